@@ -27,24 +27,24 @@ def generate_eutran_vector(key, op_c, amf, sqn, plmn):
     CryptoLogger.debug("Generating EUTRAN Vectors")
 
     key = key.encode('utf-8')
-    CryptoLogger.debug("Input K:  " + str(key))
+    CryptoLogger.debug("Input K:  %s", key)
     key = binascii.unhexlify(key)
     
     op_c = op_c.encode('utf-8')
-    CryptoLogger.debug("Input OPc:  " + str(op_c))
+    CryptoLogger.debug("Input OPc:  %s", op_c)
     op_c = binascii.unhexlify(op_c)
     
     amf = str(amf)
     amf = amf.encode('utf-8')
     amf = binascii.unhexlify(amf)
-    CryptoLogger.debug("Input AMF: " + str(amf))
+    CryptoLogger.debug("Input AMF: %s", amf)
     
     sqn = int(sqn)
-    CryptoLogger.debug("Input SQN: " + str(sqn))
+    CryptoLogger.debug("Input SQN: %s", sqn)
 
     plmn = plmn.encode('utf-8')
     plmn = binascii.unhexlify(plmn)
-    CryptoLogger.debug("Input PLMN: " + str(plmn))
+    CryptoLogger.debug("Input PLMN: %s", plmn)
     
 
 
@@ -56,42 +56,42 @@ def generate_eutran_vector(key, op_c, amf, sqn, plmn):
     CryptoLogger.debug("Successfully ran crypto.generate_eutran_vector")
     rand = binascii.hexlify(rand).decode('utf-8')
 
-    CryptoLogger.debug("output rand: " + str(rand))
+    CryptoLogger.debug("output rand: %s", rand)
     xres = binascii.hexlify(xres).decode('utf-8')
-    CryptoLogger.debug("output xres: " + str(xres))
+    CryptoLogger.debug("output xres: %s", xres)
     autn = binascii.hexlify(autn).decode('utf-8')
-    CryptoLogger.debug("output autn: " + str(autn))
+    CryptoLogger.debug("output autn: %s", autn)
     kasme = binascii.hexlify(kasme).decode('utf-8')
-    CryptoLogger.debug("output kasme: " + str(kasme))
+    CryptoLogger.debug("output kasme: %s", kasme)
     CryptoLogger.debug("Generated EUTRAN vectors")
-    CryptoLogger.debug("Generated  RAND: " + str(rand))
-    CryptoLogger.debug("Generated  XRES: " + str(xres))
-    CryptoLogger.debug("Generated  AUTN: " + str(autn))
-    CryptoLogger.debug("Generated KASME: " + str(kasme))
+    CryptoLogger.debug("Generated  RAND: %s", rand)
+    CryptoLogger.debug("Generated  XRES: %s", xres)
+    CryptoLogger.debug("Generated  AUTN: %s", autn)
+    CryptoLogger.debug("Generated KASME: %s", kasme)
     CryptoLogger.debug("Successfully an S6a_crypt.generate_eutran_vector")
     return (rand, xres, autn, kasme)
  
 def generate_maa_vector(key, op_c, amf, sqn, plmn):
     CryptoLogger.debug("Generating Multimedia Authentication Vector")
     key = key.encode('utf-8')
-    CryptoLogger.debug("Input K:  " + str(key))
+    CryptoLogger.debug("Input K:  %s", key)
     key = binascii.unhexlify(key)
     
     op_c = op_c.encode('utf-8')
-    CryptoLogger.debug("Input OPc:  " + str(op_c))
+    CryptoLogger.debug("Input OPc:  %s", op_c)
     op_c = binascii.unhexlify(op_c)
     
     amf = str(amf)
     amf = amf.encode('utf-8')
     amf = binascii.unhexlify(amf)
-    CryptoLogger.debug("Input AMF: " + str(amf))
+    CryptoLogger.debug("Input AMF: %s", amf)
     
     sqn = int(sqn)
-    CryptoLogger.debug("Input SQN: " + str(sqn))
+    CryptoLogger.debug("Input SQN: %s", sqn)
 
     plmn = plmn.encode('utf-8')
     plmn = binascii.unhexlify(plmn)
-    CryptoLogger.debug("Input PLMN: " + str(plmn))
+    CryptoLogger.debug("Input PLMN: %s", plmn)
     
 
     crypto_obj = Milenage(amf)
@@ -120,20 +120,20 @@ def generate_maa_vector(key, op_c, amf, sqn, plmn):
 def generate_2g3g_vector(key, op_c, amf, sqn, algo):
     CryptoLogger.debug("Generating 2G/3G Authentication Vector")
     key = key.encode('utf-8')
-    CryptoLogger.debug("Input K:  " + str(key))
+    CryptoLogger.debug("Input K:  %s", key)
     key = binascii.unhexlify(key)
 
     op_c = op_c.encode('utf-8')
-    CryptoLogger.debug("Input OPc:  " + str(op_c))
+    CryptoLogger.debug("Input OPc:  %s", op_c)
     op_c = binascii.unhexlify(op_c)
 
     amf = str(amf)
     amf = amf.encode('utf-8')
     amf = binascii.unhexlify(amf)
-    CryptoLogger.debug("Input AMF: " + str(amf))
+    CryptoLogger.debug("Input AMF: %s", amf)
 
     sqn = int(sqn)
-    CryptoLogger.debug("Input SQN: " + str(sqn))
+    CryptoLogger.debug("Input SQN: %s", sqn)
 
     kc = None
     sres = None
@@ -167,24 +167,24 @@ def generate_2g3g_vector(key, op_c, amf, sqn, algo):
 def generate_eap_aka_vector(key, op_c, amf, sqn, plmn):
     CryptoLogger.debug("Generating EAP-AKA Vector")
     key = key.encode('utf-8')
-    CryptoLogger.debug("Input K:  " + str(key))
+    CryptoLogger.debug("Input K:  %s", key)
     key = binascii.unhexlify(key)
     
     op_c = op_c.encode('utf-8')
-    CryptoLogger.debug("Input OPc:  " + str(op_c))
+    CryptoLogger.debug("Input OPc:  %s", op_c)
     op_c = binascii.unhexlify(op_c)
     
     amf = str(amf)
     amf = amf.encode('utf-8')
     amf = binascii.unhexlify(amf)
-    CryptoLogger.debug("Input AMF: " + str(amf))
+    CryptoLogger.debug("Input AMF: %s", amf)
     
     sqn = int(sqn)
-    CryptoLogger.debug("Input SQN: " + str(sqn))
+    CryptoLogger.debug("Input SQN: %s", sqn)
 
     plmn = plmn.encode('utf-8')
     plmn = binascii.unhexlify(plmn)
-    CryptoLogger.debug("Input PLMN: " + str(plmn))
+    CryptoLogger.debug("Input PLMN: %s", plmn)
     
     crypto_obj = Milenage(amf)
 
@@ -193,32 +193,32 @@ def generate_eap_aka_vector(key, op_c, amf, sqn, plmn):
 def generate_resync_s6a(key, op_c, amf, auts, rand):
     CryptoLogger.debug("Generating correct SQN value from AUTS")
 
-    CryptoLogger.debug("\tInput RAND: " + str(rand))
+    CryptoLogger.debug("\tInput RAND: %s", rand)
 
     key = key.encode('utf-8')
-    CryptoLogger.debug("\tInput K:  " + str(key))
+    CryptoLogger.debug("\tInput K:  %s", key)
     key = binascii.unhexlify(key)
     
     op_c = op_c.encode('utf-8')
-    CryptoLogger.debug("\tInput OPc:  " + str(op_c))
+    CryptoLogger.debug("\tInput OPc:  %s", op_c)
     op_c = binascii.unhexlify(op_c)
 
     auts = auts.encode('utf-8')
-    CryptoLogger.debug("\tInput AUTS: " + str(auts))
+    CryptoLogger.debug("\tInput AUTS: %s", auts)
     auts = binascii.unhexlify(auts)
 
     amf = str(amf)
     amf = amf.encode('utf-8')
     amf = binascii.unhexlify(amf)
-    CryptoLogger.debug("\tInput AMF: " + str(amf))
+    CryptoLogger.debug("\tInput AMF: %s", amf)
 
     #Generate Resync
     crypto_obj = Milenage(amf)
     sqn_ms_int, mac_s = crypto_obj.generate_resync(auts, key, op_c, rand)
-    CryptoLogger.debug("SQN should be: " + str(sqn_ms_int))
+    CryptoLogger.debug("SQN should be: %s", sqn_ms_int)
     CryptoLogger.debug("Successfully generated resync")
-    CryptoLogger.debug("Generated  sqn_ms_int: " + str(sqn_ms_int))
-    CryptoLogger.debug("Generated  mac_s: " + str(mac_s))    
+    CryptoLogger.debug("Generated  sqn_ms_int: %s", sqn_ms_int)
+    CryptoLogger.debug("Generated  mac_s: %s", mac_s)    
     return(sqn_ms_int, mac_s)
 
 def generate_opc(key, op):
@@ -24,6 +24,9 @@ class InboundData(BaseModel):
     LocalPort: Optional[str] = ""
     InitialReceiveTimestamp: int
     InboundHex: str
+    StageTimestamps: Optional[dict] = None
+    TraceId: Optional[str] = None
+    SpanId: Optional[str] = None
 
     def update(self, **updatedData):
         for modelField, modelValue in updatedData.items():
@@ -34,6 +37,9 @@ class OutboundData(BaseModel):
     DestinationPort: str
     InitialReceiveTimestamp: int
     OutboundHex: str
+    StageTimestamps: Optional[dict] = None
+    TraceId: Optional[str] = None
+    SpanId: Optional[str] = None
 
     def update(self, **updatedData):
         for modelField, modelValue in updatedData.items():
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from sqlalchemy import Column, Integer, String, MetaData, Table, Boolean, ForeignKey, select, UniqueConstraint, DateTime, BigInteger, Text, DateTime, Float
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert, delete, text, and_, or_
 from sqlalchemy.engine.reflection import Inspector
 from sqlalchemy.sql import desc, func
 from sqlalchemy_utils import database_exists, create_database
@@ -19,10 +19,18 @@ import pprint
 import S6a_crypt
 from gsup.protocol.ipa_peer import IPAPeerRole
 from messaging import RedisMessaging
+from tracing import Tracer
+from locationBuffer import LocationUpdateBuffer
+from readReplicas import ReadReplicas
+from sessionStore import GxSessionStore
 import yaml
 import json
 import socket
 import traceback
+import threading
+import atexit
+from collections import deque
+from contextlib import contextmanager
 
 try:
     with open("../config.yaml", 'r') as stream:
@@ -32,6 +40,8 @@ except:
         config = (yaml.safe_load(stream))
 
 Base = declarative_base()
+# Sessions are created from one factory, bound to the engine of the Database instance using them (see Database.sessionScope).
+sessionFactory = sessionmaker()
 class APN(Base):
     __tablename__ = 'apn'
     apn_id = Column(Integer, primary_key=True, doc='Unique ID of APN')
@@ -100,10 +110,11 @@ class SUBSCRIBER(Base):
     roaming_enabled = Column(Boolean, default=1, doc='Whether or not to enable roaming on this subscriber')
     roaming_rule_list = Column(String(512), doc='Comma separated list of roaming rules applicable to this subscriber')
     subscribed_rau_tau_timer = Column(Integer, default=300, doc='Subscribed periodic TAU/RAU timer value in seconds')
-    serving_mme = Column(String(512), doc='MME serving this subscriber')
+    serving_mme = Column(String(512), index=True, doc='MME serving this subscriber')
     serving_mme_timestamp = Column(DateTime, doc='Timestamp of attach to MME')
     serving_mme_realm = Column(String(512), doc='Realm of serving mme')
     serving_mme_peer = Column(String(512), doc='Diameter peer used to reach MME then ; then the HSS the Diameter peer is connected to')
+    serving_hss = Column(String(512), index=True, doc='HSS the Diameter peer used to reach MME is connected to, derived from serving_mme_peer')
     serving_msc = Column(String(512), doc='MSC serving this subscriber')
     serving_msc_timestamp = Column(DateTime, doc='Timestamp of attach to MSC')
     serving_vlr = Column(String(512), doc='VLR serving this subscriber')
@@ -138,15 +149,16 @@ class SUBSCRIBER_ROUTING(Base):
 class SERVING_APN(Base):
     __tablename__ = 'serving_apn'
     serving_apn_id = Column(Integer, primary_key=True, doc='Unique ID of SERVING_APN')
-    subscriber_id = Column(Integer, ForeignKey('subscriber.subscriber_id', ondelete='CASCADE'), doc='subscriber_id of the served subscriber')
+    subscriber_id = Column(Integer, ForeignKey('subscriber.subscriber_id', ondelete='CASCADE'), index=True, doc='subscriber_id of the served subscriber')
     apn = Column(Integer, ForeignKey('apn.apn_id', ondelete='CASCADE'), doc='apn_id of the APN served')
-    pcrf_session_id = Column(String(100), doc='Session ID from the PCRF')
-    subscriber_routing = Column(String(100), doc='IP Address allocated to the UE')
+    pcrf_session_id = Column(String(100), index=True, doc='Session ID from the PCRF')
+    subscriber_routing = Column(String(100), index=True, doc='IP Address allocated to the UE')
     ip_version = Column(Integer, default=0, doc=APN.ip_version.doc)
     serving_pgw = Column(String(512), doc='PGW serving this subscriber')
     serving_pgw_timestamp = Column(DateTime, doc='Timestamp of attach to PGW')
     serving_pgw_realm = Column(String(512), doc='Realm of serving PGW')
     serving_pgw_peer = Column(String(512), doc='Diameter peer used to reach PGW')
+    serving_pcrf = Column(String(512), index=True, doc='PCRF the Diameter peer used to reach PGW is connected to, derived from serving_pgw_peer')
     last_modified = Column(String(100), default=datetime.datetime.now(tz=timezone.utc), doc='Timestamp of last modification')
     operation_logs = relationship("SERVING_APN_OPERATION_LOG", back_populates="serving_apn")
 
@@ -158,9 +170,9 @@ class IMS_SUBSCRIBER(Base):
     msisdn_list = Column(String(1200), doc='Comma Separated list of additional MSISDNs for Subscriber')
     imsi = Column(String(18), unique=False, doc=SUBSCRIBER.imsi.doc)
     ifc_path = Column(String(512), doc='Path to template file for the Initial Filter Criteria')
-    pcscf = Column(String(512), doc='Proxy-CSCF serving this subscriber')
+    pcscf = Column(String(512), index=True, doc='Proxy-CSCF serving this subscriber')
     pcscf_realm = Column(String(512), doc='Realm of PCSCF')
-    pcscf_active_session = Column(String(512), doc='Session Id for the PCSCF when in a call')
+    pcscf_active_session = Column(String(512), index=True, doc='Session Id for the PCSCF when in a call')
     pcscf_timestamp = Column(DateTime, doc='Timestamp of last ue attach to PCSCF')
     pcscf_peer = Column(String(512), doc='Diameter peer used to reach PCSCF')
     # Conditional column definition based on the database type
@@ -174,6 +186,7 @@ class IMS_SUBSCRIBER(Base):
     scscf_timestamp = Column(DateTime, doc='Timestamp of last ue attach to SCSCF')
     scscf_realm = Column(String(512), doc='Realm of SCSCF')
     scscf_peer = Column(String(512), doc='Diameter peer used to reach SCSCF')
+    scscf_hss = Column(String(512), index=True, doc='HSS the Diameter peer used to reach SCSCF is connected to, derived from scscf_peer')
     sh_template_path = Column(String(512), doc='Path to template file for the Sh Profile')
     last_modified = Column(String(100), default=datetime.datetime.now(tz=timezone.utc), doc='Timestamp of last modification')
     operation_logs = relationship("IMS_SUBSCRIBER_OPERATION_LOG", back_populates="ims_subscriber")
@@ -237,7 +250,7 @@ class CHARGING_RULE(Base):
 class TFT(Base):
     __tablename__ = 'tft'
     tft_id = Column(Integer, primary_key = True, doc='Unique ID of CHARGING_RULE entry')
-    tft_group_id = Column(Integer, nullable=False, doc=CHARGING_RULE.tft_group_id.doc)
+    tft_group_id = Column(Integer, nullable=False, index=True, doc=CHARGING_RULE.tft_group_id.doc)
     tft_string = Column(String(100), nullable=False, doc='IPFilterRules as defined in [RFC 6733] taking the format: action dir proto from src to dst')
     direction = Column(Integer, nullable=False, doc='Traffic Direction: 0- Unspecified, 1 - Downlink, 2 - Uplink, 3 - Bidirectional')
     last_modified = Column(String(100), default=datetime.datetime.now(tz=timezone.utc), doc='Timestamp of last modification')
@@ -246,7 +259,7 @@ class TFT(Base):
 class EIR(Base):
     __tablename__ = 'eir'
     eir_id = Column(Integer, primary_key = True, doc='Unique ID of EIR entry')
-    imei = Column(String(60), doc='Exact IMEI or Regex to match IMEI (Depending on regex_mode value)')
+    imei = Column(String(60), index=True, doc='Exact IMEI or Regex to match IMEI (Depending on regex_mode value)')
     imsi = Column(String(60), doc='Exact IMSI or Regex to match IMSI (Depending on regex_mode value)')
     regex_mode = Column(Integer, default=1, doc='0 - Exact Match mode, 1 - Regex Mode')
     match_response_code = Column(Integer, doc='0 - Whitelist, 1 - Blacklist, 2 - Greylist')
@@ -275,11 +288,11 @@ class OPERATION_LOG_BASE(Base):
     __tablename__ = 'operation_log'
     id = Column(Integer, primary_key=True)
     item_id = Column(Integer, nullable=False)
-    operation_id = Column(String(36), nullable=False)
+    operation_id = Column(String(36), nullable=False, index=True)
     operation = Column(String(10))
     changes = Column(Text)
     last_modified = Column(String(100), default=datetime.datetime.now(tz=timezone.utc))
-    timestamp = Column(DateTime, default=func.now())
+    timestamp = Column(DateTime, default=func.now(), index=True)
     table_name = Column('table_name', String(255))
     __mapper_args__ = {'polymorphic_on': table_name}
 
@@ -353,10 +366,33 @@ class SUBSCRIBER_ATTRIBUTES_OPERATION_LOG(OPERATION_LOG_BASE):
     subscriber_attributes = relationship("SUBSCRIBER_ATTRIBUTES", back_populates="operation_logs")
     subscriber_attributes_id = Column(Integer, ForeignKey('subscriber_attributes.subscriber_attributes_id'))
 
+# Serving node peers are stored as '<diameter peer>;<OriginHost of the node the peer is connected to>'.
+# The node is kept in its own indexed column on every ORM write, so locally served subscribers can be filtered in SQL.
+servingNodeColumns = {SUBSCRIBER: ('serving_mme_peer', 'serving_hss'),
+                      IMS_SUBSCRIBER: ('scscf_peer', 'scscf_hss'),
+                      SERVING_APN: ('serving_pgw_peer', 'serving_pcrf')}
+
+def getPeerNode(peer) -> Optional[str]:
+    """
+    Returns the node a serving peer is connected to, or None.
+    """
+    try:
+        return str(peer).split(';')[1] or None
+    except IndexError:
+        return None
+
+def setServingNode(mapper, connection, target):
+    peerColumn, nodeColumn = servingNodeColumns[type(target)]
+    setattr(target, nodeColumn, getPeerNode(getattr(target, peerColumn)) if getattr(target, peerColumn) else None)
+
+for servingNodeModel in servingNodeColumns:
+    event.listen(servingNodeModel, 'before_insert', setServingNode)
+    event.listen(servingNodeModel, 'before_update', setServingNode)
+
 
 class Database:
 
-    def __init__(self, logTool, redisMessaging=None):
+    def __init__(self, logTool, redisMessaging=None, replicaUrls=None):
         try:
             with open("../config.yaml", 'r') as stream:
                 self.config = (yaml.safe_load(stream))
@@ -374,6 +410,8 @@ class Database:
         self.georedEnabled = self.config.get('geored', {}).get('enabled', True)
         self.eirNoMatchResponse = int(self.config.get('eir', {}).get('no_match_response', 2))
         self.eirStoreOffnetImsi = self.config.get('eir', {}).get('store_offnet_imsi', False)
+        # Rows prefetched for the batch of diameter requests currently being processed, see prefetchSubscribers().
+        self.prefetchCache = {'subscriber': {}, 'apn': {}}
 
         self.logTool = logTool
         if redisMessaging:
@@ -393,6 +431,8 @@ class Database:
             raise RuntimeError(f'Invalid database.db_type set "{db_type}"')
 
         self.hostname = socket.gethostname()        
+        # Database only forwards the current trace to geored and webhooks, its spans are recorded by the services.
+        self.tracer = Tracer(config=self.config, serviceName='database', recordSpans=False)
         
         self.engine = create_engine(
             db_string, 
@@ -401,6 +441,32 @@ class Database:
             pool_size=self.config['logging'].get('sqlalchemy_pool_size', 30),
             max_overflow=self.config['logging'].get('sqlalchemy_max_overflow', 0))
 
+        # Connections checked out for longer than this many seconds are counted as leaked.
+        self.poolLeakThreshold = float(self.config.get('database', {}).get('pool_leak_threshold', 30))
+        self.poolCheckouts = {}
+        event.listen(self.engine, 'checkout', self.handlePoolCheckout)
+        event.listen(self.engine, 'checkin', self.handlePoolCheckin)
+
+        # Read only listings, exports and statistics (see readSessionScope) may be served by read replicas within the staleness policy.
+        self.readReplicas = ReadReplicas(self.engine, self.config, self.logTool, self.redisMessaging, self.hostname, replicaUrls=replicaUrls)
+
+        # The operation log is appended to without counting or recycling rows. Its id is the sequence, and it is trimmed to
+        # the newest operationLogMaxRecords changes in the background. With write behind, entries are queued when the change
+        # is committed and inserted in batches.
+        self.operationLogMaxRecords = int(self.config.get('database', {}).get('operation_log_max_records', 1000))
+        self.operationLogTrimInterval = float(self.config.get('database', {}).get('operation_log_trim_interval', 60))
+        self.operationLogWriteBehind = self.config.get('database', {}).get('operation_log_write_behind', False)
+        self.operationLogFlushInterval = float(self.config.get('database', {}).get('operation_log_flush_interval', 1))
+        self.operationLogQueue = deque(maxlen=self.operationLogMaxRecords)
+        self.operationLogLock = threading.Lock()
+        self.operationLogThread = None
+        self.operationLogPid = None
+
+        # Serving node refreshes and location updates made while answering diameter requests may be deferred and written in the background.
+        self.locationBuffer = LocationUpdateBuffer(self, self.logTool, self.redisMessaging) if self.config.get('database', {}).get('location_write_behind', False) else None
+        # Gx / Rx binding state (SERVING_APN) may be kept in redis, and persisted to the database in the background.
+        self.sessionStore = GxSessionStore(self, self.logTool, self.redisMessaging) if self.config.get('database', {}).get('session_store_enabled', False) else None
+
         # Create database if it does not exist.
         if not database_exists(self.engine.url):
             self.logTool.log(service='Database', level='debug', message="Creating database", redisClient=self.redisMessaging)
@@ -421,10 +487,10 @@ class Database:
         inspector = Inspector.from_engine(self.engine)
         for table_name in Base.metadata.tables.keys():
             if table_name not in inspector.get_table_names():
-                self.logTool.log(service='Database', level='debug', message=f"Creating table {table_name}", redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Creating table %s", messageArgs=(table_name,), redisClient=self.redisMessaging)
                 Base.metadata.tables[table_name].create(bind=self.engine)
             else:
-                self.logTool.log(service='Database', level='debug', message=f"Table {table_name} already exists", redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Table %s already exists", messageArgs=(table_name,), redisClient=self.redisMessaging)
 
     def load_IMEI_database_into_Redis(self):
         try:
@@ -465,6 +531,90 @@ class Database:
             self.logTool.log(service='Database', level='error', message=f"Failed to load IMEI Database into Redis due to error: {traceback.format_exc()}", redisClient=self.redisMessaging)
             return
 
+    @contextmanager
+    def sessionScope(self, existingSession=None, bind=None):
+        """
+        Unit of work: yields a session which is rolled back if the block raises, and always closed, returning its connection to the pool.
+        Commits are left to the block. If existingSession is given it is yielded as-is, and left open for its owner.
+        The session is bound to the primary unless another engine is given as bind.
+        """
+        if existingSession is not None:
+            yield existingSession
+            return
+        session = sessionFactory(bind=bind or self.engine)
+        try:
+            yield session
+        except Exception as e:
+            self.safe_rollback(session)
+            raise
+        finally:
+            self.safe_close(session)
+
+    @contextmanager
+    def readSessionScope(self, existingSession=None):
+        """
+        As sessionScope, for read only queries which tolerate replication lag. The session is bound to a read replica within the
+        staleness policy, or the primary if there is none. AuC and SQN reads must always use sessionScope, as they need the latest SQN.
+        """
+        if existingSession is not None:
+            yield existingSession
+            return
+        with self.sessionScope(bind=self.getReadEngine()) as session:
+            yield session
+
+    def getReadEngine(self):
+        """
+        Returns the engine for a read which tolerates replication lag, a read replica or the primary. See ReadReplicas.
+        """
+        return self.readReplicas.getReadEngine()
+
+    def handlePoolCheckout(self, dbapiConnection, connectionRecord, connectionProxy):
+        """
+        Tracks when a pooled connection was checked out, and updates the pool metrics.
+        """
+        self.poolCheckouts[id(connectionRecord)] = time.monotonic()
+        self.sendPoolMetrics()
+
+    def handlePoolCheckin(self, dbapiConnection, connectionRecord):
+        """
+        Counts connections which were held longer than the leak threshold, and updates the pool metrics.
+        """
+        checkoutTime = self.poolCheckouts.pop(id(connectionRecord), None)
+        if checkoutTime is not None and time.monotonic() - checkoutTime > self.poolLeakThreshold:
+            self.logTool.log(service='Database', level='warning', message="[database.py] [handlePoolCheckin] Connection returned to the pool after %.1fs, exceeding the leak threshold of %ss", messageArgs=(time.monotonic() - checkoutTime, self.poolLeakThreshold), redisClient=self.redisMessaging)
+            self.redisMessaging.sendMetric(serviceName='database', metricName='prom_database_pool_leaked_count',
+                                           metricType='counter', metricAction='inc',
+                                           metricValue=1.0, metricHelp='Number of database connections held longer than the leak threshold',
+                                           metricLabels={"hostname": self.hostname},
+                                           metricExpiry=60,
+                                           usePrefix=True,
+                                           prefixHostname=self.hostname,
+                                           prefixServiceName='metric')
+        self.sendPoolMetrics()
+
+    def sendPoolMetrics(self):
+        """
+        Sends the number of checked out, overflow and currently leaked (held past the leak threshold) pool connections.
+        """
+        try:
+            now = time.monotonic()
+            poolMetrics = {
+                'prom_database_pool_checked_out': (len(self.poolCheckouts), 'Number of database connections currently checked out of the pool'),
+                'prom_database_pool_overflow': (max(self.engine.pool.overflow(), 0), 'Number of database connections open beyond the pool size'),
+                'prom_database_pool_leaked': (sum(1 for checkoutTime in list(self.poolCheckouts.values()) if now - checkoutTime > self.poolLeakThreshold), 'Number of database connections currently held longer than the leak threshold'),
+            }
+        except Exception as e:
+            return
+        for metricName, (metricValue, metricHelp) in poolMetrics.items():
+            self.redisMessaging.sendMetric(serviceName='database', metricName=metricName,
+                                           metricType='gauge', metricAction='set',
+                                           metricValue=float(metricValue), metricHelp=metricHelp,
+                                           metricLabels={"hostname": self.hostname},
+                                           metricExpiry=60,
+                                           usePrefix=True,
+                                           prefixHostname=self.hostname,
+                                           prefixServiceName='metric')
+
     def safe_rollback(self, session):
         try:
             if session.is_active:
@@ -474,8 +624,7 @@ class Database:
 
     def safe_close(self, session):
         try:
-            if session.is_active:
-                session.close()
+            session.close()
         except Exception as E:
             self.logTool.log(service='Database', level='error', message=f"Failed to run safe_close on session, error: {E}", redisClient=self.redisMessaging)
 
@@ -517,27 +666,115 @@ class Database:
 
         return {"type": "object", "title" : str(model_class.__name__), "properties": properties, "required": required}
 
-    def update_old_record(self, session, operation_log):
-        oldest_log = session.query(OPERATION_LOG_BASE).order_by(OPERATION_LOG_BASE.timestamp.asc()).first()
-        if oldest_log is not None:
-            for attr in class_mapper(oldest_log.__class__).column_attrs:
-                if attr.key != 'id' and hasattr(operation_log, attr.key):
-                    setattr(oldest_log, attr.key, getattr(operation_log, attr.key))
-            oldest_log.timestamp = datetime.datetime.now(tz=timezone.utc)
-            session.flush()
-        else:
-            raise ValueError("Unable to find record to update")
+    def startOperationLogThread(self):
+        """
+        Starts the operation log trimming (and write behind) thread, or restarts it if the process has been forked since it was started.
+        """
+        with self.operationLogLock:
+            if self.operationLogThread is not None and self.operationLogPid == os.getpid():
+                return
+            self.operationLogPid = os.getpid()
+            self.operationLogThread = threading.Thread(target=self.maintainOperationLog, name='operationLog', daemon=True)
+            self.operationLogThread.start()
+            if self.operationLogWriteBehind:
+                atexit.register(self.flushOperationLog)
+
+    def maintainOperationLog(self):
+        """
+        Writes queued operation log entries every operationLogFlushInterval (with write behind), and trims the operation log every operationLogTrimInterval.
+        """
+        lastTrimTime = 0
+        while True:
+            time.sleep(self.operationLogFlushInterval if self.operationLogWriteBehind else self.operationLogTrimInterval)
+            try:
+                self.flushOperationLog()
+                if time.monotonic() - lastTrimTime >= self.operationLogTrimInterval:
+                    self.trimOperationLog()
+                    lastTrimTime = time.monotonic()
+            except Exception as e:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [maintainOperationLog] Failed to maintain the operation log: {traceback.format_exc()}", redisClient=self.redisMessaging)
+
+    def queueOperationLog(self, session):
+        """
+        Moves operation log entries staged on a session to the write behind queue, once the session has committed.
+        """
+        operationLogEntries = session.info.pop('pendingOperationLog', [])
+        if not operationLogEntries:
+            return
+        with self.operationLogLock:
+            self.operationLogQueue.extend(operationLogEntries)
+        if self.operationLogPid != os.getpid():
+            self.startOperationLogThread()
+
+    def discardOperationLog(self, session):
+        session.info.pop('pendingOperationLog', None)
+
+    def flushOperationLog(self) -> int:
+        """
+        Inserts all queued operation log entries in one statement, returning the number written.
+        Entries which fail to insert are queued again. The queue holds at most operationLogMaxRecords entries, as older ones would be trimmed anyway.
+        """
+        with self.operationLogLock:
+            if not self.operationLogQueue:
+                return 0
+            operationLogEntries = list(self.operationLogQueue)
+            self.operationLogQueue.clear()
+
+        with self.sessionScope() as session:
+            try:
+                session.execute(insert(OPERATION_LOG_BASE.__table__), operationLogEntries)
+                session.commit()
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [flushOperationLog] Failed to write {len(operationLogEntries)} operation log entries, error: {E}", redisClient=self.redisMessaging)
+                with self.operationLogLock:
+                    queuedEntries = list(self.operationLogQueue)
+                    self.operationLogQueue.clear()
+                    self.operationLogQueue.extend(operationLogEntries + queuedEntries)
+                return 0
+        return len(operationLogEntries)
+
+    def trimOperationLog(self) -> int:
+        """
+        Deletes all but the newest operationLogMaxRecords operation log entries, returning the number deleted.
+        """
+        with self.sessionScope() as session:
+            try:
+                oldestKeptId = session.query(OPERATION_LOG_BASE.id).order_by(desc(OPERATION_LOG_BASE.id)).offset(self.operationLogMaxRecords - 1).limit(1).scalar()
+                if oldestKeptId is None:
+                    return 0
+                trimmedCount = session.execute(delete(OPERATION_LOG_BASE.__table__).where(OPERATION_LOG_BASE.id < oldestKeptId)).rowcount
+                session.commit()
+                self.logTool.log(service='Database', level='debug', message="[database.py] [trimOperationLog] Trimmed %s operation log entries", messageArgs=(trimmedCount,), redisClient=self.redisMessaging)
+                return trimmedCount
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [trimOperationLog] Failed to trim the operation log, error: {E}", redisClient=self.redisMessaging)
+                raise ValueError(E)
 
     def log_change(self, session, item_id, operation, changes, table_name, operation_id, generated_id=None):
         # We don't want to log rollback operations
         if session.info.get("operation") == 'ROLLBACK':
             return
-        max_records = 1000
-        count = session.query(OPERATION_LOG_BASE).count()
 
         # Combine all changes into a single string with their types
         changes_string = '\r\n\r\n'.join(f"{column_name}: [{type(old_value).__name__}] {old_value} ----> [{type(new_value).__name__}] {new_value}" for column_name, old_value, new_value in changes)
 
+        if self.operationLogWriteBehind:
+            # Staged on the session, and only queued for writing if the change commits.
+            if 'pendingOperationLog' not in session.info:
+                session.info['pendingOperationLog'] = []
+                event.listen(session, 'after_commit', self.queueOperationLog)
+                event.listen(session, 'after_rollback', self.discardOperationLog)
+            session.info['pendingOperationLog'].append({
+                'item_id': item_id or generated_id,
+                'operation_id': operation_id,
+                'operation': operation,
+                'last_modified': datetime.datetime.now(tz=timezone.utc),
+                'timestamp': datetime.datetime.now(tz=timezone.utc),
+                'changes': changes_string,
+                'table_name': table_name,
+            })
+            return operation_id
+
         change = OPERATION_LOG_BASE(
             item_id=item_id or generated_id,
             operation_id=operation_id,
@@ -547,17 +784,14 @@ class Database:
             table_name=table_name
         )
 
-        if count >= max_records:
-            self.update_old_record(session, change)
-        else:
-            try:
-                session.add(change)
-                session.flush()
-            except Exception as E:
-                self.logTool.log(service='Database', level='error', message="Failed to commit changelog, error: " + str(E), redisClient=self.redisMessaging)
-                self.safe_rollback(session)
-                self.safe_close(session)
-                raise ValueError(E)
+        try:
+            session.add(change)
+            session.flush()
+        except Exception as E:
+            self.logTool.log(service='Database', level='error', message="Failed to commit changelog, error: " + str(E), redisClient=self.redisMessaging)
+            raise ValueError(E)
+        if self.operationLogPid != os.getpid():
+            self.startOperationLogThread()
         return operation_id
 
 
@@ -595,11 +829,11 @@ class Database:
                     changes = []
                     for attr in class_mapper(obj.__class__).column_attrs:
                         hist = get_history(obj, attr.key)
-                        self.logTool.log(service='Database', level='debug', message=f"History {hist}", redisClient=self.redisMessaging)
+                        self.logTool.log(service='Database', level='debug', message="History %s", messageArgs=(hist,), redisClient=self.redisMessaging)
                         if hist.has_changes() and hist.added and hist.deleted:
                             old_value, new_value = hist.deleted[0], hist.added[0]
-                            self.logTool.log(service='Database', level='debug', message=f"Old Value {old_value}", redisClient=self.redisMessaging)
-                            self.logTool.log(service='Database', level='debug', message=f"New Value {new_value}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='Database', level='debug', message="Old Value %s", messageArgs=(old_value,), redisClient=self.redisMessaging)
+                            self.logTool.log(service='Database', level='debug', message="New Value %s", messageArgs=(new_value,), redisClient=self.redisMessaging)
                             changes.append((attr.key, old_value, new_value))
                             continue
 
@@ -652,317 +886,294 @@ class Database:
 
 
     def rollback_last_change(self, existingSession=None):
-        if not existingSession:
-            Base.metadata.create_all(self.engine)
-            Session = sessionmaker(bind=self.engine)
-            session = Session()
-        else:
-            session = existingSession
+        with self.sessionScope(existingSession=existingSession) as session:
 
-        try:
-            # Get the most recent operation
-            last_operation = session.query(OPERATION_LOG_BASE).order_by(desc(OPERATION_LOG_BASE.timestamp)).first()
-
-            if last_operation is None:
-                return "No operations to roll back."
-
-            rollback_messages = []
-            operation_id = str(uuid.uuid4())
-
-            target_class = self.get_class_by_tablename(Base, last_operation.table_name)
-            if not target_class:
-                return f"Error: Could not find table {last_operation.table_name}"
-
-            primary_key_col = target_class.__mapper__.primary_key[0].key
-            filter_by_kwargs = {primary_key_col: last_operation.item_id}
-            target_item = session.query(target_class).filter_by(**filter_by_kwargs).one_or_none()
-
-            if last_operation.operation == 'UPDATE':
-                if not target_item:
-                    return f"Error: Could not find item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table"
-
-                # Split the changes string into separate changes
-                changes = last_operation.changes.split('\r\n\r\n')
-                for change in changes:
-                    column_name, old_new_values = change.split(": ", 1)
-                    old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
-
-                    # Extract type and value
-                    old_type_str, old_value_repr = old_value_str[1:-1].split("] ", 1)
-                    old_value = self.str_to_type(old_type_str, old_value_repr)
-
-                    # Revert the change
-                    setattr(target_item, column_name, old_value)
-
-                rollback_message = (
-                    f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Reverted changes"
-                )
-
-            elif last_operation.operation == 'INSERT':
-                if target_item:
-                    session.delete(target_item)
-
-                rollback_message = (
-                    f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Deleted item"
-                )
-
-            elif last_operation.operation == 'DELETE':
-                # Aggregate old values of all columns into a single dictionary
-                old_values_dict = {}
-                # Split the changes string into separate changes
-                changes = last_operation.changes.split('\r\n\r\n')
-                for change in changes:
-                    column_name, old_new_values = change.split(": ", 1)
-                    old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
-
-                    # Extract type and value
-                    old_type_str, old_value_repr = old_value_str[1:].split("] ", 1)
-                    self.logTool.log(service='Database', level='error', message=f"running str_to_type for: {str(old_type_str)}, {str(old_value_repr)}", redisClient=self.redisMessaging)
-                    old_value = self.str_to_type(old_type_str, old_value_repr)
-
-                    old_values_dict[column_name] = old_value
-                self.logTool.log(service='Database', level='error', message="old_value_dict: " + str(old_values_dict), redisClient=self.redisMessaging)
-
-                if not target_item:
-                    try:
-                        # Create the target item using the aggregated old values
-                        target_item = target_class(**old_values_dict)
-                        session.add(target_item)
-                    except Exception as e:
-                        return f"Error: Failed to recreate item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table - {str(e)}"
+            try:
+                # Get the most recent operation
+                self.flushOperationLog()
+                last_operation = session.query(OPERATION_LOG_BASE).order_by(desc(OPERATION_LOG_BASE.id)).first()
+
+                if last_operation is None:
+                    return "No operations to roll back."
+
+                rollback_messages = []
+                operation_id = str(uuid.uuid4())
+
+                target_class = self.get_class_by_tablename(Base, last_operation.table_name)
+                if not target_class:
+                    return f"Error: Could not find table {last_operation.table_name}"
+
+                primary_key_col = target_class.__mapper__.primary_key[0].key
+                filter_by_kwargs = {primary_key_col: last_operation.item_id}
+                target_item = session.query(target_class).filter_by(**filter_by_kwargs).one_or_none()
+
+                if last_operation.operation == 'UPDATE':
+                    if not target_item:
+                        return f"Error: Could not find item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table"
+
+                    # Split the changes string into separate changes
+                    changes = last_operation.changes.split('\r\n\r\n')
+                    for change in changes:
+                        column_name, old_new_values = change.split(": ", 1)
+                        old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
+
+                        # Extract type and value
+                        old_type_str, old_value_repr = old_value_str[1:].split("] ", 1)
+                        old_value = self.str_to_type(old_type_str, old_value_repr)
+
+                        # Revert the change
+                        setattr(target_item, column_name, old_value)
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Reverted changes"
+                    )
+
+                elif last_operation.operation == 'INSERT':
+                    if target_item:
+                        session.delete(target_item)
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Deleted item"
+                    )
+
+                elif last_operation.operation == 'BULK_INSERT':
+                    # Summarised entry for a chunk of bulk provisioning, listing the inserted primary keys.
+                    insertedIds = [int(insertedId) for insertedId in last_operation.changes.split(" ----> ", 1)[1].split("] ", 1)[1].split(',') if insertedId]
+                    session.query(target_class).filter(target_class.__mapper__.primary_key[0].in_(insertedIds)).delete(synchronize_session=False)
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table ({len(insertedIds)} items): Deleted items"
+                    )
+
+                elif last_operation.operation == 'DELETE':
+                    # Aggregate old values of all columns into a single dictionary
+                    old_values_dict = {}
+                    # Split the changes string into separate changes
+                    changes = last_operation.changes.split('\r\n\r\n')
+                    for change in changes:
+                        column_name, old_new_values = change.split(": ", 1)
+                        old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
+
+                        # Extract type and value
+                        old_type_str, old_value_repr = old_value_str[1:].split("] ", 1)
+                        self.logTool.log(service='Database', level='error', message=f"running str_to_type for: {str(old_type_str)}, {str(old_value_repr)}", redisClient=self.redisMessaging)
+                        old_value = self.str_to_type(old_type_str, old_value_repr)
+
+                        old_values_dict[column_name] = old_value
+                    self.logTool.log(service='Database', level='error', message="old_value_dict: " + str(old_values_dict), redisClient=self.redisMessaging)
+
+                    if not target_item:
+                        try:
+                            # Create the target item using the aggregated old values
+                            target_item = target_class(**old_values_dict)
+                            session.add(target_item)
+                        except Exception as e:
+                            return f"Error: Failed to recreate item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table - {str(e)}"
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Re-inserted item"
+                    )
 
-                rollback_message = (
-                    f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Re-inserted item"
-                )
+                else:
+                    return f"Error: Unknown operation {last_operation.operation}"
 
-            else:
-                return f"Error: Unknown operation {last_operation.operation}"
+                try:
+                    session.commit()
+                except Exception as E:
+                    self.logTool.log(service='Database', level='error', message="rollback_last_change error: " + str(E), redisClient=self.redisMessaging)
+                    raise ValueError(E)
+
+                return f"Rolled back operation with operation_id: {operation_id}\n" + "\n".join(rollback_messages)
 
-            try:
-                session.commit()
-                self.safe_close(session)
             except Exception as E:
                 self.logTool.log(service='Database', level='error', message="rollback_last_change error: " + str(E), redisClient=self.redisMessaging)
-                self.safe_rollback(session)
-                self.safe_close(session)
                 raise ValueError(E)
 
-            return f"Rolled back operation with operation_id: {operation_id}\n" + "\n".join(rollback_messages)
-
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="rollback_last_change error: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
-
     def rollback_change_by_operation_id(self, operation_id, existingSession=None):
-        if not existingSession:
-            Base.metadata.create_all(self.engine)
-            Session = sessionmaker(bind=self.engine)
-            session = Session()
-        else:
-            session = existingSession
+        with self.sessionScope(existingSession=existingSession) as session:
 
-        try:
-            # Get the most recent operation
-            last_operation = session.query(OPERATION_LOG_BASE).filter(OPERATION_LOG_BASE.operation_id == operation_id).order_by(desc(OPERATION_LOG_BASE.timestamp)).first()
-
-            if last_operation is None:
-                return "No operation to roll back."
-
-            rollback_messages = []
-            operation_id = str(uuid.uuid4())
-
-            target_class = self.get_class_by_tablename(Base, last_operation.table_name)
-            if not target_class:
-                return f"Error: Could not find table {last_operation.table_name}"
-
-            primary_key_col = target_class.__mapper__.primary_key[0].key
-            filter_by_kwargs = {primary_key_col: last_operation.item_id}
-            target_item = session.query(target_class).filter_by(**filter_by_kwargs).one_or_none()
-
-            if last_operation.operation == 'UPDATE':
-                if not target_item:
-                    return f"Error: Could not find item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table"
-
-                # Split the changes string into separate changes
-                changes = last_operation.changes.split('\r\n\r\n')
-                for change in changes:
-                    column_name, old_new_values = change.split(": ", 1)
-                    old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
-
-                    # Extract type and value
-                    old_type_str, old_value_repr = old_value_str[1:-1].split("] ", 1)
-                    old_value = self.str_to_type(old_type_str, old_value_repr)
-
-                    # Revert the change
-                    setattr(target_item, column_name, old_value)
-
-                rollback_message = (
-                    f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Reverted changes"
-                )
-
-            elif last_operation.operation == 'INSERT':
-                if target_item:
-                    session.delete(target_item)
-
-                rollback_message = (
-                    f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Deleted item"
-                )
-
-            elif last_operation.operation == 'DELETE':
-                # Aggregate old values of all columns into a single dictionary
-                old_values_dict = {}
-                # Split the changes string into separate changes
-                changes = last_operation.changes.split('\r\n\r\n')
-                for change in changes:
-                    column_name, old_new_values = change.split(": ", 1)
-                    old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
-
-                    # Extract type and value
-                    old_type_str, old_value_repr = old_value_str[1:].split("] ", 1)
-                    self.logTool.log(service='Database', level='error', message=f"running str_to_type for: {str(old_type_str)}, {str(old_value_repr)}", redisClient=self.redisMessaging)
-                    old_value = self.str_to_type(old_type_str, old_value_repr)
-
-                    old_values_dict[column_name] = old_value
-                self.logTool.log(service='Database', level='error', message="old_value_dict: " + str(old_values_dict), redisClient=self.redisMessaging)
-
-                if not target_item:
-                    try:
-                        # Create the target item using the aggregated old values
-                        target_item = target_class(**old_values_dict)
-                        session.add(target_item)
-                    except Exception as e:
-                        return f"Error: Failed to recreate item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table - {str(e)}"
+            try:
+                # Get the most recent operation
+                self.flushOperationLog()
+                last_operation = session.query(OPERATION_LOG_BASE).filter(OPERATION_LOG_BASE.operation_id == operation_id).order_by(desc(OPERATION_LOG_BASE.id)).first()
+
+                if last_operation is None:
+                    return "No operation to roll back."
+
+                rollback_messages = []
+                operation_id = str(uuid.uuid4())
+
+                target_class = self.get_class_by_tablename(Base, last_operation.table_name)
+                if not target_class:
+                    return f"Error: Could not find table {last_operation.table_name}"
+
+                primary_key_col = target_class.__mapper__.primary_key[0].key
+                filter_by_kwargs = {primary_key_col: last_operation.item_id}
+                target_item = session.query(target_class).filter_by(**filter_by_kwargs).one_or_none()
+
+                if last_operation.operation == 'UPDATE':
+                    if not target_item:
+                        return f"Error: Could not find item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table"
+
+                    # Split the changes string into separate changes
+                    changes = last_operation.changes.split('\r\n\r\n')
+                    for change in changes:
+                        column_name, old_new_values = change.split(": ", 1)
+                        old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
+
+                        # Extract type and value
+                        old_type_str, old_value_repr = old_value_str[1:].split("] ", 1)
+                        old_value = self.str_to_type(old_type_str, old_value_repr)
+
+                        # Revert the change
+                        setattr(target_item, column_name, old_value)
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Reverted changes"
+                    )
+
+                elif last_operation.operation == 'INSERT':
+                    if target_item:
+                        session.delete(target_item)
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Deleted item"
+                    )
+
+                elif last_operation.operation == 'BULK_INSERT':
+                    # Summarised entry for a chunk of bulk provisioning, listing the inserted primary keys.
+                    insertedIds = [int(insertedId) for insertedId in last_operation.changes.split(" ----> ", 1)[1].split("] ", 1)[1].split(',') if insertedId]
+                    session.query(target_class).filter(target_class.__mapper__.primary_key[0].in_(insertedIds)).delete(synchronize_session=False)
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table ({len(insertedIds)} items): Deleted items"
+                    )
+
+                elif last_operation.operation == 'DELETE':
+                    # Aggregate old values of all columns into a single dictionary
+                    old_values_dict = {}
+                    # Split the changes string into separate changes
+                    changes = last_operation.changes.split('\r\n\r\n')
+                    for change in changes:
+                        column_name, old_new_values = change.split(": ", 1)
+                        old_value_str, new_value_str = old_new_values.split(" ----> ", 1)
+
+                        # Extract type and value
+                        old_type_str, old_value_repr = old_value_str[1:].split("] ", 1)
+                        self.logTool.log(service='Database', level='error', message=f"running str_to_type for: {str(old_type_str)}, {str(old_value_repr)}", redisClient=self.redisMessaging)
+                        old_value = self.str_to_type(old_type_str, old_value_repr)
+
+                        old_values_dict[column_name] = old_value
+                    self.logTool.log(service='Database', level='error', message="old_value_dict: " + str(old_values_dict), redisClient=self.redisMessaging)
+
+                    if not target_item:
+                        try:
+                            # Create the target item using the aggregated old values
+                            target_item = target_class(**old_values_dict)
+                            session.add(target_item)
+                        except Exception as e:
+                            return f"Error: Failed to recreate item with ID {last_operation.item_id} in {last_operation.table_name.upper()} table - {str(e)}"
+
+                    rollback_message = (
+                        f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Re-inserted item"
+                    )
 
-                rollback_message = (
-                    f"Rolled back '{last_operation.operation}' operation on {last_operation.table_name.upper()} table (ID: {last_operation.item_id}): Re-inserted item"
-                )
+                else:
+                    return f"Error: Unknown operation {last_operation.operation}"
 
-            else:
-                return f"Error: Unknown operation {last_operation.operation}"
+                try:
+                    session.commit()
+                except Exception as E:
+                    self.logTool.log(service='Database', level='error', message="rollback_last_change error: " + str(E), redisClient=self.redisMessaging)
+                    raise ValueError(E)
+
+                return f"Rolled back operation with operation_id: {operation_id}\n" + "\n".join(rollback_messages)
 
-            try:
-                session.commit()
-                self.safe_close(session)
             except Exception as E:
                 self.logTool.log(service='Database', level='error', message="rollback_last_change error: " + str(E), redisClient=self.redisMessaging)
-                self.safe_rollback(session)
-                self.safe_close(session)
                 raise ValueError(E)
 
-            return f"Rolled back operation with operation_id: {operation_id}\n" + "\n".join(rollback_messages)
-
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="rollback_last_change error: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
-
     def get_all_operation_logs(self, page=0, page_size=100, existingSession=None):
-        if not existingSession:
-            Base.metadata.create_all(self.engine)
-            Session = sessionmaker(bind=self.engine)
-            session = Session()
-        else:
-            session = existingSession
+        with self.sessionScope(existingSession=existingSession) as session:
 
-        try:
-            # Get all distinct operation_ids ordered by max timestamp (descending order)
-            operation_ids = session.query(OPERATION_LOG_BASE.operation_id).group_by(OPERATION_LOG_BASE.operation_id).order_by(desc(func.max(OPERATION_LOG_BASE.timestamp)))
+            try:
+                # Get all distinct operation_ids ordered by their latest entry (descending order)
+                operation_ids = session.query(OPERATION_LOG_BASE.operation_id).group_by(OPERATION_LOG_BASE.operation_id).order_by(desc(func.max(OPERATION_LOG_BASE.id)))
 
-            operation_ids = operation_ids.limit(page_size).offset(page * page_size)
+                operation_ids = operation_ids.limit(page_size).offset(page * page_size)
 
-            operation_ids = operation_ids.all()
+                operation_ids = operation_ids.all()
 
-            all_operations = []
+                all_operations = []
 
-            for operation_id in operation_ids:
-                operation_log = session.query(OPERATION_LOG_BASE).filter(OPERATION_LOG_BASE.operation_id == operation_id[0]).order_by(OPERATION_LOG_BASE.id.asc()).first()
+                for operation_id in operation_ids:
+                    operation_log = session.query(OPERATION_LOG_BASE).filter(OPERATION_LOG_BASE.operation_id == operation_id[0]).order_by(OPERATION_LOG_BASE.id.asc()).first()
 
-                if operation_log is not None:
-                    # Convert the object to dictionary
-                    obj_dict = operation_log.__dict__
-                    obj_dict.pop('_sa_instance_state')
-                    sanitized_obj_dict = self.Sanitize_Datetime(obj_dict)
-                    all_operations.append(sanitized_obj_dict)
+                    if operation_log is not None:
+                        # Convert the object to dictionary
+                        obj_dict = operation_log.__dict__
+                        obj_dict.pop('_sa_instance_state')
+                        sanitized_obj_dict = self.Sanitize_Datetime(obj_dict)
+                        all_operations.append(sanitized_obj_dict)
 
-            self.safe_close(session)
-            return all_operations
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"get_all_operation_logs error: {E}", redisClient=self.redisMessaging)
-            self.logTool.log(service='Database', level='error', message=E, redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
+                return all_operations
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"get_all_operation_logs error: {E}", redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='error', message=E, redisClient=self.redisMessaging)
+                raise ValueError(E)
 
     def get_all_operation_logs_by_table(self, table_name, page=0, page_size=100, existingSession=None):
-        if not existingSession:
-            Base.metadata.create_all(self.engine)
-            Session = sessionmaker(bind=self.engine)
-            session = Session()
-        else:
-            session = existingSession
+        with self.sessionScope(existingSession=existingSession) as session:
 
-        try:
-            # Get all distinct operation_ids ordered by max timestamp (descending order)
-            operation_ids = session.query(OPERATION_LOG_BASE.operation_id).filter(OPERATION_LOG_BASE.table_name == table_name).group_by(OPERATION_LOG_BASE.operation_id).order_by(desc(func.max(OPERATION_LOG_BASE.timestamp)))
+            try:
+                # Get all distinct operation_ids ordered by their latest entry (descending order)
+                operation_ids = session.query(OPERATION_LOG_BASE.operation_id).filter(OPERATION_LOG_BASE.table_name == table_name).group_by(OPERATION_LOG_BASE.operation_id).order_by(desc(func.max(OPERATION_LOG_BASE.id)))
 
-            operation_ids = operation_ids.limit(page_size).offset(page * page_size)
+                operation_ids = operation_ids.limit(page_size).offset(page * page_size)
 
-            operation_ids = operation_ids.all()
+                operation_ids = operation_ids.all()
 
-            all_operations = []
+                all_operations = []
 
-            for operation_id in operation_ids:
-                operation_log = session.query(OPERATION_LOG_BASE).filter(OPERATION_LOG_BASE.operation_id == operation_id[0]).order_by(OPERATION_LOG_BASE.id.asc()).first()
+                for operation_id in operation_ids:
+                    operation_log = session.query(OPERATION_LOG_BASE).filter(OPERATION_LOG_BASE.operation_id == operation_id[0]).order_by(OPERATION_LOG_BASE.id.asc()).first()
 
-                if operation_log is not None:
-                    # Convert the object to dictionary
-                    obj_dict = operation_log.__dict__
-                    obj_dict.pop('_sa_instance_state')
-                    sanitized_obj_dict = self.Sanitize_Datetime(obj_dict)
-                    all_operations.append(sanitized_obj_dict)
+                    if operation_log is not None:
+                        # Convert the object to dictionary
+                        obj_dict = operation_log.__dict__
+                        obj_dict.pop('_sa_instance_state')
+                        sanitized_obj_dict = self.Sanitize_Datetime(obj_dict)
+                        all_operations.append(sanitized_obj_dict)
 
-            self.safe_close(session)
-            return all_operations
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"get_all_operation_logs_by_table error: {E}", redisClient=self.redisMessaging)
-            self.logTool.log(service='Database', level='error', message=E, redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
+                return all_operations
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"get_all_operation_logs_by_table error: {E}", redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='error', message=E, redisClient=self.redisMessaging)
+                raise ValueError(E)
 
     def get_last_operation_log(self, existingSession=None):
-        if not existingSession:
-            Base.metadata.create_all(self.engine)
-            Session = sessionmaker(bind=self.engine)
-            session = Session()
-        else:
-            session = existingSession
+        with self.sessionScope(existingSession=existingSession) as session:
 
-        try:
-            # Get the top 100 records ordered by timestamp (descending order)
-            top_100_records = session.query(OPERATION_LOG_BASE).order_by(desc(OPERATION_LOG_BASE.timestamp)).limit(100)
+            try:
+                # Get the top 100 records ordered by sequence (descending order)
+                self.flushOperationLog()
+                top_100_records = session.query(OPERATION_LOG_BASE).order_by(desc(OPERATION_LOG_BASE.id)).limit(100)
 
-            # Get the most recent operation_id
-            most_recent_operation_log = top_100_records.first()
+                # Get the most recent operation_id
+                most_recent_operation_log = top_100_records.first()
 
-            # Convert the object to dictionary
-            if most_recent_operation_log is not None:
-                obj_dict = most_recent_operation_log.__dict__
-                obj_dict.pop('_sa_instance_state')
-                sanitized_obj_dict = self.Sanitize_Datetime(obj_dict)
-                return sanitized_obj_dict
+                # Convert the object to dictionary
+                if most_recent_operation_log is not None:
+                    obj_dict = most_recent_operation_log.__dict__
+                    obj_dict.pop('_sa_instance_state')
+                    sanitized_obj_dict = self.Sanitize_Datetime(obj_dict)
+                    return sanitized_obj_dict
 
-            self.safe_close(session)
-            return None
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"get_last_operation_log error: {E}", redisClient=self.redisMessaging)
-            self.logTool.log(service='Database', level='error', message=E, redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
+                return None
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"get_last_operation_log error: {E}", redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='error', message=E, redisClient=self.redisMessaging)
+                raise ValueError(E)
 
     def handleGeored(self, jsonData, operation: str="PATCH", asymmetric: bool=False, asymmetricUrls: list=[]) -> bool:
         """
@@ -981,6 +1192,7 @@ class Database:
                         georedDict['body'] = jsonData
                         georedDict['operation'] = operation
                         georedDict['timestamp'] = time.time_ns()
+                        georedDict['traceparent'] = self.tracer.getTraceparent()
                         self.redisMessaging.sendMessage(queue=f'geored', message=json.dumps(georedDict), queueExpiry=120, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='geored')
                 if asymmetric:
                     if len(asymmetricUrls) > 0:
@@ -988,6 +1200,7 @@ class Database:
                         georedDict['operation'] = operation
                         georedDict['timestamp'] = time.time_ns()
                         georedDict['urls'] = asymmetricUrls
+                        georedDict['traceparent'] = self.tracer.getTraceparent()
                         self.redisMessaging.sendMessage(queue=f'asymmetric-geored', message=json.dumps(georedDict), queueExpiry=120, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='geored')
             return True
 
@@ -995,6 +1208,35 @@ class Database:
             self.logTool.log(service='Database', level='warning', message="Failed to send Geored message due to error: " + str(E), redisClient=self.redisMessaging)
             return False
 
+    def handleGeoredBatch(self, jsonDataList: list, operation: str="PATCH") -> bool:
+        """
+        As handleGeored, for a list of bodies sent to the geored endpoints, queued in one redis pipeline.
+        """
+        try:
+            if not jsonDataList or not self.config.get('geored', {}).get('enabled', False) or not self.config.get('geored', {}).get('endpoints', []):
+                return True
+            traceparent = self.tracer.getTraceparent()
+            georedMessages = [json.dumps({'body': jsonData, 'operation': operation.upper(), 'timestamp': time.time_ns(), 'traceparent': traceparent}) for jsonData in jsonDataList]
+            self.redisMessaging.sendBulkMessage(queue=f'geored', messageList=georedMessages, queueExpiry=120, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='geored')
+            return True
+        except Exception as E:
+            self.logTool.log(service='Database', level='warning', message="Failed to send Geored messages due to error: " + str(E), redisClient=self.redisMessaging)
+            return False
+
+    def handleWebhookBatch(self, webhooks: list) -> bool:
+        """
+        As handleWebhook, for a list of (objectData, operation), queued in one redis pipeline.
+        """
+        if not webhooks or not self.config.get('webhooks', {}).get('enabled', False) or not self.config.get('webhooks', {}).get('endpoints', []):
+            return False
+        webhookHeaders = {'Content-Type': 'application/json', 'Referer': socket.gethostname()}
+        traceparent = self.tracer.getTraceparent()
+        if traceparent is not None:
+            webhookHeaders['traceparent'] = traceparent
+        webhookMessages = [json.dumps({'body': self.Sanitize_Datetime(objectData), 'headers': webhookHeaders, 'operation': operation, 'timestamp': time.time_ns()}) for objectData, operation in webhooks]
+        self.redisMessaging.sendBulkMessage(queue=f'webhook', messageList=webhookMessages, queueExpiry=120, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='webhook')
+        return True
+
     def handleWebhook(self, objectData, operation: str="PATCH"):
         webhooksEnabled = self.config.get('webhooks', {}).get('enabled', False)
         endpointList = self.config.get('webhooks', {}).get('endpoints', [])
@@ -1011,6 +1253,9 @@ class Database:
             return False
 
         webhookHeaders = {'Content-Type': 'application/json', 'Referer': socket.gethostname()}
+        traceparent = self.tracer.getTraceparent()
+        if traceparent is not None:
+            webhookHeaders['traceparent'] = traceparent
 
         webhook['body'] = self.Sanitize_Datetime(objectData)
         webhook['headers'] = webhookHeaders
@@ -1025,7 +1270,7 @@ class Database:
                 if result[keys] == None:
                     continue
                 else:
-                    self.logTool.log(service='Database', level='debug', message="Key " + str(keys) + " is type DateTime with value: " + str(result[keys]) + " - Formatting to String", redisClient=self.redisMessaging)
+                    self.logTool.log(service='Database', level='debug', message="Key %s is type DateTime with value: %s - Formatting to String", messageArgs=(keys, result[keys],), redisClient=self.redisMessaging)
                     try:
                         result[keys] = result[keys].strftime('%Y-%m-%dT%H:%M:%SZ')
                     except Exception as e:
@@ -1042,239 +1287,250 @@ class Database:
         return result 
 
     def GetObj(self, obj_type, obj_id=None, page=None, page_size=None):
-        self.logTool.log(service='Database', level='debug', message="Called GetObj for type " + str(obj_type), redisClient=self.redisMessaging)
-
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        session = Session()
+        self.logTool.log(service='Database', level='debug', message="Called GetObj for type %s", messageArgs=(obj_type,), redisClient=self.redisMessaging)
 
-        try:
-            if obj_id is not None:
-                result = session.query(obj_type).get(obj_id)
-                if result is None:
-                    raise ValueError(f"No {obj_type} found with id {obj_id}")
+        with self.sessionScope() as session:
 
-                result = result.__dict__
-                result.pop('_sa_instance_state')
-                result = self.Sanitize_Datetime(result)
-            elif page is not None and page_size is not None:
-                if page < 1 or page_size < 1:
-                    raise ValueError("page and page_size should be positive integers")
-
-                offset = (page - 1) * page_size
-                results = (
-                    session.query(obj_type)
-                    .order_by(obj_type.id)  # Assuming obj_type has an attribute 'id'
-                    .offset(offset)
-                    .limit(page_size)
-                    .all()
-                )
-
-                result = []
-                for item in results:
-                    item_dict = item.__dict__
-                    item_dict.pop('_sa_instance_state')
-                    result.append(self.Sanitize_Datetime(item_dict))
-            else:
-                raise ValueError("Provide either obj_id or both page and page_size")
+            try:
+                if obj_id is not None:
+                    result = session.query(obj_type).get(obj_id)
+                    if result is None:
+                        raise ValueError(f"No {obj_type} found with id {obj_id}")
+
+                    result = result.__dict__
+                    result.pop('_sa_instance_state')
+                    result = self.Sanitize_Datetime(result)
+                elif page is not None and page_size is not None:
+                    if page < 1 or page_size < 1:
+                        raise ValueError("page and page_size should be positive integers")
+
+                    offset = (page - 1) * page_size
+                    results = (
+                        session.query(obj_type)
+                        .order_by(obj_type.id)  # Assuming obj_type has an attribute 'id'
+                        .offset(offset)
+                        .limit(page_size)
+                        .all()
+                    )
+
+                    result = []
+                    for item in results:
+                        item_dict = item.__dict__
+                        item_dict.pop('_sa_instance_state')
+                        result.append(self.Sanitize_Datetime(item_dict))
+                else:
+                    raise ValueError("Provide either obj_id or both page and page_size")
 
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)
 
-        self.safe_close(session)
-        return result
+            return result
 
     def GetAll(self, obj_type):
-        self.logTool.log(service='Database', level='debug', message="Called GetAll for type " + str(obj_type), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Called GetAll for type %s", messageArgs=(obj_type,), redisClient=self.redisMessaging)
 
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        final_result_list = []
+        with self.sessionScope() as session:
+            final_result_list = []
 
-        try:
-            result = session.query(obj_type)
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)    
+            try:
+                result = session.query(obj_type)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)    
         
-        for record in result:
-            record = record.__dict__
-            record.pop('_sa_instance_state')
-            record = self.Sanitize_Datetime(record)
-            final_result_list.append(record)
+            for record in result:
+                record = record.__dict__
+                record.pop('_sa_instance_state')
+                record = self.Sanitize_Datetime(record)
+                final_result_list.append(record)
 
-        self.safe_close(session)
-        return final_result_list
+            return final_result_list
 
     def getAllPaginated(self, obj_type, page=0, page_size=0, existingSession=None):
-        self.logTool.log(service='Database', level='debug', message="Called getAllPaginated for type " + str(obj_type), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Called getAllPaginated for type %s", messageArgs=(obj_type,), redisClient=self.redisMessaging)
 
-        if not existingSession:
-            Base.metadata.create_all(self.engine)
-            Session = sessionmaker(bind=self.engine)
-            session = Session()
-        else:
-            session = existingSession
+        with self.readSessionScope(existingSession=existingSession) as session:
 
-        final_result_list = []
+            final_result_list = []
 
-        try:
-            # Query object type
-            result = session.query(obj_type)
+            try:
+                # Query object type
+                result = session.query(obj_type)
 
-            # Apply pagination
-            if page_size != 0:
-                result = result.limit(page_size).offset(page * page_size)
+                # Apply pagination
+                if page_size != 0:
+                    result = result.limit(page_size).offset(page * page_size)
             
-            result = result.all()
+                result = result.all()
+
+                for record in result:
+                    record = record.__dict__
+                    record.pop('_sa_instance_state')
+                    record = self.Sanitize_Datetime(record)
+                    final_result_list.append(record)
+                
+                return final_result_list
+
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)
+
+    def getAllKeyset(self, obj_type, after=None, page_size=100, existingSession=None):
+        """
+        Returns up to page_size records of obj_type with a primary key greater than after, in primary key order,
+        and the cursor (primary key of the last record) to pass as after for the next page, or None on the last page.
+        Unlike getAllPaginated, the cost of a page does not grow with its position in the table.
+        """
+        self.logTool.log(service='Database', level='debug', message="Called getAllKeyset for type %s after %s", messageArgs=(obj_type, after,), redisClient=self.redisMessaging)
+        primaryKey = class_mapper(obj_type).primary_key[0]
+
+        with self.readSessionScope(existingSession=existingSession) as session:
+            final_result_list = []
+
+            try:
+                result = session.query(obj_type)
+                if after is not None:
+                    result = result.filter(primaryKey > after)
+                result = result.order_by(primaryKey).limit(page_size).all()
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)
 
             for record in result:
                 record = record.__dict__
                 record.pop('_sa_instance_state')
                 record = self.Sanitize_Datetime(record)
                 final_result_list.append(record)
-                
-            self.safe_close(session)
-            return final_result_list
 
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
+            nextCursor = None
+            if page_size and len(final_result_list) == page_size:
+                nextCursor = final_result_list[-1][primaryKey.name]
+            return final_result_list, nextCursor
 
+    def streamAll(self, obj_type, batch_size=1000):
+        """
+        Yields every record of obj_type in primary key order, fetched in keyset pages of batch_size.
+        Each page uses its own short lived session, so a slow consumer never holds a connection, and only one page is held in memory.
+        """
+        after = None
+        while True:
+            records, after = self.getAllKeyset(obj_type, after=after, page_size=batch_size)
+            for record in records:
+                yield record
+            if after is None:
+                return
 
     def GetAllByTable(self, obj_type, table):
-        self.logTool.log(service='Database', level='debug', message=f"Called GetAll for type {str(obj_type)} and table {table}", redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Called GetAll for type %s and table %s", messageArgs=(str(obj_type), table,), redisClient=self.redisMessaging)
 
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        final_result_list = []
+        with self.readSessionScope() as session:
+            final_result_list = []
 
-        try:
-            result = session.query(obj_type).filter_by(table_name=str(table))
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)    
+            try:
+                result = session.query(obj_type).filter_by(table_name=str(table))
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to query, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)    
         
-        for record in result:
-            record = record.__dict__
-            record.pop('_sa_instance_state')
-            record = self.Sanitize_Datetime(record)
-            final_result_list.append(record)
+            for record in result:
+                record = record.__dict__
+                record.pop('_sa_instance_state')
+                record = self.Sanitize_Datetime(record)
+                final_result_list.append(record)
 
-        self.safe_close(session)
-        return final_result_list
+            return final_result_list
 
     def UpdateObj(self, obj_type, json_data, obj_id, disable_logging=False, operation_id=None):
-        self.logTool.log(service='Database', level='debug', message=f"Called UpdateObj() for type {obj_type} id {obj_id} with JSON data: {json_data} and operation_id: {operation_id}", redisClient=self.redisMessaging)
-        Session = sessionmaker(bind=self.engine)
-        session = Session()
-        obj_type_str = str(obj_type.__table__.name).upper()
-        self.logTool.log(service='Database', level='debug', message=f"obj_type_str is {obj_type_str}", redisClient=self.redisMessaging)
-        filter_input = eval(obj_type_str + "." + obj_type_str.lower() + "_id==obj_id")
-        try:
-            obj = session.query(obj_type).filter(filter_input).one()
-            for key, value in json_data.items():
-                if hasattr(obj, key):
-                    setattr(obj, key, value)
-                    setattr(obj, "last_modified", datetime.datetime.now(tz=datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') + 'Z')
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"Failed to query or update object, error: {E}", redisClient=self.redisMessaging)
-            raise ValueError(E)
-        try:
+        self.logTool.log(service='Database', level='debug', message="Called UpdateObj() for type %s id %s with JSON data: %s and operation_id: %s", messageArgs=(obj_type, obj_id, json_data, operation_id,), redisClient=self.redisMessaging)
+        self.invalidatePrefetchCache(obj_type, obj_id=obj_id)
+        with self.sessionScope() as session:
+            obj_type_str = str(obj_type.__table__.name).upper()
+            self.logTool.log(service='Database', level='debug', message="obj_type_str is %s", messageArgs=(obj_type_str,), redisClient=self.redisMessaging)
+            filter_input = eval(obj_type_str + "." + obj_type_str.lower() + "_id==obj_id")
+            try:
+                obj = session.query(obj_type).filter(filter_input).one()
+                for key, value in json_data.items():
+                    if hasattr(obj, key):
+                        setattr(obj, key, value)
+                        setattr(obj, "last_modified", datetime.datetime.now(tz=datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') + 'Z')
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"Failed to query or update object, error: {E}", redisClient=self.redisMessaging)
+                raise ValueError(E)
+            try:
+                    session.info["operation_id"] = operation_id  # Pass the operation id
+                    try:
+                        if not disable_logging:
+                            self.log_changes_before_commit(session)
+                        objectData = self.GetObj(obj_type, obj_id)
+                        session.commit()
+                        self.handleWebhook(objectData, 'PATCH')
+                    except Exception as E:
+                        self.logTool.log(service='Database', level='error', message=f"Failed to commit session, error: {E}", redisClient=self.redisMessaging)
+                        raise ValueError(E)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"Exception in UpdateObj, error: {E}", redisClient=self.redisMessaging)
+                raise ValueError(E)
+
+            return self.GetObj(obj_type, obj_id)
+
+    def DeleteObj(self, obj_type, obj_id, disable_logging=False, operation_id=None):
+        self.logTool.log(service='Database', level='debug', message="Called DeleteObj for type %s with id %s", messageArgs=(obj_type, obj_id,), redisClient=self.redisMessaging)
+        self.invalidatePrefetchCache(obj_type, obj_id=obj_id)
+
+        with self.sessionScope() as session:
+
+            try:
+                res = session.query(obj_type).get(obj_id)
+                if res is None:
+                    raise ValueError("The specified row does not exist")
+                objectData = self.GetObj(obj_type, obj_id)
+                session.delete(res)
                 session.info["operation_id"] = operation_id  # Pass the operation id
                 try:
                     if not disable_logging:
                         self.log_changes_before_commit(session)
-                    objectData = self.GetObj(obj_type, obj_id)
                     session.commit()
-                    self.handleWebhook(objectData, 'PATCH')
+                    self.handleWebhook(objectData, 'DELETE')
                 except Exception as E:
                     self.logTool.log(service='Database', level='error', message=f"Failed to commit session, error: {E}", redisClient=self.redisMessaging)
-                    self.safe_rollback(session)
                     raise ValueError(E)
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"Exception in UpdateObj, error: {E}", redisClient=self.redisMessaging)
-            raise ValueError(E)
-        finally:
-            self.safe_close(session)
-
-        return self.GetObj(obj_type, obj_id)
-
-    def DeleteObj(self, obj_type, obj_id, disable_logging=False, operation_id=None):
-        self.logTool.log(service='Database', level='debug', message=f"Called DeleteObj for type {obj_type} with id {obj_id}", redisClient=self.redisMessaging)
-
-        Session = sessionmaker(bind=self.engine)
-        session = Session()
 
-        try:
-            res = session.query(obj_type).get(obj_id)
-            if res is None:
-                raise ValueError("The specified row does not exist")
-            objectData = self.GetObj(obj_type, obj_id)
-            session.delete(res)
-            session.info["operation_id"] = operation_id  # Pass the operation id
-            try:
-                if not disable_logging:
-                    self.log_changes_before_commit(session)
-                session.commit()
-                self.handleWebhook(objectData, 'DELETE')
             except Exception as E:
-                self.logTool.log(service='Database', level='error', message=f"Failed to commit session, error: {E}", redisClient=self.redisMessaging)
-                self.safe_rollback(session)
+                self.logTool.log(service='Database', level='error', message=f"Exception in DeleteObj, error: {E}", redisClient=self.redisMessaging)
                 raise ValueError(E)
 
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"Exception in DeleteObj, error: {E}", redisClient=self.redisMessaging)
-            raise ValueError(E)
-        finally:
-            self.safe_close(session)
-
-        return {'Result': 'OK'}
+            return {'Result': 'OK'}
 
 
     def CreateObj(self, obj_type, json_data, disable_logging=False, operation_id=None):
-        self.logTool.log(service='Database', level='debug', message="Called CreateObj to create " + str(obj_type) + " with value: " + str(json_data), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Called CreateObj to create %s with value: %s", messageArgs=(obj_type, json_data,), redisClient=self.redisMessaging)
         last_modified_value = datetime.datetime.now(tz=datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') + 'Z'
         json_data["last_modified"] = last_modified_value  # set last_modified value in json_data
         newObj = obj_type(**json_data)
-        Session = sessionmaker(bind=self.engine)
-        session = Session()
+        with self.sessionScope() as session:
 
-        session.add(newObj)
-        try:
-            session.info["operation_id"] = operation_id  # Pass the operation id
+            session.add(newObj)
             try:
-                if not disable_logging:
-                    self.log_changes_before_commit(session)
-                session.commit()
+                session.info["operation_id"] = operation_id  # Pass the operation id
+                try:
+                    if not disable_logging:
+                        self.log_changes_before_commit(session)
+                    session.commit()
+                except Exception as E:
+                    self.logTool.log(service='Database', level='error', message=f"Failed to commit session, error: {E}", redisClient=self.redisMessaging)
+                    raise ValueError(E)
+                session.refresh(newObj)
+                result = newObj.__dict__
+                result.pop('_sa_instance_state')
+                self.handleWebhook(result, 'PUT')
+                return result
             except Exception as E:
-                self.logTool.log(service='Database', level='error', message=f"Failed to commit session, error: {E}", redisClient=self.redisMessaging)
-                self.safe_rollback(session)
+                self.logTool.log(service='Database', level='error', message=f"Exception in CreateObj, error: {E}", redisClient=self.redisMessaging)
                 raise ValueError(E)
-            session.refresh(newObj)
-            result = newObj.__dict__
-            result.pop('_sa_instance_state')
-            self.handleWebhook(result, 'PUT')
-            return result
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"Exception in CreateObj, error: {E}", redisClient=self.redisMessaging)
-            raise ValueError(E)
-        finally:
-            self.safe_close(session)
 
     def Generate_JSON_Model_for_Flask(self, obj_type):
-        self.logTool.log(service='Database', level='debug', message="Generating JSON model for Flask for object type: " + str(obj_type), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Generating JSON model for Flask for object type: %s", messageArgs=(obj_type,), redisClient=self.redisMessaging)
 
         dictty = dict(self.generate_json_schema(obj_type))
         # pprint.pprint(dictty)
@@ -1297,306 +1553,314 @@ class Database:
     def Get_AuC(self, **kwargs):
         #Get AuC data by IMSI or ICCID
 
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        with self.sessionScope() as session:
 
-        if 'iccid' in kwargs:
-            self.logTool.log(service='Database', level='debug', message="Get_AuC for iccid " + str(kwargs['iccid']), redisClient=self.redisMessaging)
-            try:
-                result = session.query(AUC).filter_by(iccid=str(kwargs['iccid'])).one()
-            except Exception as E:
-                self.safe_close(session)
-                raise ValueError(E)
-        elif 'imsi' in kwargs:
-            self.logTool.log(service='Database', level='debug', message="Get_AuC for imsi " + str(kwargs['imsi']), redisClient=self.redisMessaging)
-            try:
-                result = session.query(AUC).filter_by(imsi=str(kwargs['imsi'])).one()
-            except Exception as E:
-                self.safe_close(session)
-                raise ValueError(E)
+            if 'iccid' in kwargs:
+                self.logTool.log(service='Database', level='debug', message="Get_AuC for iccid %s", messageArgs=(kwargs['iccid'],), redisClient=self.redisMessaging)
+                try:
+                    result = session.query(AUC).filter_by(iccid=str(kwargs['iccid'])).one()
+                except Exception as E:
+                    raise ValueError(E)
+            elif 'imsi' in kwargs:
+                self.logTool.log(service='Database', level='debug', message="Get_AuC for imsi %s", messageArgs=(kwargs['imsi'],), redisClient=self.redisMessaging)
+                try:
+                    result = session.query(AUC).filter_by(imsi=str(kwargs['imsi'])).one()
+                except Exception as E:
+                    raise ValueError(E)
 
-        result = result.__dict__
-        result = self.Sanitize_Datetime(result)
-        result.pop('_sa_instance_state')
+            result = result.__dict__
+            result = self.Sanitize_Datetime(result)
+            result.pop('_sa_instance_state')
 
-        self.logTool.log(service='Database', level='debug', message="Got back result: " + str(result), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return result
+            self.logTool.log(service='Database', level='debug', message="Got back result: %s", messageArgs=(result,), redisClient=self.redisMessaging)
+            return result
 
     def Get_IMS_Subscriber(self, **kwargs):
         #Get subscriber by IMSI or MSISDN
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        if 'msisdn' in kwargs:
-            self.logTool.log(service='Database', level='debug', message="Get_IMS_Subscriber for msisdn " + str(kwargs['msisdn']), redisClient=self.redisMessaging)
-            try:
-                result = session.query(IMS_SUBSCRIBER).filter_by(msisdn=str(kwargs['msisdn'])).one()
-            except Exception as E:
-                self.safe_close(session)
-                raise ValueError(E)
-        elif 'imsi' in kwargs:
-            self.logTool.log(service='Database', level='debug', message="Get_IMS_Subscriber for imsi " + str(kwargs['imsi']), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
+            if 'msisdn' in kwargs:
+                self.logTool.log(service='Database', level='debug', message="Get_IMS_Subscriber for msisdn %s", messageArgs=(kwargs['msisdn'],), redisClient=self.redisMessaging)
+                try:
+                    result = session.query(IMS_SUBSCRIBER).filter_by(msisdn=str(kwargs['msisdn'])).one()
+                except Exception as E:
+                    raise ValueError(E)
+            elif 'imsi' in kwargs:
+                self.logTool.log(service='Database', level='debug', message="Get_IMS_Subscriber for imsi %s", messageArgs=(kwargs['imsi'],), redisClient=self.redisMessaging)
+                try:
+                    result = session.query(IMS_SUBSCRIBER).filter_by(imsi=str(kwargs['imsi'])).one()
+                except Exception as E:
+                    raise ValueError(E)
+            self.logTool.log(service='Database', level='debug', message="Converting result to dict", redisClient=self.redisMessaging)
+            result = result.__dict__
             try:
-                result = session.query(IMS_SUBSCRIBER).filter_by(imsi=str(kwargs['imsi'])).one()
-            except Exception as E:
-                self.safe_close(session)
-                raise ValueError(E)
-        self.logTool.log(service='Database', level='debug', message="Converting result to dict", redisClient=self.redisMessaging)
-        result = result.__dict__
-        try:
-            result.pop('_sa_instance_state')
-        except:
-            pass
-        result = self.Sanitize_Datetime(result)
-        self.logTool.log(service='Database', level='debug', message="Returning IMS Subscriber Data: " + str(result), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return result
+                result.pop('_sa_instance_state')
+            except:
+                pass
+            result = self.Sanitize_Datetime(result)
+            self.logTool.log(service='Database', level='debug', message="Returning IMS Subscriber Data: %s", messageArgs=(result,), redisClient=self.redisMessaging)
+            return result
 
     def Get_Subscriber(self, **kwargs):
         #Get subscriber by IMSI or MSISDN
 
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        if 'imsi' in kwargs and 'subscriber_id' not in kwargs and 'msisdn' not in kwargs and not kwargs.get('get_attributes', False):
+            prefetchedSubscriber = self.prefetchCache['subscriber'].get(str(kwargs['imsi']))
+            if prefetchedSubscriber is not None:
+                self.logTool.log(service='Database', level='debug', message="Get_Subscriber for imsi %s served from prefetch cache", messageArgs=(kwargs['imsi'],), redisClient=self.redisMessaging)
+                return dict(prefetchedSubscriber)
 
-        if 'subscriber_id' in kwargs:
-            self.logTool.log(service='Database', level='debug', message="Get_Subscriber for id " + str(kwargs['subscriber_id']), redisClient=self.redisMessaging)
-            try:
-                result = session.query(SUBSCRIBER).filter_by(subscriber_id=int(kwargs['subscriber_id'])).one()
-            except Exception as E:
-                self.safe_close(session)
-                raise ValueError(E)
-        elif 'msisdn' in kwargs:
-            self.logTool.log(service='Database', level='debug', message="Get_Subscriber for msisdn " + str(kwargs['msisdn']), redisClient=self.redisMessaging)
-            try:
-                result = session.query(SUBSCRIBER).filter_by(msisdn=str(kwargs['msisdn'])).one()
-            except Exception as E:
-                self.safe_close(session)
-                raise ValueError(E)
-        elif 'imsi' in kwargs:
-            self.logTool.log(service='Database', level='debug', message="Get_Subscriber for imsi " + str(kwargs['imsi']), redisClient=self.redisMessaging)
-            try:
-                result = session.query(SUBSCRIBER).filter_by(imsi=str(kwargs['imsi'])).one()
-            except Exception as E:
-                self.safe_close(session)
-                raise ValueError(E)
+        with self.sessionScope() as session:
+
+            if 'subscriber_id' in kwargs:
+                self.logTool.log(service='Database', level='debug', message="Get_Subscriber for id %s", messageArgs=(kwargs['subscriber_id'],), redisClient=self.redisMessaging)
+                try:
+                    result = session.query(SUBSCRIBER).filter_by(subscriber_id=int(kwargs['subscriber_id'])).one()
+                except Exception as E:
+                    raise ValueError(E)
+            elif 'msisdn' in kwargs:
+                self.logTool.log(service='Database', level='debug', message="Get_Subscriber for msisdn %s", messageArgs=(kwargs['msisdn'],), redisClient=self.redisMessaging)
+                try:
+                    result = session.query(SUBSCRIBER).filter_by(msisdn=str(kwargs['msisdn'])).one()
+                except Exception as E:
+                    raise ValueError(E)
+            elif 'imsi' in kwargs:
+                self.logTool.log(service='Database', level='debug', message="Get_Subscriber for imsi %s", messageArgs=(kwargs['imsi'],), redisClient=self.redisMessaging)
+                try:
+                    result = session.query(SUBSCRIBER).filter_by(imsi=str(kwargs['imsi'])).one()
+                except Exception as E:
+                    raise ValueError(E)
 
-        result = result.__dict__
-        result = self.Sanitize_Datetime(result)
-        result.pop('_sa_instance_state')
+            result = result.__dict__
+            result = self.Sanitize_Datetime(result)
+            result.pop('_sa_instance_state')
         
-        if 'get_attributes' in kwargs:
-            if kwargs['get_attributes'] == True:
-                attributes = self.Get_Subscriber_Attributes(result['subscriber_id'])
-                result['attributes'] = attributes
+            if 'get_attributes' in kwargs:
+                if kwargs['get_attributes'] == True:
+                    attributes = self.Get_Subscriber_Attributes(result['subscriber_id'])
+                    result['attributes'] = attributes
 
-        self.logTool.log(service='Database', level='debug', message="Got back result: " + str(result), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return result
+            self.logTool.log(service='Database', level='debug', message="Got back result: %s", messageArgs=(result,), redisClient=self.redisMessaging)
+            return result
+
+    def prefetchSubscribers(self, imsiList: list) -> int:
+        """
+        Loads the SUBSCRIBER and APN rows for a batch of IMSIs with one IN (...) query per table.
+        Get_Subscriber and Get_APN are served from the prefetched rows until clearPrefetchCache() is called.
+        AUC rows are not prefetched, as each vector request must read and advance the SQN on record, see reserveSqn().
+        Returns the number of subscribers prefetched.
+        """
+        imsiList = list(set([str(imsi) for imsi in imsiList if imsi]))
+        if len(imsiList) == 0:
+            return 0
+
+        with self.sessionScope() as session:
 
-    def Get_Subscribers_By_Pcscf(self, pcscf: str):
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Subscribers_By_Pcscf] Get_Subscribers_By_Pcscf for PCSCF: {pcscf}", redisClient=self.redisMessaging)
-        try:
-            result = session.query(IMS_SUBSCRIBER).filter_by(pcscf=pcscf).all()
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        returnList = []
-        for item in result:
-            try:
-                returnList.append(item.__dict__)
-            except Exception as e:
-                self.logTool.log(service='Database', level='warning', message=f"[database.py] [Get_Subscribers_By_Pcscf] Error getting ims_subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
-                pass
-        for item in returnList:
             try:
-                item.pop('_sa_instance_state')
-            except Exception as e:
-                pass
-        self.safe_close(session)
-        return returnList
+                subscriberIds = {}
+                apnIds = set()
+                for result in session.query(SUBSCRIBER).filter(SUBSCRIBER.imsi.in_(imsiList)).all():
+                    result = result.__dict__
+                    result.pop('_sa_instance_state')
+                    result = self.Sanitize_Datetime(result)
+                    self.prefetchCache['subscriber'][str(result['imsi'])] = result
+                    apnIds.add(str(result['default_apn']))
+                    for apnId in str(result.get('apn_list', '') or '').split(','):
+                        apnIds.add(apnId)
+
+                apnIds = [int(apnId) for apnId in apnIds if str(apnId).strip().isdigit()]
+
+                if len(apnIds) > 0:
+                    for result in session.query(APN).filter(APN.apn_id.in_(apnIds)).all():
+                        result = result.__dict__
+                        result.pop('_sa_instance_state')
+                        self.prefetchCache['apn'][int(result['apn_id'])] = result
+
+                self.logTool.log(service='Database', level='debug', message="[database.py] [prefetchSubscribers] Prefetched %s subscribers and %s APNs for %s IMSIs", messageArgs=(len(self.prefetchCache['subscriber']), len(self.prefetchCache['apn']), len(imsiList),), redisClient=self.redisMessaging)
+                return len(self.prefetchCache['subscriber'])
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [prefetchSubscribers] Error prefetching subscribers: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                self.clearPrefetchCache()
+                return 0
 
-    def Get_SUBSCRIBER_ROUTING(self, subscriber_id, apn_id):
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+    def clearPrefetchCache(self):
+        """
+        Drops all rows loaded by prefetchSubscribers().
+        """
+        self.prefetchCache = {'subscriber': {}, 'apn': {}}
 
-        self.logTool.log(service='Database', level='debug', message="Get_SUBSCRIBER_ROUTING for subscriber_id " + str(subscriber_id) + " and apn_id " + str(apn_id), redisClient=self.redisMessaging)
+    def invalidatePrefetchCache(self, obj_type, obj_id=None, imsi=None):
+        """
+        Removes a prefetched row after it has been written, so later requests in the same batch read it from the database.
+        """
         try:
-            result = session.query(SUBSCRIBER_ROUTING).filter_by(subscriber_id=subscriber_id, apn_id=apn_id).one()
+            if obj_type == SUBSCRIBER:
+                if imsi is not None:
+                    self.prefetchCache['subscriber'].pop(str(imsi), None)
+                if obj_id is not None:
+                    for cachedImsi, cachedSubscriber in list(self.prefetchCache['subscriber'].items()):
+                        if cachedSubscriber.get('subscriber_id') == int(obj_id):
+                            self.prefetchCache['subscriber'].pop(cachedImsi, None)
+            elif obj_type == APN and obj_id is not None:
+                self.prefetchCache['apn'].pop(int(obj_id), None)
         except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-
-        result = result.__dict__
-        result = self.Sanitize_Datetime(result)
-        result.pop('_sa_instance_state')
+            self.clearPrefetchCache()
 
-        self.logTool.log(service='Database', level='debug', message="Got back result: " + str(result), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return result
+    def Get_Subscribers_By_Pcscf(self, pcscf: str):
+        with self.sessionScope() as session:
+            self.logTool.log(service='Database', level='debug', message="[database.py] [Get_Subscribers_By_Pcscf] Get_Subscribers_By_Pcscf for PCSCF: %s", messageArgs=(pcscf,), redisClient=self.redisMessaging)
+            try:
+                result = session.query(IMS_SUBSCRIBER).filter_by(pcscf=pcscf).all()
+            except Exception as E:
+                raise ValueError(E)
+            returnList = []
+            for item in result:
+                try:
+                    returnList.append(item.__dict__)
+                except Exception as e:
+                    self.logTool.log(service='Database', level='warning', message=f"[database.py] [Get_Subscribers_By_Pcscf] Error getting ims_subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                    pass
+            for item in returnList:
+                try:
+                    item.pop('_sa_instance_state')
+                except Exception as e:
+                    pass
+            return returnList
 
-    def Get_Subscriber_Attributes(self, subscriber_id):
-        #Get subscriber attributes
+    def Get_SUBSCRIBER_ROUTING(self, subscriber_id, apn_id):
+        with self.sessionScope() as session:
 
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+            self.logTool.log(service='Database', level='debug', message="Get_SUBSCRIBER_ROUTING for subscriber_id %s and apn_id %s", messageArgs=(subscriber_id, apn_id,), redisClient=self.redisMessaging)
+            try:
+                result = session.query(SUBSCRIBER_ROUTING).filter_by(subscriber_id=subscriber_id, apn_id=apn_id).one()
+            except Exception as E:
+                raise ValueError(E)
 
-        self.logTool.log(service='Database', level='debug', message="Get_Subscriber_Attributes for subscriber_id " + str(subscriber_id), redisClient=self.redisMessaging)
-        try:
-            result = session.query(SUBSCRIBER_ATTRIBUTES).filter_by(subscriber_id=subscriber_id)
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        final_res = []
-        for record in result:
-            result = record.__dict__
+            result = result.__dict__
             result = self.Sanitize_Datetime(result)
             result.pop('_sa_instance_state')
-            final_res.append(result)
-        self.logTool.log(service='Database', level='debug', message="Got back result: " + str(final_res), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return final_res
 
+            self.logTool.log(service='Database', level='debug', message="Got back result: %s", messageArgs=(result,), redisClient=self.redisMessaging)
+            return result
 
-    def Get_Served_Subscribers(self, get_local_users_only=False):
-        self.logTool.log(service='Database', level='debug', message="Getting all subscribers served by this HSS", redisClient=self.redisMessaging)
+    def Get_Subscriber_Attributes(self, subscriber_id):
+        #Get subscriber attributes
 
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        with self.sessionScope() as session:
 
-        Served_Subs = {}
-        try:
-            results = session.query(SUBSCRIBER).filter(SUBSCRIBER.serving_mme.isnot(None))
-            for result in results:
-                result = result.__dict__
-                self.logTool.log(service='Database', level='debug', message="Result: " + str(result) + " type: " + str(type(result)), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Get_Subscriber_Attributes for subscriber_id %s", messageArgs=(subscriber_id,), redisClient=self.redisMessaging)
+            try:
+                result = session.query(SUBSCRIBER_ATTRIBUTES).filter_by(subscriber_id=subscriber_id)
+            except Exception as E:
+                raise ValueError(E)
+            final_res = []
+            for record in result:
+                result = record.__dict__
                 result = self.Sanitize_Datetime(result)
                 result.pop('_sa_instance_state')
+                final_res.append(result)
+            self.logTool.log(service='Database', level='debug', message="Got back result: %s", messageArgs=(final_res,), redisClient=self.redisMessaging)
+            return final_res
 
-                if get_local_users_only == True:
-                    self.logTool.log(service='Database', level='debug', message="Filtering to locally served IMS Subs only", redisClient=self.redisMessaging)
-                    try:
-                        serving_hss = result['serving_mme_peer'].split(';')[1]
-                        self.logTool.log(service='Database', level='debug', message="Serving HSS: " + str(serving_hss) + " and this is: " + str(self.config['hss']['OriginHost']), redisClient=self.redisMessaging)
-                        if serving_hss == self.config['hss']['OriginHost']:
-                            self.logTool.log(service='Database', level='debug', message="Serving HSS matches local HSS", redisClient=self.redisMessaging)
-                            Served_Subs[result['imsi']] = {}
-                            Served_Subs[result['imsi']] = result
-                            #self.logTool.log(service='Database', level='debug', message="Processed result", redisClient=self.redisMessaging)
-                            continue
-                        else:
-                            self.logTool.log(service='Database', level='debug', message="Sub is served by remote HSS: " + str(serving_hss), redisClient=self.redisMessaging)
-                    except Exception as E:
-                        self.logTool.log(service='Database', level='debug', message="Error in filtering Get_Served_Subscribers to local peer only: " + str(E), redisClient=self.redisMessaging)
-                        continue
-                else:
-                    Served_Subs[result['imsi']] = result
-                    self.logTool.log(service='Database', level='debug', message="Processed result", redisClient=self.redisMessaging)
 
+    def getServedQuery(self, session, servedType, get_local_users_only=False):
+        """
+        Returns a query for the subscribers served by an MME ('mme'), S-CSCF ('ims') or PGW ('pcrf').
+        If get_local_users_only is set, only those reached through a Diameter peer connected to this node are included.
+        """
+        originHost = self.config['hss']['OriginHost']
+        if servedType == 'mme':
+            query = session.query(SUBSCRIBER).filter(SUBSCRIBER.serving_mme.isnot(None))
+            if get_local_users_only:
+                query = query.filter(SUBSCRIBER.serving_hss == originHost)
+        elif servedType == 'ims':
+            query = session.query(IMS_SUBSCRIBER).filter(IMS_SUBSCRIBER.scscf.isnot(None))
+            if get_local_users_only:
+                query = query.filter(IMS_SUBSCRIBER.scscf_hss == originHost)
+        elif servedType == 'pcrf':
+            query = session.query(SERVING_APN)
+            if get_local_users_only:
+                query = query.filter(SERVING_APN.serving_pcrf == originHost)
+        else:
+            raise ValueError(f"Unknown served subscriber type {servedType}")
+        return query
 
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        self.logTool.log(service='Database', level='debug', message="Final Served_Subs: " + str(Served_Subs), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return Served_Subs
+    def countServedSubscribers(self, servedType, get_local_users_only=False) -> int:
+        """
+        Returns the number of distinct subscribers served by an MME ('mme'), S-CSCF ('ims') or PGW ('pcrf'), counted in SQL.
+        """
+        with self.readSessionScope() as session:
+            try:
+                query = self.getServedQuery(session, servedType, get_local_users_only)
+                if servedType == 'mme':
+                    query = query.with_entities(func.count(SUBSCRIBER.subscriber_id))
+                elif servedType == 'ims':
+                    query = query.with_entities(func.count(func.distinct(IMS_SUBSCRIBER.imsi)))
+                else:
+                    query = query.with_entities(func.count(func.distinct(SERVING_APN.subscriber_id)))
+                return int(query.scalar() or 0)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to count served subscribers, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)
 
+    def streamServedSubscribers(self, servedType, get_local_users_only=False, batch_size=1000):
+        """
+        Yields (imsi, record) for each subscriber served by an MME ('mme'), S-CSCF ('ims') or PGW ('pcrf'), in keyset pages of batch_size.
+        PCRF records include the APN and subscriber as apn_info and subscriber_info, joined in the same query.
+        Each page uses its own session, which is closed before the page is yielded.
+        """
+        primaryKey = {'mme': SUBSCRIBER.subscriber_id, 'ims': IMS_SUBSCRIBER.ims_subscriber_id, 'pcrf': SERVING_APN.serving_apn_id}[servedType]
+        after = None
+        while True:
+            servedPage = []
+            with self.readSessionScope() as session:
+                try:
+                    query = self.getServedQuery(session, servedType, get_local_users_only)
+                    if servedType == 'pcrf':
+                        query = query.add_entity(APN).add_entity(SUBSCRIBER) \
+                                     .join(APN, SERVING_APN.apn == APN.apn_id) \
+                                     .join(SUBSCRIBER, SERVING_APN.subscriber_id == SUBSCRIBER.subscriber_id)
+                    if after is not None:
+                        query = query.filter(primaryKey > after)
+                    results = query.order_by(primaryKey).limit(batch_size).all()
+                except Exception as E:
+                    self.logTool.log(service='Database', level='error', message="Failed to query served subscribers, error: " + str(E), redisClient=self.redisMessaging)
+                    raise ValueError(E)
 
-    def Get_Served_IMS_Subscribers(self, get_local_users_only=False):
-        self.logTool.log(service='Database', level='debug', message="Getting all subscribers served by this IMS-HSS", redisClient=self.redisMessaging)
-        Session = sessionmaker(bind=self.engine)
-        session = Session()
+                for result in results:
+                    if servedType == 'pcrf':
+                        after = result[0].serving_apn_id
+                        record, apnInfo, subscriberInfo = [self.Sanitize_Datetime({key: value for key, value in row.__dict__.items() if key != '_sa_instance_state'}) for row in result]
+                        record['apn_info'] = apnInfo
+                        record['subscriber_info'] = subscriberInfo
+                        servedPage.append((subscriberInfo['imsi'], record))
+                    else:
+                        after = getattr(result, primaryKey.name)
+                        record = self.Sanitize_Datetime({key: value for key, value in result.__dict__.items() if key != '_sa_instance_state'})
+                        servedPage.append((record['imsi'], record))
 
-        Served_Subs = {}
-        try:
-            
-            results = session.query(IMS_SUBSCRIBER).filter(
-                IMS_SUBSCRIBER.scscf.isnot(None))
-            for result in results:
-                result = result.__dict__
-                self.logTool.log(service='Database', level='debug', message="Result: " + str(result) + " type: " + str(type(result)), redisClient=self.redisMessaging)
-                result = self.Sanitize_Datetime(result)
-                result.pop('_sa_instance_state')
-                if get_local_users_only == True:
-                    self.logTool.log(service='Database', level='debug', message="Filtering Get_Served_IMS_Subscribers to locally served IMS Subs only", redisClient=self.redisMessaging)
-                    try:
-                        serving_ims_hss = result['scscf_peer'].split(';')[1]
-                        self.logTool.log(service='Database', level='debug', message="Serving IMS-HSS: " + str(serving_ims_hss) + " and this is: " + str(self.config['hss']['OriginHost']), redisClient=self.redisMessaging)
-                        if serving_ims_hss == self.config['hss']['OriginHost']:
-                            self.logTool.log(service='Database', level='debug', message="Serving IMS-HSS matches local HSS for " + str(result['imsi']), redisClient=self.redisMessaging)
-                            Served_Subs[result['imsi']] = {}
-                            Served_Subs[result['imsi']] = result
-                            self.logTool.log(service='Database', level='debug', message="Processed result", redisClient=self.redisMessaging)
-                            continue
-                        else:
-                            self.logTool.log(service='Database', level='debug', message="Sub is served by remote IMS-HSS: " + str(serving_ims_hss), redisClient=self.redisMessaging)
-                    except Exception as E:
-                        self.logTool.log(service='Database', level='debug', message="Error in filtering to local peer only: " + str(E), redisClient=self.redisMessaging)
-                        continue
-                else:
-                    Served_Subs[result['imsi']] = result
-                    self.logTool.log(service='Database', level='debug', message="Processed result", redisClient=self.redisMessaging)
+            for servedSubscriber in servedPage:
+                yield servedSubscriber
+            if len(results) < batch_size:
+                return
 
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        self.logTool.log(service='Database', level='debug', message="Final Served_Subs: " + str(Served_Subs), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return Served_Subs
+    def Get_Served_Subscribers(self, get_local_users_only=False):
+        self.logTool.log(service='Database', level='debug', message="Getting all subscribers served by this HSS", redisClient=self.redisMessaging)
+        return dict(self.streamServedSubscribers('mme', get_local_users_only))
 
+    def Get_Served_IMS_Subscribers(self, get_local_users_only=False):
+        self.logTool.log(service='Database', level='debug', message="Getting all subscribers served by this IMS-HSS", redisClient=self.redisMessaging)
+        return dict(self.streamServedSubscribers('ims', get_local_users_only))
 
     def Get_Served_PCRF_Subscribers(self, get_local_users_only=False):
         self.logTool.log(service='Database', level='debug', message="Getting all subscribers served by this PCRF", redisClient=self.redisMessaging)
-        Session = sessionmaker(bind=self.engine)
-        session = Session()
-        Served_Subs = {}
-        try:
-            results = session.query(SERVING_APN).all()
-            for result in results:
-                result = result.__dict__
-                self.logTool.log(service='Database', level='debug', message="Result: " + str(result) + " type: " + str(type(result)), redisClient=self.redisMessaging)
-                result = self.Sanitize_Datetime(result)
-                result.pop('_sa_instance_state')
-
-                if get_local_users_only == True:
-                    self.logTool.log(service='Database', level='debug', message="Filtering to locally served IMS Subs only", redisClient=self.redisMessaging)
-                    try:
-                        serving_pcrf = result['serving_pgw_peer'].split(';')[1]
-                        self.logTool.log(service='Database', level='debug', message="Serving PCRF: " + str(serving_pcrf) + " and this is: " + str(self.config['hss']['OriginHost']), redisClient=self.redisMessaging)
-                        if serving_pcrf == self.config['hss']['OriginHost']:
-                            self.logTool.log(service='Database', level='debug', message="Serving PCRF matches local PCRF", redisClient=self.redisMessaging)
-                            self.logTool.log(service='Database', level='debug', message="Processed result", redisClient=self.redisMessaging)
-                            
-                        else:
-                            self.logTool.log(service='Database', level='debug', message="Sub is served by remote PCRF: " + str(serving_pcrf), redisClient=self.redisMessaging)
-                            continue
-                    except Exception as E:
-                        self.logTool.log(service='Database', level='debug', message="Error in filtering Get_Served_PCRF_Subscribers to local peer only: " + str(E), redisClient=self.redisMessaging)
-                        continue
-
-                # Get APN Info
-                apn_info = self.GetObj(APN, result['apn'])
-                #self.logTool.log(service='Database', level='debug', message="Got APN Info: " + str(apn_info), redisClient=self.redisMessaging)
-                result['apn_info'] = apn_info
-
-                # Get Subscriber Info
-                subscriber_info = self.GetObj(SUBSCRIBER, result['subscriber_id'])
-                result['subscriber_info'] = subscriber_info
-
-                #self.logTool.log(service='Database', level='debug', message="Got Subscriber Info: " + str(subscriber_info), redisClient=self.redisMessaging)
-
-                Served_Subs[subscriber_info['imsi']] = result
-                self.logTool.log(service='Database', level='debug', message="Processed result", redisClient=self.redisMessaging)
-        except Exception as E:
-            raise ValueError(E)
-        #self.logTool.log(service='Database', level='debug', message="Final SERVING_APN: " + str(Served_Subs), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return Served_Subs
+        return dict(self.streamServedSubscribers('pcrf', get_local_users_only))
 
     def Get_Vectors_AuC(self, auc_id, action, **kwargs):
-        self.logTool.log(service='Database', level='debug', message="Getting Vectors for auc_id " + str(auc_id) + " with action " + str(action), redisClient=self.redisMessaging)
-        key_data = self.GetObj(AUC, auc_id)
+        self.logTool.log(service='Database', level='debug', message="Getting Vectors for auc_id %s with action %s", messageArgs=(auc_id, action,), redisClient=self.redisMessaging)
+        if action in ["air", "sip_auth", "aka", "2g3g", "eap_aka"]:
+            key_data = self.reserveSqn(auc_id, increment=100)
+        else:
+            key_data = self.GetObj(AUC, auc_id)
         vector_dict = {}
         
         if action == "air":
@@ -1606,37 +1870,33 @@ class Database:
             vector_dict['autn'] = autn
             vector_dict['kasme'] = kasme
 
-            #Incriment SQN
-            self.Update_AuC(auc_id, sqn=key_data['sqn']+100)
-
             return vector_dict
 
         elif action == "sqn_resync":
             self.logTool.log(service='Database', level='debug', message="Resync SQN", redisClient=self.redisMessaging)
             rand = kwargs['rand']       
             sqn, mac_s = S6a_crypt.generate_resync_s6a(key_data['ki'], key_data['opc'], key_data['amf'], kwargs['auts'], rand)
-            self.logTool.log(service='Database', level='debug', message="SQN from resync: " + str(sqn) + " SQN in DB is "  + str(key_data['sqn']) + "(Difference of " + str(int(sqn) - int(key_data['sqn'])) + ")", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="SQN from resync: %s SQN in DB is %s(Difference of %s)", messageArgs=(sqn, key_data['sqn'], int(sqn) - int(key_data['sqn']),), redisClient=self.redisMessaging)
             self.Update_AuC(auc_id, sqn=sqn+100)
             return
         
         elif action == "sip_auth":
             rand, autn, xres, ck, ik = S6a_crypt.generate_maa_vector(key_data['ki'], key_data['opc'], key_data['amf'], key_data['sqn'], kwargs['plmn'])
-            self.logTool.log(service='Database', level='debug', message="RAND is: " + str(rand), redisClient=self.redisMessaging)
-            self.logTool.log(service='Database', level='debug', message="AUTN is: " + str(autn), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="RAND is: %s", messageArgs=(rand,), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="AUTN is: %s", messageArgs=(autn,), redisClient=self.redisMessaging)
             vector_dict['SIP_Authenticate'] = rand + autn
             vector_dict['xres'] = xres
             vector_dict['ck'] = ck
             vector_dict['ik'] = ik
-            self.Update_AuC(auc_id, sqn=key_data['sqn']+100)
             return vector_dict
 
         elif action == "aka":
             rand, autn, xres, ck, ik = S6a_crypt.generate_maa_vector(key_data['ki'], key_data['opc'], key_data['amf'], key_data['sqn'], kwargs['plmn'])
             vector_list = []
-            self.logTool.log(service='Database', level='debug', message="Generating " + str(kwargs['requested_vectors']) + " vectors for GSM use", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Generating %s vectors for GSM use", messageArgs=(kwargs['requested_vectors'],), redisClient=self.redisMessaging)
             while kwargs['requested_vectors'] != 0:
-                self.logTool.log(service='Database', level='debug', message="RAND is: " + str(rand), redisClient=self.redisMessaging)
-                self.logTool.log(service='Database', level='debug', message="AUTN is: " + str(autn), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="RAND is: %s", messageArgs=(rand,), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="AUTN is: %s", messageArgs=(autn,), redisClient=self.redisMessaging)
 
                 vector_dict['rand'] = binascii.hexlify(rand).decode("utf-8")
                 vector_dict['autn'] = binascii.hexlify(autn).decode("utf-8")
@@ -1646,7 +1906,6 @@ class Database:
 
                 kwargs['requested_vectors'] = kwargs['requested_vectors'] - 1
                 vector_list.append(vector_dict)
-            self.Update_AuC(auc_id, sqn=key_data['sqn']+100)
             return vector_list
 
         elif action == "2g3g":
@@ -1654,28 +1913,26 @@ class Database:
             key_data['amf'] = '0' + key_data['amf'][1:]
             vect = S6a_crypt.generate_2g3g_vector(key_data['ki'], key_data['opc'], key_data['amf'], int(key_data['sqn']), int(key_data['algo']))
             vector_list = []
-            self.logTool.log(service='Database', level='debug', message="Generating " + str(kwargs['requested_vectors']) + " vectors for GSM use", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Generating %s vectors for GSM use", messageArgs=(kwargs['requested_vectors'],), redisClient=self.redisMessaging)
             while kwargs['requested_vectors'] != 0:
                 kwargs['requested_vectors'] = kwargs['requested_vectors'] - 1
                 vector_list.append(vect)
-            self.Update_AuC(auc_id, sqn=key_data['sqn']+100)
             return vector_list
 
         elif action == "eap_aka":
             rand, xres, autn, mac_a, ak = S6a_crypt.generate_eap_aka_vector(key_data['ki'], key_data['opc'], key_data['amf'], key_data['sqn'], kwargs['plmn'])
-            self.logTool.log(service='Database', level='debug', message="RAND is: " + str(rand), redisClient=self.redisMessaging)
-            self.logTool.log(service='Database', level='debug', message="AUTN is: " + str(autn), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="RAND is: %s", messageArgs=(rand,), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="AUTN is: %s", messageArgs=(autn,), redisClient=self.redisMessaging)
             vector_dict['rand'] = binascii.hexlify(rand).decode("utf-8")
             vector_dict['autn'] = binascii.hexlify(autn).decode("utf-8")
             vector_dict['xres'] = binascii.hexlify(xres).decode("utf-8")
             vector_dict['mac'] = binascii.hexlify(mac_a).decode("utf-8")
             vector_dict['ak'] = binascii.hexlify(ak).decode("utf-8")
-            self.Update_AuC(auc_id, sqn=key_data['sqn']+100)
             return vector_dict
 
         elif action == "Digest-MD5" or action == "Digest-SHA-256" or action == "Digest-SHA-512-256":
-            self.logTool.log(service='Database', level='debug', message="Generating " + action + " Auth vectors", redisClient=self.redisMessaging)
-            self.logTool.log(service='Database', level='debug', message="key_data: " + str(key_data), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message=lambda: "Generating " + action + " Auth vectors", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="key_data: %s", messageArgs=(key_data,), redisClient=self.redisMessaging)
             nonce = uuid.uuid4().hex
             #nonce = "beef4d878f2642ed98afe491b943ca60"
             vector_dict['nonce'] = nonce
@@ -1685,37 +1942,56 @@ class Database:
             self.logTool.log(service='Database', level='error', message="Invalid action: " + str(action), redisClient=self.redisMessaging)
 
     def Get_APN(self, apn_id):
-        self.logTool.log(service='Database', level='debug', message="Getting APN " + str(apn_id), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-
+        self.logTool.log(service='Database', level='debug', message="Getting APN %s", messageArgs=(apn_id,), redisClient=self.redisMessaging)
         try:
-            result = session.query(APN).filter_by(apn_id=apn_id).one()
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        result = result.__dict__
-        result.pop('_sa_instance_state')
-        self.safe_close(session)
-        return result    
+            prefetchedApn = self.prefetchCache['apn'].get(int(apn_id))
+            if prefetchedApn is not None:
+                return dict(prefetchedApn)
+        except (TypeError, ValueError):
+            pass
+        with self.sessionScope() as session:
+
+            try:
+                result = session.query(APN).filter_by(apn_id=apn_id).one()
+            except Exception as E:
+                raise ValueError(E)
+            result = result.__dict__
+            result.pop('_sa_instance_state')
+            return result    
 
     def Get_APN_by_Name(self, apn):
-        self.logTool.log(service='Database', level='debug', message="Getting APN named " + str(apn), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()    
-        try:
-            result = session.query(APN).filter_by(apn=str(apn)).one()
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        result = result.__dict__
-        result.pop('_sa_instance_state')
-        self.safe_close(session)
-        return result 
+        self.logTool.log(service='Database', level='debug', message="Getting APN named %s", messageArgs=(apn,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
+            try:
+                result = session.query(APN).filter_by(apn=str(apn)).one()
+            except Exception as E:
+                raise ValueError(E)
+            result = result.__dict__
+            result.pop('_sa_instance_state')
+            return result 
+
+    def reserveSqn(self, auc_id, increment=100, propagate=True) -> dict:
+        """
+        Reads an AUC row from the primary, locking it, and advances its SQN by increment in the same transaction.
+        Returns the row with the SQN before it was advanced, for the caller to generate vectors with, so concurrent requests never share a SQN.
+        """
+        with self.sessionScope() as session:
+            result = session.query(AUC).filter_by(auc_id=auc_id).with_for_update().one()
+            key_data = {column.name: getattr(result, column.name) for column in AUC.__table__.columns}
+            result.sqn = key_data['sqn'] + increment
+            result.last_modified = datetime.datetime.now(tz=datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') + 'Z'
+            session.flush()
+            objectData = {column.name: getattr(result, column.name) for column in AUC.__table__.columns}
+            session.commit()
+        self.logTool.log(service='Database', level='debug', message="Advanced SQN of AuC %s from %s to %s", messageArgs=(auc_id, key_data['sqn'], objectData['sqn'],), redisClient=self.redisMessaging)
+        self.handleWebhook(objectData, 'PATCH')
+        if propagate and self.config['geored'].get('enabled', False) == True:
+            self.handleGeored({"auc_id": auc_id, "sqn": objectData['sqn']})
+        return key_data
 
     def Update_AuC(self, auc_id, sqn=1, propagate=True):
-        self.logTool.log(service='Database', level='debug', message=f"Updating AuC record for ID: {auc_id}", redisClient=self.redisMessaging)
-        self.logTool.log(service='Database', level='debug', message=self.UpdateObj(AUC, {'sqn': sqn}, auc_id, True), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Updating AuC record for ID: %s", messageArgs=(auc_id,), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(self.UpdateObj(AUC, {'sqn': sqn}, auc_id, True),), redisClient=self.redisMessaging)
 
         if propagate:
             if self.config['geored'].get('enabled', False) == True:
@@ -1724,281 +2000,395 @@ class Database:
                     "sqn": sqn,
                 }
                 self.handleGeored(aucBody)
-        self.logTool.log(service='Database', level='debug', message=f"Sent Geored update for AuC: {auc_id} with SQN {sqn}", redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Sent Geored update for AuC: %s with SQN %s", messageArgs=(auc_id, sqn,), redisClient=self.redisMessaging)
 
         return
 
     def update_hlr(self, imsi: str, role: IPAPeerRole, new_id: Optional[str]) -> str:
-        self.logTool.log(service='Database', level='debug', message=f"Updating GSUP record {role} for IMSI: {imsi} with new ID: {new_id}", redisClient=self.redisMessaging)
-        Session = sessionmaker(bind=self.engine)
-        session = Session()
-
-        try:
-            subscriber = session.query(SUBSCRIBER).filter_by(imsi=imsi).one()
-            field = None
-            if role == IPAPeerRole.SGSN:
-                field = "serving_sgsn"
-            elif role == IPAPeerRole.MSC:
-                field = "serving_msc"
-            elif role == "map_msc":
-                field = "serving_msc"
-            elif role == "map_vlr":
-                field = "serving_vlr"
-
-            old_id = getattr(subscriber, field)
-            setattr(subscriber, field, new_id)
-            setattr(subscriber, f"{field}_timestamp", datetime.datetime.now(tz=timezone.utc))
-            session.commit()
-            return old_id
-
-        except Exception as e:
-            self.safe_close(session)
-            raise ValueError(str(e))
+        self.logTool.log(service='Database', level='debug', message="Updating GSUP record %s for IMSI: %s with new ID: %s", messageArgs=(role, imsi, new_id,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
 
-
-    def update_subscriber_location(self, imsi: str, last_seen_eci=None, last_seen_enodeb_id=None, last_seen_cell_id=None, last_seen_tac=None, last_seen_mcc=None, last_seen_mnc=None, last_location_update_timestamp=None, propagate=True) -> str:
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-
-        try:
-            result = session.query(SUBSCRIBER).filter_by(imsi=imsi).one()
             try:
-                self.logTool.log(service='Database', level='debug', message=f"Updating Subscriber Location for {imsi}", redisClient=self.redisMessaging)
-                if last_seen_eci:
-                    result.last_seen_eci = last_seen_eci
-                if last_seen_enodeb_id:
-                    result.last_seen_enodeb_id = last_seen_enodeb_id
-                if last_seen_cell_id:
-                    result.last_seen_cell_id = last_seen_cell_id
-                if last_seen_tac:
-                    result.last_seen_tac = last_seen_tac
-                if last_seen_mcc:
-                    result.last_seen_mcc = last_seen_mcc
-                if last_seen_mnc:
-                    result.last_seen_mnc = last_seen_mnc
-                if last_location_update_timestamp:
-                    result.last_location_update_timestamp = last_location_update_timestamp
+                subscriber = session.query(SUBSCRIBER).filter_by(imsi=imsi).one()
+                field = None
+                if role == IPAPeerRole.SGSN:
+                    field = "serving_sgsn"
+                elif role == IPAPeerRole.MSC:
+                    field = "serving_msc"
+                elif role == "map_msc":
+                    field = "serving_msc"
+                elif role == "map_vlr":
+                    field = "serving_vlr"
+
+                old_id = getattr(subscriber, field)
+                setattr(subscriber, field, new_id)
+                setattr(subscriber, f"{field}_timestamp", datetime.datetime.now(tz=timezone.utc))
                 session.commit()
-                objectData = self.GetObj(SUBSCRIBER, result.subscriber_id)
-                self.handleWebhook(objectData, 'PATCH')
-            except:
-                pass
+                return old_id
 
-            if propagate == True:
-                if 'HSS' in self.config['geored'].get('sync_actions', []) and self.config['geored'].get('enabled', False) == True:
-                    self.logTool.log(service='Database', level='debug', message="Propagate Subscriber Location changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
-                    self.handleGeored({"imsi": str(imsi), "last_seen_eci": last_seen_eci, "last_seen_enodeb_id": last_seen_enodeb_id,
-                                        "last_seen_cell_id": last_seen_cell_id, "last_seen_tac": last_seen_tac, "last_seen_mcc": last_seen_mcc,
-                                        "last_seen_mnc": last_seen_mnc, "last_location_update_timestamp": last_location_update_timestamp})
-                else:
-                    self.logTool.log(service='Database', level='debug', message="Config does not allow sync of IMS events", redisClient=self.redisMessaging)
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="An error occurred, rolling back session: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            raise
-        finally:
-            self.safe_close(session)
+            except Exception as e:
+                raise ValueError(str(e))
 
-    def Update_Serving_MME(self, imsi, serving_mme, serving_mme_realm=None, serving_mme_peer=None, serving_mme_timestamp=None, propagate=True):
-        self.logTool.log(service='Database', level='debug', message="Updating Serving MME for sub " + str(imsi) + " to MME " + str(serving_mme), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        try:
-            result = session.query(SUBSCRIBER).filter_by(imsi=imsi).one()
-            if self.config['hss']['CancelLocationRequest_Enabled'] == True:
-                self.logTool.log(service='Database', level='debug', message="Evaluating if we should trigger sending a CLR.", redisClient=self.redisMessaging)
-                if result.serving_mme != None:
-                    serving_hss = str(result.serving_mme_peer).split(';',1)[1]
-                    serving_mme_peer = str(result.serving_mme_peer).split(';',1)[0]
-                    self.logTool.log(service='Database', level='debug', message="Subscriber is currently served by serving_mme: " + str(result.serving_mme) + " at realm " + str(result.serving_mme_realm) + " through Diameter peer " + str(result.serving_mme_peer), redisClient=self.redisMessaging)
-                    self.logTool.log(service='Database', level='debug', message="Subscriber is now       served by serving_mme: " + str(serving_mme) + " at realm " + str(serving_mme_realm) + " through Diameter peer " + str(serving_mme_peer), redisClient=self.redisMessaging)
-                    #Evaluate if we need to send a CLR to the old MME
-                    if str(result.serving_mme) == str(serving_mme):
-                        self.logTool.log(service='Database', level='debug', message="This MME is unchanged (" + str(serving_mme) + ") - so no need to send a CLR", redisClient=self.redisMessaging)
-                    elif (str(result.serving_mme) != str(serving_mme)):
-                        self.logTool.log(service='Database', level='debug', message="There is a difference in serving MME, old MME is '" + str(result.serving_mme) + "' new MME is '" + str(serving_mme) + "' - We need to trigger sending a CLR", redisClient=self.redisMessaging)
-                        if serving_hss != self.config['hss']['OriginHost']:
-                            self.logTool.log(service='Database', level='debug', message="This subscriber is not served by this HSS it is served by HSS at " + serving_hss + " - We need to trigger sending a CLR on " + str(serving_hss), redisClient=self.redisMessaging)
-                            URL = 'http://' + serving_hss + '.' + self.config['hss']['OriginRealm'] + ':8080/push/clr/' + str(imsi)
+
+    def parseUtcTimestamp(self, timestamp) -> Optional[datetime.datetime]:
+        """
+        Returns a stored or ISO 8601 timestamp as an aware datetime, treating naive timestamps as UTC, or None.
+        """
+        if not timestamp or timestamp == 'None':
+            return None
+        if isinstance(timestamp, str):
+            timestamp = datetime.datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp
+
+    def storedWriteIsNewer(self, storedTimestamp, deferredTimestamp) -> bool:
+        storedTimestamp = self.parseUtcTimestamp(storedTimestamp)
+        deferredTimestamp = self.parseUtcTimestamp(deferredTimestamp)
+        return storedTimestamp is not None and deferredTimestamp is not None and storedTimestamp > deferredTimestamp
+
+    def writeDeferredLocationUpdates(self, deferredUpdates: list) -> int:
+        """
+        Writes updates deferred by the location update buffer, as (method, arguments), in one transaction, then queues their webhooks
+        and geored messages in one redis pipeline each. Returns the number of updates written.
+        An update is skipped if its record holds a newer write. A serving node refresh whose record now holds another serving node,
+        from an older write (for example one applied through geored), is a change after all: it is written through with its method
+        once the batch has committed, so a CLR is evaluated as for any change. A PGW session refresh is skipped if the session has ended.
+        """
+        imsis = {str(arguments['imsi']) for method, arguments in deferredUpdates}
+        webhooks = []
+        georedBodies = {'HSS': [], 'PCRF': []}
+        writeThrough = []
+        written = 0
+        with self.sessionScope() as session:
+            subscribers = {subscriber.imsi: subscriber for subscriber in session.query(SUBSCRIBER).filter(SUBSCRIBER.imsi.in_(imsis)).with_for_update().all()}
+            servingApns = {}
+            if any(method == 'Update_Serving_APN' for method, arguments in deferredUpdates) and subscribers:
+                servingApnRows = session.query(SERVING_APN).filter(SERVING_APN.subscriber_id.in_([subscriber.subscriber_id for subscriber in subscribers.values()])).with_for_update().all()
+                apnNames = dict(session.query(APN.apn_id, APN.apn).filter(APN.apn_id.in_({servingApn.apn for servingApn in servingApnRows})).all()) if servingApnRows else {}
+                for servingApn in servingApnRows:
+                    servingApns[(servingApn.subscriber_id, str(apnNames.get(servingApn.apn)).lower())] = servingApn
+
+            changedRows = []
+            for method, arguments in deferredUpdates:
+                subscriber = subscribers.get(str(arguments['imsi']))
+                if subscriber is None:
+                    self.logTool.log(service='Database', level='debug', message="Skipping deferred %s for unknown subscriber %s", messageArgs=(method, arguments['imsi'],), redisClient=self.redisMessaging)
+                    continue
+                if method == 'update_subscriber_location':
+                    if self.storedWriteIsNewer(subscriber.last_location_update_timestamp, arguments.get('last_location_update_timestamp')):
+                        self.logTool.log(service='Database', level='debug', message="Skipping deferred location update for %s, a newer location is on record", messageArgs=(arguments['imsi'],), redisClient=self.redisMessaging)
+                        continue
+                    for field in ['last_seen_eci', 'last_seen_enodeb_id', 'last_seen_cell_id', 'last_seen_tac', 'last_seen_mcc', 'last_seen_mnc']:
+                        if arguments.get(field):
+                            setattr(subscriber, field, arguments[field])
+                    if arguments.get('last_location_update_timestamp'):
+                        subscriber.last_location_update_timestamp = self.parseUtcTimestamp(arguments['last_location_update_timestamp'])
+                    changedRows.append(subscriber)
+                    if arguments.get('propagate', True):
+                        georedBodies['HSS'].append({field: arguments.get(field) for field in ['imsi', 'last_seen_eci', 'last_seen_enodeb_id', 'last_seen_cell_id', 'last_seen_tac', 'last_seen_mcc', 'last_seen_mnc', 'last_location_update_timestamp']})
+                elif method == 'Update_Serving_MME':
+                    if (subscriber.serving_mme, subscriber.serving_mme_realm, subscriber.serving_mme_peer) != (arguments['serving_mme'], arguments.get('serving_mme_realm'), arguments.get('serving_mme_peer')):
+                        if self.storedWriteIsNewer(subscriber.serving_mme_timestamp, arguments.get('serving_mme_timestamp')):
+                            self.logTool.log(service='Database', level='debug', message="Skipping deferred refresh of serving MME %s for %s, a newer serving MME is on record", messageArgs=(arguments['serving_mme'], arguments['imsi'],), redisClient=self.redisMessaging)
                         else:
-                            self.logTool.log(service='Database', level='debug', message="This subscriber is served by this HSS we need to send a CLR to old MME from this HSS", redisClient=self.redisMessaging)
-                        
-                        URL = 'http://' + serving_hss + '.' + self.config['hss']['OriginRealm'] + ':8080/push/clr/' + str(imsi)
-                        self.logTool.log(service='Database', level='debug', message="Sending CLR to API at " + str(URL), redisClient=self.redisMessaging)
+                            writeThrough.append((method, arguments))
+                        continue
+                    subscriber.serving_mme_timestamp = self.parseUtcTimestamp(arguments.get('serving_mme_timestamp')) or datetime.datetime.now(tz=timezone.utc)
+                    changedRows.append(subscriber)
+                    if arguments.get('propagate', True):
+                        georedBodies['HSS'].append({'imsi': str(arguments['imsi']), 'serving_mme': subscriber.serving_mme, 'serving_mme_realm': subscriber.serving_mme_realm,
+                                                    'serving_mme_peer': subscriber.serving_mme_peer, 'serving_mme_timestamp': subscriber.serving_mme_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')})
+                elif method == 'Update_Serving_APN':
+                    servingApn = servingApns.get((subscriber.subscriber_id, str(arguments['apn']).lower()))
+                    if servingApn is None:
+                        self.logTool.log(service='Database', level='debug', message="Skipping deferred refresh of PCRF session %s for %s, the session has ended", messageArgs=(arguments['pcrf_session_id'], arguments['imsi'],), redisClient=self.redisMessaging)
+                        continue
+                    if (servingApn.pcrf_session_id, servingApn.serving_pgw, servingApn.subscriber_routing) != (str(arguments['pcrf_session_id']), str(arguments['serving_pgw']), str(arguments['subscriber_routing'])):
+                        if self.storedWriteIsNewer(servingApn.serving_pgw_timestamp, arguments.get('serving_pgw_timestamp')):
+                            self.logTool.log(service='Database', level='debug', message="Skipping deferred refresh of PCRF session %s for %s, a newer session is on record", messageArgs=(arguments['pcrf_session_id'], arguments['imsi'],), redisClient=self.redisMessaging)
+                        else:
+                            writeThrough.append((method, arguments))
+                        continue
+                    servingApn.serving_pgw_timestamp = self.parseUtcTimestamp(arguments.get('serving_pgw_timestamp')) or datetime.datetime.now(tz=timezone.utc)
+                    servingApn.serving_pgw_realm = str(arguments.get('serving_pgw_realm'))
+                    servingApn.serving_pgw_peer = str(arguments.get('serving_pgw_peer'))
+                    changedRows.append(servingApn)
+                    if arguments.get('propagate', True):
+                        georedBodies['PCRF'].append({'imsi': str(arguments['imsi']), 'serving_apn': arguments['apn'], 'pcrf_session_id': arguments['pcrf_session_id'],
+                                                     'serving_pgw': arguments['serving_pgw'], 'serving_pgw_realm': arguments.get('serving_pgw_realm'), 'serving_pgw_peer': arguments.get('serving_pgw_peer'),
+                                                     'serving_pgw_timestamp': servingApn.serving_pgw_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'), 'subscriber_routing': arguments['subscriber_routing']})
+                written += 1
 
-                        clrBody = {
-                            "imsi": str(imsi), 
-                            "DestinationRealm": result.serving_mme_realm,
-                            "DestinationHost": result.serving_mme,
-                            "cancellationType": 2,
-                            "diameterPeer": serving_mme_peer,
-                            }
-                        
-                        self.logTool.log(service='Database', level='debug', message="Pushing CLR to API on " + str(URL) + " with JSON body: " + str(clrBody), redisClient=self.redisMessaging)
-                        transaction_id = str(uuid.uuid4())
-                        self.handleGeored(clrBody, asymmetric=True, asymmetricUrls=[URL])
-                else:
-                    #No currently serving MME - No action to take
-                    self.logTool.log(service='Database', level='debug', message="No currently serving MME - No need to send CLR", redisClient=self.redisMessaging)
+            session.flush()
+            for changedRow in {id(changedRow): changedRow for changedRow in changedRows}.values():
+                webhooks.append(({column.name: getattr(changedRow, column.name) for column in changedRow.__table__.columns}, 'PATCH'))
+            session.commit()
 
-            if type(serving_mme) == str:
-                self.logTool.log(service='Database', level='debug', message="Updating serving MME & Timestamp", redisClient=self.redisMessaging)
-                result.serving_mme = serving_mme
+        for imsi in imsis:
+            self.invalidatePrefetchCache(SUBSCRIBER, imsi=imsi)
+        self.handleWebhookBatch(webhooks)
+        if self.georedEnabled:
+            for syncAction, georedBodyList in georedBodies.items():
+                if syncAction in self.config.get('geored', {}).get('sync_actions', []):
+                    self.handleGeoredBatch(georedBodyList)
+
+        for method, arguments in writeThrough:
+            self.logTool.log(service='Database', level='debug', message="Writing through deferred %s for %s, its serving node was changed by an older write", messageArgs=(method, arguments['imsi'],), redisClient=self.redisMessaging)
+            getattr(self, method)(**arguments)
+            written += 1
+        return written
+
+    def update_subscriber_location(self, imsi: str, last_seen_eci=None, last_seen_enodeb_id=None, last_seen_cell_id=None, last_seen_tac=None, last_seen_mcc=None, last_seen_mnc=None, last_location_update_timestamp=None, propagate=True, writeBehind=False) -> str:
+        """
+        With writeBehind, the update is deferred to the location update buffer, and written by writeDeferredLocationUpdates.
+        """
+        if self.locationBuffer is not None:
+            if self.locationBuffer.defer('update_subscriber_location', (str(imsi),), merge=True, deferrable=writeBehind, arguments={
+                    'imsi': str(imsi), 'last_seen_eci': last_seen_eci, 'last_seen_enodeb_id': last_seen_enodeb_id, 'last_seen_cell_id': last_seen_cell_id,
+                    'last_seen_tac': last_seen_tac, 'last_seen_mcc': last_seen_mcc, 'last_seen_mnc': last_seen_mnc,
+                    'last_location_update_timestamp': last_location_update_timestamp or datetime.datetime.now(tz=timezone.utc).isoformat(), 'propagate': propagate}):
+                return
+        self.invalidatePrefetchCache(SUBSCRIBER, imsi=imsi)
+        with self.sessionScope() as session:
+
+            try:
+                result = session.query(SUBSCRIBER).filter_by(imsi=imsi).one()
                 try:
-                    if serving_mme_timestamp != None and serving_mme_timestamp != 'None':
-                        result.serving_mme_timestamp = datetime.strptime(serving_mme_timestamp, '%Y-%m-%dT%H:%M:%SZ')
-                        result.serving_mme_timestamp = result.serving_mme_timestamp.replace(tzinfo=timezone.utc)
-                        serving_mme_timestamp_string = result.serving_mme_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+                    self.logTool.log(service='Database', level='debug', message="Updating Subscriber Location for %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                    if last_seen_eci:
+                        result.last_seen_eci = last_seen_eci
+                    if last_seen_enodeb_id:
+                        result.last_seen_enodeb_id = last_seen_enodeb_id
+                    if last_seen_cell_id:
+                        result.last_seen_cell_id = last_seen_cell_id
+                    if last_seen_tac:
+                        result.last_seen_tac = last_seen_tac
+                    if last_seen_mcc:
+                        result.last_seen_mcc = last_seen_mcc
+                    if last_seen_mnc:
+                        result.last_seen_mnc = last_seen_mnc
+                    if last_location_update_timestamp:
+                        if isinstance(last_location_update_timestamp, str):
+                            result.last_location_update_timestamp = datetime.datetime.fromisoformat(last_location_update_timestamp.replace('Z', '+00:00'))
+                        else:
+                            result.last_location_update_timestamp = last_location_update_timestamp
+                    session.commit()
+                    objectData = self.GetObj(SUBSCRIBER, result.subscriber_id)
+                    self.handleWebhook(objectData, 'PATCH')
+                except:
+                    pass
+
+                if propagate == True:
+                    if 'HSS' in self.config['geored'].get('sync_actions', []) and self.config['geored'].get('enabled', False) == True:
+                        self.logTool.log(service='Database', level='debug', message="Propagate Subscriber Location changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
+                        self.handleGeored({"imsi": str(imsi), "last_seen_eci": last_seen_eci, "last_seen_enodeb_id": last_seen_enodeb_id,
+                                            "last_seen_cell_id": last_seen_cell_id, "last_seen_tac": last_seen_tac, "last_seen_mcc": last_seen_mcc,
+                                            "last_seen_mnc": last_seen_mnc, "last_location_update_timestamp": last_location_update_timestamp})
                     else:
+                        self.logTool.log(service='Database', level='debug', message="Config does not allow sync of IMS events", redisClient=self.redisMessaging)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="An error occurred, rolling back session: " + str(E), redisClient=self.redisMessaging)
+                raise
+
+    def Update_Serving_MME(self, imsi, serving_mme, serving_mme_realm=None, serving_mme_peer=None, serving_mme_timestamp=None, propagate=True, writeBehind=False):
+        """
+        With writeBehind, a refresh of the MME already on record is deferred to the location update buffer, and written by writeDeferredLocationUpdates.
+        """
+        self.logTool.log(service='Database', level='debug', message="Updating Serving MME for sub %s to MME %s", messageArgs=(imsi, serving_mme,), redisClient=self.redisMessaging)
+        if self.locationBuffer is not None:
+            if self.locationBuffer.defer('Update_Serving_MME', (str(imsi),), servingNode=(serving_mme, serving_mme_realm, serving_mme_peer), deferrable=writeBehind, arguments={
+                    'imsi': str(imsi), 'serving_mme': serving_mme, 'serving_mme_realm': serving_mme_realm, 'serving_mme_peer': serving_mme_peer,
+                    'serving_mme_timestamp': serving_mme_timestamp or datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'), 'propagate': propagate}):
+                return
+        self.invalidatePrefetchCache(SUBSCRIBER, imsi=imsi)
+        with self.sessionScope() as session:
+            try:
+                result = session.query(SUBSCRIBER).filter_by(imsi=imsi).one()
+                if self.config['hss']['CancelLocationRequest_Enabled'] == True:
+                    self.logTool.log(service='Database', level='debug', message="Evaluating if we should trigger sending a CLR.", redisClient=self.redisMessaging)
+                    if result.serving_mme != None:
+                        serving_hss = str(result.serving_mme_peer).split(';',1)[1]
+                        serving_mme_peer = str(result.serving_mme_peer).split(';',1)[0]
+                        self.logTool.log(service='Database', level='debug', message="Subscriber is currently served by serving_mme: %s at realm %s through Diameter peer %s", messageArgs=(result.serving_mme, result.serving_mme_realm, result.serving_mme_peer,), redisClient=self.redisMessaging)
+                        self.logTool.log(service='Database', level='debug', message="Subscriber is now       served by serving_mme: %s at realm %s through Diameter peer %s", messageArgs=(serving_mme, serving_mme_realm, serving_mme_peer,), redisClient=self.redisMessaging)
+                        #Evaluate if we need to send a CLR to the old MME
+                        if str(result.serving_mme) == str(serving_mme):
+                            self.logTool.log(service='Database', level='debug', message="This MME is unchanged (%s) - so no need to send a CLR", messageArgs=(serving_mme,), redisClient=self.redisMessaging)
+                        elif (str(result.serving_mme) != str(serving_mme)):
+                            self.logTool.log(service='Database', level='debug', message="There is a difference in serving MME, old MME is '%s' new MME is '%s' - We need to trigger sending a CLR", messageArgs=(result.serving_mme, serving_mme,), redisClient=self.redisMessaging)
+                            if serving_hss != self.config['hss']['OriginHost']:
+                                self.logTool.log(service='Database', level='debug', message=lambda: "This subscriber is not served by this HSS it is served by HSS at " + serving_hss + " - We need to trigger sending a CLR on " + str(serving_hss), redisClient=self.redisMessaging)
+                                URL = 'http://' + serving_hss + '.' + self.config['hss']['OriginRealm'] + ':8080/push/clr/' + str(imsi)
+                            else:
+                                self.logTool.log(service='Database', level='debug', message="This subscriber is served by this HSS we need to send a CLR to old MME from this HSS", redisClient=self.redisMessaging)
+                        
+                            URL = 'http://' + serving_hss + '.' + self.config['hss']['OriginRealm'] + ':8080/push/clr/' + str(imsi)
+                            self.logTool.log(service='Database', level='debug', message="Sending CLR to API at %s", messageArgs=(URL,), redisClient=self.redisMessaging)
+
+                            clrBody = {
+                                "imsi": str(imsi), 
+                                "DestinationRealm": result.serving_mme_realm,
+                                "DestinationHost": result.serving_mme,
+                                "cancellationType": 2,
+                                "diameterPeer": serving_mme_peer,
+                                }
+                        
+                            self.logTool.log(service='Database', level='debug', message="Pushing CLR to API on %s with JSON body: %s", messageArgs=(URL, clrBody,), redisClient=self.redisMessaging)
+                            transaction_id = str(uuid.uuid4())
+                            self.handleGeored(clrBody, asymmetric=True, asymmetricUrls=[URL])
+                    else:
+                        #No currently serving MME - No action to take
+                        self.logTool.log(service='Database', level='debug', message="No currently serving MME - No need to send CLR", redisClient=self.redisMessaging)
+
+                if type(serving_mme) == str:
+                    self.logTool.log(service='Database', level='debug', message="Updating serving MME & Timestamp", redisClient=self.redisMessaging)
+                    result.serving_mme = serving_mme
+                    try:
+                        if serving_mme_timestamp != None and serving_mme_timestamp != 'None':
+                            result.serving_mme_timestamp = datetime.datetime.strptime(serving_mme_timestamp, '%Y-%m-%dT%H:%M:%SZ')
+                            result.serving_mme_timestamp = result.serving_mme_timestamp.replace(tzinfo=timezone.utc)
+                            serving_mme_timestamp_string = result.serving_mme_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+                        else:
+                            result.serving_mme_timestamp = datetime.datetime.now(tz=timezone.utc)
+                            serving_mme_timestamp_string = result.serving_mme_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+                    except Exception as e:
                         result.serving_mme_timestamp = datetime.datetime.now(tz=timezone.utc)
                         serving_mme_timestamp_string = result.serving_mme_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                except Exception as e:
-                    result.serving_mme_timestamp = datetime.datetime.now(tz=timezone.utc)
-                    serving_mme_timestamp_string = result.serving_mme_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                result.serving_mme_realm = serving_mme_realm
-                result.serving_mme_peer = serving_mme_peer
-            else:
-                #Clear values
-                self.logTool.log(service='Database', level='debug', message="Clearing serving MME", redisClient=self.redisMessaging)
-                result.serving_mme = None
-                result.serving_mme_timestamp = None
-                result.serving_mme_realm = None
-                result.serving_mme_peer = None
-                serving_mme_timestamp_string = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                    result.serving_mme_realm = serving_mme_realm
+                    result.serving_mme_peer = serving_mme_peer
+                else:
+                    #Clear values
+                    self.logTool.log(service='Database', level='debug', message="Clearing serving MME", redisClient=self.redisMessaging)
+                    result.serving_mme = None
+                    result.serving_mme_timestamp = None
+                    result.serving_mme_realm = None
+                    result.serving_mme_peer = None
+                    serving_mme_timestamp_string = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
 
-            session.commit()
-            objectData = self.GetObj(SUBSCRIBER, result.subscriber_id)
-            self.handleWebhook(objectData, 'PATCH')
+                session.commit()
+                objectData = self.GetObj(SUBSCRIBER, result.subscriber_id)
+                self.handleWebhook(objectData, 'PATCH')
 
-            #Sync state change with geored
-            if propagate == True:
-                if 'HSS' in self.config['geored'].get('sync_actions', []) and self.config['geored'].get('enabled', False) == True:
-                    self.logTool.log(service='Database', level='debug', message="Propagate MME changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
-                    self.handleGeored({
-                        "imsi": str(imsi), 
-                        "serving_mme": result.serving_mme, 
-                        "serving_mme_realm": result.serving_mme_realm, 
-                        "serving_mme_peer": result.serving_mme_peer,
-                        "serving_mme_timestamp": serving_mme_timestamp_string
-                        })
-                else:
-                    self.logTool.log(service='Database', level='debug', message="Config does not allow sync of HSS events", redisClient=self.redisMessaging)
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="Error occurred in Update_Serving_MME: " + str(E), redisClient=self.redisMessaging)
-        finally:
-            self.safe_close(session)
+                #Sync state change with geored
+                if propagate == True:
+                    if 'HSS' in self.config['geored'].get('sync_actions', []) and self.config['geored'].get('enabled', False) == True:
+                        self.logTool.log(service='Database', level='debug', message="Propagate MME changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
+                        self.handleGeored({
+                            "imsi": str(imsi), 
+                            "serving_mme": result.serving_mme, 
+                            "serving_mme_realm": result.serving_mme_realm, 
+                            "serving_mme_peer": result.serving_mme_peer,
+                            "serving_mme_timestamp": serving_mme_timestamp_string
+                            })
+                    else:
+                        self.logTool.log(service='Database', level='debug', message="Config does not allow sync of HSS events", redisClient=self.redisMessaging)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Error occurred in Update_Serving_MME: " + str(E), redisClient=self.redisMessaging)
 
     def Update_Proxy_CSCF(self, imsi, proxy_cscf, pcscf_realm=None, pcscf_peer=None, pcscf_timestamp=None, pcscf_active_session=None, propagate=True):
-        self.logTool.log(service='Database', level='debug', message="Update_Proxy_CSCF for sub " + str(imsi) + " to pcscf " + str(proxy_cscf) + " with realm " + str(pcscf_realm) + " and peer " + str(pcscf_peer) + " for session id " + str(pcscf_active_session), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        self.logTool.log(service='Database', level='debug', message="Update_Proxy_CSCF for sub %s to pcscf %s with realm %s and peer %s for session id %s", messageArgs=(imsi, proxy_cscf, pcscf_realm, pcscf_peer, pcscf_active_session,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
 
-        try:
-            result = session.query(IMS_SUBSCRIBER).filter_by(imsi=imsi).one()
             try:
-                assert(type(proxy_cscf) == str)
-                assert(len(proxy_cscf) > 0)
-                self.logTool.log(service='Database', level='debug', message="Setting Proxy CSCF", redisClient=self.redisMessaging)
-                #Strip duplicate SIP prefix before storing
-                proxy_cscf = proxy_cscf.replace("sip:sip:", "sip:")
-                result.pcscf = proxy_cscf
-                result.pcscf_active_session = pcscf_active_session
+                result = session.query(IMS_SUBSCRIBER).filter_by(imsi=imsi).one()
                 try:
-                    if pcscf_timestamp != None and pcscf_timestamp != 'None':
-                        result.pcscf_timestamp = datetime.strptime(pcscf_timestamp, '%Y-%m-%dT%H:%M:%SZ')
-                        result.pcscf_timestamp = result.pcscf_timestamp.replace(tzinfo=timezone.utc)
-                        pcscf_timestamp_string = result.pcscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                    else:
+                    assert(type(proxy_cscf) == str)
+                    assert(len(proxy_cscf) > 0)
+                    self.logTool.log(service='Database', level='debug', message="Setting Proxy CSCF", redisClient=self.redisMessaging)
+                    #Strip duplicate SIP prefix before storing
+                    proxy_cscf = proxy_cscf.replace("sip:sip:", "sip:")
+                    result.pcscf = proxy_cscf
+                    result.pcscf_active_session = pcscf_active_session
+                    try:
+                        if pcscf_timestamp != None and pcscf_timestamp != 'None':
+                            result.pcscf_timestamp = datetime.strptime(pcscf_timestamp, '%Y-%m-%dT%H:%M:%SZ')
+                            result.pcscf_timestamp = result.pcscf_timestamp.replace(tzinfo=timezone.utc)
+                            pcscf_timestamp_string = result.pcscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+                        else:
+                            result.pcscf_timestamp = datetime.datetime.now(tz=timezone.utc)
+                            pcscf_timestamp_string = result.pcscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+                    except Exception as e:
                         result.pcscf_timestamp = datetime.datetime.now(tz=timezone.utc)
                         pcscf_timestamp_string = result.pcscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                except Exception as e:
-                    result.pcscf_timestamp = datetime.datetime.now(tz=timezone.utc)
-                    pcscf_timestamp_string = result.pcscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                result.pcscf_realm = pcscf_realm
-                result.pcscf_peer = str(pcscf_peer)
-            except:
-                #Clear values
-                self.logTool.log(service='Database', level='debug', message="Clearing Proxy CSCF", redisClient=self.redisMessaging)
-                result.pcscf = None
-                result.pcscf_timestamp = None
-                result.pcscf_realm = None
-                result.pcscf_peer = None
-                result.pcscf_active_session = None
-                pcscf_timestamp_string = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                    result.pcscf_realm = pcscf_realm
+                    result.pcscf_peer = str(pcscf_peer)
+                except:
+                    #Clear values
+                    self.logTool.log(service='Database', level='debug', message="Clearing Proxy CSCF", redisClient=self.redisMessaging)
+                    result.pcscf = None
+                    result.pcscf_timestamp = None
+                    result.pcscf_realm = None
+                    result.pcscf_peer = None
+                    result.pcscf_active_session = None
+                    pcscf_timestamp_string = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
 
-            session.commit()
-            objectData = self.GetObj(IMS_SUBSCRIBER, result.ims_subscriber_id)
-            self.handleWebhook(objectData, 'PATCH')
+                session.commit()
+                objectData = self.GetObj(IMS_SUBSCRIBER, result.ims_subscriber_id)
+                self.handleWebhook(objectData, 'PATCH')
 
-            #Sync state change with geored
-            if propagate == True:
-                if 'IMS' in self.config['geored']['sync_actions'] and self.georedEnabled == True:
-                    self.logTool.log(service='Database', level='debug', message="Propagate IMS changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
-                    self.handleGeored({"imsi": str(imsi), "pcscf": result.pcscf, "pcscf_realm": result.pcscf_realm, "pcscf_timestamp": pcscf_timestamp_string, "pcscf_peer": result.pcscf_peer, "pcscf_active_session": pcscf_active_session})
-                else:
-                    self.logTool.log(service='Database', level='debug', message="Config does not allow sync of IMS events", redisClient=self.redisMessaging)
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="An error occurred, rolling back session: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            raise
-        finally:
-            self.safe_close(session)
+                #Sync state change with geored
+                if propagate == True:
+                    if 'IMS' in self.config['geored']['sync_actions'] and self.georedEnabled == True:
+                        self.logTool.log(service='Database', level='debug', message="Propagate IMS changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
+                        self.handleGeored({"imsi": str(imsi), "pcscf": result.pcscf, "pcscf_realm": result.pcscf_realm, "pcscf_timestamp": pcscf_timestamp_string, "pcscf_peer": result.pcscf_peer, "pcscf_active_session": pcscf_active_session})
+                    else:
+                        self.logTool.log(service='Database', level='debug', message="Config does not allow sync of IMS events", redisClient=self.redisMessaging)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="An error occurred, rolling back session: " + str(E), redisClient=self.redisMessaging)
+                raise
 
     def Update_Serving_CSCF(self, imsi, serving_cscf, scscf_realm=None, scscf_peer=None, scscf_timestamp=None, propagate=True):
-        self.logTool.log(service='Database', level='debug', message="Update_Serving_CSCF for sub " + str(imsi) + " to SCSCF " + str(serving_cscf) + " with realm " + str(scscf_realm) + " and peer " + str(scscf_peer), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        self.logTool.log(service='Database', level='debug', message="Update_Serving_CSCF for sub %s to SCSCF %s with realm %s and peer %s", messageArgs=(imsi, serving_cscf, scscf_realm, scscf_peer,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
 
-        try:
-            result = session.query(IMS_SUBSCRIBER).filter_by(imsi=imsi).one()
             try:
-                assert(type(serving_cscf) == str)
-                assert(len(serving_cscf) > 0)
-                self.logTool.log(service='Database', level='debug', message="Setting serving CSCF", redisClient=self.redisMessaging)
-                #Strip duplicate SIP prefix before storing
-                serving_cscf = serving_cscf.replace("sip:sip:", "sip:")
-                result.scscf = serving_cscf
+                result = session.query(IMS_SUBSCRIBER).filter_by(imsi=imsi).one()
                 try:
-                    if scscf_timestamp != None and scscf_timestamp != 'None':
-                        result.scscf_timestamp = datetime.strptime(scscf_timestamp, '%Y-%m-%dT%H:%M:%SZ')
-                        result.scscf_timestamp = result.scscf_timestamp.replace(tzinfo=timezone.utc)
-                        scscf_timestamp_string = result.scscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                    else:
+                    assert(type(serving_cscf) == str)
+                    assert(len(serving_cscf) > 0)
+                    self.logTool.log(service='Database', level='debug', message="Setting serving CSCF", redisClient=self.redisMessaging)
+                    #Strip duplicate SIP prefix before storing
+                    serving_cscf = serving_cscf.replace("sip:sip:", "sip:")
+                    result.scscf = serving_cscf
+                    try:
+                        if scscf_timestamp != None and scscf_timestamp != 'None':
+                            result.scscf_timestamp = datetime.strptime(scscf_timestamp, '%Y-%m-%dT%H:%M:%SZ')
+                            result.scscf_timestamp = result.scscf_timestamp.replace(tzinfo=timezone.utc)
+                            scscf_timestamp_string = result.scscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+                        else:
+                            result.scscf_timestamp = datetime.datetime.now(tz=timezone.utc)
+                            scscf_timestamp_string = result.scscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+                    except Exception as e:
                         result.scscf_timestamp = datetime.datetime.now(tz=timezone.utc)
                         scscf_timestamp_string = result.scscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                except Exception as e:
-                    result.scscf_timestamp = datetime.datetime.now(tz=timezone.utc)
-                    scscf_timestamp_string = result.scscf_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
-                result.scscf_realm = scscf_realm
-                result.scscf_peer = str(scscf_peer)
-            except:
-                #Clear values
-                self.logTool.log(service='Database', level='debug', message="Clearing serving CSCF", redisClient=self.redisMessaging)
-                result.scscf = None
-                result.scscf_timestamp = None
-                result.scscf_realm = None
-                result.scscf_peer = None
-                scscf_timestamp_string = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                    result.scscf_realm = scscf_realm
+                    result.scscf_peer = str(scscf_peer)
+                except:
+                    #Clear values
+                    self.logTool.log(service='Database', level='debug', message="Clearing serving CSCF", redisClient=self.redisMessaging)
+                    result.scscf = None
+                    result.scscf_timestamp = None
+                    result.scscf_realm = None
+                    result.scscf_peer = None
+                    scscf_timestamp_string = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
             
-            session.commit()
-            objectData = self.GetObj(IMS_SUBSCRIBER, result.ims_subscriber_id)
-            self.handleWebhook(objectData, 'PATCH')
+                session.commit()
+                objectData = self.GetObj(IMS_SUBSCRIBER, result.ims_subscriber_id)
+                self.handleWebhook(objectData, 'PATCH')
 
-            #Sync state change with geored
-            if propagate == True:
-                if 'IMS' in self.config['geored']['sync_actions'] and self.georedEnabled == True:
-                    self.logTool.log(service='Database', level='debug', message="Propagate IMS changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
-                    self.handleGeored({"imsi": str(imsi), "scscf": result.scscf, "scscf_realm": result.scscf_realm, "scscf_timestamp": scscf_timestamp_string, "scscf_peer": result.scscf_peer})
-                else:
-                    self.logTool.log(service='Database', level='debug', message="Config does not allow sync of IMS events", redisClient=self.redisMessaging)
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="An error occurred, rolling back session: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            raise
-        finally:
-            self.safe_close(session)
+                #Sync state change with geored
+                if propagate == True:
+                    if 'IMS' in self.config['geored']['sync_actions'] and self.georedEnabled == True:
+                        self.logTool.log(service='Database', level='debug', message="Propagate IMS changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
+                        self.handleGeored({"imsi": str(imsi), "scscf": result.scscf, "scscf_realm": result.scscf_realm, "scscf_timestamp": scscf_timestamp_string, "scscf_peer": result.scscf_peer})
+                    else:
+                        self.logTool.log(service='Database', level='debug', message="Config does not allow sync of IMS events", redisClient=self.redisMessaging)
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="An error occurred, rolling back session: " + str(E), redisClient=self.redisMessaging)
+                raise
 
-    def Update_Serving_APN(self, imsi, apn, pcrf_session_id, serving_pgw, subscriber_routing, serving_pgw_realm=None, serving_pgw_peer=None, serving_pgw_timestamp=None, propagate=True):
+    def Update_Serving_APN(self, imsi, apn, pcrf_session_id, serving_pgw, subscriber_routing, serving_pgw_realm=None, serving_pgw_peer=None, serving_pgw_timestamp=None, propagate=True, writeBehind=False):
         """
         (1). A given UE should only ever have one IP per PDN connection.
         (2). If a UE has no active PDN connections, it's treated as no longer being served and associated data is removed from the SERVING_APN object.
@@ -2014,12 +2404,22 @@ class Database:
             - This prevents duplicates from existing in the database, which may occur from UEs that detach where signalling was never provided.
 
           - The SERVING_APN is updated with the provided information, or deleted if serving_pgw is None.
+
+        With writeBehind, a refresh of the PGW session already on record is deferred to the location update buffer, and written by writeDeferredLocationUpdates.
+        With the session store enabled, the SERVING_APN is stored in redis instead, and written to the database in the background.
         """
 
-        self.logTool.log(service='Database', level='debug', message="Called Update_Serving_APN() for imsi " + str(imsi) + " with APN " + str(apn), redisClient=self.redisMessaging)
-        self.logTool.log(service='Database', level='debug', message="PCRF Session ID " + str(pcrf_session_id) + " and serving PGW " + str(serving_pgw) + " and subscriber routing " + str(subscriber_routing), redisClient=self.redisMessaging)
-        self.logTool.log(service='Database', level='debug', message="Serving PGW Realm is: " + str(serving_pgw_realm) + " and peer is: " + str(serving_pgw_peer), redisClient=self.redisMessaging)
-        self.logTool.log(service='Database', level='debug', message="subscriber_routing: " + str(subscriber_routing), redisClient=self.redisMessaging)
+        if self.locationBuffer is not None and self.sessionStore is None:
+            if self.locationBuffer.defer('Update_Serving_APN', (str(imsi), str(apn).lower()), servingNode=(pcrf_session_id, serving_pgw, subscriber_routing, serving_pgw_realm, serving_pgw_peer), deferrable=writeBehind, arguments={
+                    'imsi': str(imsi), 'apn': apn, 'pcrf_session_id': pcrf_session_id, 'serving_pgw': serving_pgw, 'subscriber_routing': subscriber_routing,
+                    'serving_pgw_realm': serving_pgw_realm, 'serving_pgw_peer': serving_pgw_peer,
+                    'serving_pgw_timestamp': serving_pgw_timestamp or datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'), 'propagate': propagate}):
+                return
+
+        self.logTool.log(service='Database', level='debug', message="Called Update_Serving_APN() for imsi %s with APN %s", messageArgs=(imsi, apn,), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="PCRF Session ID %s and serving PGW %s and subscriber routing %s", messageArgs=(pcrf_session_id, serving_pgw, subscriber_routing,), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Serving PGW Realm is: %s and peer is: %s", messageArgs=(serving_pgw_realm, serving_pgw_peer,), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="subscriber_routing: %s", messageArgs=(subscriber_routing,), redisClient=self.redisMessaging)
 
         """
         The matching SUBSCRIBER object is found for the given imsi.
@@ -2034,7 +2434,7 @@ class Database:
         All SERVING_APNs are retrieved from the database.
         """
         try:
-            if serving_pgw and subscriber_routing:
+            if serving_pgw and subscriber_routing and self.sessionStore is None:
                 servingApns = self.GetAll(SERVING_APN)
                 for servingApn in servingApns:
                     """
@@ -2054,12 +2454,12 @@ class Database:
         
         #Split the APN list into a list
         apn_list = subscriber_details['apn_list'].split(',')
-        self.logTool.log(service='Database', level='debug', message="Current APN List: " + str(apn_list), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Current APN List: %s", messageArgs=(apn_list,), redisClient=self.redisMessaging)
         #Remove the default APN from the list
         try:
             apn_list.remove(str(subscriber_details['default_apn']))
         except:
-            self.logTool.log(service='Database', level='debug', message="Failed to remove default APN (" + str(subscriber_details['default_apn']) + " from APN List", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Failed to remove default APN (%s from APN List", messageArgs=(subscriber_details['default_apn'],), redisClient=self.redisMessaging)
             pass
         #Add default APN in first position
         apn_list.insert(0, str(subscriber_details['default_apn']))
@@ -2068,15 +2468,15 @@ class Database:
         for apn_id in apn_list:
             #Get each APN in List
             apn_data = self.Get_APN(apn_id)
-            self.logTool.log(service='Database', level='debug', message=apn_data, redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(apn_data,), redisClient=self.redisMessaging)
             if str(apn_data['apn']).lower() == str(apn).lower():
-                self.logTool.log(service='Database', level='debug', message="Matched named APN " + str(apn_data['apn']) + " with APN ID " + str(apn_id), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Matched named APN %s with APN ID %s", messageArgs=(apn_data['apn'], apn_id,), redisClient=self.redisMessaging)
                 break
-        self.logTool.log(service='Database', level='debug', message="APN ID is " + str(apn_id), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="APN ID is %s", messageArgs=(apn_id,), redisClient=self.redisMessaging)
 
         try:
             if serving_pgw_timestamp != None and serving_pgw_timestamp != 'None':
-                serving_pgw_timestamp = datetime.strptime(serving_pgw_timestamp, '%Y-%m-%dT%H:%M:%SZ')
+                serving_pgw_timestamp = datetime.datetime.strptime(serving_pgw_timestamp, '%Y-%m-%dT%H:%M:%SZ')
                 serving_pgw_timestamp = serving_pgw_timestamp.replace(tzinfo=timezone.utc)
                 serving_pgw_timestamp_string = serving_pgw_timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
             else:
@@ -2099,19 +2499,22 @@ class Database:
             'subscriber_routing' : str(subscriber_routing)
         }
 
-        if serving_pgw is None:
+        sessionActive = type(serving_pgw) == str and len(serving_pgw) > 0 and "None" not in serving_pgw
+        if self.sessionStore is not None and self.sessionStore.storeSession(imsi, subscriber_id, apn_id, session=dict(json_data, serving_pgw_realm=serving_pgw_realm, serving_pgw_peer=serving_pgw_peer) if sessionActive else None):
+            self.logTool.log(service='Database', level='debug', message="Stored serving APN for subscriber_id %s on APN id %s in the session store", messageArgs=(subscriber_id, apn_id,), redisClient=self.redisMessaging)
+        elif serving_pgw is None:
             try:
                 ServingAPN = self.Get_Serving_APN(subscriber_id=subscriber_id, apn_id=apn_id)
-                self.logTool.log(service='Database', level='debug', message="Clearing PCRF session ID on serving_apn_id: " + str(ServingAPN['serving_apn_id']), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Clearing PCRF session ID on serving_apn_id: %s", messageArgs=(ServingAPN['serving_apn_id'],), redisClient=self.redisMessaging)
                 objectData = self.GetObj(SERVING_APN, ServingAPN['serving_apn_id'])
                 self.handleWebhook(objectData, 'DELETE')
                 self.DeleteObj(SERVING_APN, ServingAPN['serving_apn_id'], True)
             except Exception as e:
-                self.logTool.log(service='Database', level='debug', message=f"Error when trying to delete serving_apn id: {apn_id}", redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Error when trying to delete serving_apn id: %s", messageArgs=(apn_id,), redisClient=self.redisMessaging)
         else:
             try:
             #Check if already a serving APN on record
-                self.logTool.log(service='Database', level='debug', message="Checking to see if subscriber id " + str(subscriber_id) + " already has an active PCRF profile on APN id " + str(apn_id), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Checking to see if subscriber id %s already has an active PCRF profile on APN id %s", messageArgs=(subscriber_id, apn_id,), redisClient=self.redisMessaging)
                 ServingAPN = self.Get_Serving_APN(subscriber_id=subscriber_id, apn_id=apn_id)
                 self.logTool.log(service='Database', level='debug', message="Existing Serving APN ID on record, updating", redisClient=self.redisMessaging)
                 try:
@@ -2123,12 +2526,12 @@ class Database:
                     objectData = self.GetObj(SERVING_APN, ServingAPN['serving_apn_id'])
                     self.handleWebhook(objectData, 'PATCH')
                 except:
-                    self.logTool.log(service='Database', level='debug', message="Clearing PCRF session ID on serving_apn_id: " + str(ServingAPN['serving_apn_id']), redisClient=self.redisMessaging)
+                    self.logTool.log(service='Database', level='debug', message="Clearing PCRF session ID on serving_apn_id: %s", messageArgs=(ServingAPN['serving_apn_id'],), redisClient=self.redisMessaging)
                     objectData = self.GetObj(SERVING_APN, ServingAPN['serving_apn_id'])
                     self.handleWebhook(objectData, 'DELETE')
                     self.DeleteObj(SERVING_APN, ServingAPN['serving_apn_id'], True)
             except Exception as E:
-                self.logTool.log(service='Database', level='debug', message="Failed to update existing APN " + str(E), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Failed to update existing APN %s", messageArgs=(E,), redisClient=self.redisMessaging)
                 #Create if does not exist
                 self.CreateObj(SERVING_APN, json_data, True)
                 ServingAPN = self.Get_Serving_APN(subscriber_id=subscriber_id, apn_id=apn_id)
@@ -2157,123 +2560,178 @@ class Database:
             return
 
     def Get_Serving_APN(self, subscriber_id, apn_id):
-        self.logTool.log(service='Database', level='debug', message="Getting Serving APN " + str(apn_id) + " with subscriber_id " + str(subscriber_id), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        self.logTool.log(service='Database', level='debug', message="Getting Serving APN %s with subscriber_id %s", messageArgs=(apn_id, subscriber_id,), redisClient=self.redisMessaging)
+        if self.sessionStore is not None:
+            sessionState, servingApn = self.sessionStore.getSession(subscriber_id, apn_id)
+            if sessionState == 'live':
+                return servingApn
+            if sessionState == 'deleted':
+                raise ValueError(f"No serving APN {apn_id} for subscriber_id {subscriber_id}")
+        with self.sessionScope() as session:
 
-        try:
-            result = session.query(SERVING_APN).filter_by(subscriber_id=subscriber_id, apn=apn_id).first()
-        except Exception as E:
-            self.logTool.log(service='Database', level='debug', message=E, redisClient=self.redisMessaging)
-            self.safe_close(session)
-            raise ValueError(E)
-        result = result.__dict__
-        result.pop('_sa_instance_state')
+            try:
+                result = session.query(SERVING_APN).filter_by(subscriber_id=subscriber_id, apn=apn_id).first()
+            except Exception as E:
+                self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(E,), redisClient=self.redisMessaging)
+                raise ValueError(E)
+            result = result.__dict__
+            result.pop('_sa_instance_state')
         
-        self.safe_close(session)
-        return result   
+            return result   
 
     def Get_Serving_APNs(self, subscriber_id: int) -> dict:
         """
         Returns all a dictionary containing all APNs that a subscriber is configured for (subscriber/apn_list), 
         with active sessions being a populated dictionary, and inactive sessions being an empty dictionary.
         """
-        self.logTool.log(service='Database', level='debug', message=f"Getting Serving APNs for subscriber_id: {subscriber_id}", redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        apnDict = {'apns': {}}
+        self.logTool.log(service='Database', level='debug', message="Getting Serving APNs for subscriber_id: %s", messageArgs=(subscriber_id,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
+            apnDict = {'apns': {}}
 
-        try:
-            subscriber = self.Get_Subscriber(subscriber_id=subscriber_id)
-        except:
-            self.logTool.log(service='Database', level='debug', message=f"Unable to get subscriber with ID: {subscriber_id}: {traceback.format_exc()} ", redisClient=self.redisMessaging)
-            return apnDict
-        
-        apnList = subscriber.get('apn_list', []).split(',')
-        for apnId in apnList:
             try:
-                apnData = self.Get_APN(apnId)
-                apnName = apnData.get('apn', 'Unknown')
+                subscriber = self.Get_Subscriber(subscriber_id=subscriber_id)
+            except:
+                self.logTool.log(service='Database', level='debug', message="Unable to get subscriber with ID: %s: %s ", messageArgs=(subscriber_id, traceback.format_exc(),), redisClient=self.redisMessaging)
+                return apnDict
+        
+            apnList = subscriber.get('apn_list', []).split(',')
+            # Live sessions in the session store are found in one lookup by IMSI.
+            storedSessions = self.sessionStore.getSessionsByImsi(subscriber['imsi']) if self.sessionStore is not None else {}
+            for apnId in apnList:
                 try:
-                    servingApn = self.Sanitize_Datetime(self.Get_Serving_APN(subscriber_id=subscriber_id, apn_id=apnId))
-                    self.logTool.log(service='Database', level='debug', message=f"Got serving APN: {servingApn}", redisClient=self.redisMessaging)
-                    if len(servingApn) > 0:
-                        apnDict['apns'][apnName] = servingApn
-                    else:
+                    apnData = self.Get_APN(apnId)
+                    apnName = apnData.get('apn', 'Unknown')
+                    try:
+                        servingApn = self.Sanitize_Datetime(storedSessions.get(int(apnId)) or self.Get_Serving_APN(subscriber_id=subscriber_id, apn_id=apnId))
+                        self.logTool.log(service='Database', level='debug', message="Got serving APN: %s", messageArgs=(servingApn,), redisClient=self.redisMessaging)
+                        if len(servingApn) > 0:
+                            apnDict['apns'][apnName] = servingApn
+                        else:
+                            apnDict['apns'][apnName] = {}
+                    except Exception as e:
                         apnDict['apns'][apnName] = {}
-                except Exception as e:
-                    apnDict['apns'][apnName] = {}
-                    continue
-            except Exception as E:
-                self.logTool.log(service='Database', level='debug', message=f"Error getting apn for subscriber id: {subscriber_id}: {traceback.format_exc()} ", redisClient=self.redisMessaging)
+                        continue
+                except Exception as E:
+                    self.logTool.log(service='Database', level='debug', message="Error getting apn for subscriber id: %s: %s ", messageArgs=(subscriber_id, traceback.format_exc(),), redisClient=self.redisMessaging)
         
-        self.logTool.log(service='Database', level='debug', message=f"Returning: {apnDict}", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Returning: %s", messageArgs=(apnDict,), redisClient=self.redisMessaging)
 
-        return apnDict
+            return apnDict
 
     def Get_Serving_APN_By_IP(self, subscriberIp):
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        if self.sessionStore is not None:
+            sessionState, servingApn = self.sessionStore.getSessionByIp(subscriberIp)
+            if sessionState == 'live':
+                return servingApn
+            if sessionState == 'deleted':
+                raise ValueError(f"No serving APN for IP {subscriberIp}")
+        with self.sessionScope() as session:
 
-        try:
-            result = session.query(SERVING_APN).filter_by(subscriber_routing=subscriberIp).first()
-        except Exception as E:
-            self.logTool.log(service='Database', level='debug', message=E, redisClient=self.redisMessaging)
-            self.safe_close(session)
-            raise ValueError(E)
-        result = result.__dict__
-        result.pop('_sa_instance_state')
+            try:
+                result = session.query(SERVING_APN).filter_by(subscriber_routing=subscriberIp).first()
+            except Exception as E:
+                self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(E,), redisClient=self.redisMessaging)
+                raise ValueError(E)
+            result = result.__dict__
+            result.pop('_sa_instance_state')
         
-        self.safe_close(session)
-        return result   
+            return result   
+
+    def persistServingApns(self, servingApns: list, endedServingApns: list) -> dict:
+        """
+        Writes sessions from the session store to SERVING_APN in one transaction: servingApns are inserted or updated by subscriber_id and apn,
+        and endedServingApns, as (subscriber_id, apn_id), are deleted, along with rows holding the IP of a written session.
+        Returns {(subscriber_id, apn_id): serving_apn_id} of the written rows.
+        """
+        servingApnIds = {}
+        storedRows = {}
+        webhooks = []
+        with self.sessionScope() as session:
+            try:
+                if endedServingApns:
+                    endedRows = session.query(SERVING_APN).filter(or_(*[and_(SERVING_APN.subscriber_id == subscriberId, SERVING_APN.apn == apnId) for subscriberId, apnId in endedServingApns])).all()
+                    for endedRow in endedRows:
+                        webhooks.append(({'serving_apn_id': endedRow.serving_apn_id, 'subscriber_id': endedRow.subscriber_id, 'apn': endedRow.apn}, 'DELETE'))
+                        session.delete(endedRow)
+                if servingApns:
+                    storedRows = {(storedRow.subscriber_id, storedRow.apn): storedRow for storedRow in
+                                  session.query(SERVING_APN).filter(or_(*[and_(SERVING_APN.subscriber_id == servingApn['subscriber_id'], SERVING_APN.apn == servingApn['apn']) for servingApn in servingApns])).all()}
+                    # A UE has one IP per PDN connection, so other rows holding a written IP are stale.
+                    subscriberRoutings = [servingApn['subscriber_routing'] for servingApn in servingApns if servingApn.get('subscriber_routing')]
+                    if subscriberRoutings:
+                        for staleRow in session.query(SERVING_APN).filter(SERVING_APN.subscriber_routing.in_(subscriberRoutings)).all():
+                            if (staleRow.subscriber_id, staleRow.apn) not in storedRows:
+                                webhooks.append(({'serving_apn_id': staleRow.serving_apn_id, 'subscriber_id': staleRow.subscriber_id, 'apn': staleRow.apn}, 'DELETE'))
+                                session.delete(staleRow)
+                    for servingApn in servingApns:
+                        storedRow = storedRows.get((servingApn['subscriber_id'], servingApn['apn']))
+                        if storedRow is None:
+                            storedRow = SERVING_APN(subscriber_id=servingApn['subscriber_id'], apn=servingApn['apn'])
+                            session.add(storedRow)
+                            storedRows[(servingApn['subscriber_id'], servingApn['apn'])] = storedRow
+                            webhookOperation = 'PUT'
+                        else:
+                            webhookOperation = 'PATCH'
+                        for field in ['pcrf_session_id', 'subscriber_routing', 'serving_pgw', 'serving_pgw_timestamp', 'serving_pgw_realm', 'serving_pgw_peer']:
+                            setattr(storedRow, field, servingApn.get(field))
+                        storedRow.last_modified = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') + 'Z'
+                        webhooks.append((storedRow, webhookOperation))
+                session.commit()
+                for (subscriberId, apnId), storedRow in storedRows.items():
+                    servingApnIds[(subscriberId, apnId)] = storedRow.serving_apn_id
+                webhookBodies = [(webhookData if isinstance(webhookData, dict) else self.Sanitize_Datetime({key: value for key, value in webhookData.__dict__.items() if key != '_sa_instance_state'}), webhookOperation) for webhookData, webhookOperation in webhooks]
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to persist serving APNs, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)
+
+        for webhookBody, webhookOperation in webhookBodies:
+            self.handleWebhook(webhookBody, webhookOperation)
+        return servingApnIds
 
     def Get_Charging_Rule(self, charging_rule_id):
-        self.logTool.log(service='Database', level='debug', message="Called Get_Charging_Rule() for  charging_rule_id " + str(charging_rule_id), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        #Get base Rule
-        ChargingRule = self.GetObj(CHARGING_RULE, charging_rule_id)
-        ChargingRule['tft'] = []
-        #Get TFTs
-        try:
-            results = session.query(TFT).filter_by(tft_group_id=ChargingRule['tft_group_id'])
-            for result in results:
-                result = result.__dict__
-                result.pop('_sa_instance_state')
-                ChargingRule['tft'].append(result)
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        self.safe_close(session)
-        return ChargingRule
+        self.logTool.log(service='Database', level='debug', message="Called Get_Charging_Rule() for  charging_rule_id %s", messageArgs=(charging_rule_id,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
+            #Get base Rule
+            ChargingRule = self.GetObj(CHARGING_RULE, charging_rule_id)
+            ChargingRule['tft'] = []
+            #Get TFTs
+            try:
+                results = session.query(TFT).filter_by(tft_group_id=ChargingRule['tft_group_id'])
+                for result in results:
+                    result = result.__dict__
+                    result.pop('_sa_instance_state')
+                    ChargingRule['tft'].append(result)
+            except Exception as E:
+                raise ValueError(E)
+            return ChargingRule
 
     def Get_Charging_Rules(self, imsi, apn):
-        self.logTool.log(service='Database', level='debug', message="Called Get_Charging_Rules() for IMSI " + str(imsi) + " and APN " + str(apn), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Called Get_Charging_Rules() for IMSI %s and APN %s", messageArgs=(imsi, apn,), redisClient=self.redisMessaging)
         #Get Subscriber ID from IMSI
         subscriber_details = self.Get_Subscriber(imsi=str(imsi))
 
         #Split the APN list into a list
         apn_list = subscriber_details['apn_list'].split(',')
-        self.logTool.log(service='Database', level='debug', message="Current APN List: " + str(apn_list), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Current APN List: %s", messageArgs=(apn_list,), redisClient=self.redisMessaging)
         #Remove the default APN from the list
         try:
             apn_list.remove(str(subscriber_details['default_apn']))
         except:
-            self.logTool.log(service='Database', level='debug', message="Failed to remove default APN (" + str(subscriber_details['default_apn']) + " from APN List", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Failed to remove default APN (%s from APN List", messageArgs=(subscriber_details['default_apn'],), redisClient=self.redisMessaging)
             pass
         #Add default APN in first position
         apn_list.insert(0, str(subscriber_details['default_apn']))
 
         #Get APN ID from APN
         for apn_id in apn_list:
-            self.logTool.log(service='Database', level='debug', message="Getting APN ID " + str(apn_id) + " to see if it matches APN " + str(apn), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Getting APN ID %s to see if it matches APN %s", messageArgs=(apn_id, apn,), redisClient=self.redisMessaging)
             #Get each APN in List
             apn_data = self.Get_APN(apn_id)
-            self.logTool.log(service='Database', level='debug', message=apn_data, redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(apn_data,), redisClient=self.redisMessaging)
             if str(apn_data['apn']).lower() == str(apn).lower():
-                self.logTool.log(service='Database', level='debug', message="Matched named APN " + str(apn_data['apn']) + " with APN ID " + str(apn_id), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Matched named APN %s with APN ID %s", messageArgs=(apn_data['apn'], apn_id,), redisClient=self.redisMessaging)
 
-                self.logTool.log(service='Database', level='debug', message="Getting charging rule list from " + str(apn_data['charging_rule_list']), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="Getting charging rule list from %s", messageArgs=(apn_data['charging_rule_list'],), redisClient=self.redisMessaging)
                 ChargingRule = {}
                 ChargingRule['charging_rule_list'] = str(apn_data['charging_rule_list']).split(',')
                 ChargingRule['apn_data'] = apn_data
@@ -2284,99 +2742,98 @@ class Database:
                     ChargingRule['charging_rules'] = None
                     return ChargingRule
 
-                self.logTool.log(service='Database', level='debug', message="ChargingRule['charging_rule_list'] is: " + str(ChargingRule['charging_rule_list']), redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="ChargingRule['charging_rule_list'] is: %s", messageArgs=(ChargingRule['charging_rule_list'],), redisClient=self.redisMessaging)
                 #Empty dict for the Charging Rules to go into
                 ChargingRule['charging_rules'] = []
                 #Add each of the Charging Rules for the APN
                 for individual_charging_rule in ChargingRule['charging_rule_list']:
-                    self.logTool.log(service='Database', level='debug', message="Getting Charging rule " + str(individual_charging_rule), redisClient=self.redisMessaging)
+                    self.logTool.log(service='Database', level='debug', message="Getting Charging rule %s", messageArgs=(individual_charging_rule,), redisClient=self.redisMessaging)
                     individual_charging_rule_complete = self.Get_Charging_Rule(individual_charging_rule)
-                    self.logTool.log(service='Database', level='debug', message="Got individual_charging_rule_complete: " + str(individual_charging_rule_complete), redisClient=self.redisMessaging)
+                    self.logTool.log(service='Database', level='debug', message="Got individual_charging_rule_complete: %s", messageArgs=(individual_charging_rule_complete,), redisClient=self.redisMessaging)
                     ChargingRule['charging_rules'].append(individual_charging_rule_complete)
                 self.logTool.log(service='Database', level='debug', message="Completed Get_Charging_Rules()", redisClient=self.redisMessaging)
-                self.logTool.log(service='Database', level='debug', message=ChargingRule, redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(ChargingRule,), redisClient=self.redisMessaging)
                 return ChargingRule
 
     def Get_UE_by_IP(self, subscriber_routing):   
-        self.logTool.log(service='Database', level='debug', message="Called Get_UE_by_IP() for IP " + str(subscriber_routing), redisClient=self.redisMessaging)
-
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        self.logTool.log(service='Database', level='debug', message="Called Get_UE_by_IP() for IP %s", messageArgs=(subscriber_routing,), redisClient=self.redisMessaging)
+        if self.sessionStore is not None:
+            sessionState, servingApn = self.sessionStore.getSessionByIp(subscriber_routing)
+            if sessionState == 'live':
+                return self.Sanitize_Datetime(servingApn)
+            if sessionState == 'deleted':
+                raise ValueError(f"No serving APN for IP {subscriber_routing}")
+
+        with self.sessionScope() as session:
         
-        try:
-            result = session.query(SERVING_APN).filter_by(subscriber_routing=subscriber_routing).one()
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        result = result.__dict__
-        result.pop('_sa_instance_state')
-        result = self.Sanitize_Datetime(result)
-        return result
+            try:
+                result = session.query(SERVING_APN).filter_by(subscriber_routing=subscriber_routing).one()
+            except Exception as E:
+                raise ValueError(E)
+            result = result.__dict__
+            result.pop('_sa_instance_state')
+            result = self.Sanitize_Datetime(result)
+            return result
 
     def Get_IMS_Subscriber_By_Session_Id(self, sessionId):   
-        self.logTool.log(service='Database', level='debug', message="Called Get_IMS_Subscriber_By_Session_Id() for Session " + str(sessionId), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Called Get_IMS_Subscriber_By_Session_Id() for Session %s", messageArgs=(sessionId,), redisClient=self.redisMessaging)
 
-        Session = sessionmaker(bind = self.engine)
-        session = Session()    
+        with self.sessionScope() as session:
         
-        try:
-            result = session.query(IMS_SUBSCRIBER).filter_by(pcscf_active_session=sessionId).one()
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
-        result = result.__dict__
-        result.pop('_sa_instance_state')
-        result = self.Sanitize_Datetime(result)
-        return result
+            try:
+                result = session.query(IMS_SUBSCRIBER).filter_by(pcscf_active_session=sessionId).one()
+            except Exception as E:
+                raise ValueError(E)
+            result = result.__dict__
+            result.pop('_sa_instance_state')
+            result = self.Sanitize_Datetime(result)
+            return result
 
     def Get_Emergency_Subscriber(self, emergencySubscriberId: int=None, subscriberIp: str=None, gxSessionId: str=None, rxSessionId: str=None, imsi: str=None, **kwargs) -> dict:
         self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Emergency_Subscriber] Getting Emergency_Subscriber", redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        with self.sessionScope() as session:
 
-        result = None
+            result = None
 
-        try:
-            while not result:
-                if imsi and not result:
-                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(imsi=imsi).first()
-                    if result:
-                        self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: {imsi}", redisClient=self.redisMessaging)
-                        break
-                if emergencySubscriberId and not result:
-                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(emergency_subscriber_id=emergencySubscriberId).first()
-                    if result:
-                        self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: {imsi}", redisClient=self.redisMessaging)
-                        break
-                if subscriberIp and not result:
-                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp).first()
-                    if result:
-                        self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: {imsi}", redisClient=self.redisMessaging)
-                        break
-                if gxSessionId and not result:
-                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pgw=gxSessionId).first()
-                    if result:
-                        self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: {imsi}", redisClient=self.redisMessaging)
-                        break
-                if rxSessionId and not result:
-                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pcscf=rxSessionId).first()
-                    if result:
-                        self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: {imsi}", redisClient=self.redisMessaging)
-                        break
-                break
-
-            if not result:
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Get_Emergency_Subscriber] No match for emergency subscriber on IMSI: {imsi} / Subscriber IP: {subscriberIp} / gxSessionId: {gxSessionId} / rxSessionId: {rxSessionId}", redisClient=self.redisMessaging)
-                return None
-            result = result.__dict__
-            result.pop('_sa_instance_state')
-            self.safe_close(session)
-            return result
+            try:
+                while not result:
+                    if imsi and not result:
+                        result = session.query(EMERGENCY_SUBSCRIBER).filter_by(imsi=imsi).first()
+                        if result:
+                            self.logTool.log(service='Database', level='debug', message="[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                            break
+                    if emergencySubscriberId and not result:
+                        result = session.query(EMERGENCY_SUBSCRIBER).filter_by(emergency_subscriber_id=emergencySubscriberId).first()
+                        if result:
+                            self.logTool.log(service='Database', level='debug', message="[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                            break
+                    if subscriberIp and not result:
+                        result = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp).first()
+                        if result:
+                            self.logTool.log(service='Database', level='debug', message="[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                            break
+                    if gxSessionId and not result:
+                        result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pgw=gxSessionId).first()
+                        if result:
+                            self.logTool.log(service='Database', level='debug', message="[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                            break
+                    if rxSessionId and not result:
+                        result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pcscf=rxSessionId).first()
+                        if result:
+                            self.logTool.log(service='Database', level='debug', message="[database.py] [Get_Emergency_Subscriber] Matched emergency subscriber on IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                            break
+                    break
+
+                if not result:
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Get_Emergency_Subscriber] No match for emergency subscriber on IMSI: %s / Subscriber IP: %s / gxSessionId: %s / rxSessionId: %s", messageArgs=(imsi, subscriberIp, gxSessionId, rxSessionId,), redisClient=self.redisMessaging)
+                    return None
+                result = result.__dict__
+                result.pop('_sa_instance_state')
+                return result
         
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"[database.py] [Get_Emergency_Subscriber] Error getting emergency subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
-            self.safe_close(session)
-            return None
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [Get_Emergency_Subscriber] Error getting emergency subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                return None
 
     def Update_Emergency_Subscriber(self, emergencySubscriberId: int=None, subscriberIp: str=None, gxSessionId: str=None, rxSessionId: str=None, imsi: str=None, subscriberData: dict={}, propagate: bool=True) -> dict:
         """
@@ -2385,366 +2842,334 @@ class Database:
         If IMSI is None or no result was found, then try with a combination of all of the arguments.
         Then update all data with the provided subscriberData, and push to geored.
         """
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        with self.sessionScope() as session:
 
-        result = None
+            result = None
 
-        """
-        We need to check for duplicate IPs, in case the old entries haven't been flushed automatically.
-        """
+            """
+            We need to check for duplicate IPs, in case the old entries haven't been flushed automatically.
+            """
 
-        try:
-            all_subscribers_matching_ip = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp)
-            if len(all_subscribers_matching_ip) > 1:
-                most_recent_timestamp = 0
-                most_recent_emergency_subscriber_id = None
-                for matching_subscriber in all_subscribers_matching_ip:
-                    if int(matching_subscriber.serving_pgw_timestamp) > most_recent_timestamp:
-                        most_recent_timestamp = int(matching_subscriber.serving_pgw_timestamp)
-                        most_recent_emergency_subscriber_id = int(matching_subscriber.emergency_subscriber_id)
-                for matching_subscriber in all_subscribers_matching_ip:
-                    if int(matching_subscriber.emergency_subscriber_id) != most_recent_emergency_subscriber_id:
-                        self.Delete_Emergency_Subscriber(emergencySubscriberId=int(matching_subscriber.emergency_subscriber_id))
-        except:
-            self.logTool.log(service='Database', level='error', message=f"[database.py] [Update_Emergency_Subscriber] Duplicate IP detection failed: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            try:
+                all_subscribers_matching_ip = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp)
+                if len(all_subscribers_matching_ip) > 1:
+                    most_recent_timestamp = 0
+                    most_recent_emergency_subscriber_id = None
+                    for matching_subscriber in all_subscribers_matching_ip:
+                        if int(matching_subscriber.serving_pgw_timestamp) > most_recent_timestamp:
+                            most_recent_timestamp = int(matching_subscriber.serving_pgw_timestamp)
+                            most_recent_emergency_subscriber_id = int(matching_subscriber.emergency_subscriber_id)
+                    for matching_subscriber in all_subscribers_matching_ip:
+                        if int(matching_subscriber.emergency_subscriber_id) != most_recent_emergency_subscriber_id:
+                            self.Delete_Emergency_Subscriber(emergencySubscriberId=int(matching_subscriber.emergency_subscriber_id))
+            except:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [Update_Emergency_Subscriber] Duplicate IP detection failed: {traceback.format_exc()}", redisClient=self.redisMessaging)
 
-        while not result:
-            if imsi and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(imsi=imsi).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on IMSI: {imsi}", redisClient=self.redisMessaging)
-                break
-            if emergencySubscriberId and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(emergency_subscriber_id=emergencySubscriberId).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on emergency_subscriber_id: {emergencySubscriberId}", redisClient=self.redisMessaging)
-                break
-            if subscriberIp and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on IP: {subscriberIp}", redisClient=self.redisMessaging)
-                break
-            if gxSessionId and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pgw=gxSessionId).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on Gx Session ID: {gxSessionId}", redisClient=self.redisMessaging)
-                break
-            if rxSessionId and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pcscf=rxSessionId).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on Rx Session ID: {rxSessionId}", redisClient=self.redisMessaging)
+            while not result:
+                if imsi and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(imsi=imsi).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                    break
+                if emergencySubscriberId and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(emergency_subscriber_id=emergencySubscriberId).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on emergency_subscriber_id: %s", messageArgs=(emergencySubscriberId,), redisClient=self.redisMessaging)
+                    break
+                if subscriberIp and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on IP: %s", messageArgs=(subscriberIp,), redisClient=self.redisMessaging)
+                    break
+                if gxSessionId and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pgw=gxSessionId).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on Gx Session ID: %s", messageArgs=(gxSessionId,), redisClient=self.redisMessaging)
+                    break
+                if rxSessionId and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pcscf=rxSessionId).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Update_Emergency_Subscriber] Matched emergency subscriber on Rx Session ID: %s", messageArgs=(rxSessionId,), redisClient=self.redisMessaging)
+                    break
                 break
-            break
-
 
-        """
-        If we havent matched in on any entries at this point, create a new emergency subscriber.
-        """
-        if not result:
-            result = EMERGENCY_SUBSCRIBER()
-            session.add(result)
 
-        result.imsi = subscriberData.get('imsi')
-        result.serving_pgw = subscriberData.get('servingPgw')
-        result.serving_pgw_timestamp = subscriberData.get('requestTime')
-        result.serving_pcscf = subscriberData.get('servingPcscf')
-        result.serving_pcscf_timestamp = subscriberData.get('aarRequestTime')
-        result.gx_origin_realm = subscriberData.get('gxOriginRealm')
-        result.gx_origin_host = subscriberData.get('gxOriginHost')
-        result.rat_type = subscriberData.get('ratType')
-        result.ip = subscriberData.get('ip')
-        result.access_network_gateway_address = subscriberData.get('accessNetworkGatewayAddress')
-        result.access_network_charging_address = subscriberData.get('accessNetworkChargingAddress')
+            """
+            If we havent matched in on any entries at this point, create a new emergency subscriber.
+            """
+            if not result:
+                result = EMERGENCY_SUBSCRIBER()
+                session.add(result)
+
+            result.imsi = subscriberData.get('imsi')
+            result.serving_pgw = subscriberData.get('servingPgw')
+            result.serving_pgw_timestamp = subscriberData.get('requestTime')
+            result.serving_pcscf = subscriberData.get('servingPcscf')
+            result.serving_pcscf_timestamp = subscriberData.get('aarRequestTime')
+            result.gx_origin_realm = subscriberData.get('gxOriginRealm')
+            result.gx_origin_host = subscriberData.get('gxOriginHost')
+            result.rat_type = subscriberData.get('ratType')
+            result.ip = subscriberData.get('ip')
+            result.access_network_gateway_address = subscriberData.get('accessNetworkGatewayAddress')
+            result.access_network_charging_address = subscriberData.get('accessNetworkChargingAddress')
 
-        try:
-            session.commit()
-            emergencySubscriberId = result.emergency_subscriber_id
-            if propagate:
-                self.handleGeored({ "emergency_subscriber_id": int(emergencySubscriberId),
-                                    "emergency_subscriber_imsi": subscriberData.get('imsi'),
-                                    "emergency_subscriber_serving_pgw": subscriberData.get('servingPgw'), 
-                                    "emergency_subscriber_serving_pgw_timestamp": subscriberData.get('requestTime'), 
-                                    "emergency_subscriber_serving_pcscf": subscriberData.get('servingPcscf'), 
-                                    "emergency_subscriber_serving_pcscf_timestamp": subscriberData.get('aarRequestTime'), 
-                                    "emergency_subscriber_gx_origin_realm":  subscriberData.get('gxOriginRealm'),
-                                    "emergency_subscriber_gx_origin_host": subscriberData.get('gxOriginHost'),
-                                    "emergency_subscriber_rat_type": subscriberData.get('ratType'),
-                                    "emergency_subscriber_ip": subscriberData.get('ip'),
-                                    "emergency_subscriber_access_network_gateway_address": subscriberData.get('accessNetworkGatewayAddress'),
-                                    "emergency_subscriber_access_network_charging_address": subscriberData.get('accessNetworkChargingAddress'),
-                                    })
+            try:
+                session.commit()
+                emergencySubscriberId = result.emergency_subscriber_id
+                if propagate:
+                    self.handleGeored({ "emergency_subscriber_id": int(emergencySubscriberId),
+                                        "emergency_subscriber_imsi": subscriberData.get('imsi'),
+                                        "emergency_subscriber_serving_pgw": subscriberData.get('servingPgw'), 
+                                        "emergency_subscriber_serving_pgw_timestamp": subscriberData.get('requestTime'), 
+                                        "emergency_subscriber_serving_pcscf": subscriberData.get('servingPcscf'), 
+                                        "emergency_subscriber_serving_pcscf_timestamp": subscriberData.get('aarRequestTime'), 
+                                        "emergency_subscriber_gx_origin_realm":  subscriberData.get('gxOriginRealm'),
+                                        "emergency_subscriber_gx_origin_host": subscriberData.get('gxOriginHost'),
+                                        "emergency_subscriber_rat_type": subscriberData.get('ratType'),
+                                        "emergency_subscriber_ip": subscriberData.get('ip'),
+                                        "emergency_subscriber_access_network_gateway_address": subscriberData.get('accessNetworkGatewayAddress'),
+                                        "emergency_subscriber_access_network_charging_address": subscriberData.get('accessNetworkChargingAddress'),
+                                        })
 
-        except Exception as E:
-            self.safe_close(session)
-            self.logTool.log(service='Database', level='error', message=f"[database.py] [Update_Emergency_Subscriber] Error updating emergency subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
-            return None
-        result = result.__dict__
-        result.pop('_sa_instance_state')
-        self.safe_close(session)
-        return result
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [Update_Emergency_Subscriber] Error updating emergency subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                return None
+            result = result.__dict__
+            result.pop('_sa_instance_state')
+            return result
 
     def Delete_Emergency_Subscriber(self, emergencySubscriberId: int=None, subscriberIp: str=None, gxSessionId: str=None, rxSessionId: str=None, imsi: str=None, subscriberData: dict={}, propagate: bool=True) -> bool:
         """
         First, get at most one emergency subscriber matching the provided identifiers.
         Then delete the emergency subscriber, and push to geored.
         """
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
+        with self.sessionScope() as session:
 
-        result = None
+            result = None
 
-        while not result:
-            if imsi and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(imsi=imsi).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on IMSI: {imsi}", redisClient=self.redisMessaging)
-                break
-            if emergencySubscriberId and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(emergency_subscriber_id=emergencySubscriberId).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on emergency_subscriber_id: {emergencySubscriberId}", redisClient=self.redisMessaging)
-                break
-            if subscriberIp and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on IP: {subscriberIp}", redisClient=self.redisMessaging)
-                break
-            if gxSessionId and not result:
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on Gx Session ID: {gxSessionId}", redisClient=self.redisMessaging)
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pgw=gxSessionId).first()
-                break
-            if rxSessionId and not result:
-                result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pcscf=rxSessionId).first()
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on Rx Session ID: {rxSessionId}", redisClient=self.redisMessaging)
+            while not result:
+                if imsi and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(imsi=imsi).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                    break
+                if emergencySubscriberId and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(emergency_subscriber_id=emergencySubscriberId).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on emergency_subscriber_id: %s", messageArgs=(emergencySubscriberId,), redisClient=self.redisMessaging)
+                    break
+                if subscriberIp and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(ip=subscriberIp).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on IP: %s", messageArgs=(subscriberIp,), redisClient=self.redisMessaging)
+                    break
+                if gxSessionId and not result:
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on Gx Session ID: %s", messageArgs=(gxSessionId,), redisClient=self.redisMessaging)
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pgw=gxSessionId).first()
+                    break
+                if rxSessionId and not result:
+                    result = session.query(EMERGENCY_SUBSCRIBER).filter_by(serving_pcscf=rxSessionId).first()
+                    self.logTool.log(service='Database', level='debug', message="[database.py] [Delete_Emergency_Subscriber] Matched emergency subscriber on Rx Session ID: %s", messageArgs=(rxSessionId,), redisClient=self.redisMessaging)
+                    break
                 break
-            break
 
-        if not result:
-            self.safe_close(session)
-            return True
+            if not result:
+                return True
         
-        try:
-            emergencySubscriberId = result.emergency_subscriber_id
-            session.delete(result)
-            session.commit()
-            result = result.__dict__
-            if propagate:
-                self.handleGeored({
-                                    "emergency_subscriber_imsi": result.get('imsi'),
-                                    "emergency_subscriber_ip": result.get('ip'),
-                                    "emergency_subscriber_delete": True,
-                                })
-            self.safe_close(session)
-            return True
-        except Exception as E:
-            self.safe_close(session)
-            self.logTool.log(service='Database', level='error', message=f"[database.py] [Delete_Emergency_Subscriber] Error deleting emergency subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
-            return False
+            try:
+                emergencySubscriberId = result.emergency_subscriber_id
+                session.delete(result)
+                session.commit()
+                result = result.__dict__
+                if propagate:
+                    self.handleGeored({
+                                        "emergency_subscriber_imsi": result.get('imsi'),
+                                        "emergency_subscriber_ip": result.get('ip'),
+                                        "emergency_subscriber_delete": True,
+                                    })
+                return True
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message=f"[database.py] [Delete_Emergency_Subscriber] Error deleting emergency subscriber: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                return False
 
     def Store_IMSI_IMEI_Binding(self, imsi, imei, match_response_code, propagate=True):
         #IMSI           14-15 Digits
         #IMEI           15 Digits
         #IMEI-SV        2 Digits
-        self.logTool.log(service='Database', level='debug', message=f"[database.py] [Store_IMSI_IMEI_Binding] Received IMSI: {imsi}, IMEI: {imei}, Match Response Code: {match_response_code}", redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="[database.py] [Store_IMSI_IMEI_Binding] Received IMSI: %s, IMEI: %s, Match Response Code: %s", messageArgs=(imsi, imei, match_response_code,), redisClient=self.redisMessaging)
         if not self.imsiImeiLogging:
             self.logTool.log(service='Database', level='debug', message="[database.py] [Store_IMSI_IMEI_Binding] IMSI IMEI Logging disabled, skipping storing binding.", redisClient=self.redisMessaging)
             return
         #Concat IMEI + IMSI
         imsi_imei = str(imsi) + "," + str(imei)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-
-        try:
-            aucSearchResult = session.query(AUC).filter_by(imsi=imsi).one()
-        except Exception as e:
-            if not self.eirStoreOffnetImsi:
-                self.logTool.log(service='Database', level='debug', message=f"[database.py] [Store_IMSI_IMEI_Binding] IMSI not present in AUC, not adding to EIR", redisClient=self.redisMessaging)   
-                self.safe_close(session)
-                return
-        try:
-            imsiImeiResult = session.query(IMSI_IMEI_HISTORY).filter_by(imsi_imei=imsi_imei).one()
-            if imsiImeiResult:
-                self.logTool.log(service='Database', level='debug', message=f"Entry already exists IMSI_IMEI_HISTORY for IMSI/IMEI: {imsi}/{imei}", redisClient=self.redisMessaging)   
-                self.safe_close(session)
-                return
-        except Exception as e:
-            self.logTool.log(service='Database', level='debug', message=f"No existing IMSI_IMEI_HISTORY for IMSI/IMEI: {imsi}/{imei}", redisClient=self.redisMessaging)   
-
-        newObj = IMSI_IMEI_HISTORY(imsi_imei=imsi_imei, match_response_code=match_response_code, imsi_imei_timestamp = datetime.datetime.now(tz=timezone.utc))
-        session.add(newObj)
-        try:
-            session.commit()
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message=f"Failed to commit session, error: {traceback.format_exc()}", redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
-        self.safe_close(session)
-        self.logTool.log(service='Database', level='debug', message="Added new IMSI_IMEI_HISTORY binding", redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
 
-        if self.simSwapNotificationEnabled:
-            self.logTool.log(service='Database', level='debug', message="Sending SIM Swap notification to Webhook", redisClient=self.redisMessaging)
             try:
-                dictToSend = {'imei':imei, 'imsi': imsi, 'match_response_code': match_response_code}
-                self.handleWebhook(dictToSend)
-            except Exception as E:
-                self.logTool.log(service='Database', level='debug', message="Failed to post to Webhook", redisClient=self.redisMessaging)
-                self.logTool.log(service='Database', level='debug', message=str(E), redisClient=self.redisMessaging)
-
-        #Lookup Device Info
-        if self.tacDatabasePath:
+                aucSearchResult = session.query(AUC).filter_by(imsi=imsi).one()
+            except Exception as e:
+                if not self.eirStoreOffnetImsi:
+                    self.logTool.log(service='Database', level='debug', message=f"[database.py] [Store_IMSI_IMEI_Binding] IMSI not present in AUC, not adding to EIR", redisClient=self.redisMessaging)   
+                    return
             try:
-                device_info = self.getTacDataFromImei(imei=str(imei))
-                self.logTool.log(service='Database', level='debug', message="Got Device Info: " + str(device_info), redisClient=self.redisMessaging)
-                self.redisMessaging.sendMetric(serviceName='database', metricName='prom_eir_devices',
-                                                metricType='counter', metricAction='inc', 
-                                                metricValue=1, metricHelp='Profile of attached devices',
-                                                metricLabels={'imei_prefix': device_info['tacPrefix'],
-                                                                'device_type': device_info['name'],
-                                                                'device_name': device_info['model']},
-                                                metricExpiry=60,
-                                                usePrefix=True, 
-                                                prefixHostname=self.hostname, 
-                                                prefixServiceName='metric')
-            except Exception as E:
-                self.logTool.log(service='Database', level='debug', message="Failed to get device info from TAC", redisClient=self.redisMessaging)
-                self.redisMessaging.sendMetric(serviceName='database', metricName='prom_eir_devices',
-                            metricType='counter', metricAction='inc', 
-                            metricValue=1, metricHelp='Profile of attached devices',
-                            metricLabels={'imei_prefix': str(imei)[0:8],
-                                            'device_type': 'Unknown',
-                                            'device_name': 'Unknown'},
-                            metricExpiry=60,
-                            usePrefix=True, 
-                            prefixHostname=self.hostname, 
-                            prefixServiceName='metric')
-        else:
-            self.logTool.log(service='Database', level='debug', message="No TAC database configured, skipping device info lookup", redisClient=self.redisMessaging)
+                imsiImeiResult = session.query(IMSI_IMEI_HISTORY).filter_by(imsi_imei=imsi_imei).one()
+                if imsiImeiResult:
+                    self.logTool.log(service='Database', level='debug', message="Entry already exists IMSI_IMEI_HISTORY for IMSI/IMEI: %s/%s", messageArgs=(imsi, imei,), redisClient=self.redisMessaging)   
+                    return
+            except Exception as e:
+                self.logTool.log(service='Database', level='debug', message="No existing IMSI_IMEI_HISTORY for IMSI/IMEI: %s/%s", messageArgs=(imsi, imei,), redisClient=self.redisMessaging)   
 
-        #Sync state change with geored
-        if propagate == True:
+            newObj = IMSI_IMEI_HISTORY(imsi_imei=imsi_imei, match_response_code=match_response_code, imsi_imei_timestamp = datetime.datetime.now(tz=timezone.utc))
+            session.add(newObj)
             try:
-                if 'EIR' in self.config['geored']['sync_actions'] and self.georedEnabled == True:
-                    self.logTool.log(service='Database', level='debug', message="Propagate EIR changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
-                    self.handleGeored(
-                        {"imsi": str(imsi), 
-                        "imei": str(imei), 
-                        "match_response_code": str(match_response_code)}
-                        )
-                else:
-                    self.logTool.log(service='Database', level='debug', message="Config does not allow sync of EIR events", redisClient=self.redisMessaging)
+                session.commit()
             except Exception as E:
-                self.logTool.log(service='Database', level='debug', message="Nothing synced to Geographic PyHSS instances for EIR event", redisClient=self.redisMessaging)
-                self.logTool.log(service='Database', level='debug', message=E, redisClient=self.redisMessaging)
+                self.logTool.log(service='Database', level='error', message=f"Failed to commit session, error: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                raise ValueError(E)
+            self.logTool.log(service='Database', level='debug', message="Added new IMSI_IMEI_HISTORY binding", redisClient=self.redisMessaging)
 
-        return
+            if self.simSwapNotificationEnabled:
+                self.logTool.log(service='Database', level='debug', message="Sending SIM Swap notification to Webhook", redisClient=self.redisMessaging)
+                try:
+                    dictToSend = {'imei':imei, 'imsi': imsi, 'match_response_code': match_response_code}
+                    self.handleWebhook(dictToSend)
+                except Exception as E:
+                    self.logTool.log(service='Database', level='debug', message="Failed to post to Webhook", redisClient=self.redisMessaging)
+                    self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(str(E),), redisClient=self.redisMessaging)
 
-    def Get_IMEI_IMSI_History(self, attribute):
-        self.logTool.log(service='Database', level='debug', message="Called Get_IMEI_IMSI_History() for entry matching " + str(self.Get_IMEI_IMSI_History), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        result_array = []
-        try:
-            results = session.query(IMSI_IMEI_HISTORY).filter(IMSI_IMEI_HISTORY.imsi_imei.ilike("%" + str(attribute) + "%")).all()
-            for result in results:
-                result = result.__dict__
-                result.pop('_sa_instance_state')
-                result = self.Sanitize_Datetime(result)
+            #Lookup Device Info
+            if self.tacDatabasePath:
                 try:
-                    result['imsi'] = result['imsi_imei'].split(",")[0]
-                except:
-                    continue
+                    device_info = self.getTacDataFromImei(imei=str(imei))
+                    self.logTool.log(service='Database', level='debug', message="Got Device Info: %s", messageArgs=(device_info,), redisClient=self.redisMessaging)
+                    self.redisMessaging.sendMetric(serviceName='database', metricName='prom_eir_devices',
+                                                    metricType='counter', metricAction='inc', 
+                                                    metricValue=1, metricHelp='Profile of attached devices',
+                                                    metricLabels={'imei_prefix': device_info['tacPrefix'],
+                                                                    'device_type': device_info['name'],
+                                                                    'device_name': device_info['model']},
+                                                    metricExpiry=60,
+                                                    usePrefix=True, 
+                                                    prefixHostname=self.hostname, 
+                                                    prefixServiceName='metric')
+                except Exception as E:
+                    self.logTool.log(service='Database', level='debug', message="Failed to get device info from TAC", redisClient=self.redisMessaging)
+                    self.redisMessaging.sendMetric(serviceName='database', metricName='prom_eir_devices',
+                                metricType='counter', metricAction='inc', 
+                                metricValue=1, metricHelp='Profile of attached devices',
+                                metricLabels={'imei_prefix': str(imei)[0:8],
+                                                'device_type': 'Unknown',
+                                                'device_name': 'Unknown'},
+                                metricExpiry=60,
+                                usePrefix=True, 
+                                prefixHostname=self.hostname, 
+                                prefixServiceName='metric')
+            else:
+                self.logTool.log(service='Database', level='debug', message="No TAC database configured, skipping device info lookup", redisClient=self.redisMessaging)
+
+            #Sync state change with geored
+            if propagate == True:
                 try:
-                    result['imei'] = result['imsi_imei'].split(",")[1]
-                except:
-                    continue                
-                result_array.append(result)
-            self.safe_close(session)
-            return result_array
-        except Exception as E:
-            self.safe_close(session)
-            raise ValueError(E)
+                    if 'EIR' in self.config['geored']['sync_actions'] and self.georedEnabled == True:
+                        self.logTool.log(service='Database', level='debug', message="Propagate EIR changes to Geographic PyHSS instances", redisClient=self.redisMessaging)
+                        self.handleGeored(
+                            {"imsi": str(imsi), 
+                            "imei": str(imei), 
+                            "match_response_code": str(match_response_code)}
+                            )
+                    else:
+                        self.logTool.log(service='Database', level='debug', message="Config does not allow sync of EIR events", redisClient=self.redisMessaging)
+                except Exception as E:
+                    self.logTool.log(service='Database', level='debug', message="Nothing synced to Geographic PyHSS instances for EIR event", redisClient=self.redisMessaging)
+                    self.logTool.log(service='Database', level='debug', message="%s", messageArgs=(E,), redisClient=self.redisMessaging)
+
+            return
+
+    def Get_IMEI_IMSI_History(self, attribute):
+        self.logTool.log(service='Database', level='debug', message="Called Get_IMEI_IMSI_History() for entry matching %s", messageArgs=(self.Get_IMEI_IMSI_History,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
+            result_array = []
+            try:
+                results = session.query(IMSI_IMEI_HISTORY).filter(IMSI_IMEI_HISTORY.imsi_imei.ilike("%" + str(attribute) + "%")).all()
+                for result in results:
+                    result = result.__dict__
+                    result.pop('_sa_instance_state')
+                    result = self.Sanitize_Datetime(result)
+                    try:
+                        result['imsi'] = result['imsi_imei'].split(",")[0]
+                    except:
+                        continue
+                    try:
+                        result['imei'] = result['imsi_imei'].split(",")[1]
+                    except:
+                        continue                
+                    result_array.append(result)
+                return result_array
+            except Exception as E:
+                raise ValueError(E)
 
     def Check_EIR(self, imsi, imei):
         eir_response_code_table = {0 : 'Whitelist', 1: 'Blacklist', 2: 'Greylist'}
-        self.logTool.log(service='Database', level='debug', message="Called Check_EIR() for  imsi " + str(imsi) + " and imei: " + str(imei), redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        #Check for Exact Matches
-        self.logTool.log(service='Database', level='debug', message="Looking for exact matches", redisClient=self.redisMessaging)
-        #Check for exact Matches
-        try:
-            results = session.query(EIR).filter_by(imei=str(imei), regex_mode=0)
-            for result in results:
-                result = result.__dict__
-                match_response_code = result['match_response_code']
-                if result['imsi'] == '':
-                    self.logTool.log(service='Database', level='debug', message="No IMSI specified in DB, so matching only on IMEI", redisClient=self.redisMessaging)
-                    self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=match_response_code)
-                    self.safe_close(session)
-                    return match_response_code
-                elif result['imsi'] == str(imsi):
-                    self.logTool.log(service='Database', level='debug', message="Matched on IMEI and IMSI", redisClient=self.redisMessaging)
-                    self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=match_response_code)
-                    self.safe_close(session)
-                    return match_response_code
-        except Exception as E:
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
+        self.logTool.log(service='Database', level='debug', message="Called Check_EIR() for  imsi %s and imei: %s", messageArgs=(imsi, imei,), redisClient=self.redisMessaging)
+        with self.sessionScope() as session:
+            #Check for Exact Matches
+            self.logTool.log(service='Database', level='debug', message="Looking for exact matches", redisClient=self.redisMessaging)
+            #Check for exact Matches
+            try:
+                results = session.query(EIR).filter_by(imei=str(imei), regex_mode=0)
+                for result in results:
+                    result = result.__dict__
+                    match_response_code = result['match_response_code']
+                    if result['imsi'] == '':
+                        self.logTool.log(service='Database', level='debug', message="No IMSI specified in DB, so matching only on IMEI", redisClient=self.redisMessaging)
+                        self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=match_response_code)
+                        return match_response_code
+                    elif result['imsi'] == str(imsi):
+                        self.logTool.log(service='Database', level='debug', message="Matched on IMEI and IMSI", redisClient=self.redisMessaging)
+                        self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=match_response_code)
+                        return match_response_code
+            except Exception as E:
+                raise ValueError(E)
         
-        self.logTool.log(service='Database', level='debug', message="Did not match any Exact Matches - Checking Regex", redisClient=self.redisMessaging)   
-        try:
-            results = session.query(EIR).filter_by(regex_mode=1)    #Get all Regex records from DB
-            for result in results:
-                result = result.__dict__
-                match_response_code = result['match_response_code']
-                if re.match(result['imei'], imei):
-                    self.logTool.log(service='Database', level='debug', message="IMEI matched " + str(result['imei']), redisClient=self.redisMessaging)
-                    #Check if IMSI also specified
-                    if len(result['imsi']) != 0:
-                        self.logTool.log(service='Database', level='debug', message="With IMEI matched, now checking if IMSI matches regex", redisClient=self.redisMessaging)
-                        if re.match(result['imsi'], imsi):
-                            self.logTool.log(service='Database', level='debug', message="IMSI also matched, so match OK!", redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Did not match any Exact Matches - Checking Regex", redisClient=self.redisMessaging)   
+            try:
+                results = session.query(EIR).filter_by(regex_mode=1)    #Get all Regex records from DB
+                for result in results:
+                    result = result.__dict__
+                    match_response_code = result['match_response_code']
+                    if re.match(result['imei'], imei):
+                        self.logTool.log(service='Database', level='debug', message="IMEI matched %s", messageArgs=(result['imei'],), redisClient=self.redisMessaging)
+                        #Check if IMSI also specified
+                        if len(result['imsi']) != 0:
+                            self.logTool.log(service='Database', level='debug', message="With IMEI matched, now checking if IMSI matches regex", redisClient=self.redisMessaging)
+                            if re.match(result['imsi'], imsi):
+                                self.logTool.log(service='Database', level='debug', message="IMSI also matched, so match OK!", redisClient=self.redisMessaging)
+                                self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=match_response_code)
+                                return match_response_code
+                        else:
+                            self.logTool.log(service='Database', level='debug', message="No IMSI specified, so match OK!", redisClient=self.redisMessaging)
                             self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=match_response_code)
-                            self.safe_close(session)
                             return match_response_code
-                    else:
-                        self.logTool.log(service='Database', level='debug', message="No IMSI specified, so match OK!", redisClient=self.redisMessaging)
-                        self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=match_response_code)
-                        self.safe_close(session)
-                        return match_response_code
-        except Exception as E:
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
+            except Exception as E:
+                raise ValueError(E)
 
-        try:
-            session.commit()
-        except Exception as E:
-            self.logTool.log(service='Database', level='error', message="Failed to commit session, error: " + str(E), redisClient=self.redisMessaging)
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
-        self.logTool.log(service='Database', level='debug', message="No matches at all - Returning default response", redisClient=self.redisMessaging)
-        try:
-            self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=self.eirNoMatchResponse)
-        except Exception as e:
-            self.logTool.log(service='Database', level='error', message=f"Error Storing IMSI / IMEI Binding: {traceback.format_exc()}", redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return self.config['eir']['no_match_response']
+            try:
+                session.commit()
+            except Exception as E:
+                self.logTool.log(service='Database', level='error', message="Failed to commit session, error: " + str(E), redisClient=self.redisMessaging)
+                raise ValueError(E)
+            self.logTool.log(service='Database', level='debug', message="No matches at all - Returning default response", redisClient=self.redisMessaging)
+            try:
+                self.Store_IMSI_IMEI_Binding(imsi=imsi, imei=imei, match_response_code=self.eirNoMatchResponse)
+            except Exception as e:
+                self.logTool.log(service='Database', level='error', message=f"Error Storing IMSI / IMEI Binding: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return self.config['eir']['no_match_response']
 
     def Get_EIR_Rules(self):
         self.logTool.log(service='Database', level='debug', message="Getting all EIR Rules", redisClient=self.redisMessaging)
-        Session = sessionmaker(bind = self.engine)
-        session = Session()
-        EIR_Rules = []
-        try:
-            results = session.query(EIR)
-            for result in results:
-                result = result.__dict__
-                result.pop('_sa_instance_state')
-                EIR_Rules.append(result)
-        except Exception as E:
-            self.safe_rollback(session)
-            self.safe_close(session)
-            raise ValueError(E)
-        self.logTool.log(service='Database', level='debug', message="Final EIR_Rules: " + str(EIR_Rules), redisClient=self.redisMessaging)
-        self.safe_close(session)
-        return EIR_Rules 
+        with self.sessionScope() as session:
+            EIR_Rules = []
+            try:
+                results = session.query(EIR)
+                for result in results:
+                    result = result.__dict__
+                    result.pop('_sa_instance_state')
+                    EIR_Rules.append(result)
+            except Exception as E:
+                raise ValueError(E)
+            self.logTool.log(service='Database', level='debug', message="Final EIR_Rules: %s", messageArgs=(EIR_Rules,), redisClient=self.redisMessaging)
+            return EIR_Rules 
 
 
     def dict_bytes_to_dict_string(self, dict_bytes):
@@ -2768,11 +3193,11 @@ class Database:
         return {}
 
     def getTacDataFromImei(self, imei) -> dict:
-        self.logTool.log(service='Database', level='debug', message="Getting Device Info from IMEI: " + str(imei), redisClient=self.redisMessaging)
+        self.logTool.log(service='Database', level='debug', message="Getting Device Info from IMEI: %s", messageArgs=(imei,), redisClient=self.redisMessaging)
         try:
             imei_result = self.findImeiInTacList(imei, self.tacData)
             assert(len(imei_result) != 0)
-            self.logTool.log(service='Database', level='debug', message="Found match for IMEI " + str(imei) + " with result " + str(imei_result), redisClient=self.redisMessaging)
+            self.logTool.log(service='Database', level='debug', message="Found match for IMEI %s with result %s", messageArgs=(imei, imei_result,), redisClient=self.redisMessaging)
             return imei_result
         except:
             self.logTool.log(service='Database', level='debug', message="Failed to match on 8 digit IMEI", redisClient=self.redisMessaging)
@@ -25,8 +25,12 @@ import xml.etree.ElementTree as ET
 class Diameter:
 
     def __init__(self, logTool, originHost: str="hss01", originRealm: str="epc.mnc999.mcc999.3gppnetwork.org", productName: str="PyHSS", mcc: str="999", mnc: str="999", redisMessaging=None):
-        with open("../config.yaml", 'r') as stream:
-            self.config = (yaml.safe_load(stream))
+        try:
+            with open("../config.yaml", 'r') as stream:
+                self.config = (yaml.safe_load(stream))
+        except:
+            with open("config.yaml", 'r') as stream:
+                self.config = (yaml.safe_load(stream))
 
         self.OriginHost = self.string_to_hex(originHost)
         self.OriginRealm = self.string_to_hex(originRealm)
@@ -55,6 +59,12 @@ class Diameter:
         self.sendDsrOnMmeChange = self.config.get('hss', {}).get('send_dsr_on_mme_change', False)
         self.dsrExternalIdentifier = self.config.get('hss', {}).get('dsr_external_identifier', "subscriber")
         self.ignorePurgeUeRequest = self.config.get('hss', {}).get('ignore_purge_ue_request', False)
+        self.answerCacheEnabled = self.config.get('hss', {}).get('answer_cache_enabled', True)
+        self.answerCacheTtl = int(self.config.get('hss', {}).get('answer_cache_ttl', 10))
+        self.answerCacheCommandCodes = [int(commandCode) for commandCode in self.config.get('hss', {}).get('answer_cache_command_codes', [316, 318])]
+        # Stored under an answer cache key while the first copy of a request is answered, so concurrent duplicates are dropped.
+        self.answerCachePending = 'pending'
+        self.batchPrefetchCommandCodes = [316, 318]
 
         self.templateLoader = jinja2.FileSystemLoader(searchpath="../")
         self.templateEnv = jinja2.Environment(loader=self.templateLoader)
@@ -219,11 +229,11 @@ class Diameter:
             plmn = ''
         for bits in plmn_list:
             plmn = plmn + bits
-        self.logTool.log(service='HSS', level='debug', message="Encoded PLMN: " + str(plmn), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Encoded PLMN: %s", messageArgs=(plmn,), redisClient=self.redisMessaging)
         return plmn
 
     def TBCD_special_chars(self, input):
-        self.logTool.log(service='HSS', level='debug', message="Special character possible in " + str(input), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Special character possible in %s", messageArgs=(input,), redisClient=self.redisMessaging)
         if input == "*":
             self.logTool.log(service='HSS', level='debug', message="Found * - Returning 1010", redisClient=self.redisMessaging)
             return "1010"
@@ -241,28 +251,28 @@ class Diameter:
             return "1100"      
         else:
             binform = "{:04b}".format(int(input))
-            self.logTool.log(service='HSS', level='debug', message="input " + str(input) + " is not a special char, converted to bin: " + str(binform), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="input %s is not a special char, converted to bin: %s", messageArgs=(input, binform,), redisClient=self.redisMessaging)
             return (binform)
 
     def TBCD_encode(self, input):
-        self.logTool.log(service='HSS', level='debug', message="TBCD_encode input value is " + str(input), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="TBCD_encode input value is %s", messageArgs=(input,), redisClient=self.redisMessaging)
         offset = 0
         output = ''
         matches = ['*', '#', 'a', 'b', 'c']
         while offset < len(input):
             if len(input[offset:offset+2]) == 2:
-                self.logTool.log(service='HSS', level='debug', message="processing bits " + str(input[offset:offset+2]) + " at position offset " + str(offset), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="processing bits %s at position offset %s", messageArgs=(input[offset:offset+2], offset,), redisClient=self.redisMessaging)
                 bit = input[offset:offset+2]    #Get two digits at a time
                 bit = bit[::-1]                 #Reverse them
                 #Check if *, #, a, b or c
                 if any(x in bit for x in matches):
-                    self.logTool.log(service='HSS', level='debug', message="Special char in bit " + str(bit), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Special char in bit %s", messageArgs=(bit,), redisClient=self.redisMessaging)
                     new_bit = ''
                     new_bit = new_bit + str(self.TBCD_special_chars(bit[0]))
                     new_bit = new_bit + str(self.TBCD_special_chars(bit[1]))
-                    self.logTool.log(service='HSS', level='debug', message="Final bin output of new_bit is " + str(new_bit), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Final bin output of new_bit is %s", messageArgs=(new_bit,), redisClient=self.redisMessaging)
                     bit = hex(int(new_bit, 2))[2:]      #Get Hex value
-                    self.logTool.log(service='HSS', level='debug', message="Formatted as Hex this is " + str(bit), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Formatted as Hex this is %s", messageArgs=(bit,), redisClient=self.redisMessaging)
                 output = output + bit
                 offset = offset + 2
             else:
@@ -270,23 +280,23 @@ class Diameter:
                 last_digit = str(input[offset:offset+2])
                 #Check if *, #, a, b or c
                 if any(x in last_digit for x in matches):
-                    self.logTool.log(service='HSS', level='debug', message="Special char in bit " + str(bit), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Special char in bit %s", messageArgs=(bit,), redisClient=self.redisMessaging)
                     new_bit = ''
                     new_bit = new_bit + '1111'      #Add the F first
                     #Encode the symbol into binary and append it to the new_bit var
                     new_bit = new_bit + str(self.TBCD_special_chars(last_digit))
-                    self.logTool.log(service='HSS', level='debug', message="Final bin output of new_bit is " + str(new_bit), redisClient=self.redisMessaging) 
+                    self.logTool.log(service='HSS', level='debug', message="Final bin output of new_bit is %s", messageArgs=(new_bit,), redisClient=self.redisMessaging) 
                     bit = hex(int(new_bit, 2))[2:]      #Get Hex value
-                    self.logTool.log(service='HSS', level='debug', message="Formatted as Hex this is " + str(bit), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Formatted as Hex this is %s", messageArgs=(bit,), redisClient=self.redisMessaging)
                 else:
                     bit = "f" + last_digit
                 offset = offset + 2
                 output = output + bit
-        self.logTool.log(service='HSS', level='debug', message="TBCD_encode final output value is " + str(output), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="TBCD_encode final output value is %s", messageArgs=(output,), redisClient=self.redisMessaging)
         return output
 
     def TBCD_decode(self, input):
-        self.logTool.log(service='HSS', level='debug', message="TBCD_decode Input value is " + str(input), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="TBCD_decode Input value is %s", messageArgs=(input,), redisClient=self.redisMessaging)
         offset = 0
         output = ''
         while offset < len(input):
@@ -298,7 +308,7 @@ class Diameter:
                 bit = input[offset:offset+2]
                 output = output + bit[1]
             offset = offset + 2
-        self.logTool.log(service='HSS', level='debug', message="TBCD_decode output value is " + str(output), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="TBCD_decode output value is %s", messageArgs=(output,), redisClient=self.redisMessaging)
         return output
 
     #Generates an AVP with inputs provided (AVP Code, AVP Flags, AVP Content, Padding)
@@ -338,8 +348,8 @@ class Diameter:
             avp_padding = ''
         else:                       #Not multiple of 4 - Padding needed
             rounded_value = self.myround(avp_length)
-            self.logTool.log(service='HSS', level='debug', message="Rounded value is " + str(rounded_value), redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message="Has " + str( int( rounded_value - avp_length)) + " bytes of padding", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Rounded value is %s", messageArgs=(rounded_value,), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Has %s bytes of padding", messageArgs=(int( rounded_value - avp_length),), redisClient=self.redisMessaging)
             avp_padding = format(0,"x").zfill(int( rounded_value - avp_length) * 2)
 
 
@@ -382,7 +392,7 @@ class Diameter:
         """
         service = xmlRoot.find(f'default:{serviceName}', xmlNamespace)
         if service is None:
-            self.logTool.log(service='HSS', level='debug', message=f"Service {serviceName} not found", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Service %s not found", messageArgs=(serviceName,), redisClient=self.redisMessaging)
             return None, None
 
         active = service.get('active') == 'true'
@@ -390,18 +400,18 @@ class Diameter:
         forwarding_rules = {}
         
         ruleset = service.find('.//cp:ruleset', xmlNamespace)
-        self.logTool.log(service='HSS', level='debug', message=f"Found ruleset: {ruleset is not None}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Found ruleset: %s", messageArgs=(ruleset is not None,), redisClient=self.redisMessaging)
         
         if ruleset is not None:
             rules = ruleset.findall('cp:rule', xmlNamespace)
-            self.logTool.log(service='HSS', level='debug', message=f"Number of rules found: {len(rules)}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Number of rules found: %s", messageArgs=(len(rules),), redisClient=self.redisMessaging)
             
             for rule in rules:
                 rule_id = rule.get('id')
                 if rule_id is None:
                     continue
                     
-                self.logTool.log(service='HSS', level='debug', message=f"Processing rule ID: {rule_id}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Processing rule ID: %s", messageArgs=(rule_id,), redisClient=self.redisMessaging)
                 
                 conditions = rule.find('.//cp:conditions', xmlNamespace)
                 condition = None
@@ -419,7 +429,7 @@ class Diameter:
                             self.logTool.log(service='HSS', level='debug', message="Found unconditional forwarding rule (rule-deactivated)", redisClient=self.redisMessaging)
                         else:
                             condition = condition_tag
-                            self.logTool.log(service='HSS', level='debug', message=f"Found condition: {condition}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="Found condition: %s", messageArgs=(condition,), redisClient=self.redisMessaging)
                 else:
                     condition = "unconditional"
                     self.logTool.log(service='HSS', level='debug', message="Found unconditional forwarding rule (no conditions element)", redisClient=self.redisMessaging)
@@ -430,7 +440,7 @@ class Diameter:
                     if forward_to is not None:
                         target = forward_to.find('.//default:target', xmlNamespace)
                         if target is not None:
-                            self.logTool.log(service='HSS', level='debug', message=f"Found target: {target.text}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="Found target: %s", messageArgs=(target.text,), redisClient=self.redisMessaging)
                             forwarding_rules[rule_id] = {
                                 'condition': condition,
                                 'target': target.text
@@ -482,7 +492,7 @@ class Diameter:
         if type(data) is bytes:
             data = data.hex()
 
-        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [split_diameter_message] Splitting: {data}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [split_diameter_message] Splitting: %s", messageArgs=(data,), redisClient=self.redisMessaging)
 
         while message_processing_complete == False:
             try:
@@ -843,7 +853,7 @@ class Diameter:
             try:
                 if len(filteredConnectedPeers) == 0:
                     if self.useDraFallback == True:
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [getConnectedPeersByType] No peers of type {peerType} found, attempting to use DRA fallback", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [getConnectedPeersByType] No peers of type %s found, attempting to use DRA fallback", messageArgs=(peerType,), redisClient=self.redisMessaging)
                         connectedDraPeers = self.getDraPeers()
                         if len(connectedDraPeers) > 0:
                             return [connectedDraPeers[0]]
@@ -861,7 +871,7 @@ class Diameter:
             return []
 
     def getPeerByHostname(self, hostname: str) -> Peer:
-        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [getPeerByHostname] Looking for peer with hostname {hostname}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [getPeerByHostname] Looking for peer with hostname %s", messageArgs=(hostname,), redisClient=self.redisMessaging)
         try:
             hostname = hostname.lower()
             activePeers = self.redisMessaging.getAllHashData(name=self.diameterPeerKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
@@ -876,7 +886,7 @@ class Diameter:
 
             try:
                 if self.useDraFallback == True:
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [getPeerByHostname] {hostname} not found, attempting to use DRA fallback", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [getPeerByHostname] %s not found, attempting to use DRA fallback", messageArgs=(hostname,), redisClient=self.redisMessaging)
                     connectedDraPeers = self.getDraPeers()
                     if len(connectedDraPeers) > 0:
                         return connectedDraPeers[0]
@@ -950,7 +960,7 @@ class Diameter:
                 self.logTool.log(
                     service='HSS',
                     level='debug',
-                    message=f"Successfully updated peer {peerKey}",
+                    message="Successfully updated peer %s", messageArgs=(peerKey,),
                     redisClient=self.redisMessaging
                 )
                 return True
@@ -989,7 +999,7 @@ class Diameter:
                 else:
                     response['inbound'] = diameterApplication["responseAcronym"]
                     response['outbound'] = diameterApplication["requestAcronym"]
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] Matched message types: {response}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] Matched message types: %s", messageArgs=(response,), redisClient=self.redisMessaging)
             except Exception as e:
                 continue
         return response
@@ -1001,7 +1011,7 @@ class Diameter:
         try:
             request = ''
             requestType = requestType.upper()
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [sendDiameterRequest] [{requestType}] Generating a diameter outbound request", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [sendDiameterRequest] [%s] Generating a diameter outbound request", messageArgs=(requestType,), redisClient=self.redisMessaging)
             
             for diameterApplication in self.diameterRequestList:
                 try:
@@ -1020,7 +1030,7 @@ class Diameter:
 
                 try:
                     request = diameterApplication["requestMethod"](**kwargs)
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [sendDiameterRequest] [{requestType}] Successfully generated request: {request}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [sendDiameterRequest] [%s] Successfully generated request: %s", messageArgs=(requestType, request,), redisClient=self.redisMessaging)
                 except Exception as e:
                     self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [sendDiameterRequest] [{requestType}] Error generating request: {traceback.format_exc()}", redisClient=self.redisMessaging)
                     return ''
@@ -1031,7 +1041,7 @@ class Diameter:
                                                 InitialReceiveTimestamp=sendTime,
                                                 OutboundHex=request)
                 self.redisMessaging.sendMessage(queue=outboundQueue, message=outboundMessage.model_dump_json(), queueExpiry=self.diameterRequestTimeout, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [sendDiameterRequest] [{requestType}] Queueing for host: {hostname} on {peerIp}-{peerPort}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [sendDiameterRequest] [%s] Queueing for host: %s on %s-%s", messageArgs=(requestType, hostname, peerIp, peerPort,), redisClient=self.redisMessaging)
             return request
         except Exception as e:
             self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [sendDiameterRequest] [{requestType}] Error generating diameter outbound request: {traceback.format_exc()}", redisClient=self.redisMessaging)
@@ -1044,7 +1054,7 @@ class Diameter:
         try:
             request = ''
             requestType = requestType.upper()
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [broadcastDiameterRequest] [{requestType}] Broadcasting a diameter outbound request of type: {requestType} to peers of type: {peerType}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [broadcastDiameterRequest] [%s] Broadcasting a diameter outbound request of type: %s to peers of type: %s", messageArgs=(requestType, requestType, peerType,), redisClient=self.redisMessaging)
             
             for diameterApplication in self.diameterRequestList:
                 try:
@@ -1060,11 +1070,11 @@ class Diameter:
                         return ''
                     try:
                         request = diameterApplication["requestMethod"](**kwargs)
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [broadcastDiameterRequest] [{requestType}] Successfully generated request: {request}", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [broadcastDiameterRequest] [%s] Successfully generated request: %s", messageArgs=(requestType, request,), redisClient=self.redisMessaging)
                     except Exception as e:
                         self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [broadcastDiameterRequest] [{requestType}] Error generating request: {traceback.format_exc()}", redisClient=self.redisMessaging)
                         return ''
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [broadcastDiameterRequest] [{requestType}] Successfully generated request: {request}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [broadcastDiameterRequest] [%s] Successfully generated request: %s", messageArgs=(requestType, request,), redisClient=self.redisMessaging)
                     outboundQueue = f"diameter-outbound-{peerIp}-{peerPort}"
                     sendTime = time.time_ns()
 
@@ -1074,7 +1084,7 @@ class Diameter:
                                                 OutboundHex=request)
                     
                     self.redisMessaging.sendMessage(queue=outboundQueue, message=outboundMessage.model_dump_json(), queueExpiry=self.diameterRequestTimeout, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [broadcastDiameterRequest] [{requestType}] Queueing for peer type: {peerType} on {peerIp}-{peerPort}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [broadcastDiameterRequest] [%s] Queueing for peer type: %s on %s-%s", messageArgs=(requestType, peerType, peerIp, peerPort,), redisClient=self.redisMessaging)
             return connectedPeerList
         except Exception as e:
             return ''
@@ -1097,7 +1107,7 @@ class Diameter:
         try:
             request = ''
             requestType = requestType.upper()
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Generating a diameter outbound request", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Generating a diameter outbound request", messageArgs=(requestType,), redisClient=self.redisMessaging)
             
             for diameterApplication in self.diameterRequestList:
                 try:
@@ -1105,7 +1115,7 @@ class Diameter:
                 except Exception as e:
                     continue
                 connectedPeer = self.getPeerByHostname(hostname=hostname)
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Sending request via connected peer {connectedPeer} from hostname {hostname}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Sending request via connected peer %s from hostname %s", messageArgs=(requestType, connectedPeer, hostname,), redisClient=self.redisMessaging)
                 try:
                     peerIp = connectedPeer.IpAddress
                     peerPort = connectedPeer.Port
@@ -1115,13 +1125,13 @@ class Diameter:
                     
                 try:
                     request = diameterApplication["requestMethod"](**kwargs)
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Successfully generated request: {request}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Successfully generated request: %s", messageArgs=(requestType, request,), redisClient=self.redisMessaging)
                 except Exception as e:
                     self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Error generating request: {traceback.format_exc()}", redisClient=self.redisMessaging)
                     return ''
                 responseType = diameterApplication["responseAcronym"]
                 sessionId = kwargs.get('sessionId', None)
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Successfully generated request: {request}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Successfully generated request: %s", messageArgs=(requestType, request,), redisClient=self.redisMessaging)
                 sendTime = time.time_ns()
                 outboundQueue = f"diameter-outbound-{peerIp}-{peerPort}"
                 outboundMessage = OutboundData(DestinationIp=peerIp,
@@ -1129,14 +1139,14 @@ class Diameter:
                                                 InitialReceiveTimestamp=sendTime,
                                                 OutboundHex=request)
                 self.redisMessaging.sendMessage(queue=outboundQueue, message=outboundMessage.model_dump_json(), queueExpiry=self.diameterRequestTimeout, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Queueing for host: {hostname} on {peerIp}-{peerPort}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Queueing for host: %s on %s-%s", messageArgs=(requestType, hostname, peerIp, peerPort,), redisClient=self.redisMessaging)
                 startTimer = time.time()
                 while True:
                     try:
                         if not time.time() >= startTimer + timeout:
                             if sessionId is None:
                                 queuedMessages = self.redisMessaging.getList(key=f"diameter-inbound", usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] queuedMessages(NoSessionId): {queuedMessages}", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] queuedMessages(NoSessionId): %s", messageArgs=(requestType, queuedMessages,), redisClient=self.redisMessaging)
                                 for queuedMessage in queuedMessages:
                                     queuedMessage = json.loads(queuedMessage)
                                     clientAddress = queuedMessage.get('SenderIp', None)
@@ -1148,12 +1158,12 @@ class Diameter:
                                         messageHex = queuedMessage.get('InboundHex')
                                         messageType = self.getDiameterMessageType(messageHex)
                                         if messageType['inbound'].upper() == responseType.upper():
-                                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Found inbound response: {messageHex}", redisClient=self.redisMessaging)
+                                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Found inbound response: %s", messageArgs=(requestType, messageHex,), redisClient=self.redisMessaging)
                                             return messageHex
                                 time.sleep(0.02)
                             else:
                                 queuedMessages = self.redisMessaging.getList(key=f"diameter-inbound", usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] queuedMessages({sessionId}): {queuedMessages} responseType: {responseType}", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] queuedMessages(%s): %s responseType: %s", messageArgs=(requestType, sessionId, queuedMessages, responseType,), redisClient=self.redisMessaging)
                                 for queuedMessage in queuedMessages:
                                     queuedMessage = json.loads(queuedMessage)
                                     clientAddress = queuedMessage.get('SenderIp', None)
@@ -1168,21 +1178,152 @@ class Diameter:
                                             packetVars, avps = self.decode_diameter_packet(messageHex)
                                             messageSessionId = bytes.fromhex(self.get_avp_data(avps, 263)[0]).decode('ascii')
                                             if messageSessionId == sessionId:
-                                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Matched on Session Id: {sessionId}", redisClient=self.redisMessaging)
+                                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Matched on Session Id: %s", messageArgs=(requestType, sessionId,), redisClient=self.redisMessaging)
                                                 return messageHex
                                 time.sleep(0.02)
                         else:
                             return ''
                     except Exception as e:
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Traceback: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [awaitDiameterRequestAndResponse] [%s] Traceback: %s", messageArgs=(requestType, traceback.format_exc(),), redisClient=self.redisMessaging)
                         return ''
         except Exception as e:
             self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [awaitDiameterRequestAndResponse] [{requestType}] Error generating diameter outbound request: {traceback.format_exc()}", redisClient=self.redisMessaging)
             return ''
 
-    def generateDiameterResponse(self, binaryData: str) -> str:
+    def prefetchBatch(self, messageHexList: list) -> int:
+        """
+        Gathers the IMSIs of all S6a AIR / ULR requests in a batch of diameter messages, and prefetches their database rows in bulk.
+        Returns the number of subscribers prefetched.
+        """
+        try:
+            imsiList = []
+            for messageHex in messageHexList:
+                if isinstance(messageHex, bytes):
+                    messageHex = messageHex.hex()
+                # Only decode the AVPs of S6a (16777251) requests with a command code of interest.
+                if int(messageHex[16:24], 16) != 16777251:
+                    continue
+                if int(messageHex[10:16], 16) not in self.batchPrefetchCommandCodes:
+                    continue
+                packetVars, avps = self.decode_diameter_packet(messageHex)
+                userName = self.get_avp_data(avps, 1)
+                if len(userName) == 0:
+                    continue
+                imsiList.append(binascii.unhexlify(userName[0]).decode('utf-8'))
+            if len(imsiList) == 0:
+                return 0
+            return self.database.prefetchSubscribers(imsiList)
+        except Exception as e:
+            self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [prefetchBatch] Error prefetching batch: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return 0
+
+    def clearPrefetchedBatch(self):
+        """
+        Drops any rows prefetched by prefetchBatch().
+        """
+        self.database.clearPrefetchCache()
+
+    def getAnswerCacheKey(self, originHost: str, sessionId: str, packetVars: dict) -> str:
+        """
+        Returns the redis key used to cache the answer to a request, or None if the request is not cacheable.
+        Requests are identified by Origin-Host, Session-Id, Command Code and End-to-End Identifier, which are preserved across retransmissions.
+        The Hop-by-Hop Identifier is not part of the key, as it may change between retransmissions.
+        """
+        if not self.answerCacheEnabled:
+            return None
+        if packetVars.get('command_code') not in self.answerCacheCommandCodes:
+            return None
+        return f"diameterAnswerCache:{originHost}:{sessionId}:{packetVars['command_code']}:{packetVars['end-to-end-identifier']}"
+
+    def claimAnswer(self, answerCacheKey: str, packetVars: dict) -> tuple:
+        """
+        Atomically claims the answer to a request, returning (True, '') if this is its first copy and it should be answered,
+        or (False, cachedAnswer) for a duplicate, where cachedAnswer is empty while the first copy is still being answered.
+        The claim expires after answerCacheTtl seconds, and is released if the answer is not cached (see cacheAnswer).
+        If redis can't be reached, the request is answered without the cache.
+        """
+        try:
+            if self.redisMessaging.setValueIfAbsent(key=answerCacheKey, value=self.answerCachePending, keyExpiry=self.answerCacheTtl, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter'):
+                return True, ''
+        except Exception as e:
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [claimAnswer] Error claiming answer for %s: %s", messageArgs=(answerCacheKey, traceback.format_exc(),), redisClient=self.redisMessaging)
+            return True, ''
+        return False, self.getCachedAnswer(answerCacheKey=answerCacheKey, packetVars=packetVars)
+
+    def getCachedAnswer(self, answerCacheKey: str, packetVars: dict) -> str:
+        """
+        Returns a previously generated answer for a duplicate request, with the Hop-by-Hop Identifier of the new request, or an empty string.
+        """
+        try:
+            cachedAnswer = self.redisMessaging.getValue(key=answerCacheKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+            if not cachedAnswer:
+                return ''
+            if isinstance(cachedAnswer, bytes):
+                cachedAnswer = cachedAnswer.decode('ascii')
+            if cachedAnswer == self.answerCachePending:
+                return ''
+            # The Hop-by-Hop Identifier may change between retransmissions, so the answer has to carry the one we just received.
+            return cachedAnswer[:24] + packetVars['hop-by-hop-identifier'] + cachedAnswer[32:]
+        except Exception as e:
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [getCachedAnswer] Error getting cached answer for %s: %s", messageArgs=(answerCacheKey, traceback.format_exc(),), redisClient=self.redisMessaging)
+            return ''
+
+    def cacheAnswer(self, answerCacheKey: str, answer: str) -> bool:
+        """
+        Stores a generated answer for answerCacheTtl seconds, so that retransmissions of the same request are not processed again.
+        Only successful (2xxx) answers are cached. Otherwise the claim on the answer is released, so a retransmission after a failure is processed again.
+        """
+        try:
+            if not answer or self.getResultCode(bytes.fromhex(answer)) // 1000 != 2:
+                self.redisMessaging.deleteQueue(queue=answerCacheKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+                return False
+            self.redisMessaging.setValue(key=answerCacheKey, value=answer, keyExpiry=self.answerCacheTtl, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+            return True
+        except Exception as e:
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [cacheAnswer] Error caching answer for %s: %s", messageArgs=(answerCacheKey, traceback.format_exc(),), redisClient=self.redisMessaging)
+            return False
+
+    def getResultCode(self, binaryData: bytes) -> int:
+        """
+        Returns the Result-Code, or the Experimental-Result-Code, of a diameter answer, or 0 if neither is present.
+        Only walks the AVP headers, so it is cheap enough to call for every answer.
+        """
+        avpOffset = 20
+        while avpOffset + 8 <= len(binaryData):
+            avpCode = int.from_bytes(binaryData[avpOffset:avpOffset + 4], 'big')
+            avpFlags = binaryData[avpOffset + 4]
+            avpLength = int.from_bytes(binaryData[avpOffset + 5:avpOffset + 8], 'big')
+            if avpLength < 8:
+                return 0
+            avpHeaderLength = 12 if avpFlags & 0x80 else 8
+            if avpCode == 268:
+                return int.from_bytes(binaryData[avpOffset + avpHeaderLength:avpOffset + avpLength], 'big')
+            if avpCode == 297:
+                # Experimental-Result is grouped: walk its members for Experimental-Result-Code (298).
+                groupedOffset = avpOffset + avpHeaderLength
+                while groupedOffset + 8 <= avpOffset + avpLength:
+                    groupedCode = int.from_bytes(binaryData[groupedOffset:groupedOffset + 4], 'big')
+                    groupedFlags = binaryData[groupedOffset + 4]
+                    groupedLength = int.from_bytes(binaryData[groupedOffset + 5:groupedOffset + 8], 'big')
+                    if groupedLength < 8:
+                        return 0
+                    if groupedCode == 298:
+                        groupedHeaderLength = 12 if groupedFlags & 0x80 else 8
+                        return int.from_bytes(binaryData[groupedOffset + groupedHeaderLength:groupedOffset + groupedLength], 'big')
+                    groupedOffset += (groupedLength + 3) & ~3
+            avpOffset += (avpLength + 3) & ~3
+        return 0
+
+    def generateDiameterResponse(self, binaryData: str, stageTimestamps: dict=None) -> str:
+            """
+            Returns the answer to a diameter request, in a hex string. Given stageTimestamps, records when the request was decoded ('decode'),
+            and when its answer handler started and ended ('handler_start', 'handler_end').
+            """
+            answerCacheKey = None
             try:
                 packet_vars, avps = self.decode_diameter_packet(binaryData)
+                if stageTimestamps is not None:
+                    stageTimestamps['decode'] = time.time_ns()
                 origin_host = self.get_avp_data(avps, 264)[0]
                 origin_host = binascii.unhexlify(origin_host).decode("utf-8")
                 response = ''
@@ -1192,9 +1333,47 @@ class Diameter:
                 # Drop packet if it's a response packet:
                 if packet_vars["flags_bin"][0:1] == "0":
                     self.logTool.log(service='HSS', level='debug', message="[diameter.py] [generateDiameterResponse] Got a Response, not a request - dropping it.", redisClient=self.redisMessaging)
-                    self.logTool.log(service='HSS', level='debug', message=packet_vars, redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(packet_vars,), redisClient=self.redisMessaging)
                     return
-                
+
+                # Answer retransmitted requests (T flag set, same End-to-End Identifier) from the cache, instead of processing them again.
+                # The first copy of a request claims its answer, so a duplicate received while it is answered is dropped, and the peer retransmits.
+                sessionId = self.get_avp_data(avps, 263)
+                answerCacheKey = self.getAnswerCacheKey(originHost=origin_host, sessionId=sessionId[0] if sessionId else '', packetVars=packet_vars)
+                if answerCacheKey is not None:
+                    answerClaimed, cachedAnswer = self.claimAnswer(answerCacheKey=answerCacheKey, packetVars=packet_vars)
+                    if not answerClaimed:
+                        # Claimed by the first copy, so not ours to release.
+                        answerCacheKey = None
+                    if not answerClaimed and not cachedAnswer:
+                        self.logTool.log(service='HSS', level='info', message=f"[diameter.py] [generateDiameterResponse] Duplicate request from {origin_host} (End-to-End Identifier {packet_vars['end-to-end-identifier']}) received while the first copy is being answered - dropping it", redisClient=self.redisMessaging)
+                        self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_duplicate_request_dropped_count',
+                            metricType='counter', metricAction='inc',
+                            metricLabels={
+                                "diameter_application_id": packet_vars["ApplicationId"],
+                                "diameter_cmd_code": packet_vars["command_code"],
+                            },
+                            metricValue=1.0, metricHelp='Number of duplicate Diameter Requests dropped while the first copy was being answered',
+                            metricExpiry=60,
+                            usePrefix=True,
+                            prefixHostname=self.hostname,
+                            prefixServiceName='metric')
+                        return ''
+                    if cachedAnswer:
+                        self.logTool.log(service='HSS', level='info', message=f"[diameter.py] [generateDiameterResponse] Duplicate request from {origin_host} (End-to-End Identifier {packet_vars['end-to-end-identifier']}, T flag: {packet_vars['flags_bin'][3:4]}) - returning cached answer", redisClient=self.redisMessaging)
+                        self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_duplicate_request_count',
+                            metricType='counter', metricAction='inc',
+                            metricLabels={
+                                "diameter_application_id": packet_vars["ApplicationId"],
+                                "diameter_cmd_code": packet_vars["command_code"],
+                            },
+                            metricValue=1.0, metricHelp='Number of duplicate Diameter Requests answered from the answer cache',
+                            metricExpiry=60,
+                            usePrefix=True,
+                            prefixHostname=self.hostname,
+                            prefixServiceName='metric')
+                        return cachedAnswer
+
                 self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_request_count_application_id',
                     metricType='counter', metricAction='inc', 
                     metricLabels={
@@ -1213,17 +1392,27 @@ class Diameter:
                         assert(packet_vars["ApplicationId"] == diameterApplication["applicationId"])
                         if 'flags' in diameterApplication:
                             assert(str(packet_vars["flags"]) == str(diameterApplication["flags"]))
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [generateDiameterResponse] [{diameterApplication.get('requestAcronym', '')}] Attempting to generate response", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [generateDiameterResponse] [%s] Attempting to generate response", messageArgs=(diameterApplication.get('requestAcronym', ''),), redisClient=self.redisMessaging)
                         try:
+                            if stageTimestamps is not None:
+                                stageTimestamps['handler_start'] = time.time_ns()
                             response = diameterApplication["responseMethod"](packet_vars, avps)
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [generateDiameterResponse] [{diameterApplication.get('requestAcronym', '')}] Successfully generated response: {response}", redisClient=self.redisMessaging)
+                            if stageTimestamps is not None:
+                                stageTimestamps['handler_end'] = time.time_ns()
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [generateDiameterResponse] [%s] Successfully generated response: %s", messageArgs=(diameterApplication.get('requestAcronym', ''), response,), redisClient=self.redisMessaging)
                         except Exception as e:
                             self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [generateDiameterResponse] [{diameterApplication.get('requestAcronym', '')}] Error generating response: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                            if answerCacheKey is not None:
+                                self.cacheAnswer(answerCacheKey=answerCacheKey, answer='')
                             return ''
                         break
                     except Exception as e:
                         continue
 
+                if answerCacheKey is not None:
+                    self.cacheAnswer(answerCacheKey=answerCacheKey, answer=response)
+                    answerCacheKey = None
+
                 self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_response_count_application_id_successful',
                                     metricType='counter', metricAction='inc', 
                                     metricLabels={
@@ -1237,6 +1426,8 @@ class Diameter:
                                     prefixServiceName='metric')
                 return response
             except Exception as e:
+                if answerCacheKey is not None:
+                    self.cacheAnswer(answerCacheKey=answerCacheKey, answer='')
                 self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_response_count_application_id_fail',
                                                 metricType='counter', metricAction='inc',
                                                 metricLabels={
@@ -1257,7 +1448,7 @@ class Diameter:
         try:
             request = ''
             requestType = requestType.upper()
-            self.logTool.log(service='AS', level='debug', message=f"[diameter.py] [generateDiameterRequest] [{requestType}] Generating a diameter outbound request", redisClient=self.redisMessaging)
+            self.logTool.log(service='AS', level='debug', message="[diameter.py] [generateDiameterRequest] [%s] Generating a diameter outbound request", messageArgs=(requestType,), redisClient=self.redisMessaging)
             
             for diameterApplication in self.diameterRequestList:
                 try:
@@ -1266,7 +1457,7 @@ class Diameter:
                     continue
 
                 request = diameterApplication["requestMethod"](**kwargs)
-                self.logTool.log(service='AS', level='debug', message=f"[diameter.py] [generateDiameterRequest] [{requestType}] Successfully generated request: {request}", redisClient=self.redisMessaging)
+                self.logTool.log(service='AS', level='debug', message="[diameter.py] [generateDiameterRequest] [%s] Successfully generated request: %s", messageArgs=(requestType, request,), redisClient=self.redisMessaging)
                 return request
         except Exception as e:
             self.logTool.log(service='AS', level='error', message=f"[diameter.py] [generateDiameterRequest] [{requestType}] Error generating diameter outbound request: {traceback.format_exc()}", redisClient=self.redisMessaging)
@@ -1276,7 +1467,7 @@ class Diameter:
         """
         Ensures that a given IMSI or MSISDN (Or both, if specified) are associated with a subscriber that is enabled, and has an associated IMS Subscriber record.
         """
-        self.logTool.log(service='AS', level='debug', message=f"[diameter.py] [validateImsSubscriber] Checking subscriber with IMSI {imsi} / MSISDN {msisdn} is associated with a subscriber that is enabled and has an IMS Subscriber record", redisClient=self.redisMessaging)
+        self.logTool.log(service='AS', level='debug', message="[diameter.py] [validateImsSubscriber] Checking subscriber with IMSI %s / MSISDN %s is associated with a subscriber that is enabled and has an IMS Subscriber record", messageArgs=(imsi, msisdn,), redisClient=self.redisMessaging)
         if imsi == None and msisdn == None:
             self.logTool.log(service='AS', level='info', message=f"[diameter.py] [validateImsSubscriber] Neither an IMSI or an MSISDN was passed", redisClient=self.redisMessaging)
             return False
@@ -1345,7 +1536,7 @@ class Diameter:
                             if ';' in servingPgwPeer:
                                 servingPgwPeer = servingPgwPeer.split(';')[0]
                             
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [deregisterData] Sending CCR-T with Session-ID:{pcrfSessionId} to peer: {servingPgwPeer} {apnKey}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [deregisterData] Sending CCR-T with Session-ID:%s to peer: %s %s", messageArgs=(pcrfSessionId, servingPgwPeer, apnKey,), redisClient=self.redisMessaging)
 
                             self.sendDiameterRequest(
                             requestType='CCR',
@@ -1358,7 +1549,7 @@ class Diameter:
                             domain=servingPgwRealm
                             )
 
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [deregisterData] Sending RTR to peer: {servingPgwPeer} {apnKey}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [deregisterData] Sending RTR to peer: %s %s", messageArgs=(servingPgwPeer, apnKey,), redisClient=self.redisMessaging)
 
                             self.sendDiameterRequest(
                             requestType='RTR',
@@ -1434,7 +1625,7 @@ class Diameter:
         subscriberRoamingRules = []
         if assignedRoamingRules:
             subscriberRoamingRules = assignedRoamingRules.split(',')
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [validateOutboundRoamingNetwork] Got Subscriber Roaming Rules: {subscriberRoamingRules}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [validateOutboundRoamingNetwork] Got Subscriber Roaming Rules: %s", messageArgs=(subscriberRoamingRules,), redisClient=self.redisMessaging)
 
         """
         Iterate over every roaming rule, and it's reference roaming network.
@@ -1452,10 +1643,10 @@ class Diameter:
                 if roamingNetwork:
                     if str(roamingNetwork.get('mcc')) == str(mcc) and str(roamingNetwork.get('mnc')) == str(mnc):
                         if allowNetwork:
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [validateOutboundRoamingNetwork] Subscriber Roaming Rule for PLMN: {mcc}{mnc} is Allowed", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [validateOutboundRoamingNetwork] Subscriber Roaming Rule for PLMN: %s%s is Allowed", messageArgs=(mcc, mnc,), redisClient=self.redisMessaging)
                             return True
                         else:
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [validateOutboundRoamingNetwork] Subscriber Roaming Rule for PLMN: {mcc}{mnc} is Not Allowed", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [validateOutboundRoamingNetwork] Subscriber Roaming Rule for PLMN: %s%s is Not Allowed", messageArgs=(mcc, mnc,), redisClient=self.redisMessaging)
                             return False
 
         """
@@ -1472,10 +1663,10 @@ class Diameter:
             if roamingNetwork:
                 if str(roamingNetwork.get('mcc')) == str(mcc) and str(roamingNetwork.get('mnc')) == str(mnc):
                     if allowNetwork:
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [validateOutboundRoamingNetwork] Fallback Roaming Rule for PLMN: {mcc}{mnc} is Allowed", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [validateOutboundRoamingNetwork] Fallback Roaming Rule for PLMN: %s%s is Allowed", messageArgs=(mcc, mnc,), redisClient=self.redisMessaging)
                         return True
                     else:
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [validateOutboundRoamingNetwork] Fallback Subscriber Roaming Rule for PLMN: {mcc}{mnc} is Not Allowed", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [validateOutboundRoamingNetwork] Fallback Subscriber Roaming Rule for PLMN: %s%s is Not Allowed", messageArgs=(mcc, mnc,), redisClient=self.redisMessaging)
                         return False
 
         """
@@ -1484,10 +1675,10 @@ class Diameter:
         return True, otherwise return False.
         """
         if allowUndefinedNetworks:
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [validateOutboundRoamingNetwork] Unknown Network Roaming Rule for PLMN: {mcc}{mnc} is Allowed", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [validateOutboundRoamingNetwork] Unknown Network Roaming Rule for PLMN: %s%s is Allowed", messageArgs=(mcc, mnc,), redisClient=self.redisMessaging)
             return True
         else:
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [validateOutboundRoamingNetwork] Unknown Network Roaming Rule for PLMN: {mcc}{mnc} is Not Allowed", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [validateOutboundRoamingNetwork] Unknown Network Roaming Rule for PLMN: %s%s is Not Allowed", messageArgs=(mcc, mnc,), redisClient=self.redisMessaging)
             return False
 
     def validateSubscriberRoaming(self, subscriber: dict, mcc: str, mnc: str) -> bool:
@@ -1531,11 +1722,11 @@ class Diameter:
                     return str(sdpResult)
             return ''
         except Exception as e:
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Match_SDP] Error matching SDP: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Match_SDP] Error matching SDP: %s", messageArgs=(traceback.format_exc(),), redisClient=self.redisMessaging)
             return ''
 
     def Charging_Rule_Generator(self, ChargingRules=None, ue_ip=None, chargingRuleName=None, action="install"):
-        self.logTool.log(service='HSS', level='debug', message=f"Called Charging_Rule_Generator with action: {action}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Called Charging_Rule_Generator with action: %s", messageArgs=(action,), redisClient=self.redisMessaging)
         if action not in ['install', 'remove']:
             self.logTool.log(service='HSS', level='debug', message="Invalid action supplied to Charging_Rule_Generator", redisClient=self.redisMessaging)
             return None
@@ -1561,12 +1752,12 @@ class Diameter:
             #Populate all Flow Information AVPs
             Flow_Information = ''
             for tft in ChargingRules['tft']:
-                self.logTool.log(service='HSS', level='debug', message="Adding TFT: " + str(tft), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Adding TFT: %s", messageArgs=(tft,), redisClient=self.redisMessaging)
                 #If {{ UE_IP }} in TFT splice in the real UE IP Value
                 try:
                     tft['tft_string'] = tft['tft_string'].replace('{{ UE_IP }}', str(ue_ip))
                     tft['tft_string'] = tft['tft_string'].replace('{{UE_IP}}', str(ue_ip))
-                    self.logTool.log(service='HSS', level='debug', message="Spliced in UE IP into TFT: " + str(tft['tft_string']), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Spliced in UE IP into TFT: %s", messageArgs=(tft['tft_string'],), redisClient=self.redisMessaging)
                 except Exception as E:
                     self.logTool.log(service='HSS', level='error', message="Failed to splice in UE IP into flow description", redisClient=self.redisMessaging)
                 
@@ -1576,7 +1767,7 @@ class Diameter:
                 Flow_Information += self.generate_vendor_avp(1058, "80", 10415, Flow_Direction + Flow_Description)
 
             Flow_Status = self.generate_vendor_avp(511, "c0", 10415, self.int_to_hex(2, 4))
-            self.logTool.log(service='HSS', level='debug', message="Defined Flow_Status: " + str(Flow_Status), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Defined Flow_Status: %s", messageArgs=(Flow_Status,), redisClient=self.redisMessaging)
 
             self.logTool.log(service='HSS', level='debug', message="Defining QoS information", redisClient=self.redisMessaging)
             #QCI 
@@ -1602,11 +1793,11 @@ class Diameter:
                     Bandwidth_info += self.generate_vendor_avp(1026, "c0", 10415, self.int_to_hex(int(ChargingRules['gbr_ul']), 4))
                 if int(ChargingRules['gbr_dl']) != 0:
                     Bandwidth_info += self.generate_vendor_avp(1025, "c0", 10415, self.int_to_hex(int(ChargingRules['gbr_dl']), 4))
-            self.logTool.log(service='HSS', level='debug', message="Defined Bandwith Info: " + str(Bandwidth_info), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Defined Bandwith Info: %s", messageArgs=(Bandwidth_info,), redisClient=self.redisMessaging)
 
             #Populate QoS Information
             QoS_Information = self.generate_vendor_avp(1016, "c0", 10415, QCI + ARP + Bandwidth_info)
-            self.logTool.log(service='HSS', level='debug', message="Defined QoS_Information: " + str(QoS_Information), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Defined QoS_Information: %s", messageArgs=(QoS_Information,), redisClient=self.redisMessaging)
             
             #Precedence
             self.logTool.log(service='HSS', level='debug', message="Defining Precedence information", redisClient=self.redisMessaging)
@@ -1614,7 +1805,7 @@ class Diameter:
                 Precedence = self.generate_vendor_avp(1010, "c0", 10415, self.int_to_hex(ChargingRules['precedence'], 4))
             else:
                 Precedence = self.generate_vendor_avp(1010, "c0", 10415, self.int_to_hex(0, 4))
-            self.logTool.log(service='HSS', level='debug', message="Defined Precedence " + str(Precedence), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Defined Precedence %s", messageArgs=(Precedence,), redisClient=self.redisMessaging)
 
             #Rating Group
             self.logTool.log(service='HSS', level='debug', message="Defining Rating Group information", redisClient=self.redisMessaging)
@@ -1622,7 +1813,7 @@ class Diameter:
                 RatingGroup = self.generate_avp(432, 40, format(int(ChargingRules['rating_group']),"x").zfill(8))                   #Rating-Group-ID
             else:
                 RatingGroup = ''
-            self.logTool.log(service='HSS', level='debug', message="Defined Rating Group " + str(ChargingRules['rating_group']), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Defined Rating Group %s", messageArgs=(ChargingRules['rating_group'],), redisClient=self.redisMessaging)
             
 
             #Complete Charging Rule Defintion
@@ -1637,19 +1828,19 @@ class Diameter:
     def Get_IMS_Subscriber_Details_from_AVP(self, username):
         #Feed the Username AVP with Tel URI, SIP URI and either MSISDN or IMSI and this returns user data
         username = binascii.unhexlify(username).decode('utf-8')
-        self.logTool.log(service='HSS', level='debug', message="Username AVP is present, value is " + str(username), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Username AVP is present, value is %s", messageArgs=(username,), redisClient=self.redisMessaging)
         username = username.split('@')[0]   #Strip Domain to get User part
         username = username[4:]             #Strip tel: or sip: prefix
         #Determine if dealing with IMSI or MSISDN
         if (len(username) == 15) or (len(username) == 16):
-            self.logTool.log(service='HSS', level='debug', message="We have an IMSI: " + str(username), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="We have an IMSI: %s", messageArgs=(username,), redisClient=self.redisMessaging)
             ims_subscriber_details = self.database.Get_IMS_Subscriber(imsi=username)
         else:
-            self.logTool.log(service='HSS', level='debug', message="We have an msisdn: " + str(username), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="We have an msisdn: %s", messageArgs=(username,), redisClient=self.redisMessaging)
             if username[0] == '+':
                 username = username[1:]
             ims_subscriber_details = self.database.Get_IMS_Subscriber(msisdn=username)
-        self.logTool.log(service='HSS', level='debug', message="Got subscriber details: " + str(ims_subscriber_details), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got subscriber details: %s", messageArgs=(ims_subscriber_details,), redisClient=self.redisMessaging)
         return ims_subscriber_details
 
     def clear_expired_emergency_subscribers(self) -> bool:
@@ -1686,28 +1877,28 @@ class Diameter:
         try:
             self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_ims_subs',
                                             metricType='gauge', metricAction='set', 
-                                            metricValue=len(self.database.Get_Served_IMS_Subscribers(get_local_users_only=True)), metricHelp='Number of attached IMS Subscribers',
+                                            metricValue=self.database.countServedSubscribers('ims', get_local_users_only=True), metricHelp='Number of attached IMS Subscribers',
                                             metricExpiry=60,
                                             usePrefix=True, 
                                             prefixHostname=self.hostname, 
                                             prefixServiceName='metric')
             self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_mme_subs',
                                             metricType='gauge', metricAction='set', 
-                                            metricValue=len(self.database.Get_Served_Subscribers(get_local_users_only=True)), metricHelp='Number of attached MME Subscribers',
+                                            metricValue=self.database.countServedSubscribers('mme', get_local_users_only=True), metricHelp='Number of attached MME Subscribers',
                                             metricExpiry=60,
                                             usePrefix=True, 
                                             prefixHostname=self.hostname, 
                                             prefixServiceName='metric')
             self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_pcrf_subs',
                                             metricType='gauge', metricAction='set', 
-                                            metricValue=len(self.database.Get_Served_PCRF_Subscribers(get_local_users_only=True)), metricHelp='Number of attached PCRF Subscribers',
+                                            metricValue=self.database.countServedSubscribers('pcrf', get_local_users_only=True), metricHelp='Number of attached PCRF Subscribers',
                                             metricExpiry=60,
                                             usePrefix=True, 
                                             prefixHostname=self.hostname, 
                                             prefixServiceName='metric')
         except Exception as e:
             self.logTool.log(service='HSS', level='debug', message="Failed to generate Prometheus Stats for IMS Subscribers", redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message=e, redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(e,), redisClient=self.redisMessaging)
         self.logTool.log(service='HSS', level='debug', message="Generated Prometheus Stats for IMS Subscribers", redisClient=self.redisMessaging)
 
         return
@@ -1840,10 +2031,10 @@ class Diameter:
         imsi = binascii.unhexlify(imsi).decode('utf-8')                                                  #Convert IMSI
         try:
             subscriber_details = self.database.Get_Subscriber(imsi=imsi)                                               #Get subscriber details
-            self.logTool.log(service='HSS', level='debug', message="Got back subscriber_details: " + str(subscriber_details), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Got back subscriber_details: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
 
             if subscriber_details['enabled'] == 0:
-                self.logTool.log(service='HSS', level='debug', message=f"Subscriber {imsi} is disabled", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Subscriber %s is disabled", messageArgs=(imsi,), redisClient=self.redisMessaging)
 
                 #Experimental Result AVP(Response Code for Failure)
                 avp_experimental_result = ''
@@ -1852,13 +2043,13 @@ class Diameter:
                 avp += self.generate_avp(297, 40, avp_experimental_result)                                      #AVP Experimental-Result(297)
                 
                 avp += self.generate_avp(277, 40, "00000001")                                                   #Auth-Session-State
-                self.logTool.log(service='HSS', level='debug', message=f"Successfully Generated ULA for disabled Subscriber: {imsi}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Successfully Generated ULA for disabled Subscriber: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
                 response = self.generate_diameter_packet("01", "40", 316, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)
                 return response
 
         except ValueError as e:
-            self.logTool.log(service='HSS', level='debug', message="failed to get data backfrom database for imsi " + str(imsi), redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message="Error is " + str(e), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="failed to get data backfrom database for imsi %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Error is %s", messageArgs=(e,), redisClient=self.redisMessaging)
             self.logTool.log(service='HSS', level='debug', message="Responding with DIAMETER_ERROR_USER_UNKNOWN", redisClient=self.redisMessaging)
             avp += self.generate_avp(268, 40, self.int_to_hex(5030, 4))
             response = self.generate_diameter_packet("01", "40", 316, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
@@ -1880,7 +2071,7 @@ class Diameter:
                 subscriberIsRoaming = True
             
             if subscriberIsRoaming:
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777251_318] [ULA] Subscriber {imsi} is roaming", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777251_318] [ULA] Subscriber %s is roaming", messageArgs=(imsi,), redisClient=self.redisMessaging)
                 subscriberRoamingAllowed = self.validateSubscriberRoaming(subscriber=subscriber_details, mcc=mcc, mnc=mnc)
 
             if not subscriberRoamingAllowed and subscriberIsRoaming:
@@ -1901,7 +2092,7 @@ class Diameter:
                 response = self.generate_diameter_packet("01", "40", 318, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
                 return response
             
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777251_318] [AIA] Subscriber {imsi} passed roaming validation for {decodedPlmn}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777251_318] [AIA] Subscriber %s passed roaming validation for %s", messageArgs=(imsi, decodedPlmn,), redisClient=self.redisMessaging)
             
         except Exception as e:
             self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [Answer_16777251_318] [AIA] Error when validating subscriber roaming: {traceback.format_exc()}", redisClient=self.redisMessaging)
@@ -1911,7 +2102,7 @@ class Diameter:
         OriginHost = binascii.unhexlify(OriginHost).decode('utf-8')      #Format it
         OriginRealm = self.get_avp_data(avps, 296)[0]                          #Get OriginRealm from AVP
         OriginRealm = binascii.unhexlify(OriginRealm).decode('utf-8')      #Format it
-        self.logTool.log(service='HSS', level='debug', message="Subscriber is served by MME " + str(OriginHost) + " at realm " + str(OriginRealm), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Subscriber is served by MME %s at realm %s", messageArgs=(OriginHost, OriginRealm,), redisClient=self.redisMessaging)
 
         #Find Remote Peer we need to address CLRs through
         try:        #Check if we have a record-route set as that's where we'll need to send the response
@@ -1920,9 +2111,9 @@ class Diameter:
         except:     #If we don't have a record-route set, we'll send the response to the OriginHost
             remote_peer = OriginHost
         remote_peer = remote_peer + ";" + str(self.config['hss']['OriginHost'])
-        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777251_316] [ULA] Remote Peer is " + str(remote_peer), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777251_316] [ULA] Remote Peer is %s", messageArgs=(remote_peer,), redisClient=self.redisMessaging)
 
-        self.database.Update_Serving_MME(imsi=imsi, serving_mme=OriginHost, serving_mme_peer=remote_peer, serving_mme_realm=OriginRealm)
+        self.database.Update_Serving_MME(imsi=imsi, serving_mme=OriginHost, serving_mme_peer=remote_peer, serving_mme_realm=OriginRealm, writeBehind=True)
 
         #Boilerplate AVPs
         avp += self.generate_avp(268, 40, self.int_to_hex(2001, 4))                                      #Result Code (DIAMETER_SUCCESS (2001))
@@ -1954,21 +2145,21 @@ class Diameter:
 
         #Split the APN list into a list
         apn_list = subscriber_details['apn_list'].split(',')
-        self.logTool.log(service='HSS', level='debug', message="Current APN List: " + str(apn_list), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Current APN List: %s", messageArgs=(apn_list,), redisClient=self.redisMessaging)
         #Remove the default APN from the list
         try:
             apn_list.remove(str(subscriber_details['default_apn']))
         except:
-            self.logTool.log(service='HSS', level='debug', message="Failed to remove default APN (" + str(subscriber_details['default_apn']) + " from APN List", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Failed to remove default APN (%s from APN List", messageArgs=(subscriber_details['default_apn'],), redisClient=self.redisMessaging)
             pass
         #Add default APN in first position
         apn_list.insert(0, str(subscriber_details['default_apn']))
 
-        self.logTool.log(service='HSS', level='debug', message="APN list: " + str(apn_list), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="APN list: %s", messageArgs=(apn_list,), redisClient=self.redisMessaging)
         APN_context_identifer_count = 1
         for apn_id in apn_list:
             #Per APN Setup
-            self.logTool.log(service='HSS', level='debug', message="Processing APN ID " + str(apn_id), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Processing APN ID %s", messageArgs=(apn_id,), redisClient=self.redisMessaging)
             try:
                 apn_data = self.database.Get_APN(apn_id)
             except:
@@ -2049,11 +2240,11 @@ class Diameter:
             #Try static IP allocation
             try:
                 subscriber_routing_dict = self.database.Get_SUBSCRIBER_ROUTING(subscriber_id=subscriber_details['subscriber_id'], apn_id=apn_id)                                               #Get subscriber details
-                self.logTool.log(service='HSS', level='debug', message="Got static UE IP " + str(subscriber_routing_dict), redisClient=self.redisMessaging)
-                self.logTool.log(service='HSS', level='debug', message="Found static IP for UE " + str(subscriber_routing_dict['ip_address']), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Got static UE IP %s", messageArgs=(subscriber_routing_dict,), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Found static IP for UE %s", messageArgs=(subscriber_routing_dict['ip_address'],), redisClient=self.redisMessaging)
                 Served_Party_Address = self.generate_vendor_avp(848, "c0", 10415, self.ip_to_hex(subscriber_routing_dict['ip_address']))
             except Exception as E:
-                self.logTool.log(service='HSS', level='debug', message="No static UE IP found: " + str(E), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="No static UE IP found: %s", messageArgs=(E,), redisClient=self.redisMessaging)
                 Served_Party_Address = ""
 
 
@@ -2074,7 +2265,7 @@ class Diameter:
 
             #If static SMF / PGW-C defined
             if apn_data['pgw_address'] is not None:
-                self.logTool.log(service='HSS', level='debug', message="MIP6-Agent-Info present (Static SMF/PGW-C), value " + str(apn_data['pgw_address']), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="MIP6-Agent-Info present (Static SMF/PGW-C), value %s", messageArgs=(apn_data['pgw_address'],), redisClient=self.redisMessaging)
                 MIP_Home_Agent_Address = self.generate_avp(334, '40', self.ip_to_hex(apn_data['pgw_address']))
                 MIP6_Agent_Info = self.generate_avp(486, '40', MIP_Home_Agent_Address)
             else:
@@ -2087,29 +2278,29 @@ class Diameter:
             
             #Incriment Context Identifier Count to keep track of how many APN Profiles returned
             APN_context_identifer_count = APN_context_identifer_count + 1  
-            self.logTool.log(service='HSS', level='debug', message="Completed processing APN ID " + str(apn_id), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Completed processing APN ID %s", messageArgs=(apn_id,), redisClient=self.redisMessaging)
         
         subscription_data += self.generate_vendor_avp(1429, "c0", 10415, APN_Configuration_Profile + APN_Configuration)
 
         try:
-            self.logTool.log(service='HSS', level='debug', message="MSISDN is " + str(subscriber_details['msisdn']) + " - adding in ULA", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="MSISDN is %s - adding in ULA", messageArgs=(subscriber_details['msisdn'],), redisClient=self.redisMessaging)
             msisdn_avp = self.generate_vendor_avp(701, 'c0', 10415, self.TBCD_encode(str(subscriber_details['msisdn'])))                     #MSISDN
-            self.logTool.log(service='HSS', level='debug', message=msisdn_avp, redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(msisdn_avp,), redisClient=self.redisMessaging)
             subscription_data += msisdn_avp
         except Exception as E:
             self.logTool.log(service='HSS', level='error', message="Failed to populate MSISDN in ULA due to error " + str(E), redisClient=self.redisMessaging)
 
         if 'RAT_freq_priorityID' in subscriber_details:
-            self.logTool.log(service='HSS', level='debug', message="RAT_freq_priorityID is " + str(subscriber_details['RAT_freq_priorityID']) + " - Adding in ULA", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="RAT_freq_priorityID is %s - Adding in ULA", messageArgs=(subscriber_details['RAT_freq_priorityID'],), redisClient=self.redisMessaging)
             rat_freq_priorityID = self.generate_vendor_avp(1440, "C0", 10415, self.int_to_hex(int(subscriber_details['RAT_freq_priorityID']), 4))                              #RAT-Frequency-Selection-Priority ID
-            self.logTool.log(service='HSS', level='debug', message="Adding rat_freq_priorityID: " + str(rat_freq_priorityID), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Adding rat_freq_priorityID: %s", messageArgs=(rat_freq_priorityID,), redisClient=self.redisMessaging)
             subscription_data += rat_freq_priorityID
 
         if 'charging_characteristics' in subscriber_details:
-            self.logTool.log(service='HSS', level='debug', message="3gpp-charging-characteristics " + str(subscriber_details['charging_characteristics']) + " - Adding in ULA", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="3gpp-charging-characteristics %s - Adding in ULA", messageArgs=(subscriber_details['charging_characteristics'],), redisClient=self.redisMessaging)
             _3gpp_charging_characteristics = self.generate_vendor_avp(13, "80", 10415, str(subscriber_details['charging_characteristics']))
             subscription_data += _3gpp_charging_characteristics
-            self.logTool.log(service='HSS', level='debug', message="Adding _3gpp_charging_characteristics: " + str(_3gpp_charging_characteristics), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Adding _3gpp_charging_characteristics: %s", messageArgs=(_3gpp_charging_characteristics,), redisClient=self.redisMessaging)
 
         #ToDo - Fix this  
         # if 'APN_OI_replacement' in subscriber_details:
@@ -2128,7 +2319,7 @@ class Diameter:
                     servingMmeRealm = subscriber_details.get('serving_mme_realm')
                     new_serving_mme = OriginHost
                     if len(servingMmePeer) > 0 and new_serving_mme != servingMme:
-                        self.logTool.log(service='HSS', level='debug', message=f"MME Serving UE has changed from: {servingMme} to {new_serving_mme}, Sending DSR.", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="MME Serving UE has changed from: %s to %s, Sending DSR.", messageArgs=(servingMme, new_serving_mme,), redisClient=self.redisMessaging)
                         self.sendDiameterRequest(
                                             requestType='DSR',
                                             hostname=servingMmePeer,
@@ -2138,7 +2329,7 @@ class Diameter:
                                             ExternalIdentifier=self.dsrExternalIdentifier
                                             )
             except Exception as e:
-                self.logTool.log(service='HSS', level='debug', message=f"Error sending DSR: {e}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Error sending DSR: %s", messageArgs=(e,), redisClient=self.redisMessaging)
 
         response = self.generate_diameter_packet("01", "40", 316, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
 
@@ -2147,7 +2338,7 @@ class Diameter:
 
     #3GPP S6a/S6d Authentication Information Answer
     def Answer_16777251_318(self, packet_vars, avps):
-        self.logTool.log(service='HSS', level='debug', message=f"AIA AVPS: {avps}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="AIA AVPS: %s", messageArgs=(avps,), redisClient=self.redisMessaging)
         imsi = self.get_avp_data(avps, 1)[0]                                                             #Get IMSI from User-Name AVP in request
         imsi = binascii.unhexlify(imsi).decode('utf-8')                                                  #Convert IMSI
         plmn = self.get_avp_data(avps, 1407)[0]                                                          #Get PLMN from User-Name AVP in request
@@ -2155,7 +2346,7 @@ class Diameter:
         try:
             subscriber_details = self.database.Get_Subscriber(imsi=imsi)                                               #Get subscriber details
             if subscriber_details['enabled'] == 0:
-                self.logTool.log(service='HSS', level='debug', message=f"Subscriber {imsi} is disabled", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Subscriber %s is disabled", messageArgs=(imsi,), redisClient=self.redisMessaging)
                 avp = ''
                 session_id = self.get_avp_data(avps, 263)[0]                                                     #Get Session-ID
                 avp += self.generate_avp(263, 40, session_id)                                                    #Session-ID AVP set
@@ -2184,12 +2375,12 @@ class Diameter:
                 avp += self.generate_avp(277, 40, "00000001")                                                    #Auth-Session-State
                 avp += self.generate_avp(260, 40, "000001024000000c" + format(int(16777251),"x").zfill(8) +  "0000010a4000000c000028af")      #Vendor-Specific-Application-ID (S6a)
                 response = self.generate_diameter_packet("01", "40", 318, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
-                self.logTool.log(service='HSS', level='debug', message=f"Successfully Generated AIA for disabled Subscriber: {imsi}", redisClient=self.redisMessaging)
-                self.logTool.log(service='HSS', level='debug', message=f"{response}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Successfully Generated AIA for disabled Subscriber: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(response,), redisClient=self.redisMessaging)
                 return response
         except ValueError as e:
-            self.logTool.log(service='HSS', level='debug', message="Error getting subscriber details for IMSI " + str(imsi), redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message=e, redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Error getting subscriber details for IMSI %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(e,), redisClient=self.redisMessaging)
             decodedPlmn = self.DecodePLMN(plmn=plmn)
             mcc = decodedPlmn[0]
             mnc = decodedPlmn[1]
@@ -2213,7 +2404,7 @@ class Diameter:
                                             prefixHostname=self.hostname, 
                                             prefixServiceName='metric')
             #Handle if the subscriber is not present in HSS return "DIAMETER_ERROR_USER_UNKNOWN"
-            self.logTool.log(service='HSS', level='debug', message="Subscriber " + str(imsi) + " is unknown in database", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Subscriber %s is unknown in database", messageArgs=(imsi,), redisClient=self.redisMessaging)
             avp = ''
             session_id = self.get_avp_data(avps, 263)[0]                                                     #Get Session-ID
             avp += self.generate_avp(263, 40, session_id)                                                    #Session-ID AVP set
@@ -2245,7 +2436,7 @@ class Diameter:
                 subscriberIsRoaming = True
             
             if subscriberIsRoaming:
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777251_318] [AIA] Subscriber {imsi} is roaming", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777251_318] [AIA] Subscriber %s is roaming", messageArgs=(imsi,), redisClient=self.redisMessaging)
                 subscriberRoamingAllowed = self.validateSubscriberRoaming(subscriber=subscriber_details, mcc=mcc, mnc=mnc)
 
             if not subscriberRoamingAllowed and subscriberIsRoaming:
@@ -2266,7 +2457,7 @@ class Diameter:
                 response = self.generate_diameter_packet("01", "40", 318, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
                 return response
             
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777251_318] [AIA] Subscriber {imsi} passed roaming validation for {decodedPlmn}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777251_318] [AIA] Subscriber %s passed roaming validation for %s", messageArgs=(imsi, decodedPlmn,), redisClient=self.redisMessaging)
             
         except Exception as e:
             self.logTool.log(service='HSS', level='error', message=f"[diameter.py] [Answer_16777251_318] [AIA] Error when validating subscriber roaming: {traceback.format_exc()}", redisClient=self.redisMessaging)
@@ -2275,11 +2466,11 @@ class Diameter:
         try:
             requested_vectors = 1
             EUTRAN_Authentication_Info = self.get_avp_data(avps, 1408)
-            self.logTool.log(service='HSS', level='debug', message=f"authInfo: {EUTRAN_Authentication_Info}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="authInfo: %s", messageArgs=(EUTRAN_Authentication_Info,), redisClient=self.redisMessaging)
             if len(EUTRAN_Authentication_Info) > 0:
                 EUTRAN_Authentication_Info = EUTRAN_Authentication_Info[0]
                 self.logTool.log(service='HSS', level='debug', message="AVP: Requested-EUTRAN-Authentication-Info(1408) l=44 f=VM- vnd=TGPP", redisClient=self.redisMessaging)
-                self.logTool.log(service='HSS', level='debug', message="EUTRAN_Authentication_Info is " + str(EUTRAN_Authentication_Info), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="EUTRAN_Authentication_Info is %s", messageArgs=(EUTRAN_Authentication_Info,), redisClient=self.redisMessaging)
                 for sub_avp in EUTRAN_Authentication_Info:
                     #If resync request
                     if sub_avp['avp_code'] == 1411:
@@ -2305,16 +2496,16 @@ class Diameter:
 
                     #Get number of requested vectors
                     if sub_avp['avp_code'] == 1410:
-                        self.logTool.log(service='HSS', level='debug', message="Raw value of requested vectors is " + str(sub_avp['misc_data']), redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="Raw value of requested vectors is %s", messageArgs=(sub_avp['misc_data'],), redisClient=self.redisMessaging)
                         requested_vectors = int(sub_avp['misc_data'], 16)
                         if requested_vectors >= 32:
-                            self.logTool.log(service='HSS', level='debug', message="Client has requested " + str(requested_vectors) + " vectors, limiting this to 32", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="Client has requested %s vectors, limiting this to 32", messageArgs=(requested_vectors,), redisClient=self.redisMessaging)
                             requested_vectors = 32
 
-            self.logTool.log(service='HSS', level='debug', message="Generating " + str(requested_vectors) + " vectors as requested", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Generating %s vectors as requested", messageArgs=(requested_vectors,), redisClient=self.redisMessaging)
             eutranvector_complete = ''
             while requested_vectors != 0:
-                self.logTool.log(service='HSS', level='debug', message="Generating vector number " + str(requested_vectors), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Generating vector number %s", messageArgs=(requested_vectors,), redisClient=self.redisMessaging)
                 plmn = self.get_avp_data(avps, 1407)[0]                                                     #Get PLMN from request
                 vector_dict = self.database.Get_Vectors_AuC(subscriber_details['auc_id'], "air", plmn=plmn)
                 eutranvector = ''                                                                           #This goes into the payload of AVP 10415 (Authentication info)
@@ -2340,7 +2531,7 @@ class Diameter:
             
             response = self.generate_diameter_packet("01", "40", 318, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
             self.logTool.log(service='HSS', level='debug', message="Successfully Generated AIA", redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message=response, redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(response,), redisClient=self.redisMessaging)
             return response
         except Exception as e:
             self.logTool.log(service='HSS', level='error', message=traceback.format_exc(), redisClient=self.redisMessaging)
@@ -2376,7 +2567,7 @@ class Diameter:
         response = self.generate_diameter_packet("01", "40", 321, 16777251, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
         
         if self.ignorePurgeUeRequest == False:
-            self.database.Update_Serving_MME(imsi, None)
+            self.database.Update_Serving_MME(imsi, None, writeBehind=True)
         self.logTool.log(service='HSS', level='debug', message="Successfully Generated PUA", redisClient=self.redisMessaging)
         return response
 
@@ -2417,7 +2608,7 @@ class Diameter:
                         apn = apn.split('.')[0]
             except Exception as e:
                 apn = bytes.fromhex(self.get_avp_data(avps, 30)[0]).decode('utf-8')
-            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] CCR for APN " + str(apn), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] CCR for APN %s", messageArgs=(apn,), redisClient=self.redisMessaging)
 
             OriginHost = self.get_avp_data(avps, 264)[0]                          #Get OriginHost from AVP
             OriginHost = binascii.unhexlify(OriginHost).decode('utf-8')      #Format it
@@ -2430,12 +2621,12 @@ class Diameter:
                 remote_peer = binascii.unhexlify(remote_peer).decode('utf-8')           #Format it
             except:     #If we don't have a record-route set, we'll send the response to the OriginHost
                 remote_peer = OriginHost
-            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Remote Peer is " + str(remote_peer), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Remote Peer is %s", messageArgs=(remote_peer,), redisClient=self.redisMessaging)
             remote_peer = remote_peer + ";" + str(self.config['hss']['OriginHost'])
 
             avp = ''                                                                                    #Initiate empty var AVP
             session_id = self.get_avp_data(avps, 263)[0]                                                     #Get Session-ID
-            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Session Id is " + str(binascii.unhexlify(session_id).decode()), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message=lambda: "[diameter.py] [Answer_16777238_272] [CCA] Session Id is " + binascii.unhexlify(session_id).decode(), redisClient=self.redisMessaging)
             avp += self.generate_avp(263, 40, session_id)                                                    #Session-ID AVP set
             avp += self.generate_avp(264, 40, self.OriginHost)                                                    #Origin Host
             avp += self.generate_avp(296, 40, self.OriginRealm)                                                   #Origin Realm
@@ -2449,10 +2640,10 @@ class Diameter:
                     for UniqueSubscriptionIdentifier in SubscriptionIdentifier:
                         if UniqueSubscriptionIdentifier['avp_code'] == 444:
                             localImsi = binascii.unhexlify(UniqueSubscriptionIdentifier['misc_data']).decode('utf-8')
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] Got local IMSI: {localImsi}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Got local IMSI: %s", messageArgs=(localImsi,), redisClient=self.redisMessaging)
                             subscriberDetails = self.database.Get_Subscriber(imsi=localImsi)
                             if not subscriberDetails:
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] Local IMSI {localImsi} not found, treating as Emergency Subscriber", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Local IMSI %s not found, treating as Emergency Subscriber", messageArgs=(localImsi,), redisClient=self.redisMessaging)
                                 localImsi = None
             except:
                 localImsi = None
@@ -2623,23 +2814,23 @@ class Diameter:
             for SubscriptionIdentifier in self.get_avp_data(avps, 443):
                 subscription_type = -1
                 for UniqueSubscriptionIdentifier in SubscriptionIdentifier:
-                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Evaluating UniqueSubscriptionIdentifier AVP " + str(UniqueSubscriptionIdentifier) + " to find IMSI", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Evaluating UniqueSubscriptionIdentifier AVP %s to find IMSI", messageArgs=(UniqueSubscriptionIdentifier,), redisClient=self.redisMessaging)
                     if UniqueSubscriptionIdentifier['avp_code'] == 450:                    
                         subscription_type = int(UniqueSubscriptionIdentifier['misc_data'])
-                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Subscription-Type " + str(subscription_type), redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Subscription-Type %s", messageArgs=(subscription_type,), redisClient=self.redisMessaging)
                     if UniqueSubscriptionIdentifier['avp_code'] == 444:
                         if subscription_type == 1:
                             imsi = binascii.unhexlify(UniqueSubscriptionIdentifier['misc_data']).decode('utf-8')
-                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Found IMSI " + str(imsi), redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] SubscriptionID: " + str(self.get_avp_data(avps, 443)), redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Found IMSI %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message=lambda: "[diameter.py] [Answer_16777238_272] [CCA] SubscriptionID: " + str(self.get_avp_data(avps, 443)), redisClient=self.redisMessaging)
             try:
-                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Getting Get_Charging_Rules for IMSI " + str(imsi) + " using APN " + str(apn) + " from database", redisClient=self.redisMessaging)                                            #Get subscriber details
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Getting Get_Charging_Rules for IMSI %s using APN %s from database", messageArgs=(imsi, apn,), redisClient=self.redisMessaging)                                            #Get subscriber details
                 ChargingRules = self.database.Get_Charging_Rules(imsi=imsi, apn=apn)
-                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Got Charging Rules: " + str(ChargingRules), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Got Charging Rules: %s", messageArgs=(ChargingRules,), redisClient=self.redisMessaging)
             except Exception as E:
                 #Handle if the subscriber is not present in HSS return "DIAMETER_ERROR_USER_UNKNOWN"
-                self.logTool.log(service='HSS', level='debug', message=E, redisClient=self.redisMessaging)
-                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Subscriber " + str(imsi) + " unknown in HSS for CCR - Check Charging Rule assigned to APN is set and exists", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(E,), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Subscriber %s unknown in HSS for CCR - Check Charging Rule assigned to APN is set and exists", messageArgs=(imsi,), redisClient=self.redisMessaging)
 
 
             # CCR - Initial Request
@@ -2677,15 +2868,15 @@ class Diameter:
 
                 #Store PGW location into Database
                 remote_peer = remote_peer + ";" + str(self.config['hss']['OriginHost'])
-                self.database.Update_Serving_APN(imsi=imsi, apn=apn, pcrf_session_id=binascii.unhexlify(session_id).decode(), serving_pgw=OriginHost, subscriber_routing=str(ue_ip), serving_pgw_realm=OriginRealm, serving_pgw_peer=remote_peer)
+                self.database.Update_Serving_APN(imsi=imsi, apn=apn, pcrf_session_id=binascii.unhexlify(session_id).decode(), serving_pgw=OriginHost, subscriber_routing=str(ue_ip), serving_pgw_realm=OriginRealm, serving_pgw_peer=remote_peer, writeBehind=True)
 
                 # Update Subscriber location information
                 try:
                     default_eps_bearer_qos = self.get_avp_data(avps, 1049)[0]
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] default_eps_bearer_qos: {default_eps_bearer_qos}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] default_eps_bearer_qos: %s", messageArgs=(default_eps_bearer_qos,), redisClient=self.redisMessaging)
 
                     default_eps_bearer_3gpp_user_location_info = self.decode_3gpp_user_location_info(self.get_avp_data(default_eps_bearer_qos, 22)[0])
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] default_eps_bearer_3gpp_user_location_info: {default_eps_bearer_3gpp_user_location_info}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] default_eps_bearer_3gpp_user_location_info: %s", messageArgs=(default_eps_bearer_3gpp_user_location_info,), redisClient=self.redisMessaging)
 
                     last_seen_eci = default_eps_bearer_3gpp_user_location_info.get('ecgi', {}).get('eci', None)
                     last_seen_enodeb_id = default_eps_bearer_3gpp_user_location_info.get('ecgi', {}).get('enodeb_id', None)
@@ -2703,7 +2894,8 @@ class Diameter:
                                                             last_seen_mcc=last_seen_mcc,
                                                             last_seen_mnc=last_seen_mnc,
                                                             last_location_update_timestamp=last_location_update_timestamp,
-                                                            propagate=True)
+                                                            propagate=True,
+                                                            writeBehind=True)
 
                 except Exception as e:
                     pass
@@ -2761,29 +2953,29 @@ class Diameter:
 
                     QoS_Information = ''
                     for AMBR_Part in self.get_avp_data(avps, 1016)[0]:
-                        self.logTool.log(service='HSS', level='debug', message=AMBR_Part, redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(AMBR_Part,), redisClient=self.redisMessaging)
                         AMBR_AVP = self.generate_vendor_avp(AMBR_Part['avp_code'], "80", 10415, AMBR_Part['misc_data'][8:])
                         QoS_Information += AMBR_AVP
-                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] QoS_Information added " + str(AMBR_AVP), redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] QoS_Information added %s", messageArgs=(AMBR_AVP,), redisClient=self.redisMessaging)
                     avp += self.generate_vendor_avp(1016, "80", 10415, QoS_Information)
                     self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] QoS information set statically", redisClient=self.redisMessaging)
                     
                 self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Added to AVP List", redisClient=self.redisMessaging)
-                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] QoS Information: " + str(QoS_Information), redisClient=self.redisMessaging)                                                                                 
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] QoS Information: %s", messageArgs=(QoS_Information,), redisClient=self.redisMessaging)                                                                                 
                 
                 # If database returned an existing ChargingRule defintion add ChargingRule to CCA-I
                 # If a Charging Rule Install AVP is present, it may trigger the creation of a dedicated bearer.
                 if ChargingRules and ChargingRules['charging_rules'] is not None:
                     try:
-                        self.logTool.log(service='HSS', level='debug', message=ChargingRules, redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(ChargingRules,), redisClient=self.redisMessaging)
                         for individual_charging_rule in ChargingRules['charging_rules']:
-                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Processing Charging Rule: " + str(individual_charging_rule), redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Processing Charging Rule: %s", messageArgs=(individual_charging_rule,), redisClient=self.redisMessaging)
                             chargingRule = self.Charging_Rule_Generator(ChargingRules=individual_charging_rule, ue_ip=ue_ip)
                             if len(chargingRule) > 0:
                                 avp += chargingRule
 
                     except Exception as E:
-                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Error in populating dynamic charging rules: " + str(E), redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Error in populating dynamic charging rules: %s", messageArgs=(E,), redisClient=self.redisMessaging)
 
             # CCR - Termination Request
             elif int(CC_Request_Type) == 3:
@@ -2820,16 +3012,16 @@ class Diameter:
                                     try:
                                         self.database.Update_Serving_CSCF(imsi=imsi, serving_cscf=None)
                                         self.database.Update_Proxy_CSCF(imsi=imsi, proxy_cscf=None)
-                                        self.database.Update_Serving_APN(imsi=imsi, apn=apn, pcrf_session_id=session_id_string, serving_pgw=None, subscriber_routing='')
+                                        self.database.Update_Serving_APN(imsi=imsi, apn=apn, pcrf_session_id=session_id_string, serving_pgw=None, subscriber_routing='', writeBehind=True)
                                         self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] Successfully cleared stored IMS state", redisClient=self.redisMessaging)
                                     except Exception as e:
-                                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] Failed to clear stored IMS state: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Failed to clear stored IMS state: %s", messageArgs=(traceback.format_exc(),), redisClient=self.redisMessaging)
                             else:
                                     try:
-                                        self.database.Update_Serving_APN(imsi=imsi, apn=apn, pcrf_session_id=session_id_string, serving_pgw=None, subscriber_routing='')
-                                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] Successfully cleared stored state for: {apn}", redisClient=self.redisMessaging)
+                                        self.database.Update_Serving_APN(imsi=imsi, apn=apn, pcrf_session_id=session_id_string, serving_pgw=None, subscriber_routing='', writeBehind=True)
+                                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Successfully cleared stored state for: %s", messageArgs=(apn,), redisClient=self.redisMessaging)
                                     except Exception as e:
-                                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777238_272] [CCA] Failed to clear apn state for {apn}: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Failed to clear apn state for %s: %s", messageArgs=(apn, traceback.format_exc(),), redisClient=self.redisMessaging)
                 else:
                     pass
 
@@ -2837,7 +3029,7 @@ class Diameter:
             response = self.generate_diameter_packet("01", "40", 272, 16777238, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
         except Exception as e:                                             #Get subscriber details
             #Handle if the subscriber is not present in HSS return "DIAMETER_ERROR_USER_UNKNOWN"
-            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Subscriber " + str(imsi) + " unknown in HSS for CCR", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777238_272] [CCA] Subscriber %s unknown in HSS for CCR", messageArgs=(imsi,), redisClient=self.redisMessaging)
 
             self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_auth_event_count',
                                             metricType='counter', metricAction='inc', 
@@ -2878,24 +3070,24 @@ class Diameter:
             remote_peer = binascii.unhexlify(remote_peer).decode('utf-8')           #Format it
         except:     #If we don't have a record-route set, we'll send the response to the OriginHost
             remote_peer = OriginHost
-        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777216_300] [UAR] Remote Peer is " + str(remote_peer), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777216_300] [UAR] Remote Peer is %s", messageArgs=(remote_peer,), redisClient=self.redisMessaging)
 
         try:
             self.logTool.log(service='HSS', level='debug', message="Checking if username present", redisClient=self.redisMessaging)
             username = self.get_avp_data(avps, 1)[0]                                                     
             username = binascii.unhexlify(username).decode('utf-8')
-            self.logTool.log(service='HSS', level='debug', message="Username AVP is present, value is " + str(username), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Username AVP is present, value is %s", messageArgs=(username,), redisClient=self.redisMessaging)
             user = username.split('@')[0]   #Strip Domain
             domain = username.split('@')[1] #Get Domain Part
             
             if self.config['hss']['use_msisdn_as_user']:
-                self.logTool.log(service='HSS', level='debug', message="Extracted MSISDN: " + str(user) + " now checking backend for this MSISDN", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Extracted MSISDN: %s now checking backend for this MSISDN", messageArgs=(user,), redisClient=self.redisMessaging)
                 ims_subscriber_details = self.database.Get_IMS_Subscriber(msisdn=user)
             else:
-                self.logTool.log(service='HSS', level='debug', message="Extracted IMSI: " + str(user) + " now checking backend for this IMSI", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Extracted IMSI: %s now checking backend for this IMSI", messageArgs=(user,), redisClient=self.redisMessaging)
                 ims_subscriber_details = self.database.Get_IMS_Subscriber(imsi=user)
         except Exception as E:
-            self.logTool.log(service='HSS', level='debug', message="Threw Exception: " + str(E), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Threw Exception: %s", messageArgs=(E,), redisClient=self.redisMessaging)
             self.logTool.log(service='HSS', level='debug', message=f"No known MSISDN or IMSI in Answer_16777216_300()", redisClient=self.redisMessaging)
             self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_auth_event_count',
                                             metricType='counter', metricAction='inc', 
@@ -2924,7 +3116,7 @@ class Diameter:
         if user_authorization_type_avp_data:
             try:
                 User_Authorization_Type = int(user_authorization_type_avp_data[0])
-                self.logTool.log(service='HSS', level='debug', message="User_Authorization_Type is: " + str(User_Authorization_Type), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="User_Authorization_Type is: %s", messageArgs=(User_Authorization_Type,), redisClient=self.redisMessaging)
                 if (User_Authorization_Type == 1):
                     self.logTool.log(service='HSS', level='debug', message="This is Deregister", redisClient=self.redisMessaging)
                     self.database.Update_Serving_CSCF(imsi, serving_cscf=None)
@@ -2935,10 +3127,10 @@ class Diameter:
                     return response
                     
             except Exception as E:
-                self.logTool.log(service='HSS', level='debug', message="Failed to get User_Authorization_Type AVP & Update_Serving_CSCF error: " + str(E), redisClient=self.redisMessaging)
-        self.logTool.log(service='HSS', level='debug', message="Got subscriber details: " + str(ims_subscriber_details), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Failed to get User_Authorization_Type AVP & Update_Serving_CSCF error: %s", messageArgs=(E,), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got subscriber details: %s", messageArgs=(ims_subscriber_details,), redisClient=self.redisMessaging)
         if ims_subscriber_details['scscf'] != None:
-            self.logTool.log(service='HSS', level='debug', message="Already has SCSCF Assigned from DB: " + str(ims_subscriber_details['scscf']), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Already has SCSCF Assigned from DB: %s", messageArgs=(ims_subscriber_details['scscf'],), redisClient=self.redisMessaging)
             avp += self.generate_vendor_avp(602, "c0", 10415, str(binascii.hexlify(str.encode(ims_subscriber_details['scscf'])),'ascii'))
             experimental_avp = ''
             experimental_avp += experimental_avp + self.generate_avp(266, 40, format(int(10415),"x").zfill(8))          #3GPP Vendor ID            
@@ -2949,11 +3141,11 @@ class Diameter:
             if 'scscf_pool' in self.config['hss']:
                 try:
                     scscf = random.choice(self.config['hss']['scscf_pool'])
-                    self.logTool.log(service='HSS', level='debug', message="Randomly picked SCSCF address " + str(scscf) + " from pool", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Randomly picked SCSCF address %s from pool", messageArgs=(scscf,), redisClient=self.redisMessaging)
                     avp += self.generate_vendor_avp(602, "c0", 10415, str(binascii.hexlify(str.encode(scscf)),'ascii'))
                 except Exception as E:
                     avp += self.generate_vendor_avp(602, "c0", 10415, str(binascii.hexlify(str.encode("sip:scscf.ims.mnc" + str(self.MNC).zfill(3) + ".mcc" + str(self.MCC).zfill(3) + ".3gppnetwork.org")),'ascii'))
-                    self.logTool.log(service='HSS', level='debug', message="Using generated S-CSCF Address as failed to source from list due to " + str(E), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Using generated S-CSCF Address as failed to source from list due to %s", messageArgs=(E,), redisClient=self.redisMessaging)
             else:                        
                 avp += self.generate_vendor_avp(602, "c0", 10415, str(binascii.hexlify(str.encode("sip:scscf.ims.mnc" + str(self.MNC).zfill(3) + ".mcc" + str(self.MCC).zfill(3) + ".3gppnetwork.org")),'ascii'))
                 self.logTool.log(service='HSS', level='debug', message="Using generated S-CSCF Address as none set in scscf_pool in config", redisClient=self.redisMessaging)
@@ -2988,17 +3180,17 @@ class Diameter:
             remote_peer = binascii.unhexlify(remote_peer).decode('utf-8')           #Format it
         except:     #If we don't have a record-route set, we'll send the response to the OriginHost
             remote_peer = OriginHost
-        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777216_301] [SAR] Remote Peer is " + str(remote_peer), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777216_301] [SAR] Remote Peer is %s", messageArgs=(remote_peer,), redisClient=self.redisMessaging)
 
         try:
             self.logTool.log(service='HSS', level='debug', message="Checking if username present", redisClient=self.redisMessaging)
             username = self.get_avp_data(avps, 601)[0]                                                     
             ims_subscriber_details = self.Get_IMS_Subscriber_Details_from_AVP(username) 
-            self.logTool.log(service='HSS', level='debug', message="Got subscriber details: " + str(ims_subscriber_details), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Got subscriber details: %s", messageArgs=(ims_subscriber_details,), redisClient=self.redisMessaging)
             imsi = ims_subscriber_details['imsi']
             domain = "ims.mnc" + str(self.MNC).zfill(3) + ".mcc" + str(self.MCC).zfill(3) + ".3gppnetwork.org"
         except Exception as E:
-            self.logTool.log(service='HSS', level='debug', message="Threw Exception: " + str(E), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Threw Exception: %s", messageArgs=(E,), redisClient=self.redisMessaging)
             self.logTool.log(service='HSS', level='debug', message=f"No known MSISDN or IMSI in Answer_16777216_301()", redisClient=self.redisMessaging)
             result_code = 5005
             #Experimental Result AVP
@@ -3015,7 +3207,7 @@ class Diameter:
         #This loads a Jinja XML template as the default iFC
         templateLoader = jinja2.FileSystemLoader(searchpath="../")
         templateEnv = jinja2.Environment(loader=templateLoader)
-        self.logTool.log(service='HSS', level='debug', message="Loading iFC from path " + str(ims_subscriber_details['ifc_path']), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Loading iFC from path %s", messageArgs=(ims_subscriber_details['ifc_path'],), redisClient=self.redisMessaging)
         template = templateEnv.get_template(ims_subscriber_details['ifc_path'])
         
         #These variables are passed to the template for use
@@ -3032,10 +3224,10 @@ class Diameter:
         #Determine SAR Type & Store
         Server_Assignment_Type_Hex = self.get_avp_data(avps, 614)[0]
         Server_Assignment_Type = self.hex_to_int(Server_Assignment_Type_Hex)
-        self.logTool.log(service='HSS', level='debug', message="Server-Assignment-Type is: " + str(Server_Assignment_Type), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Server-Assignment-Type is: %s", messageArgs=(Server_Assignment_Type,), redisClient=self.redisMessaging)
         ServingCSCF = self.get_avp_data(avps, 602)[0]                          #Get OriginHost from AVP
         ServingCSCF = binascii.unhexlify(ServingCSCF).decode('utf-8')      #Format it
-        self.logTool.log(service='HSS', level='debug', message="Subscriber is served by S-CSCF " + str(ServingCSCF), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Subscriber is served by S-CSCF %s", messageArgs=(ServingCSCF,), redisClient=self.redisMessaging)
         if (Server_Assignment_Type == 1) or (Server_Assignment_Type == 2):
             self.logTool.log(service='HSS', level='debug', message="SAR is Register / Re-Register", redisClient=self.redisMessaging)
             remote_peer = remote_peer + ";" + str(self.config['hss']['OriginHost'])
@@ -3048,10 +3240,10 @@ class Diameter:
             ims_subscriber_details = self.Get_IMS_Subscriber_Details_from_AVP(username)   
             scscf_on_record = ims_subscriber_details.get('scscf', None)
             if scscf_on_record == ServingCSCF:
-                self.logTool.log(service='HSS', level='debug', message="Subscriber is served by S-CSCF " + str(ServingCSCF) + " and matches S-CSCF on record - Clearing Registration" + str(scscf_on_record), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Subscriber is served by S-CSCF %s and matches S-CSCF on record - Clearing Registration%s", messageArgs=(ServingCSCF, scscf_on_record,), redisClient=self.redisMessaging)
                 self.database.Update_Serving_CSCF(imsi, serving_cscf=None)
             else:
-                self.logTool.log(service='HSS', level='debug', message="Subscriber is served by S-CSCF " + str(ServingCSCF) + " but does not match S-CSCF on record - Ignoring request to clear registration" + str(scscf_on_record), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Subscriber is served by S-CSCF %s but does not match S-CSCF on record - Ignoring request to clear registration%s", messageArgs=(ServingCSCF, scscf_on_record,), redisClient=self.redisMessaging)
 
         avp += self.generate_avp(268, 40, self.int_to_hex(2001, 4))                                 #Result Code (DIAMETER_SUCCESS (2001))
 
@@ -3081,16 +3273,16 @@ class Diameter:
                 if 'scscf_pool' in self.config['hss']:
                     try:
                         scscf = random.choice(self.config['hss']['scscf_pool'])
-                        self.logTool.log(service='HSS', level='debug', message="Randomly picked SCSCF address " + str(scscf) + " from pool", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="Randomly picked SCSCF address %s from pool", messageArgs=(scscf,), redisClient=self.redisMessaging)
                         avp += self.generate_vendor_avp(602, "c0", 10415, str(binascii.hexlify(str.encode(scscf)),'ascii'))
                     except Exception as E:
                         avp += self.generate_vendor_avp(602, "c0", 10415, str(binascii.hexlify(str.encode("sip:scscf.ims.mnc" + str(self.MNC).zfill(3) + ".mcc" + str(self.MCC).zfill(3) + ".3gppnetwork.org")),'ascii'))
-                        self.logTool.log(service='HSS', level='debug', message="Using generated iFC as failed to source from list due to " + str(E), redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="Using generated iFC as failed to source from list due to %s", messageArgs=(E,), redisClient=self.redisMessaging)
                 else:                        
                     avp += self.generate_vendor_avp(602, "c0", 10415, str(binascii.hexlify(str.encode("sip:scscf.ims.mnc" + str(self.MNC).zfill(3) + ".mcc" + str(self.MCC).zfill(3) + ".3gppnetwork.org")),'ascii'))
                     self.logTool.log(service='HSS', level='debug', message="Using generated iFC", redisClient=self.redisMessaging)
         except Exception as E:
-            self.logTool.log(service='HSS', level='debug', message="Threw Exception: " + str(E), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Threw Exception: %s", messageArgs=(E,), redisClient=self.redisMessaging)
             self.logTool.log(service='HSS', level='debug', message=f"No known MSISDN or IMSI in Answer_16777216_302()", redisClient=self.redisMessaging)
             result_code = 5001
             self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_auth_event_count',
@@ -3123,12 +3315,12 @@ class Diameter:
     def Answer_16777216_303(self, packet_vars, avps):
         public_identity = self.get_avp_data(avps, 601)[0]
         public_identity = binascii.unhexlify(public_identity).decode('utf-8')
-        self.logTool.log(service='HSS', level='debug', message="Got MAR for public_identity : " + str(public_identity), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got MAR for public_identity : %s", messageArgs=(public_identity,), redisClient=self.redisMessaging)
         username = self.get_avp_data(avps, 1)[0]
         username = binascii.unhexlify(username).decode('utf-8')
         user = username.split('@')[0]   #Strip Domain
         domain = username.split('@')[1] #Get Domain Part
-        self.logTool.log(service='HSS', level='debug', message="Got MAR username: " + str(username), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got MAR username: %s", messageArgs=(username,), redisClient=self.redisMessaging)
         auth_schemes = ["Digest-MD5", "Digest-SHA-256", "Digest-SHA-512-256"]
         auth_scheme = ''
 
@@ -3147,7 +3339,7 @@ class Diameter:
                 subscriber_details = self.database.Get_Subscriber(imsi=user)
         except:
             #Handle if the subscriber is not present in HSS return "DIAMETER_ERROR_USER_UNKNOWN"
-            self.logTool.log(service='HSS', level='debug', message="Subscriber " + str(user) + " unknown in HSS for MAA", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Subscriber %s unknown in HSS for MAA", messageArgs=(user,), redisClient=self.redisMessaging)
             self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_auth_event_count',
                                             metricType='counter', metricAction='inc', 
                                             metricValue=1.0, 
@@ -3197,11 +3389,11 @@ class Diameter:
                                                 prefixHostname=self.hostname, 
                                                 prefixServiceName='metric')
             if sub_avp_612['avp_code'] == 608:
-                self.logTool.log(service='HSS', level='debug', message="Auth mechansim requested: " + str(sub_avp_612['misc_data']), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Auth mechansim requested: %s", messageArgs=(sub_avp_612['misc_data'],), redisClient=self.redisMessaging)
                 auth_scheme = binascii.unhexlify(sub_avp_612['misc_data']).decode('utf-8')
-                self.logTool.log(service='HSS', level='debug', message="Auth mechansim requested: " + str(auth_scheme), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Auth mechansim requested: %s", messageArgs=(auth_scheme,), redisClient=self.redisMessaging)
 
-        self.logTool.log(service='HSS', level='debug', message="IMSI is " + str(imsi), redisClient=self.redisMessaging)        
+        self.logTool.log(service='HSS', level='debug', message="IMSI is %s", messageArgs=(imsi,), redisClient=self.redisMessaging)        
         avp += self.generate_vendor_avp(601, "c0", 10415, str(binascii.hexlify(str.encode(public_identity)),'ascii'))               #Public Identity (IMSI)
         avp += self.generate_avp(1, 40, str(binascii.hexlify(str.encode(imsi + "@" + domain)),'ascii'))                                    #Username
 
@@ -3210,7 +3402,7 @@ class Diameter:
         #Determine Vectors to Generate
         if auth_scheme in auth_schemes:
             # Digest-MD5, Digest-SHA-256, Digest-SHA-512-256
-            self.logTool.log(service='HSS', level="debug", message=f"Generating {auth_scheme} Auth Challenge", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level="debug", message="Generating %s Auth Challenge", messageArgs=(auth_scheme,), redisClient=self.redisMessaging)
             vector_dict = self.database.Get_Vectors_AuC(subscriber_details['auc_id'], auth_scheme, username=imsi, plmn=plmn)
             avp_SIP_Item_Number = self.generate_vendor_avp(613, "c0", 10415, format(0, "x").zfill(8))
             avp_SIP_Authentication_Scheme = self.generate_vendor_avp(608, "c0", 10415, str(binascii.hexlify(auth_scheme.encode()), 'ascii'))
@@ -3297,9 +3489,9 @@ class Diameter:
         session_id = self.get_avp_data(avps, 263)[0]                                                     #Get Session-ID
         avp += self.generate_avp(263, 40, session_id)                                                    #Set session ID to received session ID
         vendor_id = self.generate_avp(266, 40, str(binascii.hexlify('10415'),'ascii'))
-        self.logTool.log(service='HSS', level='debug', message="vendor_id avp: " + str(vendor_id), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="vendor_id avp: %s", messageArgs=(vendor_id,), redisClient=self.redisMessaging)
         auth_application_id = self.generate_avp(248, 40, self.int_to_hex(16777252, 8))
-        self.logTool.log(service='HSS', level='debug', message="auth_application_id: " + auth_application_id, redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message=lambda: "auth_application_id: " + auth_application_id, redisClient=self.redisMessaging)
         avp += self.generate_avp(260, 40, "0000010a4000000c000028af000001024000000c01000000")            #Vendor-Specific-Application-ID for Cx
         avp += self.generate_avp(268, 40, "000007d1")                                                   #Result Code - DIAMETER_SUCCESS
         avp += self.generate_avp(277, 40, "00000001")                                                    #Auth Session State        
@@ -3333,16 +3525,16 @@ class Diameter:
             #Try to get MSISDN
             try:
                 msisdn = self.get_avp_data(user_identity_avp, 701)[0]                                                         #Get MSISDN from AVP in request
-                self.logTool.log(service='HSS', level='debug', message="Got raw MSISDN with value " + str(msisdn), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Got raw MSISDN with value %s", messageArgs=(msisdn,), redisClient=self.redisMessaging)
                 msisdn = self.TBCD_decode(msisdn)
-                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with value " + str(msisdn), redisClient=self.redisMessaging)            
+                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with value %s", messageArgs=(msisdn,), redisClient=self.redisMessaging)            
                 subscriber_ims_details = self.database.Get_IMS_Subscriber(msisdn=msisdn)
                 subscriber_details = self.database.Get_Subscriber(msisdn=msisdn)
             except:
             #Try to get the IMSI from the Public Identity
                 public_identity = self.get_avp_data(avps, 601)[0]
                 public_identity = binascii.unhexlify(public_identity).decode('utf-8')
-                self.logTool.log(service='HSS', level='debug', message="Got public_identity : " + str(public_identity), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Got public_identity : %s", messageArgs=(public_identity,), redisClient=self.redisMessaging)
                 if "sip:" in public_identity:
                     public_identity = public_identity.replace("sip:", "")
                 
@@ -3352,12 +3544,12 @@ class Diameter:
                 
                 if len(public_identity) == 15:
                     imsi = public_identity
-                    self.logTool.log(service='HSS', level='debug', message="Got IMSI: " + str(imsi), redisClient=self.redisMessaging)                                                              
+                    self.logTool.log(service='HSS', level='debug', message="Got IMSI: %s", messageArgs=(imsi,), redisClient=self.redisMessaging)                                                              
                     subscriber_ims_details = self.database.Get_IMS_Subscriber(imsi=imsi)
                     subscriber_details = self.database.Get_Subscriber(imsi=imsi)
                 else:
                     msisdn = public_identity
-                    self.logTool.log(service='HSS', level='debug', message="Got msisdn : " + str(msisdn), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Got msisdn : %s", messageArgs=(msisdn,), redisClient=self.redisMessaging)
                     subscriber_ims_details = self.database.Get_IMS_Subscriber(msisdn=msisdn)
                     subscriber_details = self.database.Get_Subscriber(msisdn=msisdn)
         except:
@@ -3373,18 +3565,18 @@ class Diameter:
 
         if subscriber_ims_details is not None:
                 try:
-                    self.logTool.log(service='HSS', level='debug', message="Got subscriber IMS details: " + str(subscriber_ims_details), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Got subscriber IMS details: %s", messageArgs=(subscriber_ims_details,), redisClient=self.redisMessaging)
                     imsi = subscriber_details.get('imsi', None)
                     scscf = subscriber_ims_details.get('scscf', None)
                     if scscf is not None:
                         imsUserState = 1
                     else:
                         imsUserState = 0
-                    self.logTool.log(service='HSS', level='debug', message="Got subscriber details: " + str(subscriber_details), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Got subscriber details: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
                     subscriber_details = {**subscriber_details, **subscriber_ims_details, 'imsUserState': imsUserState}
-                    self.logTool.log(service='HSS', level='debug', message="Merged subscriber details: " + str(subscriber_details), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Merged subscriber details: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
                 except Exception as e:
-                    self.logTool.log(service='HSS', level='debug', message=f"No subscriber found for MSISDN {msisdn}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="No subscriber found for MSISDN %s", messageArgs=(msisdn,), redisClient=self.redisMessaging)
                     result_code = 5001
                     #Experimental Result AVP
                     avp_experimental_result = ''
@@ -3421,7 +3613,7 @@ class Diameter:
         #Sh-User-Data (XML)
         #This loads a Jinja XML template containing the Sh-User-Data
         sh_userdata_template = self.config['hss']['Default_Sh_UserData']
-        self.logTool.log(service='HSS', level='debug', message="Using template " + str(sh_userdata_template) + " for SH user data", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Using template %s for SH user data", messageArgs=(sh_userdata_template,), redisClient=self.redisMessaging)
         template = self.templateEnv.get_template(sh_userdata_template)
         #These variables are passed to the template for use
         subscriber_details['mnc'] = self.MNC.zfill(3)
@@ -3444,8 +3636,8 @@ class Diameter:
             outgoingCommunicationBarringRuleActive, outgoingCommunicationBarringAllowed = self.get_sh_profile_call_barring_rules('outgoing-communication-barring', subscriberShXml, namespaces)
 
             call_forwarding_active, call_forwarding_rules = self.get_sh_profile_call_forwarding_rules('communication-diversion', subscriberShXml, namespaces)
-            self.logTool.log(service='HSS', level='debug', message=f"Call forwarding rules enabled: {call_forwarding_active}", redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message=f"Call forwarding rules: {call_forwarding_rules}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Call forwarding rules enabled: %s", messageArgs=(call_forwarding_active,), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Call forwarding rules: %s", messageArgs=(call_forwarding_rules,), redisClient=self.redisMessaging)
 
             if incomingCommunicationBarringRuleActive:
                 if not incomingCommunicationBarringAllowed:
@@ -3493,13 +3685,13 @@ class Diameter:
 
 
         except Exception as e:
-            self.logTool.log(service='HSS', level='debug', message="Unable to parse Sh Profile XML for subscriber: " + str(subscriber_details), redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message=f"{traceback.format_exc()}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Unable to parse Sh Profile XML for subscriber: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(traceback.format_exc(),), redisClient=self.redisMessaging)
 
-        self.logTool.log(service='HSS', level='debug', message="Rendering template with values: " + str(subscriber_details), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Rendering template with values: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
         xmlbody = template.render(Sh_template_vars=subscriber_details)
 
-        self.logTool.log(service='HSS', level='debug', message=f"Template: {template}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Template: %s", messageArgs=(template,), redisClient=self.redisMessaging)
 
         avp += self.generate_vendor_avp(702, "c0", 10415, str(binascii.hexlify(str.encode(xmlbody)),'ascii'))
         
@@ -3521,7 +3713,7 @@ class Diameter:
         sh_user_data = self.get_avp_data(avps, 702)[0]                                                        #Get IMSI from User-Name AVP in request
         sh_user_data = binascii.unhexlify(sh_user_data).decode('utf-8')
 
-        self.logTool.log(service='HSS', level='debug', message="Got Sh User data: " + str(sh_user_data), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got Sh User data: %s", messageArgs=(sh_user_data,), redisClient=self.redisMessaging)
 
         #Push updated User Data into IMS Backend
         #Start with the Current User Data
@@ -3562,7 +3754,7 @@ class Diameter:
             avp += self.generate_vendor_avp(628, 80, 10415, "0000010a4000000c000028af0000027580000010000028af000000010000027680000010000028af00000001") #Supported Features
 
             subscriptionId = bytes.fromhex(self.get_avp_data(avps, 444)[0]).decode('ascii')
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Received subscription ID: {subscriptionId}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Received subscription ID: %s", messageArgs=(subscriptionId,), redisClient=self.redisMessaging)
             subscriptionId = subscriptionId.replace('sip:', '')
             imsi = None
             msisdn = None
@@ -3599,14 +3791,14 @@ class Diameter:
             If we didn't get a service urn, check if the IP represents a bearer for a local subscriber.
             """
             try:
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Service URN: {serviceUrn}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Service URN: %s", messageArgs=(serviceUrn,), redisClient=self.redisMessaging)
                 if not serviceUrn or serviceUrn == 'None' or serviceUrn == None:
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Checking Get_Serving_APN_By_IP for UE IP: {ueIp}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Checking Get_Serving_APN_By_IP for UE IP: %s", messageArgs=(ueIp,), redisClient=self.redisMessaging)
                     try:
                         ipServingApn = self.database.Get_Serving_APN_By_IP(subscriberIp=ueIp)
                     except:
                         ipServingApn = None
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] IP Serving APN: {ipServingApn}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] IP Serving APN: %s", messageArgs=(ipServingApn,), redisClient=self.redisMessaging)
                     ipApnName = ''
                     if ipServingApn:
                         ipApnName = self.database.Get_APN(apn_id=int(ipServingApn.get('apn', {})))
@@ -3616,23 +3808,23 @@ class Diameter:
                         localGeoredEndpoints = self.config.get('geored', {}).get('local_endpoints', [])
                         for localGeoredEndpoint in localGeoredEndpoints:
                             endpointUrl = f"{localGeoredEndpoint}/pcrf/pcrf_serving_apn_ip/{ueIp}"
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Searching remote HSS for serving apn: {endpointUrl}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Searching remote HSS for serving apn: %s", messageArgs=(endpointUrl,), redisClient=self.redisMessaging)
                             response = requests.get(url=endpointUrl, timeout=1)
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Response: {response.text}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Response: %s", messageArgs=(response.text,), redisClient=self.redisMessaging)
                             responseJson = response.json()
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Response JSON: {responseJson}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Response JSON: %s", messageArgs=(responseJson,), redisClient=self.redisMessaging)
                             if not responseJson:
                                 continue
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Recieved response from remote HSS: {responseJson}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Recieved response from remote HSS: %s", messageArgs=(responseJson,), redisClient=self.redisMessaging)
                             remoteServingApn = responseJson
                             ipApnName = self.database.Get_APN(apn_id=int(remoteServingApn.get('apn', {})))
                             ipApnName = ipApnName.get('apn', None)
 
             except Exception as e:
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Exception: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Exception: %s", messageArgs=(traceback.format_exc(),), redisClient=self.redisMessaging)
                 ipApnName = ''
 
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] IP APN Name: {ipApnName}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] IP APN Name: %s", messageArgs=(ipApnName,), redisClient=self.redisMessaging)
 
             if '@' in subscriptionId:
                 subscriberIdentifier = subscriptionId.split('@')[0]
@@ -3658,7 +3850,7 @@ class Diameter:
                         subscriberId = ue.get('subscriber_id', None)
                         subscriberDetails = self.database.Get_Subscriber(subscriber_id=subscriberId)
                         imsi = subscriberDetails.get('imsi', None)
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Found IMSI {imsi} by IP: {ueIP}", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Found IMSI %s by IP: %s", messageArgs=(imsi, ueIP,), redisClient=self.redisMessaging)
                     except Exception as e:
                         pass
             else:
@@ -3670,11 +3862,11 @@ class Diameter:
                     subscriberId = ue.get('subscriber_id', None)
                     subscriberDetails = self.database.Get_Subscriber(subscriber_id=subscriberId)
                     imsi = subscriberDetails.get('imsi', None)
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Found IMSI {imsi} by IP: {ueIP}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Found IMSI %s by IP: %s", messageArgs=(imsi, ueIP,), redisClient=self.redisMessaging)
                 except Exception as e:
                     pass
 
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] IMSI: {imsi} / MSISDN: {msisdn}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] IMSI: %s / MSISDN: %s", messageArgs=(imsi, msisdn,), redisClient=self.redisMessaging)
             imsEnabled = self.validateImsSubscriber(imsi=imsi, msisdn=msisdn)
 
             if imsEnabled or emergencySubscriber:
@@ -3751,8 +3943,8 @@ class Diameter:
                             if apnId == None:
                                 self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Getting ID for ims apn", redisClient=self.redisMessaging)
                                 apnId = (self.database.Get_APN_by_Name(apn="ims")).get('apn_id', None)
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] ApnID: {apnId}", redisClient=self.redisMessaging)
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Getting Serving APN for subscriberId: {subscriberId} and apnId: {apnId}", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] ApnID: %s", messageArgs=(apnId,), redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Getting Serving APN for subscriberId: %s and apnId: %s", messageArgs=(subscriberId, apnId,), redisClient=self.redisMessaging)
                             if remoteServingApn:
                                 servingApn = remoteServingApn
                             else:
@@ -3812,7 +4004,7 @@ class Diameter:
                                     for suppliedTft in suppliedTfts:
                                         tftDirection = None
                                         decodedTft = bytes.fromhex(suppliedTft).decode('ascii')
-                                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Got TFT from PCSCF: {decodedTft}", redisClient=self.redisMessaging)
+                                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Got TFT from PCSCF: %s", messageArgs=(decodedTft,), redisClient=self.redisMessaging)
                                         if 'permit out' in decodedTft.lower():
                                             tftDirection = 1
                                         if 'permit in' in decodedTft.lower():
@@ -3823,7 +4015,7 @@ class Diameter:
                                             decodedTftSplit = decodedTft.split(' ')
                                             decodedTft = f"permit out {decodedTftSplit[2]} from {decodedTftSplit[7]} {decodedTftSplit[8]} to {decodedTftSplit[4]} {decodedTftSplit[5]}"
                                             tftDirection = 2
-                                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Recompiled 'permit in' TFT to: {decodedTft}", redisClient=self.redisMessaging)
+                                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Recompiled 'permit in' TFT to: %s", messageArgs=(decodedTft,), redisClient=self.redisMessaging)
 
                                         completedTftList.append({
                                         "tft_group_id": 1,
@@ -3838,13 +4030,13 @@ class Diameter:
                         if not suppliedTfts:
                             try:
                                 sdpOffer = self.get_avp_data(avps, 524)[0]
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Got SDP Offer raw: {sdpOffer}", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Got SDP Offer raw: %s", messageArgs=(sdpOffer,), redisClient=self.redisMessaging)
                                 sdpOffer = binascii.unhexlify(sdpOffer).decode('utf-8')
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Got SDP Offer decoded: {sdpOffer}", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Got SDP Offer decoded: %s", messageArgs=(sdpOffer,), redisClient=self.redisMessaging)
                                 sdpAnswer = self.get_avp_data(avps, 524)[1]
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Got SDP Answer raw: {sdpAnswer}", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Got SDP Answer raw: %s", messageArgs=(sdpAnswer,), redisClient=self.redisMessaging)
                                 sdpAnswer = binascii.unhexlify(sdpAnswer).decode('utf-8')
-                                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Got SDP Answer decoded: {sdpAnswer}", redisClient=self.redisMessaging)
+                                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Got SDP Answer decoded: %s", messageArgs=(sdpAnswer,), redisClient=self.redisMessaging)
 
                                 regexIpv4 = r"IN IP4 (\d*\.\d*\.\d*\.\d*)"
                                 regexIpv6 = r"IN IP6 ([0-9a-fA-F:]{3,39})"
@@ -3955,10 +4147,10 @@ class Diameter:
                                 "accessNetworkGatewayAddress": emergencySubscriberData.get('access_network_gateway_address'),
                                 "accessNetworkChargingAddress": emergencySubscriberData.get('access_network_charging_address'),
                             }
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] Updating Emergency Subscriber: {updatedEmergencySubscriberData}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] Updating Emergency Subscriber: %s", messageArgs=(updatedEmergencySubscriberData,), redisClient=self.redisMessaging)
                             self.database.Update_Emergency_Subscriber(subscriberIp=ueIp, subscriberData=updatedEmergencySubscriberData, imsi=imsi)
 
-                        self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] RAR Generated to be sent to serving PGW: {servingPgw} via peer {servingPgwPeer}", redisClient=self.redisMessaging)
+                        self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] RAR Generated to be sent to serving PGW: %s via peer %s", messageArgs=(servingPgw, servingPgwPeer,), redisClient=self.redisMessaging)
                         reAuthAnswer = self.awaitDiameterRequestAndResponse(
                                 requestType='RAR',
                                 hostname=servingPgwPeer,
@@ -3970,7 +4162,7 @@ class Diameter:
                         )
 
                         if not len(reAuthAnswer) > 0:
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_265] [AAA] RAA Timeout: {reAuthAnswer}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_265] [AAA] RAA Timeout: %s", messageArgs=(reAuthAnswer,), redisClient=self.redisMessaging)
                             assert()
                             
                         raaPacketVars, raaAvps = self.decode_diameter_packet(reAuthAnswer)
@@ -4022,7 +4214,7 @@ class Diameter:
             avp += self.generate_avp(264, 40, self.OriginHost)                                               #Origin Host
             avp += self.generate_avp(296, 40, self.OriginRealm)                                              #Origin Realm
             subscriptionId = bytes.fromhex(self.get_avp_data(avps, 444)[0]).decode('ascii')
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_258] [RAA] Received subscription ID: {subscriptionId}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_258] [RAA] Received subscription ID: %s", messageArgs=(subscriptionId,), redisClient=self.redisMessaging)
             subscriptionId = subscriptionId.replace('sip:', '')
             imsi = None
             msisdn = None
@@ -4047,7 +4239,7 @@ class Diameter:
             else:
                 imsi = None
                 msisdn = None
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_258] [RAA] IMSI: {imsi} / MSISDN: {msisdn}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_258] [RAA] IMSI: %s / MSISDN: %s", messageArgs=(imsi, msisdn,), redisClient=self.redisMessaging)
             imsEnabled = self.validateImsSubscriber(imsi=imsi, msisdn=msisdn)
 
             if imsEnabled:
@@ -4099,12 +4291,12 @@ class Diameter:
                         localGeoredEndpoints = self.config.get('geored', {}).get('local_endpoints', [])
                         for localGeoredEndpoint in localGeoredEndpoints:
                             endpointUrl = f"{localGeoredEndpoint}/pcrf/pcrf_subscriber_imsi/{imsi}"
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_275] [STA] Searching remote HSS for serving apn: {endpointUrl}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_275] [STA] Searching remote HSS for serving apn: %s", messageArgs=(endpointUrl,), redisClient=self.redisMessaging)
                             response = requests.get(url=endpointUrl, timeout=1)
                             responseJson = response.json()
                             if not responseJson:
                                 continue
-                            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_275] [STA] Recieved response from remote HSS: {responseJson}", redisClient=self.redisMessaging)
+                            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_275] [STA] Recieved response from remote HSS: %s", messageArgs=(responseJson,), redisClient=self.redisMessaging)
                             remoteServingApn = responseJson
                             servingImsApn = remoteServingApn.get('apns', {}).get('ims', {})
                             if servingImsApn:
@@ -4129,9 +4321,9 @@ class Diameter:
                 emergencySubscriberData = self.database.Get_Emergency_Subscriber(rxSessionId=sessionId)
                 if emergencySubscriberData:
                     emergencySubscriber = True
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_275] [STA] Found emergency subscriber with Rx Session: {sessionId}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_275] [STA] Found emergency subscriber with Rx Session: %s", messageArgs=(sessionId,), redisClient=self.redisMessaging)
             except Exception as e:
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_275] [STA] Error getting Emergency Subscriber Data: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_275] [STA] Error getting Emergency Subscriber Data: %s", messageArgs=(traceback.format_exc(),), redisClient=self.redisMessaging)
                 emergencySubscriberData = None
             
             if emergencySubscriberData:
@@ -4143,9 +4335,9 @@ class Diameter:
             try:
                 aarSessionID = self.get_avp_data(avps, 263)[0]
                 aarSessionID = bytes.fromhex(aarSessionID).decode('ascii')
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_275] [STA] Got Original SessionID: {aarSessionID}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_275] [STA] Got Original SessionID: %s", messageArgs=(aarSessionID,), redisClient=self.redisMessaging)
             except:
-                self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_275] [STA] Error getting Original SessionID: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_275] [STA] Error getting Original SessionID: %s", messageArgs=(traceback.format_exc(),), redisClient=self.redisMessaging)
                 aarSessionID = ""
             if servingApn is not None or emergencySubscriberData:
                 reAuthAnswer = self.awaitDiameterRequestAndResponse(
@@ -4159,7 +4351,7 @@ class Diameter:
                 )
             
                 if not len(reAuthAnswer) > 0:
-                    self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Answer_16777236_275] [STA] RAA Timeout: {reAuthAnswer}", redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Answer_16777236_275] [STA] RAA Timeout: %s", messageArgs=(reAuthAnswer,), redisClient=self.redisMessaging)
                     assert()
                 
                 raaPacketVars, raaAvps = self.decode_diameter_packet(reAuthAnswer)
@@ -4231,18 +4423,18 @@ class Diameter:
             imsi = self.get_avp_data(avps, 1)[0]                                                            #Get IMSI from User-Name AVP in request
             imsi = binascii.unhexlify(imsi).decode('utf-8')                                                 #Convert IMSI
             #avp += self.generate_avp(1, 40, self.string_to_hex(imsi))                                      #Username (IMSI)
-            self.logTool.log(service='HSS', level='debug', message="Got IMSI with value " + str(imsi), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Got IMSI with value %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
         except Exception as e:
             self.logTool.log(service='HSS', level='debug', message="Failed to get IMSI from LCS-Routing-Info-Request", redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message="Error was: " + str(e), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Error was: %s", messageArgs=(e,), redisClient=self.redisMessaging)
 
         try:
             #Get IMEI
             for sub_avp in self.get_avp_data(avps, 1401)[0]:
-                self.logTool.log(service='HSS', level='debug', message="Evaluating sub_avp AVP " + str(sub_avp) + " to find IMSI", redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Evaluating sub_avp AVP %s to find IMSI", messageArgs=(sub_avp,), redisClient=self.redisMessaging)
                 if sub_avp['avp_code'] == 1402:
                     imei = binascii.unhexlify(sub_avp['misc_data']).decode('utf-8')
-                    self.logTool.log(service='HSS', level='debug', message="Found IMEI " + str(imei), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Found IMEI %s", messageArgs=(imei,), redisClient=self.redisMessaging)
 
             avp = ''                                                                                        #Initiate empty var AVP
             session_id = self.get_avp_data(avps, 263)[0]                                                    #Get Session-ID
@@ -4307,22 +4499,22 @@ class Diameter:
                 imsi = self.get_avp_data(avps, 1)[0]                                                            #Get IMSI from User-Name AVP in request
                 imsi = binascii.unhexlify(imsi).decode('utf-8')                                                 #Convert IMSI
                 avp += self.generate_avp(1, 40, self.string_to_hex(imsi))                                       #Username (IMSI)
-                self.logTool.log(service='HSS', level='debug', message="Got IMSI with value " + str(imsi), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Got IMSI with value %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
             except Exception as e:
                 self.logTool.log(service='HSS', level='debug', message="Failed to get IMSI from LCS-Routing-Info-Request", redisClient=self.redisMessaging)
-                self.logTool.log(service='HSS', level='debug', message="Error was: " + str(e), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Error was: %s", messageArgs=(e,), redisClient=self.redisMessaging)
         elif 701 in present_avps:
             #Try and get MSISDN if present
             try:
                 msisdn = self.get_avp_data(avps, 701)[0]                                                          #Get MSISDN from AVP in request
-                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with value " + str(msisdn), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with value %s", messageArgs=(msisdn,), redisClient=self.redisMessaging)
                 avp += self.generate_vendor_avp(701, 'c0', 10415, self.get_avp_data(avps, 701)[0])                     #MSISDN
-                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with encoded value " + str(msisdn), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with encoded value %s", messageArgs=(msisdn,), redisClient=self.redisMessaging)
                 msisdn = self.TBCD_decode(msisdn)
-                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with decoded value " + str(msisdn), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Got MSISDN with decoded value %s", messageArgs=(msisdn,), redisClient=self.redisMessaging)
             except Exception as e:
                 self.logTool.log(service='HSS', level='debug', message="Failed to get MSISDN from LCS-Routing-Info-Request", redisClient=self.redisMessaging)
-                self.logTool.log(service='HSS', level='debug', message="Error was: " + str(e), redisClient=self.redisMessaging)
+                self.logTool.log(service='HSS', level='debug', message="Error was: %s", messageArgs=(e,), redisClient=self.redisMessaging)
         else:
             self.logTool.log(service='HSS', level='error', message="No MSISDN or IMSI", redisClient=self.redisMessaging)
 
@@ -4330,14 +4522,14 @@ class Diameter:
             if imsi is not None:
                     self.logTool.log(service='HSS', level='debug', message="Getting subscriber location based on IMSI", redisClient=self.redisMessaging)
                     subscriber_details = self.database.Get_Subscriber(imsi=imsi)
-                    self.logTool.log(service='HSS', level='debug', message="Got subscriber_details from IMSI: " + str(subscriber_details), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Got subscriber_details from IMSI: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
             elif msisdn is not None:
                     self.logTool.log(service='HSS', level='debug', message="Getting subscriber location based on MSISDN", redisClient=self.redisMessaging)
                     subscriber_details = self.database.Get_Subscriber(msisdn=msisdn)
-                    self.logTool.log(service='HSS', level='debug', message="Got subscriber_details from MSISDN: " + str(subscriber_details), redisClient=self.redisMessaging)
+                    self.logTool.log(service='HSS', level='debug', message="Got subscriber_details from MSISDN: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
         except Exception as E:
             self.logTool.log(service='HSS', level='debug', message="No MSISDN or IMSI returned in Answer_16777291_8388622 input", redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message="Error is " + str(E), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="Error is %s", messageArgs=(E,), redisClient=self.redisMessaging)
             self.logTool.log(service='HSS', level='debug', message="Responding with DIAMETER_ERROR_USER_UNKNOWN", redisClient=self.redisMessaging)
             avp += self.generate_avp(268, 40, self.int_to_hex(5030, 4))
             response = self.generate_diameter_packet("01", "40", 8388622, 16777291, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp)     #Generate Diameter packet
@@ -4346,7 +4538,7 @@ class Diameter:
 
 
         
-        self.logTool.log(service='HSS', level='debug', message="Got subscriber_details for subscriber: " + str(subscriber_details), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got subscriber_details for subscriber: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
 
         
         if subscriber_details['serving_mme'] == None:
@@ -4553,11 +4745,11 @@ class Diameter:
 
         try:
             subscriber_details = self.database.Get_Subscriber(imsi=imsi)                                               #Get subscriber details
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Request_16777251_319] [ISD] Got subscriber data: {subscriber_details}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Request_16777251_319] [ISD] Got subscriber data: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
 
         except ValueError as e:
-            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Request_16777251_319] [ISD]failed to get data backfrom database for imsi " + str(imsi), redisClient=self.redisMessaging)
-            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Request_16777251_319] [ISD] Error is " + str(e), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Request_16777251_319] [ISD]failed to get data backfrom database for imsi %s", messageArgs=(imsi,), redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Request_16777251_319] [ISD] Error is %s", messageArgs=(e,), redisClient=self.redisMessaging)
             raise
         except Exception as ex:
             template = "An exception of type {0} occurred. Arguments:\n{1!r}"
@@ -4679,26 +4871,26 @@ class Diameter:
 
         #If MSISDN is present include it in Subscription Data
         if 'msisdn' in subscriber_details:
-            self.logTool.log(service='HSS', level='debug', message="MSISDN is " + str(subscriber_details['msisdn']) + " - adding in IDR", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="MSISDN is %s - adding in IDR", messageArgs=(subscriber_details['msisdn'],), redisClient=self.redisMessaging)
             msisdn_avp = self.generate_vendor_avp(701, 'c0', 10415, self.string_to_hex(str(subscriber_details['msisdn'])))                     #MSISDN
-            self.logTool.log(service='HSS', level='debug', message=msisdn_avp, redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(msisdn_avp,), redisClient=self.redisMessaging)
             subscription_data += msisdn_avp
 
         if 'RAT_freq_priorityID' in subscriber_details:
-            self.logTool.log(service='HSS', level='debug', message="RAT_freq_priorityID is " + str(subscriber_details['RAT_freq_priorityID']) + " - Adding in IDR", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="RAT_freq_priorityID is %s - Adding in IDR", messageArgs=(subscriber_details['RAT_freq_priorityID'],), redisClient=self.redisMessaging)
             rat_freq_priorityID = self.generate_vendor_avp(1440, "C0", 10415, self.int_to_hex(int(subscriber_details['RAT_freq_priorityID']), 4))                              #RAT-Frequency-Selection-Priority ID
-            self.logTool.log(service='HSS', level='debug', message=rat_freq_priorityID, redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(rat_freq_priorityID,), redisClient=self.redisMessaging)
             subscription_data += rat_freq_priorityID
 
         if '3gpp-charging-characteristics' in subscriber_details:
-            self.logTool.log(service='HSS', level='debug', message="3gpp-charging-characteristics " + str(subscriber_details['3gpp-charging-characteristics']) + " - Adding in IDR", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="3gpp-charging-characteristics %s - Adding in IDR", messageArgs=(subscriber_details['3gpp-charging-characteristics'],), redisClient=self.redisMessaging)
             _3gpp_charging_characteristics = self.generate_vendor_avp(13, "80", 10415, self.string_to_hex(str(subscriber_details['3gpp-charging-characteristics'])))
             subscription_data += _3gpp_charging_characteristics
-            self.logTool.log(service='HSS', level='debug', message=_3gpp_charging_characteristics, redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(_3gpp_charging_characteristics,), redisClient=self.redisMessaging)
 
             
         if 'APN_OI_replacement' in subscriber_details:
-            self.logTool.log(service='HSS', level='debug', message="APN_OI_replacement " + str(subscriber_details['APN_OI_replacement']) + " - Adding in IDR", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="APN_OI_replacement %s - Adding in IDR", messageArgs=(subscriber_details['APN_OI_replacement'],), redisClient=self.redisMessaging)
             subscription_data += self.generate_vendor_avp(1427, "C0", 10415, self.string_to_hex(str(subscriber_details['APN_OI_replacement'])))
 
         avp += self.generate_vendor_avp(1400, "c0", 10415, subscription_data)                            #Subscription-Data
@@ -4996,14 +5188,14 @@ class Diameter:
         avp += self.generate_avp(263, 40, str(binascii.hexlify(str.encode(sessionId)),'ascii'))          #Session-Id set AVP
 
         #Setup Charging Rule
-        self.logTool.log(service='HSS', level='debug', message=chargingRules, redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="%s", messageArgs=(chargingRules,), redisClient=self.redisMessaging)
         if chargingRules is not None and ueIp is not None:
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Request_16777238_258] [RAR] Charging Rules: {chargingRules}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Request_16777238_258] [RAR] Charging Rules: %s", messageArgs=(chargingRules,), redisClient=self.redisMessaging)
             avp += self.Charging_Rule_Generator(ChargingRules=chargingRules, ue_ip=ueIp)
             self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Request_16777238_258] [RAR] Generated Charging Rules", redisClient=self.redisMessaging)
         elif chargingRuleName is not None and chargingRuleAction == 'remove':
             avp += self.Charging_Rule_Generator(action=chargingRuleAction, chargingRuleName=chargingRuleName)
-            self.logTool.log(service='HSS', level='debug', message=f"[diameter.py] [Request_16777238_258] [RAR] Removing Charging Rule: {chargingRuleName}", redisClient=self.redisMessaging)
+            self.logTool.log(service='HSS', level='debug', message="[diameter.py] [Request_16777238_258] [RAR] Removing Charging Rule: %s", messageArgs=(chargingRuleName,), redisClient=self.redisMessaging)
 
         avp += self.generate_avp(264, 40, self.OriginHost)                                               #Origin Host
         avp += self.generate_avp(296, 40, self.OriginRealm)                                              #Origin Realm
@@ -5096,12 +5288,12 @@ class Diameter:
 
         self.logTool.log(service='HSS', level='debug', message="Getting subscriber IMS info based on MSISDN", redisClient=self.redisMessaging)
         subscriber_ims_details = self.database.Get_IMS_Subscriber(msisdn=msisdn)
-        self.logTool.log(service='HSS', level='debug', message="Got subscriber IMS details: " + str(subscriber_ims_details), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got subscriber IMS details: %s", messageArgs=(subscriber_ims_details,), redisClient=self.redisMessaging)
         self.logTool.log(service='HSS', level='debug', message="Getting subscriber info based on MSISDN", redisClient=self.redisMessaging)
         subscriber_details = self.database.Get_Subscriber(msisdn=msisdn)
-        self.logTool.log(service='HSS', level='debug', message="Got subscriber details: " + str(subscriber_details), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Got subscriber details: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
         subscriber_details = {**subscriber_details, **subscriber_ims_details}
-        self.logTool.log(service='HSS', level='debug', message="Merged subscriber details: " + str(subscriber_details), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Merged subscriber details: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
 
         avp += self.generate_avp(1, 40, str(binascii.hexlify(str.encode(subscriber_details['imsi'])),'ascii'))                 #Username AVP
 
@@ -5110,13 +5302,13 @@ class Diameter:
         templateLoader = jinja2.FileSystemLoader(searchpath="./")
         templateEnv = jinja2.Environment(loader=templateLoader)
         sh_userdata_template = self.config['hss']['Default_Sh_UserData']
-        self.logTool.log(service='HSS', level='debug', message="Using template " + str(sh_userdata_template) + " for SH user data", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Using template %s for SH user data", messageArgs=(sh_userdata_template,), redisClient=self.redisMessaging)
         template = templateEnv.get_template(sh_userdata_template)
         #These variables are passed to the template for use
         subscriber_details['mnc'] = self.MNC.zfill(3)
         subscriber_details['mcc'] = self.MCC.zfill(3)
 
-        self.logTool.log(service='HSS', level='debug', message="Rendering template with values: " + str(subscriber_details), redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message="Rendering template with values: %s", messageArgs=(subscriber_details,), redisClient=self.redisMessaging)
         xmlbody = template.render(Sh_template_vars=subscriber_details)  # this is where to put args to the template renderer
         avp += self.generate_vendor_avp(702, "c0", 10415, str(binascii.hexlify(str.encode(xmlbody)),'ascii'))
         
@@ -3,15 +3,19 @@ import math
 import asyncio
 import yaml
 import uuid
+import json
 import socket
 import traceback
 import binascii
+import ipaddress
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from messagingAsync import RedisMessagingAsync
 
 
 class DiameterAsync:
 
-    def __init__(self, logTool):
+    def __init__(self, logTool, originHost: str=None, originRealm: str=None, productName: str=None, mcc: str=None, mnc: str=None):
         self.diameterCommandList = [
                 # Generic Diameter Messages RFC6733
                 {"commandCode": 257, "applicationId": 0, "flags": 80, "responseMethod": self.Answer_257, "failureResultCode": 5012 ,"requestAcronym": "CER", "responseAcronym": "CEA", "requestName": "Capabilites Exchange Request", "responseName": "Capabilites Exchange Answer"},
@@ -50,9 +54,30 @@ class DiameterAsync:
                 {"commandCode": 8388622, "applicationId": 16777291, "responseMethod": self.Answer_16777291_8388622, "failureResultCode": 4100 ,"requestAcronym": "LRR", "responseAcronym": "LRA", "requestName": "LCS Routing Info Request", "responseName": "LCS Routing Info Answer"},
             ]
 
-        with open("../config.yaml", 'r') as stream:
-            self.config = (yaml.safe_load(stream))
-            
+        try:
+            with open("../config.yaml", 'r') as stream:
+                self.config = (yaml.safe_load(stream))
+        except:
+            with open("config.yaml", 'r') as stream:
+                self.config = (yaml.safe_load(stream))
+
+        self.MNC = str(mnc or self.config.get('hss', {}).get('MNC', '999'))
+        self.MCC = str(mcc or self.config.get('hss', {}).get('MCC', '999'))
+        self.originHost = originHost or self.config.get('hss', {}).get('OriginHost', 'hss01')
+        self.originRealm = originRealm or self.config.get('hss', {}).get('OriginRealm', f'mnc{self.MNC}.mcc{self.MCC}.3gppnetwork.org')
+        self.productName = productName or self.config.get('hss', {}).get('ProductName', 'PyHSS')
+        self.OriginHost = binascii.hexlify(self.originHost.encode('utf-8')).decode('ascii')
+        self.OriginRealm = binascii.hexlify(self.originRealm.encode('utf-8')).decode('ascii')
+        self.ProductName = binascii.hexlify(self.productName.encode('utf-8')).decode('ascii')
+
+        # Handlers which need the database are run by the synchronous Diameter class on a bounded pool of worker threads,
+        # so that the event loop can keep other requests in flight while a handler waits on the database.
+        self.handlerWorkers = int(self.config.get('hss', {}).get('async_handler_workers', 10))
+        self.handlerExecutor = None
+        self.diameterApplication = None
+        # Held while the Diameter class is created, so concurrent first requests create only one.
+        self.diameterApplicationLock = asyncio.Lock()
+
         self.redisUseUnixSocket = self.config.get('redis', {}).get('useUnixSocket', False)
         self.redisUnixSocketPath = self.config.get('redis', {}).get('unixSocketPath', '/var/run/redis/redis-server.sock')
         self.redisHost = self.config.get('redis', {}).get('host', 'localhost')
@@ -61,6 +86,7 @@ class DiameterAsync:
 
         self.logTool = logTool
         self.hostname = socket.gethostname()
+        self.diameterPeerKey = self.config.get('hss', {}).get('diameter_peer_key', 'diameterPeers')
 
     #Generates rounding for calculating padding
     async def myRound(self, n, base=4):
@@ -112,6 +138,32 @@ class DiameterAsync:
             return False
 
 
+    async def splitDiameterMessage(self, data) -> list:
+        """
+        Returns a list of undecoded diameter messages in hex, from a received binary message.
+        This provides support for one or more diameter messages contained within a single packet.
+        """
+        diameterMessages = []
+        index = 0
+        failsafe = 0
+
+        if type(data) is bytes:
+            data = data.hex()
+
+        while len(data[index:]) >= 40 and failsafe <= 50:
+            try:
+                packetLength = int(data[index+2:index+8], 16)
+                if packetLength < 20:
+                    break
+                diameterMessages.append(data[index:index+(packetLength*2)])
+                index += packetLength * 2
+                failsafe += 1
+            except Exception as e:
+                await(self.logTool.logAsync(service='Diameter', level='warning', message=f"[diameterAsync.py] [splitDiameterMessage] Error splitting diameter message: {traceback.format_exc()}"))
+                break
+
+        return diameterMessages
+
     async def decodeDiameterPacket(self, data):
         """
         Handles decoding of a full diameter packet.
@@ -307,25 +359,102 @@ class DiameterAsync:
         
         return response
 
+    async def getResultCode(self, binaryData: bytes) -> int:
+        """
+        Returns the Result-Code, or the Experimental-Result-Code, of a diameter answer, or 0 if neither is present.
+        Only walks the AVP headers, so it is cheap enough to call for every answer.
+        """
+        avpOffset = 20
+        while avpOffset + 8 <= len(binaryData):
+            avpCode = int.from_bytes(binaryData[avpOffset:avpOffset + 4], 'big')
+            avpFlags = binaryData[avpOffset + 4]
+            avpLength = int.from_bytes(binaryData[avpOffset + 5:avpOffset + 8], 'big')
+            if avpLength < 8:
+                return 0
+            avpHeaderLength = 12 if avpFlags & 0x80 else 8
+            if avpCode == 268:
+                return int.from_bytes(binaryData[avpOffset + avpHeaderLength:avpOffset + avpLength], 'big')
+            if avpCode == 297:
+                # Experimental-Result is grouped: walk its members for Experimental-Result-Code (298).
+                groupedOffset = avpOffset + avpHeaderLength
+                while groupedOffset + 8 <= avpOffset + avpLength:
+                    groupedCode = int.from_bytes(binaryData[groupedOffset:groupedOffset + 4], 'big')
+                    groupedFlags = binaryData[groupedOffset + 4]
+                    groupedLength = int.from_bytes(binaryData[groupedOffset + 5:groupedOffset + 8], 'big')
+                    if groupedLength < 8:
+                        return 0
+                    if groupedCode == 298:
+                        groupedHeaderLength = 12 if groupedFlags & 0x80 else 8
+                        return int.from_bytes(binaryData[groupedOffset + groupedHeaderLength:groupedOffset + groupedLength], 'big')
+                    groupedOffset += (groupedLength + 3) & ~3
+            avpOffset += (avpLength + 3) & ~3
+        return 0
+
     async def generateDiameterResponse(self, binaryData: str) -> str:
-        packet_vars, avps = await(self.decodeDiameterPacket(binaryData))
-        response = ''
+        """
+        Returns the answer to a given diameter request in a hex string, or an empty string if no answer could be generated.
+        """
+        try:
+            packet_vars, avps = await(self.decodeDiameterPacket(binaryData))
+            # Synchronous handlers expect grouped AVPs in the layout of Diameter.decodeAvpPacket, so keep the raw AVPs for them
+            packet_vars['avp_data'] = binaryData[20:].hex() if type(binaryData) is bytes else binaryData[40:]
+            response = ''
+
+            # Drop packet if it's a response packet:
+            if packet_vars["flags_bin"][0:1] == "0":
+                return
+            
+            for diameterApplication in self.diameterCommandList:
+                try:
+                    assert(packet_vars["command_code"] == diameterApplication["commandCode"])
+                    assert(packet_vars["ApplicationId"] == diameterApplication["applicationId"])
+                    if 'flags' in diameterApplication:
+                        assert(str(packet_vars["flags"]) == str(diameterApplication["flags"]))
+                except Exception as e:
+                    continue
+                try:
+                    response = await(diameterApplication["responseMethod"](packet_vars, avps))
+                except Exception as e:
+                    await(self.logTool.logAsync(service='HSS', level='error', message=f"[diameterAsync.py] [generateDiameterResponse] [{diameterApplication.get('requestAcronym', '')}] Error generating response: {traceback.format_exc()}"))
+                    return ''
+                break
+            
+            return response
+        except Exception as e:
+            await(self.logTool.logAsync(service='HSS', level='error', message=f"[diameterAsync.py] [generateDiameterResponse] Error generating response: {traceback.format_exc()}"))
+            return ''
 
-        # Drop packet if it's a response packet:
-        if packet_vars["flags_bin"][0:1] == "0":
-            return
-        
-        for diameterApplication in self.diameterCommandList:
-            try:
-                assert(packet_vars["command_code"] == diameterApplication["commandCode"])
-                assert(packet_vars["ApplicationId"] == diameterApplication["applicationId"])
-                if 'flags' in diameterApplication:
-                    assert(str(packet_vars["flags"]) == str(diameterApplication["flags"]))
-                response = diameterApplication["responseMethod"](packet_vars, avps)
-            except Exception as e:
-                continue
-        
-        return response
+    async def getDiameterApplication(self):
+        """
+        Returns the synchronous Diameter class used for database backed answers, creating it and the handler thread pool on first use.
+        """
+        if self.handlerExecutor is None:
+            self.handlerExecutor = ThreadPoolExecutor(max_workers=self.handlerWorkers, thread_name_prefix='diameterHandler')
+        if self.diameterApplication is None:
+            async with self.diameterApplicationLock:
+                if self.diameterApplication is None:
+                    from diameter import Diameter
+                    self.diameterApplication = await(asyncio.get_running_loop().run_in_executor(self.handlerExecutor, lambda: Diameter(logTool=self.logTool, originHost=self.originHost, originRealm=self.originRealm, productName=self.productName, mcc=self.MCC, mnc=self.MNC)))
+        return self.diameterApplication
+
+    async def runSynchronousHandler(self, handlerName: str, packet_vars: dict, avps: list) -> str:
+        """
+        Runs the named answer handler of the synchronous Diameter class on the handler thread pool, and awaits the result.
+        The AVPs are decoded again by the synchronous class when the raw AVPs are available, since it lays out grouped AVPs differently.
+        """
+        diameterApplication = await(self.getDiameterApplication())
+        handler = getattr(diameterApplication, handlerName)
+        avpData = packet_vars.get('avp_data', None)
+        if avpData is not None:
+            return await(asyncio.get_running_loop().run_in_executor(self.handlerExecutor, contextvars.copy_context().run, lambda: handler(packet_vars, diameterApplication.decodeAvpPacket(avpData))))
+        return await(asyncio.get_running_loop().run_in_executor(self.handlerExecutor, contextvars.copy_context().run, handler, packet_vars, avps))
+
+    async def generateSynchronousResponse(self, binaryData: bytes, stageTimestamps: dict=None) -> str:
+        """
+        Runs Diameter.generateDiameterResponse on the handler thread pool, including its answer cache and metrics, and awaits the result.
+        """
+        diameterApplication = await(self.getDiameterApplication())
+        return await(asyncio.get_running_loop().run_in_executor(self.handlerExecutor, contextvars.copy_context().run, diameterApplication.generateDiameterResponse, binaryData, stageTimestamps))
 
     async def generateId(self, length):
         length = length * 2
@@ -393,7 +522,7 @@ class DiameterAsync:
             packet_hex = packet_version + packet_length + packet_flags + packet_command_code + packet_application_id + packet_hop_by_hop_id + packet_end_to_end_id + avp
             return packet_hex
         except Exception as e:
-            await(self.logTool.error(message=f"Exception: {e}", redisClient=self.redisMessaging))
+            await(self.logTool.logAsync(service='HSS', level='error', message=f"[diameterAsync.py] [generate_diameter_packet] Exception: {e}", redisClient=self.redisMessaging))
 
     async def Request_280(self, originHost: str, originRealm: str, endToEndIdentifier: str=None):
         """
@@ -408,65 +537,227 @@ class DiameterAsync:
             response = await(self.generate_diameter_packet("01", "80", 280, 0, (await(self.generateId(4))), endToEndIdentifier, avp)) #Generate Diameter packet
             return response
         except Exception as e:
-            await(self.logTool.error(message=f"Error: {traceback.format_exc()}", redisClient=self.redisMessaging))
+            await(self.logTool.logAsync(service='HSS', level='error', message=f"[diameterAsync.py] [Request_280] Error: {traceback.format_exc()}", redisClient=self.redisMessaging))
             return None
 
-    async def Answer_257(self):
-        pass
+    async def ipToHex(self, ip: str) -> str:
+        """
+        Encodes an IP address as the value of an Address AVP.
+        """
+        ipAddress = ipaddress.ip_address(ip)
+        if ipAddress.version == 4:
+            return "0001" + ipAddress.packed.hex()
+        return "0002" + ipAddress.packed.hex()
 
-    async def Answer_16777238_272(self):
-        pass
+    async def hexToIp(self, hexIp: str) -> str:
+        """
+        Decodes the address of an Address AVP, formatted as Diameter.hex_to_ip does, as stored peers are keyed by it.
+        """
+        if len(hexIp) == 8:
+            return str(ipaddress.IPv4Address(bytes.fromhex(hexIp)))
+        elif len(hexIp) == 32:
+            return ':'.join(hexIp[index:index + 4].lstrip('0') for index in range(0, 32, 4))
 
-    async def Answer_280(self):
-        pass
+    async def updateStoredPeer(self, peerKey: str, peer: dict) -> bool:
+        """
+        Merges peer into the peer stored in redis under peerKey, as Diameter.update_stored_peer does.
+        """
+        try:
+            existingPeer = await(self.redisMessaging.getHashValue(name=self.diameterPeerKey, key=peerKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter'))
+            mergedPeer = peer
+            if existingPeer:
+                try:
+                    mergedPeer = dict(json.loads(existingPeer), **peer)
+                except json.JSONDecodeError:
+                    await(self.logTool.logAsync(service='HSS', level='warning', message=f"[diameterAsync.py] [updateStoredPeer] Failed to parse existing peer data for {peerKey}, treating as new peer", redisClient=self.redisMessaging))
+            await(self.redisMessaging.setHashValue(name=self.diameterPeerKey, key=peerKey, value=json.dumps(mergedPeer), usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter'))
+            return True
+        except Exception as e:
+            await(self.logTool.logAsync(service='HSS', level='warning', message=f"[diameterAsync.py] [updateStoredPeer] Error updating stored peer: {traceback.format_exc()}", redisClient=self.redisMessaging))
+            return False
 
-    async def Answer_282(self):
-        pass
+    async def originStateIncrement(self, avps: list) -> str:
+        """
+        Returns the Origin-State-Id of a request, incremented by one.
+        """
+        for avp in avps:
+            if avp['avp_code'] == 278:
+                return format(int(avp['misc_data'], 16) + 1, "x").zfill(8)
 
-    async def Answer_16777251_318(self):
-        pass
-    
-    async def Answer_16777251_316(self):
-        pass
+    async def Answer_257(self, packet_vars, avps):
+        """
+        Capabilities Exchange Answer.
+        """
+        avp = ''
+        avp += await(self.generate_avp(268, 40, await(self.int_to_hex(2001, 4))))                                    #Result Code (DIAMETER_SUCCESS (2001))
+        avp += await(self.generate_avp(264, 40, self.OriginHost))                                                     #Origin Host
+        avp += await(self.generate_avp(296, 40, self.OriginRealm))                                                    #Origin Realm
+        if len(await(self.getAvpData(avps, 278))) > 0:                                                                #Only include Origin State if the request included it
+            avp += await(self.generate_avp(278, 40, await(self.originStateIncrement(avps))))
+        for host in self.config['hss']['bind_ip']:
+            avp += await(self.generate_avp(257, 40, await(self.ipToHex(host))))                                       #Host-IP-Address
+        avp += await(self.generate_avp(266, 40, "00000000"))                                                          #Vendor-Id
+        avp += await(self.generate_avp(269, "00", self.ProductName))                                                  #Product-Name
+        avp += await(self.generate_avp(267, "00", "000027d9"))                                                        #Firmware-Revision
+        for applicationId in [16777251, 16777216, 16777252, 16777291, 16777217, 16777236, 16777238]:                 #S6a, Cx, S13, SLh, Sh, Rx, Gx
+            avp += await(self.generate_avp(265, 40, format(int(10415),"x").zfill(8)))                                 #Supported-Vendor-ID (3GPP)
+            avp += await(self.generate_avp(260, 40, "000001024000000c" + format(int(applicationId),"x").zfill(8) + "0000010a4000000c000028af"))  #Vendor-Specific-Application-ID
+        avp += await(self.generate_avp(258, 40, format(int(16777238),"x").zfill(8)))                                  #Auth-Application-ID - Diameter Gx
+        avp += await(self.generate_avp(258, 40, format(int(10),"x").zfill(8)))                                        #Auth-Application-ID - Diameter CER
+        avp += await(self.generate_avp(265, 40, format(int(5535),"x").zfill(8)))                                      #Supported-Vendor-ID (3GGP v2)
+        avp += await(self.generate_avp(265, 40, format(int(10415),"x").zfill(8)))                                     #Supported-Vendor-ID (3GPP)
+        avp += await(self.generate_avp(265, 40, format(int(13019),"x").zfill(8)))                                     #Supported-Vendor-ID 13019 (ETSI)
+
+        # With the external socket service, the peer's capabilities are stored against its Host-IP-Address, as in Diameter.Answer_257.
+        try:
+            if self.config.get('hss', {}).get('use_external_socket_service', False) == True:
+                originHost = binascii.unhexlify((await(self.getAvpData(avps, 264)))[0]).decode()
+                originRealm = binascii.unhexlify((await(self.getAvpData(avps, 296)))[0]).decode()
+                originHostIp = await(self.hexToIp((await(self.getAvpData(avps, 257)))[0][4:]))
+                productName = await(self.getAvpData(avps, 269))
+                vendorId = await(self.getAvpData(avps, 266))
+                vsai = await(self.getAvpData(avps, 260))
+                metadata = {"Host": originHost,
+                            "Realm": originRealm,
+                            "ProductName": binascii.unhexlify(productName[0]).decode() if productName else "",
+                            "VendorId": int(vendorId[0], 16) if vendorId else "",
+                            "CeaReceived": True,
+                            "AuthorizedApplicationIds": vsai[0] if vsai else ""}
+                peer = {"Hostname": originHost,
+                        "PeerType": (await(self.getPeerType(originHost))) or 'Unknown',
+                        "Metadata": json.dumps(metadata)}
+                await(self.updateStoredPeer(peerKey=originHostIp, peer=peer))
+        except Exception as e:
+            await(self.logTool.logAsync(service='HSS', level='warning', message=f"[diameterAsync.py] [Answer_257] Error updating stored peer: {traceback.format_exc()}", redisClient=self.redisMessaging))
 
-    async def Answer_16777251_321(self):
-        pass
+        response = await(self.generate_diameter_packet("01", "00", 257, 0, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp))
+        await(self.logTool.logAsync(service='HSS', level='debug', message="[diameterAsync.py] [Answer_257] Successfully Generated CEA", redisClient=self.redisMessaging))
+        return response
 
-    async def Answer_16777251_323(self):
-        pass
+    async def Answer_280(self, packet_vars, avps):
+        """
+        Device Watchdog Answer.
+        """
+        avp = ''
+        avp += await(self.generate_avp(268, 40, await(self.int_to_hex(2001, 4))))                                    #Result Code (DIAMETER_SUCCESS (2001))
+        avp += await(self.generate_avp(264, 40, self.OriginHost))                                                     #Origin Host
+        avp += await(self.generate_avp(296, 40, self.OriginRealm))                                                    #Origin Realm
+        if len(await(self.getAvpData(avps, 278))) > 0:                                                                #Only include Origin State if the request included it
+            avp += await(self.generate_avp(278, 40, await(self.originStateIncrement(avps))))
+        response = await(self.generate_diameter_packet("01", "00", 280, 0, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp))
+        await(self.logTool.logAsync(service='HSS', level='debug', message="[diameterAsync.py] [Answer_280] Successfully Generated DWA", redisClient=self.redisMessaging))
+        return response
 
-    async def Answer_16777216_300(self):
-        pass
+    async def Answer_282(self, packet_vars, avps):
+        """
+        Disconnect Peer Answer.
+        """
+        avp = ''
+        avp += await(self.generate_avp(264, 40, self.OriginHost))                                                     #Origin Host
+        avp += await(self.generate_avp(296, 40, self.OriginRealm))                                                    #Origin Realm
+        avp += await(self.generate_avp(268, 40, "000007d1"))                                                          #Result Code (DIAMETER_SUCCESS (2001))
+        response = await(self.generate_diameter_packet("01", "00", 282, 0, packet_vars['hop-by-hop-identifier'], packet_vars['end-to-end-identifier'], avp))
+        await(self.logTool.logAsync(service='HSS', level='debug', message="[diameterAsync.py] [Answer_282] Successfully Generated DPA", redisClient=self.redisMessaging))
+        return response
 
-    async def Answer_16777216_301(self):
-        pass
+    async def Answer_16777238_272(self, packet_vars, avps):
+        """
+        Gx Credit Control Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777238_272', packet_vars, avps))
 
-    async def Answer_16777216_302(self):
-        pass
+    async def Answer_16777251_318(self, packet_vars, avps):
+        """
+        S6a Authentication Information Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777251_318', packet_vars, avps))
 
-    async def Answer_16777216_303(self):
-        pass
+    async def Answer_16777251_316(self, packet_vars, avps):
+        """
+        S6a Update Location Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777251_316', packet_vars, avps))
 
-    async def Answer_16777217_306(self):
-        pass
+    async def Answer_16777251_321(self, packet_vars, avps):
+        """
+        S6a Purge UE Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777251_321', packet_vars, avps))
 
-    async def Answer_16777217_307(self):
-        pass
+    async def Answer_16777251_323(self, packet_vars, avps):
+        """
+        S6a Notify Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777251_323', packet_vars, avps))
 
-    async def Answer_16777252_324(self):
-        pass
+    async def Answer_16777216_300(self, packet_vars, avps):
+        """
+        Cx User Authentication Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777216_300', packet_vars, avps))
 
-    async def Answer_16777291_8388622(self):
-        pass
+    async def Answer_16777216_301(self, packet_vars, avps):
+        """
+        Cx Server Assignment Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777216_301', packet_vars, avps))
 
-    async def Answer_16777236_265(self):
-        pass
+    async def Answer_16777216_302(self, packet_vars, avps):
+        """
+        Cx Location Information Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777216_302', packet_vars, avps))
 
-    async def Answer_16777236_275(self):
-        pass
+    async def Answer_16777216_303(self, packet_vars, avps):
+        """
+        Cx Multimedia Authentication Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777216_303', packet_vars, avps))
 
-    async def Answer_16777236_274(self):
-        pass
+    async def Answer_16777217_306(self, packet_vars, avps):
+        """
+        Sh User Data Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777217_306', packet_vars, avps))
 
-    async def Answer_16777238_258(self):
-        pass
\ No newline at end of file
+    async def Answer_16777217_307(self, packet_vars, avps):
+        """
+        Sh Profile Update Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777217_307', packet_vars, avps))
+
+    async def Answer_16777252_324(self, packet_vars, avps):
+        """
+        S13 ME Identity Check Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777252_324', packet_vars, avps))
+
+    async def Answer_16777291_8388622(self, packet_vars, avps):
+        """
+        SLh LCS Routing Info Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777291_8388622', packet_vars, avps))
+
+    async def Answer_16777236_265(self, packet_vars, avps):
+        """
+        Rx AA Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777236_265', packet_vars, avps))
+
+    async def Answer_16777236_275(self, packet_vars, avps):
+        """
+        Rx Session Termination Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777236_275', packet_vars, avps))
+
+    async def Answer_16777236_274(self, packet_vars, avps):
+        """
+        Rx Abort Session Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777236_274', packet_vars, avps))
+
+    async def Answer_16777238_258(self, packet_vars, avps):
+        """
+        Gx Re Auth Answer.
+        """
+        return await(self.runSynchronousHandler('Answer_16777238_258', packet_vars, avps))
@@ -0,0 +1,182 @@
+import os
+import glob
+import json
+import time
+import fcntl
+import atexit
+import threading
+import traceback
+from collections import OrderedDict
+
+class LocationUpdateBuffer:
+    """
+    Write behind buffer for serving node and location updates made while answering diameter requests (ULR, PUR, CCR).
+    Updates which only refresh the serving node already on record (a new timestamp for the same MME or PGW session), and
+    location updates, are answered immediately and coalesced per key, keeping the latest, until the next flush.
+    Updates which change the serving node are left to the caller to write through, so CLRs and Rx lookups see them at once.
+    Each flush is written by Database.writeDeferredLocationUpdates in one transaction, which skips an update whose record holds a newer write,
+    including one by another process, and writes a refresh through as a change if its record holds another serving node from an older write.
+    Deferred updates are appended to a journal, which is replayed by the next process to start if this one exits without flushing.
+    """
+
+    def __init__(self, database, logTool, redisMessaging):
+        self.database = database
+        self.logTool = logTool
+        self.redisMessaging = redisMessaging
+        self.config = database.config
+        self.flushInterval = float(self.config.get('database', {}).get('location_write_behind_interval', 1))
+        self.journalPath = str(self.config.get('database', {}).get('location_write_behind_journal', '/tmp/pyhss_location_journal'))
+        self.journalFsync = self.config.get('database', {}).get('location_write_behind_fsync', False)
+        # (method, key): (arguments, serving node) of the latest deferred update
+        self.pendingUpdates = {}
+        # (method, key): serving node last written, to tell a refresh from a change, least recently updated first.
+        # Bounded, as a key evicted from it only means its next update is written through.
+        self.servingNodes = OrderedDict()
+        self.maxServingNodes = int(self.config.get('database', {}).get('location_write_behind_max_serving_nodes', 100000))
+        self.lock = threading.Lock()
+        # Set while this buffer's own flush is writing, so its calls are written through.
+        self.flushingThread = threading.local()
+        self.journal = None
+        self.thread = None
+        self.pid = None
+
+    def defer(self, method: str, key: tuple, arguments: dict, servingNode=None, merge: bool=False, deferrable: bool=True) -> bool:
+        """
+        Buffers a call to Database.<method>(**arguments), returning True if it was deferred, or False for the caller to write it through.
+        With a servingNode, the update is only deferred if the same serving node was last written for key, otherwise any deferred
+        update for key is dropped as superseded. Calls which are not deferrable are only recorded, so they supersede deferred updates.
+        With merge, arguments which are not None are merged into a deferred update for key, rather than replacing it.
+        """
+        if getattr(self.flushingThread, 'active', False):
+            return False
+        if self.pid != os.getpid():
+            if not deferrable:
+                return False
+            self.start()
+        updateKey = (method, tuple(key))
+        with self.lock:
+            if servingNode is not None or not merge:
+                if not deferrable or updateKey not in self.servingNodes or self.servingNodes[updateKey] != servingNode:
+                    self.servingNodes[updateKey] = servingNode
+                    self.servingNodes.move_to_end(updateKey)
+                    while len(self.servingNodes) > self.maxServingNodes:
+                        self.servingNodes.popitem(last=False)
+                    self.pendingUpdates.pop(updateKey, None)
+                    return False
+                self.servingNodes.move_to_end(updateKey)
+            elif not deferrable:
+                return False
+            self.addPending(updateKey, arguments, servingNode, merge)
+            self.writeJournal([{'method': method, 'key': list(key), 'arguments': arguments, 'servingNode': servingNode, 'merge': merge}])
+        return True
+
+    def addPending(self, updateKey: tuple, arguments: dict, servingNode, merge: bool):
+        if merge and updateKey in self.pendingUpdates:
+            self.pendingUpdates[updateKey][0].update({argument: value for argument, value in arguments.items() if value is not None})
+        else:
+            self.pendingUpdates[updateKey] = (dict(arguments), servingNode)
+
+    def start(self):
+        """
+        Opens this process' journal and starts the flush thread, or restarts them if the process has been forked since they were started.
+        Updates deferred by the parent before a fork are left for the parent to flush.
+        """
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.pendingUpdates = {}
+            self.journal = open(f"{self.journalPath}.{self.pid}", 'a')
+            fcntl.flock(self.journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.recoverJournals()
+            self.thread = threading.Thread(target=self.maintain, name='locationWriteBehind', daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+
+    def writeJournal(self, entries: list):
+        try:
+            self.journal.write(''.join(json.dumps(entry, default=str) + '\n' for entry in entries))
+            self.journal.flush()
+            if self.journalFsync:
+                os.fsync(self.journal.fileno())
+        except Exception as e:
+            self.logTool.log(service='Database', level='error', message=f"[locationBuffer.py] [writeJournal] Failed to write to the location update journal: {traceback.format_exc()}", redisClient=self.redisMessaging)
+
+    def recoverJournals(self):
+        """
+        Takes over the journals of processes which exited before flushing, recognised by their lock being free, into this process' pending updates.
+        """
+        ownJournals = [f"{self.journalPath}.{self.pid}", f"{self.journalPath}.{self.pid}.flushing"]
+        for journalFile in sorted(glob.glob(f"{self.journalPath}.*"), key=lambda journalFile: not journalFile.endswith('.flushing')):
+            if journalFile in ownJournals:
+                continue
+            try:
+                with open(journalFile, 'r') as orphanJournal:
+                    fcntl.flock(orphanJournal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    entries = [json.loads(line) for line in orphanJournal if line.strip()]
+                for entry in entries:
+                    servingNode = tuple(entry['servingNode']) if entry.get('servingNode') is not None else None
+                    self.addPending((entry['method'], tuple(entry['key'])), entry['arguments'], servingNode, entry.get('merge', False))
+                self.writeJournal(entries)
+                os.remove(journalFile)
+                self.logTool.log(service='Database', level='info', message=f"[locationBuffer.py] [recoverJournals] Recovered {len(entries)} location updates from {journalFile}", redisClient=self.redisMessaging)
+            except BlockingIOError:
+                # Held by a running process
+                continue
+            except Exception as e:
+                self.logTool.log(service='Database', level='error', message=f"[locationBuffer.py] [recoverJournals] Failed to recover {journalFile}: {traceback.format_exc()}", redisClient=self.redisMessaging)
+
+    def maintain(self):
+        while True:
+            time.sleep(self.flushInterval)
+            try:
+                self.flush()
+            except Exception as e:
+                self.logTool.log(service='Database', level='error', message=f"[locationBuffer.py] [maintain] Failed to flush location updates: {traceback.format_exc()}", redisClient=self.redisMessaging)
+
+    def flush(self) -> int:
+        """
+        Writes all deferred updates, returning the number written.
+        The journal is rotated aside while they are written, and removed once they are, so a crash mid flush leaves them to be recovered.
+        """
+        if self.pid != os.getpid():
+            return 0
+        with self.lock:
+            if not self.pendingUpdates:
+                return 0
+            pendingUpdates = self.pendingUpdates
+            self.pendingUpdates = {}
+            flushingPath = f"{self.journalPath}.{self.pid}.flushing"
+            os.replace(f"{self.journalPath}.{self.pid}", flushingPath)
+            flushingJournal = self.journal
+            self.journal = open(f"{self.journalPath}.{self.pid}", 'a')
+            fcntl.flock(self.journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        startTime = time.time()
+        self.flushingThread.active = True
+        try:
+            self.writePending(pendingUpdates)
+        finally:
+            self.flushingThread.active = False
+        os.remove(flushingPath)
+        flushingJournal.close()
+        self.logTool.log(service='Database', level='debug', message="[locationBuffer.py] [flush] Wrote %s deferred location updates in %.3fs", messageArgs=(len(pendingUpdates), time.time() - startTime,), redisClient=self.redisMessaging)
+        return len(pendingUpdates)
+
+    def writePending(self, pendingUpdates: dict):
+        # Skip refreshes overtaken by a serving node change written through since they were deferred.
+        deferredUpdates = [(method, arguments) for (method, key), (arguments, servingNode) in pendingUpdates.items()
+                           if servingNode is None or self.servingNodes.get((method, key), servingNode) == servingNode]
+        if not deferredUpdates:
+            return
+        try:
+            self.database.writeDeferredLocationUpdates(deferredUpdates)
+            return
+        except Exception as e:
+            self.logTool.log(service='Database', level='error', message=f"[locationBuffer.py] [writePending] Failed to write {len(deferredUpdates)} deferred location updates, writing them one by one: {traceback.format_exc()}", redisClient=self.redisMessaging)
+        # Written one by one, so a single failing update does not drop the rest.
+        for method, arguments in deferredUpdates:
+            try:
+                self.database.writeDeferredLocationUpdates([(method, arguments)])
+            except Exception as e:
+                self.logTool.log(service='Database', level='error', message=f"[locationBuffer.py] [writePending] Failed to write deferred {method} for {arguments.get('imsi')}: {traceback.format_exc()}", redisClient=self.redisMessaging)
@@ -1,12 +1,17 @@
 import logging
 import logging.handlers as handlers
-import os, sys, time
+import os, sys, time, json
 import socket
+import atexit
+import random
+import threading
+from collections import deque
 from datetime import datetime
 sys.path.append(os.path.realpath('../'))
 import asyncio
 from messagingAsync import RedisMessagingAsync
 from messaging import RedisMessaging
+from tracing import currentTraceContext
 
 class TimestampFilter (logging.Filter):
     """
@@ -20,6 +25,170 @@ class TimestampFilter (logging.Filter):
             record.created = record.timestamp
         return True
 
+class BufferedLogFile:
+    """
+    Size-rotated log file, written through a large buffer which is only flushed when flush() is called or the buffer fills.
+    Rotation follows RotatingFileHandler, keeping backupCount files named {logFilePath}.1 to {logFilePath}.{backupCount}.
+    """
+    def __init__(self, logFilePath: str, maxBytes: int=50000000, backupCount: int=5, bufferSize: int=1048576):
+        self.logFilePath = logFilePath
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.bufferSize = bufferSize
+        self.logFile = open(self.logFilePath, 'a', buffering=self.bufferSize, encoding='utf-8')
+        self.fileSize = os.path.getsize(self.logFilePath)
+
+    def write(self, line: str):
+        """
+        Writes a line to the buffer, rotating the file first if it would exceed maxBytes.
+        """
+        lineSize = len(line.encode('utf-8'))
+        if self.maxBytes > 0 and self.fileSize > 0 and self.fileSize + lineSize > self.maxBytes:
+            self.rotate()
+        self.logFile.write(line)
+        self.fileSize += lineSize
+
+    def rotate(self):
+        """
+        Closes the current file, shifts the backups along by one and opens a new file.
+        """
+        self.logFile.close()
+        for backupNumber in range(self.backupCount - 1, 0, -1):
+            sourcePath = f"{self.logFilePath}.{backupNumber}"
+            if os.path.exists(sourcePath):
+                os.replace(sourcePath, f"{self.logFilePath}.{backupNumber + 1}")
+        if self.backupCount > 0:
+            os.replace(self.logFilePath, f"{self.logFilePath}.1")
+        self.logFile = open(self.logFilePath, 'a', buffering=self.bufferSize, encoding='utf-8')
+        self.fileSize = 0
+
+    def flush(self):
+        self.logFile.flush()
+
+    def close(self):
+        self.logFile.close()
+
+
+class LogShipper:
+    """
+    Buffers log messages in a bounded in-memory ring, and ships them to the logService queue in one redis pipeline per flush.
+    Flushing happens on a background thread, every flushInterval seconds or once flushLines messages are buffered.
+    When the ring is full, debug messages are dropped first. Dropped messages are counted, and never block the caller.
+    """
+    def __init__(self, redisMessaging, hostname: str, bufferSize: int=10000, flushInterval: float=0.1, flushLines: int=500, logExpiry: int=60):
+        self.redisMessaging = redisMessaging
+        self.hostname = hostname
+        self.bufferSize = bufferSize
+        self.flushInterval = flushInterval
+        self.flushLines = flushLines
+        self.logExpiry = logExpiry
+        self.logQueue = self.redisMessaging.handlePrefix(key='log', usePrefix=True, prefixHostname=self.hostname, prefixServiceName='log')
+        self.debugBuffer = deque()
+        self.logBuffer = deque()
+        self.sequence = 0
+        self.droppedCount = 0
+        self.droppedTotal = 0
+        self.bufferLock = threading.Lock()
+        self.flushEvent = threading.Event()
+        self.shipperThread = None
+        self.shipperPid = None
+        atexit.register(self.flush)
+
+    def start(self):
+        """
+        Starts the shipper thread, or restarts it if the process has been forked since it was started.
+        """
+        if self.shipperThread is not None and self.shipperPid == os.getpid():
+            return
+        with self.bufferLock:
+            if self.shipperThread is not None and self.shipperPid == os.getpid():
+                return
+            self.shipperPid = os.getpid()
+            self.shipperThread = threading.Thread(target=self.shipLogs, name='logShipper', daemon=True)
+            self.shipperThread.start()
+
+    def enqueue(self, service: str, level: str, timestamp: float, message: str) -> bool:
+        """
+        Adds a log message to the ring, without blocking on redis.
+        Returns False if the message (or an older debug message, to make room) was dropped.
+        """
+        if self.shipperPid != os.getpid():
+            self.start()
+        isDebug = level.lower() == 'debug'
+        messageDropped = False
+        with self.bufferLock:
+            if len(self.debugBuffer) + len(self.logBuffer) >= self.bufferSize:
+                messageDropped = True
+                self.droppedCount += 1
+                if self.debugBuffer:
+                    self.debugBuffer.popleft()
+                elif isDebug:
+                    return False
+                else:
+                    self.logBuffer.popleft()
+            self.sequence += 1
+            logEntry = (self.sequence, service, level, timestamp, message)
+            if isDebug:
+                self.debugBuffer.append(logEntry)
+            else:
+                self.logBuffer.append(logEntry)
+            bufferedLines = len(self.debugBuffer) + len(self.logBuffer)
+        if bufferedLines >= self.flushLines:
+            self.flushEvent.set()
+        return not messageDropped
+
+    def flush(self) -> int:
+        """
+        Sends all buffered log messages to redis in a single pipeline, in the order they were logged.
+        Returns the number of messages sent.
+        """
+        with self.bufferLock:
+            if not self.debugBuffer and not self.logBuffer and not self.droppedCount:
+                return 0
+            debugBuffer, self.debugBuffer = self.debugBuffer, deque()
+            logBuffer, self.logBuffer = self.logBuffer, deque()
+            droppedCount, self.droppedCount = self.droppedCount, 0
+
+        logEntries = sorted(debugBuffer + logBuffer) if debugBuffer and logBuffer else (debugBuffer or logBuffer)
+        logMessages = [json.dumps({"message": message, "service": service, "level": level, "timestamp": timestamp}) for sequence, service, level, timestamp, message in logEntries]
+        if droppedCount:
+            self.droppedTotal += droppedCount
+            logMessages.append(json.dumps({"message": f"[LogTool] Dropped {droppedCount} log messages due to a full log buffer ({self.droppedTotal} in total)", "service": "hss", "level": "WARNING", "timestamp": time.time()}))
+
+        try:
+            redisPipe = self.redisMessaging.redisClient.pipeline(transaction=False)
+            redisPipe.rpush(self.logQueue, *logMessages)
+            redisPipe.expire(self.logQueue, self.logExpiry)
+            redisPipe.execute()
+        except Exception as e:
+            with self.bufferLock:
+                self.droppedCount += len(logEntries)
+            return 0
+
+        if droppedCount:
+            self.redisMessaging.sendMetric(serviceName='log', metricName='prom_log_dropped_count',
+                                            metricType='counter', metricAction='inc',
+                                            metricValue=float(droppedCount), metricHelp='Number of log messages dropped due to a full log buffer',
+                                            metricLabels={"hostname": self.hostname},
+                                            metricExpiry=60,
+                                            usePrefix=True,
+                                            prefixHostname=self.hostname,
+                                            prefixServiceName='metric')
+        return len(logEntries)
+
+    def shipLogs(self):
+        """
+        Flushes the ring every flushInterval, or sooner when flushLines messages are buffered.
+        """
+        while True:
+            try:
+                self.flushEvent.wait(self.flushInterval)
+                self.flushEvent.clear()
+                self.flush()
+            except Exception as e:
+                time.sleep(self.flushInterval)
+
+
 class LogTool:
     """
     Reusable logging class, providing both asynchronous and synchronous logging functions.
@@ -34,6 +203,23 @@ class LogTool:
         'NOTSET': {'verbosity': 6, 'logging':  logging.NOTSET},
         }
         self.logLevel = config.get('logging', {}).get('level', 'INFO')
+        self.logLevelVerbosity = self.logLevels.get(self.logLevel.upper(), {}).get('verbosity', 4)
+        self.messageLogLevelVerbosity = {}
+        for logLevelName, logLevel in self.logLevels.items():
+            self.messageLogLevelVerbosity[logLevelName] = logLevel.get('verbosity')
+            self.messageLogLevelVerbosity[logLevelName.lower()] = logLevel.get('verbosity')
+        self.logToStdout = config.get('logging', {}).get('log_to_stdout', True)
+
+        # Info and warning messages from the same call site are limited to rateLimitMessages per rateLimitInterval seconds.
+        # Debug messages are sampled instead, errors and critical messages are always logged.
+        self.rateLimitEnabled = config.get('logging', {}).get('rate_limit_enabled', False)
+        self.rateLimitedLevels = ['info', 'warning']
+        self.rateLimitInterval = float(config.get('logging', {}).get('rate_limit_interval', 10))
+        self.rateLimitMessages = int(config.get('logging', {}).get('rate_limit_messages', 100))
+        self.rateLimitState = {}
+        self.rateLimitLastSweep = time.monotonic()
+        self.rateLimitLock = threading.Lock()
+        self.debugSampleRate = float(config.get('logging', {}).get('debug_sample_rate', 1.0))
 
         self.redisUseUnixSocket = config.get('redis', {}).get('useUnixSocket', False)
         self.redisUnixSocketPath = config.get('redis', {}).get('unixSocketPath', '/var/run/redis/redis-server.sock')
@@ -43,39 +229,157 @@ class LogTool:
         self.redisMessagingAsync = RedisMessagingAsync(host=self.redisHost, port=self.redisPort, useUnixSocket=self.redisUseUnixSocket, unixSocketPath=self.redisUnixSocketPath)
         self.redisMessaging = RedisMessaging(host=self.redisHost, port=self.redisPort, useUnixSocket=self.redisUseUnixSocket, unixSocketPath=self.redisUnixSocketPath)
         self.hostname = socket.gethostname()
+
+        self.bufferedShipping = config.get('logging', {}).get('buffered_shipping', True)
+        self.logShipper = None
+        if self.bufferedShipping:
+            self.logShipper = LogShipper(redisMessaging=self.redisMessaging,
+                                         hostname=self.hostname,
+                                         bufferSize=int(config.get('logging', {}).get('shipping_buffer_size', 10000)),
+                                         flushInterval=float(config.get('logging', {}).get('shipping_flush_interval_ms', 100)) / 1000,
+                                         flushLines=int(config.get('logging', {}).get('shipping_flush_lines', 500)))
     
-    async def logAsync(self, service: str, level: str, message: str, redisClient=None) -> bool:
+    def isEnabledFor(self, level: str) -> bool:
+        """
+        Returns whether a message of the given level would be logged, without building the message.
+        """
+        messageLogLevelVerbosity = self.messageLogLevelVerbosity.get(level)
+        if messageLogLevelVerbosity is None:
+            messageLogLevelVerbosity = self.logLevels.get(level.upper(), {}).get('verbosity', 4)
+        return messageLogLevelVerbosity <= self.logLevelVerbosity
+
+    def formatMessage(self, message, messageArgs: tuple=None) -> str:
+        """
+        Builds a log message which was deferred until after the level check.
+        Accepts either a callable returning the message, or a %-style format string with messageArgs.
+        """
+        if callable(message):
+            return str(message())
+        if messageArgs:
+            try:
+                return str(message) % messageArgs
+            except (TypeError, ValueError):
+                return f"{message} {messageArgs}"
+        return str(message)
+
+    def formatTracedMessage(self, message, messageArgs: tuple=None) -> str:
+        """
+        Builds a log message, prefixed with the trace id of the message being handled, if any.
         """
-        Tests loglevel, prints to console and queues a log message to an asynchronous redis messaging client.
+        message = self.formatMessage(message, messageArgs)
+        traceContext = currentTraceContext.get()
+        if traceContext is not None:
+            return f"[{traceContext[0]}] {message}"
+        return message
+
+    def isSampled(self, level: str) -> bool:
+        """
+        Returns whether a message passes debug sampling. Only debug messages are sampled.
+        """
+        if self.debugSampleRate >= 1 or level.lower() != 'debug':
+            return True
+        return random.random() < self.debugSampleRate
+
+    def checkRateLimit(self, service: str, level: str, callSite: tuple) -> tuple:
+        """
+        Counts a message against the rate limit of its call site.
+        Returns whether the message may be logged, and a list of (service, level, message) summaries for call sites whose suppressed messages are due to be reported.
         """
+        now = time.monotonic()
+        suppressedSummaries = []
+        with self.rateLimitLock:
+            if now - self.rateLimitLastSweep >= self.rateLimitInterval:
+                self.rateLimitLastSweep = now
+                for rateLimitSite, rateLimitState in list(self.rateLimitState.items()):
+                    if now - rateLimitState[0] >= self.rateLimitInterval and rateLimitSite != callSite:
+                        if rateLimitState[2]:
+                            suppressedSummaries.append(self.getSuppressedSummary(rateLimitSite, rateLimitState, now))
+                        del self.rateLimitState[rateLimitSite]
+
+            rateLimitState = self.rateLimitState.get(callSite)
+            if rateLimitState is None or now - rateLimitState[0] >= self.rateLimitInterval:
+                if rateLimitState is not None and rateLimitState[2]:
+                    suppressedSummaries.append(self.getSuppressedSummary(callSite, rateLimitState, now))
+                # Window start, messages in window, suppressed messages, service, level
+                rateLimitState = [now, 0, 0, service, level]
+                self.rateLimitState[callSite] = rateLimitState
+
+            rateLimitState[1] += 1
+            if rateLimitState[1] > self.rateLimitMessages:
+                rateLimitState[2] += 1
+                return False, suppressedSummaries
+        return True, suppressedSummaries
+
+    def getSuppressedSummary(self, callSite: tuple, rateLimitState: list, now: float) -> tuple:
+        """
+        Returns a (service, level, message) summary of the messages suppressed at a call site.
+        """
+        return (rateLimitState[3], rateLimitState[4], f"[LogTool] Suppressed {rateLimitState[2]} similar messages from {os.path.basename(callSite[0])}:{callSite[1]} in the last {int(now - rateLimitState[0])}s")
+
+    async def logAsync(self, service: str, level: str, message, redisClient=None, messageArgs: tuple=None) -> bool:
+        """
+        Tests loglevel, sampling and rate limits, prints to console and queues a log message to an asynchronous redis messaging client.
+        The message may be a callable or a format string with messageArgs, which are only evaluated if the message is logged.
+        """
+        if not self.isEnabledFor(level) or not self.isSampled(level):
+            return False
         if redisClient == None:
             redisClient = self.redisMessagingAsync
-        configLogLevelVerbosity = self.logLevels.get(self.logLevel.upper(), {}).get('verbosity', 4)
-        messageLogLevelVerbosity = self.logLevels.get(level.upper(), {}).get('verbosity', 4)
-        if not messageLogLevelVerbosity <= configLogLevelVerbosity:
-            return False
-        timestamp = time.time()
-        dateTimeString = datetime.fromtimestamp(timestamp).strftime("%m/%d/%Y %H:%M:%S %Z").strip()
-        print(f"[{dateTimeString}] [{level.upper()}] {message}")
-        await(redisClient.sendLogMessage(serviceName=service.lower(), logLevel=level, logTimestamp=timestamp, message=message, logExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='log'))
+        if self.rateLimitEnabled and level.lower() in self.rateLimitedLevels:
+            callerFrame = sys._getframe(1)
+            messageAllowed, suppressedSummaries = self.checkRateLimit(service, level, (callerFrame.f_code.co_filename, callerFrame.f_lineno))
+            for summaryService, summaryLevel, summaryMessage in suppressedSummaries:
+                await(self.emitLogAsync(summaryService, summaryLevel, summaryMessage, redisClient))
+            if not messageAllowed:
+                return False
+        await(self.emitLogAsync(service, level, self.formatTracedMessage(message, messageArgs), redisClient))
         return True
-    
-    def log(self, service: str, level: str, message: str, redisClient=None) -> bool:
+
+    def log(self, service: str, level: str, message, redisClient=None, messageArgs: tuple=None) -> bool:
         """
-        Tests loglevel, prints to console and queues a log message to a synchronous redis messaging client.
+        Tests loglevel, sampling and rate limits, prints to console and queues a log message to a synchronous redis messaging client.
+        The message may be a callable or a format string with messageArgs, which are only evaluated if the message is logged.
         """
+        if not self.isEnabledFor(level) or not self.isSampled(level):
+            return False
         if redisClient == None:
             redisClient = self.redisMessaging
-        configLogLevelVerbosity = self.logLevels.get(self.logLevel.upper(), {}).get('verbosity', 4)
-        messageLogLevelVerbosity = self.logLevels.get(level.upper(), {}).get('verbosity', 4)
-        if not messageLogLevelVerbosity <= configLogLevelVerbosity:
-            return False
-        timestamp = time.time()
-        dateTimeString = datetime.fromtimestamp(timestamp).strftime("%m/%d/%Y %H:%M:%S %Z").strip()
-        print(f"[{dateTimeString}] [{level.upper()}] {message}")
-        redisClient.sendLogMessage(serviceName=service.lower(), logLevel=level, logTimestamp=timestamp, message=message, logExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+        if self.rateLimitEnabled and level.lower() in self.rateLimitedLevels:
+            callerFrame = sys._getframe(1)
+            messageAllowed, suppressedSummaries = self.checkRateLimit(service, level, (callerFrame.f_code.co_filename, callerFrame.f_lineno))
+            for summaryService, summaryLevel, summaryMessage in suppressedSummaries:
+                self.emitLog(summaryService, summaryLevel, summaryMessage, redisClient)
+            if not messageAllowed:
+                return False
+        self.emitLog(service, level, self.formatTracedMessage(message, messageArgs), redisClient)
         return True
 
+    async def emitLogAsync(self, service: str, level: str, message: str, redisClient):
+        """
+        Prints a formatted log message to console, and queues it to an asynchronous redis messaging client.
+        """
+        timestamp = time.time()
+        if self.logToStdout:
+            dateTimeString = datetime.fromtimestamp(timestamp).strftime("%m/%d/%Y %H:%M:%S %Z").strip()
+            print(f"[{dateTimeString}] [{level.upper()}] {message}")
+        if self.logShipper is not None:
+            self.logShipper.enqueue(service=service.lower(), level=level, timestamp=timestamp, message=message)
+            return
+        await(redisClient.sendLogMessage(serviceName=service.lower(), logLevel=level, logTimestamp=timestamp, message=message, logExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='log'))
+
+    def emitLog(self, service: str, level: str, message: str, redisClient):
+        """
+        Prints a formatted log message to console, and queues it to a synchronous redis messaging client.
+        """
+        timestamp = time.time()
+        if self.logToStdout:
+            dateTimeString = datetime.fromtimestamp(timestamp).strftime("%m/%d/%Y %H:%M:%S %Z").strip()
+            print(f"[{dateTimeString}] [{level.upper()}] {message}")
+        if self.logShipper is not None:
+            self.logShipper.enqueue(service=service.lower(), level=level, timestamp=timestamp, message=message)
+            return
+        redisClient.sendLogMessage(serviceName=service.lower(), logLevel=level, logTimestamp=timestamp, message=message, logExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='log')
+
     def setupFileLogger(self, loggerName: str, logFilePath: str):
         """
         Sets up and returns a file logger, given a loggerName and logFilePath. 
@@ -97,4 +401,19 @@ class LogTool:
         rolloverHandler.setFormatter(formatter)
         fileLogger.addHandler(rolloverHandler)
         fileLogger.setLevel(logging.DEBUG)
-        return fileLogger
\ No newline at end of file
+        return fileLogger
+
+    def setupBufferedLogFile(self, logFilePath: str) -> BufferedLogFile:
+        """
+        Sets up and returns a buffered, size-rotated log file, given a logFilePath.
+        Defaults to {pyhssRootDir}/log/{logFileName} if the configured file location is not writable.
+        """
+        try:
+            bufferedLogFile = BufferedLogFile(logFilePath, maxBytes=50000000, backupCount=5)
+        except PermissionError:
+            logFileName = logFilePath.split('/')[-1]
+            pyhssRootDir = os.path.abspath(os.path.join(os.getcwd(), os.pardir))
+            print(f"[LogTool] Warning - Unable to write to {logFilePath}, using {pyhssRootDir}/log/{logFileName} instead.")
+            logFilePath = f"{pyhssRootDir}/log/{logFileName}"
+            bufferedLogFile = BufferedLogFile(logFilePath, maxBytes=50000000, backupCount=5)
+        return bufferedLogFile
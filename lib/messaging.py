@@ -1,5 +1,57 @@
 from redis import Redis
 import time, json, uuid, traceback
+import os, atexit, threading
+
+class MetricAggregator:
+    """
+    Merges metrics in memory until they are drained, so that many sendMetric calls become one queued message.
+    Increments and decrements with the same name and labels are summed, sets keep the latest value,
+    observations are collected into a list of VALUES, and InfluxDB points are collected into a list.
+    """
+
+    def __init__(self):
+        self.metricLock = threading.Lock()
+        self.pendingMetrics = {}
+        self.pendingExpiry = {}
+
+    def add(self, queue: str, metricBody: dict, metricExpiry: int=None):
+        """
+        Merges a metric into the pending metrics for the given queue.
+        """
+        metricLabels = metricBody.get('LABELS')
+        labelKey = tuple(sorted((str(labelName), str(labelValue)) for labelName, labelValue in metricLabels.items())) if isinstance(metricLabels, dict) else ()
+        aggregationKey = (metricBody['serviceName'], metricBody['NAME'], metricBody['TYPE'], metricBody['ACTION'], labelKey)
+        metricInflux = metricBody.pop('INFLUX', None)
+        with self.metricLock:
+            queueMetrics = self.pendingMetrics.setdefault(queue, {})
+            pendingMetric = queueMetrics.get(aggregationKey)
+            if pendingMetric is None:
+                pendingMetric = metricBody
+                if metricBody['ACTION'] == 'observe':
+                    pendingMetric['VALUES'] = [pendingMetric['VALUE']]
+                pendingMetric['INFLUX'] = []
+                queueMetrics[aggregationKey] = pendingMetric
+            elif metricBody['ACTION'] == 'set':
+                pendingMetric['VALUE'] = metricBody['VALUE']
+                pendingMetric['timestamp'] = metricBody['timestamp']
+            elif metricBody['ACTION'] == 'observe':
+                pendingMetric['VALUES'].append(metricBody['VALUE'])
+            else:
+                pendingMetric['VALUE'] += metricBody['VALUE']
+                pendingMetric['timestamp'] = metricBody['timestamp']
+            if metricInflux:
+                pendingMetric['INFLUX'].append(metricInflux)
+            if metricExpiry is not None:
+                self.pendingExpiry[queue] = max(metricExpiry, self.pendingExpiry.get(queue, 0))
+
+    def drain(self) -> dict:
+        """
+        Returns and clears the pending metrics, as {queue: (metricList, metricExpiry)}.
+        """
+        with self.metricLock:
+            pendingMetrics, self.pendingMetrics = self.pendingMetrics, {}
+            pendingExpiry, self.pendingExpiry = self.pendingExpiry, {}
+        return {queue: (list(queueMetrics.values()), pendingExpiry.get(queue)) for queue, queueMetrics in pendingMetrics.items() if queueMetrics}
 
 class RedisMessaging:
     """
@@ -7,11 +59,16 @@ class RedisMessaging:
     A class for sending and receiving redis messages.
     """
 
-    def __init__(self, host: str='localhost', port: int=6379, useUnixSocket: bool=False, unixSocketPath: str='/var/run/redis/redis-server.sock'):
+    def __init__(self, host: str='localhost', port: int=6379, useUnixSocket: bool=False, unixSocketPath: str='/var/run/redis/redis-server.sock', metricAggregation: bool=True, metricFlushInterval: float=1.0):
         if useUnixSocket:
             self.redisClient = Redis(unix_socket_path=unixSocketPath)
         else:
             self.redisClient = Redis(host=host, port=port)
+        self.metricAggregation = metricAggregation
+        self.metricFlushInterval = metricFlushInterval
+        self.metricAggregator = MetricAggregator()
+        self.metricFlushThread = None
+        self.metricFlushPid = None
 
     def handlePrefix(self, key: str, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common'):
         """
@@ -36,14 +93,32 @@ class RedisMessaging:
         except Exception as e:
             return ''
 
-    def sendMetric(self, serviceName: str, metricName: str, metricType: str, metricAction: str, metricValue: float, metricInflux: dict={}, metricHelp: str='', metricLabels: list=[], metricTimestamp: int=time.time_ns(), metricExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
+    def sendBulkMessage(self, queue: str, messageList: list, queueExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
+        """
+        Stores a list of messages in a given Queue (Key), in one pipeline.
+        """
+        try:
+            queue = self.handlePrefix(key=queue, usePrefix=usePrefix, prefixHostname=prefixHostname, prefixServiceName=prefixServiceName)
+            redisPipe = self.redisClient.pipeline()
+            redisPipe.rpush(queue, *messageList)
+            if queueExpiry is not None:
+                redisPipe.expire(queue, queueExpiry)
+            redisPipe.execute()
+            return f'{len(messageList)} messages stored in {queue} successfully.'
+        except Exception as e:
+            return ''
+
+    def sendMetric(self, serviceName: str, metricName: str, metricType: str, metricAction: str, metricValue: float, metricInflux: dict={}, metricHelp: str='', metricLabels: list=[], metricBuckets: list=None, metricTimestamp: int=None, metricExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
         """
         Stores a prometheus metric in a format readable by the metric service.
+        When metric aggregation is enabled, the metric is merged in memory and queued by flushMetrics on a background thread.
         """
         if not isinstance(metricValue, (int, float)):
             return 'Invalid Argument: metricValue must be a digit'
         metricValue = float(metricValue)
-        prometheusMetricBody = json.dumps([{
+        if metricTimestamp is None:
+            metricTimestamp = time.time_ns()
+        prometheusMetric = {
         'serviceName': serviceName,
         'timestamp': metricTimestamp,
         'NAME': metricName,
@@ -54,17 +129,68 @@ class RedisMessaging:
         'VALUE': metricValue,
         'INFLUX': metricInflux,
         }
-        ])
+        if metricBuckets:
+            prometheusMetric['BUCKETS'] = metricBuckets
 
         queue = self.handlePrefix(key='metric', usePrefix=usePrefix, prefixHostname=prefixHostname, prefixServiceName=prefixServiceName)
 
+        if self.metricAggregation:
+            if self.metricFlushPid != os.getpid():
+                self.startMetricFlush()
+            self.metricAggregator.add(queue=queue, metricBody=prometheusMetric, metricExpiry=metricExpiry)
+            return f'Succesfully stored metric called: {metricName}, with value of: {metricType}'
+
         try:
-            self.redisClient.rpush(queue, prometheusMetricBody)
+            self.redisClient.rpush(queue, json.dumps([prometheusMetric]))
             if metricExpiry is not None:
                 self.redisClient.expire(queue, metricExpiry)
             return f'Succesfully stored metric called: {metricName}, with value of: {metricType}'
         except Exception as e:
             return ''
+
+    def startMetricFlush(self):
+        """
+        Starts the background thread which flushes aggregated metrics, or restarts it after a fork.
+        """
+        with self.metricAggregator.metricLock:
+            if self.metricFlushPid == os.getpid():
+                return
+            self.metricFlushPid = os.getpid()
+            self.metricFlushThread = threading.Thread(target=self.flushMetricsPeriodically, name='metricFlush', daemon=True)
+            self.metricFlushThread.start()
+            atexit.register(self.flushMetrics)
+
+    def flushMetricsPeriodically(self):
+        """
+        Flushes aggregated metrics every metricFlushInterval seconds.
+        """
+        while True:
+            time.sleep(self.metricFlushInterval)
+            try:
+                self.flushMetrics()
+            except Exception as e:
+                pass
+
+    def flushMetrics(self) -> int:
+        """
+        Queues all aggregated metrics, as one message per metric queue, in a single pipeline.
+        Returns the number of aggregated metrics queued.
+        """
+        pendingMetrics = self.metricAggregator.drain()
+        if not pendingMetrics:
+            return 0
+        metricCount = 0
+        redisPipe = self.redisClient.pipeline(transaction=False)
+        for queue, (metricList, metricExpiry) in pendingMetrics.items():
+            redisPipe.rpush(queue, json.dumps(metricList))
+            if metricExpiry is not None:
+                redisPipe.expire(queue, metricExpiry)
+            metricCount += len(metricList)
+        try:
+            redisPipe.execute()
+        except Exception as e:
+            return 0
+        return metricCount
     
     def sendLogMessage(self, serviceName: str, logLevel: str, logTimestamp: int, message: str, logExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
         """
@@ -131,18 +257,29 @@ class RedisMessaging:
         except Exception as e:
             return ''
 
-    def awaitBulkMessage(self, key: str, count: int=100, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common'):
+    def awaitBulkMessage(self, key: str, count: int=100, timeout: float=0, direction: str='RIGHT', usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common'):
         """
         Blocks until one or more messages are received at the given key, then returns the amount of messages specified by count.
+        Blocks indefinitely when timeout is 0, otherwise returns None once timeout (in seconds) has passed.
         """
         try:
             key = self.handlePrefix(key=key, usePrefix=usePrefix, prefixHostname=prefixHostname, prefixServiceName=prefixServiceName)
-            message =  self.redisClient.blmpop(0, 1, key, direction='RIGHT', count=count)
+            message =  self.redisClient.blmpop(timeout, 1, key, direction=direction, count=count)
             return message
         except Exception as e:
             print(traceback.format_exc())
             return ''
 
+    def getQueueLength(self, queue: str, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> int:
+        """
+        Returns the number of messages waiting in the given Queue (Key).
+        """
+        try:
+            queue = self.handlePrefix(key=queue, usePrefix=usePrefix, prefixHostname=prefixHostname, prefixServiceName=prefixServiceName)
+            return int(self.redisClient.llen(queue))
+        except Exception as e:
+            return 0
+
     def deleteQueue(self, queue: str, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> bool:
         """
         Deletes the given Queue (Key)
@@ -167,6 +304,14 @@ class RedisMessaging:
         except Exception as e:
             return ''
 
+    def setValueIfAbsent(self, key: str, value: str, keyExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> bool:
+        """
+        Atomically stores a value under a given key, with an expiry (in seconds) if provided, only if the key doesn't exist.
+        Returns True if the value was stored. Redis errors are raised, so the caller can tell them from an existing key.
+        """
+        key = self.handlePrefix(key=key, usePrefix=usePrefix, prefixHostname=prefixHostname, prefixServiceName=prefixServiceName)
+        return bool(self.redisClient.set(key, value, nx=True, ex=keyExpiry))
+
     def getValue(self, key: str, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
         """
         Gets the value stored under a given key.
@@ -3,6 +3,7 @@ import traceback
 import socket
 import redis.asyncio as redis
 import time, json, uuid
+from messaging import MetricAggregator
 
 class RedisMessagingAsync:
     """
@@ -10,12 +11,15 @@ class RedisMessagingAsync:
     A class for sending and receiving redis messages asynchronously.
     """
 
-    def __init__(self, host: str='localhost', port: int=6379, useUnixSocket: bool=False, unixSocketPath: str='/var/run/redis/redis-server.sock'):
+    def __init__(self, host: str='localhost', port: int=6379, useUnixSocket: bool=False, unixSocketPath: str='/var/run/redis/redis-server.sock', metricAggregation: bool=True, metricFlushInterval: float=1.0):
         if useUnixSocket:
             self.redisClient = redis.Redis(unix_socket_path=unixSocketPath)
         else:
             self.redisClient = redis.Redis(host=host, port=port)
-        pass
+        self.metricAggregation = metricAggregation
+        self.metricFlushInterval = metricFlushInterval
+        self.metricAggregator = MetricAggregator()
+        self.metricFlushTask = None
 
     async def handlePrefix(self, key: str, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common'):
         """
@@ -60,14 +64,17 @@ class RedisMessagingAsync:
         except Exception as e:
             return ''
 
-    async def sendMetric(self, serviceName: str, metricName: str, metricType: str, metricAction: str, metricValue: float, metricHelp: str='', metricLabels: list=[], metricTimestamp: int=time.time_ns(), metricExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
+    async def sendMetric(self, serviceName: str, metricName: str, metricType: str, metricAction: str, metricValue: float, metricHelp: str='', metricLabels: list=[], metricBuckets: list=None, metricTimestamp: int=None, metricExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
         """
         Stores a prometheus metric in a format readable by the metric service, asynchronously.
+        When metric aggregation is enabled, the metric is merged in memory and queued by flushMetrics on a background task.
         """
         if not isinstance(metricValue, (int, float)):
             return 'Invalid Argument: metricValue must be a digit'
         metricValue = float(metricValue)
-        prometheusMetricBody = json.dumps([{
+        if metricTimestamp is None:
+            metricTimestamp = time.time_ns()
+        prometheusMetric = {
         'serviceName': serviceName,
         'timestamp': metricTimestamp,
         'NAME': metricName,
@@ -77,21 +84,60 @@ class RedisMessagingAsync:
         'ACTION': metricAction,
         'VALUE': metricValue,
         }
-        ])
+        if metricBuckets:
+            prometheusMetric['BUCKETS'] = metricBuckets
 
         metricQueueName = f"metric"
         metricQueueName = await(self.handlePrefix(key=metricQueueName, usePrefix=usePrefix, prefixHostname=prefixHostname, prefixServiceName=prefixServiceName))
-        
+
+        if self.metricAggregation:
+            if self.metricFlushTask is None or self.metricFlushTask.done():
+                self.metricFlushTask = asyncio.create_task(self.flushMetricsPeriodically())
+            self.metricAggregator.add(queue=metricQueueName, metricBody=prometheusMetric, metricExpiry=metricExpiry)
+            return f'Succesfully stored metric called: {metricName}, with value of: {metricType}'
+
         try:
             async with self.redisClient.pipeline(transaction=True) as redisPipe:
-                await(redisPipe.rpush(metricQueueName, prometheusMetricBody).execute())
+                redisPipe.rpush(metricQueueName, json.dumps([prometheusMetric]))
                 if metricExpiry is not None:
-                    await(redisPipe.expire(metricQueueName, metricExpiry).execute())
-                    sendMetricResult, expireKeyResult = await redisPipe.execute()
+                    redisPipe.expire(metricQueueName, metricExpiry)
+                await(redisPipe.execute())
             return f'Succesfully stored metric called: {metricName}, with value of: {metricType}'
         except Exception as e:
             return ''
 
+    async def flushMetricsPeriodically(self):
+        """
+        Flushes aggregated metrics every metricFlushInterval seconds.
+        """
+        while True:
+            await(asyncio.sleep(self.metricFlushInterval))
+            try:
+                await(self.flushMetrics())
+            except Exception as e:
+                pass
+
+    async def flushMetrics(self) -> int:
+        """
+        Queues all aggregated metrics, as one message per metric queue, in a single pipeline.
+        Returns the number of aggregated metrics queued.
+        """
+        pendingMetrics = self.metricAggregator.drain()
+        if not pendingMetrics:
+            return 0
+        metricCount = 0
+        try:
+            async with self.redisClient.pipeline(transaction=False) as redisPipe:
+                for queue, (metricList, metricExpiry) in pendingMetrics.items():
+                    redisPipe.rpush(queue, json.dumps(metricList))
+                    if metricExpiry is not None:
+                        redisPipe.expire(queue, metricExpiry)
+                    metricCount += len(metricList)
+                await(redisPipe.execute())
+        except Exception as e:
+            return 0
+        return metricCount
+
     async def sendLogMessage(self, serviceName: str, logLevel: str, logTimestamp: int, message: str, logExpiry: int=None, usePrefix: bool=False, prefixHostname: str='unknown', prefixServiceName: str='common') -> str:
         """
         Stores a log message in a given Queue (Key) asynchronously and sets an expiry (in seconds) if provided.
@@ -0,0 +1,125 @@
+import struct
+import time
+import ipaddress
+from collections import deque, OrderedDict
+
+class PacketCapture:
+    """
+    In-memory ring buffer of raw Diameter messages per peer, which can be written out as a pcap file.
+    Capturing only stores a reference to the received or sent bytes, so it is cheap enough to leave enabled.
+    Messages are written with synthetic IP and TCP (or SCTP) headers, so Wireshark decodes them as Diameter.
+    """
+
+    def __init__(self, maxPackets: int=1000, maxPeers: int=256):
+        self.maxPackets = maxPackets
+        self.maxPeers = maxPeers
+        self.peerCaptures = OrderedDict()
+
+    def registerPeer(self, peerKey: str, localIp: str, localPort: int, peerIp: str, peerPort: int, transport: str='TCP'):
+        """
+        Starts a ring buffer for a connected peer, evicting the oldest peer if maxPeers is reached.
+        A reconnecting peer keeps its existing buffer.
+        """
+        if peerKey in self.peerCaptures:
+            self.peerCaptures.move_to_end(peerKey)
+            return
+        while len(self.peerCaptures) >= self.maxPeers:
+            self.peerCaptures.popitem(last=False)
+        self.peerCaptures[peerKey] = {
+            'localIp': localIp,
+            'localPort': int(localPort),
+            'peerIp': peerIp,
+            'peerPort': int(peerPort),
+            'transport': transport.upper(),
+            'packets': deque(maxlen=self.maxPackets),
+        }
+
+    def capture(self, peerKey: str, data: bytes, inbound: bool):
+        """
+        Stores a received (inbound) or sent message for a registered peer.
+        """
+        peerCapture = self.peerCaptures.get(peerKey)
+        if peerCapture is not None:
+            peerCapture['packets'].append((time.time(), inbound, data))
+
+    def snapshot(self, peerKeys: list=None) -> list:
+        """
+        Returns a copy of the captured peers and their messages, which is safe to write out from another thread.
+        """
+        peerCaptures = []
+        for peerKey, peerCapture in list(self.peerCaptures.items()):
+            if peerKeys and peerKey not in peerKeys:
+                continue
+            peerSnapshot = dict(peerCapture)
+            peerSnapshot['packets'] = list(peerCapture['packets'])
+            peerCaptures.append(peerSnapshot)
+        return peerCaptures
+
+    def writePcap(self, filePath: str, peerCaptures: list) -> int:
+        """
+        Writes a snapshot of captured messages to a pcap file (LINKTYPE_RAW), ordered by capture time.
+        Returns the number of messages written.
+        """
+        pcapRecords = []
+        for peerCapture in peerCaptures:
+            # Track TCP sequence numbers per direction, so Wireshark can reassemble messages split across reads.
+            sequenceNumbers = {True: 1, False: 1}
+            sctpTsn = {True: 1, False: 1}
+            for captureTime, inbound, data in peerCapture['packets']:
+                if inbound:
+                    sourceIp, sourcePort, destinationIp, destinationPort = peerCapture['peerIp'], peerCapture['peerPort'], peerCapture['localIp'], peerCapture['localPort']
+                else:
+                    sourceIp, sourcePort, destinationIp, destinationPort = peerCapture['localIp'], peerCapture['localPort'], peerCapture['peerIp'], peerCapture['peerPort']
+                for offset in range(0, max(len(data), 1), 65000):
+                    payload = data[offset:offset + 65000]
+                    if peerCapture['transport'] == 'SCTP':
+                        chunkFlags = (0x02 if offset == 0 else 0) | (0x01 if offset + 65000 >= len(data) else 0)
+                        transportHeader = self.sctpHeader(sourcePort, destinationPort, sctpTsn[inbound], len(payload), chunkFlags)
+                        sctpTsn[inbound] += 1
+                        padding = b'\x00' * (-len(payload) % 4)
+                        packet = self.ipHeader(sourceIp, destinationIp, 132, len(transportHeader) + len(payload) + len(padding)) + transportHeader + payload + padding
+                    else:
+                        transportHeader = self.tcpHeader(sourcePort, destinationPort, sequenceNumbers[inbound], sequenceNumbers[not inbound])
+                        sequenceNumbers[inbound] = (sequenceNumbers[inbound] + len(payload)) & 0xffffffff
+                        packet = self.ipHeader(sourceIp, destinationIp, 6, len(transportHeader) + len(payload)) + transportHeader + payload
+                    pcapRecords.append((captureTime, packet))
+
+        pcapRecords.sort(key=lambda pcapRecord: pcapRecord[0])
+        with open(filePath, 'wb') as pcapFile:
+            # Magic, version 2.4, UTC, no sigfigs, snaplen, LINKTYPE_RAW
+            pcapFile.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 262144, 101))
+            for captureTime, packet in pcapRecords:
+                pcapFile.write(struct.pack('<IIII', int(captureTime), int((captureTime % 1) * 1000000), len(packet), len(packet)))
+                pcapFile.write(packet)
+        return len(pcapRecords)
+
+    def ipHeader(self, sourceIp: str, destinationIp: str, protocol: int, payloadLength: int) -> bytes:
+        """
+        Returns an IPv4 or IPv6 header, depending on the address family of the peer.
+        """
+        sourceAddress = ipaddress.ip_address(sourceIp)
+        destinationAddress = ipaddress.ip_address(destinationIp)
+        if sourceAddress.version == 6 or destinationAddress.version == 6:
+            sourceAddress = sourceAddress if sourceAddress.version == 6 else ipaddress.IPv6Address(f"::ffff:{sourceAddress}")
+            destinationAddress = destinationAddress if destinationAddress.version == 6 else ipaddress.IPv6Address(f"::ffff:{destinationAddress}")
+            return struct.pack('!IHBB', 6 << 28, payloadLength, protocol, 64) + sourceAddress.packed + destinationAddress.packed
+        header = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + payloadLength, 0, 0x4000, 64, protocol, 0, sourceAddress.packed, destinationAddress.packed)
+        checksum = 0
+        for index in range(0, 20, 2):
+            checksum += (header[index] << 8) + header[index + 1]
+        while checksum > 0xffff:
+            checksum = (checksum & 0xffff) + (checksum >> 16)
+        return header[:10] + struct.pack('!H', ~checksum & 0xffff) + header[12:]
+
+    def tcpHeader(self, sourcePort: int, destinationPort: int, sequenceNumber: int, acknowledgementNumber: int) -> bytes:
+        """
+        Returns a TCP header with PSH and ACK set. The checksum is left as 0, which Wireshark does not validate by default.
+        """
+        return struct.pack('!HHIIBBHHH', sourcePort, destinationPort, sequenceNumber, acknowledgementNumber, 5 << 4, 0x18, 65535, 0, 0)
+
+    def sctpHeader(self, sourcePort: int, destinationPort: int, tsn: int, payloadLength: int, chunkFlags: int=0x03) -> bytes:
+        """
+        Returns an SCTP common header and DATA chunk header, with the Diameter payload protocol identifier (46).
+        The checksum is left as 0, which Wireshark does not validate by default.
+        """
+        return struct.pack('!HHII', sourcePort, destinationPort, 0, 0) + struct.pack('!BBHIHHI', 0, chunkFlags, 16 + payloadLength, tsn, 0, 0, 46)
@@ -0,0 +1,360 @@
+import io
+import csv
+import json
+import time
+import uuid
+import datetime
+import traceback
+import multiprocessing
+import concurrent.futures
+from datetime import timezone
+from sqlalchemy import Integer, BigInteger, Boolean, Float, DateTime, String, insert, select, or_
+from sqlalchemy.exc import IntegrityError
+from database import AUC, SUBSCRIBER, IMS_SUBSCRIBER
+import S6a_crypt
+
+def deriveOpcUnit(keyPairs: list) -> list:
+    """
+    Derives OPc for a work unit of (ki, op) hex pairs, returning (opc, None) or (None, error) for each.
+    Module level so it can be run in a multiprocessing pool.
+    """
+    derivedKeys = []
+    for ki, op in keyPairs:
+        try:
+            if len(ki) != 32 or len(op) != 32:
+                raise ValueError("ki and op must be 32 hex characters")
+            derivedKeys.append((S6a_crypt.generate_opc(ki, op), None))
+        except Exception as e:
+            derivedKeys.append((None, f"Failed to derive opc: {e}"))
+    return derivedKeys
+
+class BulkProvisioner:
+    """
+    Imports AuC, subscriber and IMS subscriber records in bulk, streamed from CSV or JSONL.
+    Records are validated and inserted in chunks, each with one executemany insert, one commit, one summarised operation log entry,
+    one webhook and one geored message, instead of a session, commit, operation log entry and webhook per record.
+    """
+
+    objectTypes = {'auc': AUC, 'subscriber': SUBSCRIBER, 'ims_subscriber': IMS_SUBSCRIBER}
+
+    def __init__(self, database, logTool, redisMessaging=None):
+        self.database = database
+        self.logTool = logTool
+        self.redisMessaging = redisMessaging or database.redisMessaging
+        self.config = database.config
+        self.chunkSize = int(self.config.get('database', {}).get('bulk_chunk_size', 1000))
+        self.opcWorkers = int(self.config.get('database', {}).get('bulk_opc_workers', 0)) or multiprocessing.cpu_count()
+        self.opcWorkUnitSize = int(self.config.get('database', {}).get('bulk_opc_work_unit', 250))
+        self.maxReportedErrors = 100
+
+    def readRecords(self, stream, recordFormat: str='csv'):
+        """
+        Yields (line number, record) from a text or binary stream of CSV (with a header row) or JSONL, without reading it all into memory.
+        A JSONL line which is not a JSON object is yielded as (line number, ValueError), to be rejected with the rest of its chunk's errors.
+        """
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream, encoding='utf-8-sig')
+        if recordFormat == 'csv':
+            for lineNumber, record in enumerate(csv.DictReader(stream), start=2):
+                yield lineNumber, record
+        elif recordFormat == 'jsonl':
+            for lineNumber, line in enumerate(stream, start=1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield lineNumber, ValueError(f"Invalid JSON: {e}")
+                        continue
+                    if not isinstance(record, dict):
+                        yield lineNumber, ValueError("Expected a JSON object")
+                        continue
+                    yield lineNumber, record
+        else:
+            raise ValueError(f"Unknown record format {recordFormat}, expected csv or jsonl")
+
+    def convertValue(self, column, value):
+        """
+        Converts a CSV / JSON value to the type of a column. Empty strings are treated as missing.
+        """
+        if value is None or value == '':
+            return None
+        if isinstance(column.type, (Integer, BigInteger)):
+            return int(value)
+        if isinstance(column.type, Boolean):
+            return value if isinstance(value, bool) else str(value).strip().lower() in ['1', 'true', 'yes']
+        if isinstance(column.type, Float):
+            return float(value)
+        if isinstance(column.type, DateTime):
+            return value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        value = str(value)
+        if isinstance(column.type, String) and column.type.length and len(value) > column.type.length:
+            raise ValueError(f"{column.name} is longer than {column.type.length} characters")
+        return value
+
+    def validateRecord(self, model, record: dict) -> dict:
+        """
+        Returns a record converted to the columns of model, or raises ValueError.
+        """
+        columns = model.__table__.columns
+        row = {}
+        for key, value in record.items():
+            if key is None or key not in columns:
+                raise ValueError(f"Unknown field {key}")
+            row[key] = self.convertValue(columns[key], value)
+        if model is SUBSCRIBER and row.get('msisdn'):
+            row['msisdn'] = row['msisdn'].replace('+', '')
+        row['last_modified'] = datetime.datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') + 'Z'
+        return row
+
+    def checkRequired(self, model, row: dict):
+        for column in model.__table__.columns:
+            if not column.nullable and not column.primary_key and column.default is None and column.server_default is None and row.get(column.name) is None:
+                raise ValueError(f"Missing required field {column.name}")
+
+    def resolveAucIds(self, session, rows: list):
+        """
+        Fills in auc_id for subscriber rows which only give an imsi, with one query per chunk.
+        """
+        imsiList = [row['imsi'] for row in rows if row.get('auc_id') is None and row.get('imsi')]
+        if not imsiList:
+            return
+        aucIds = dict(session.execute(select(AUC.imsi, AUC.auc_id).where(AUC.imsi.in_(imsiList))).all())
+        for row in rows:
+            if row.get('auc_id') is None and row.get('imsi') in aucIds:
+                row['auc_id'] = aucIds[row['imsi']]
+
+    def findExisting(self, session, model, rows: list) -> dict:
+        """
+        Returns {row index: reason} for rows which duplicate a unique value already stored, or earlier in the chunk.
+        """
+        duplicates = {}
+        for column in model.__table__.columns:
+            if not (column.unique or column.primary_key):
+                continue
+            values = [row[column.name] for row in rows if row.get(column.name) is not None]
+            if not values:
+                continue
+            storedValues = set(session.execute(select(column).where(column.in_(values))).scalars())
+            seenValues = set()
+            for rowIndex, row in enumerate(rows):
+                value = row.get(column.name)
+                if value is None:
+                    continue
+                if value in storedValues:
+                    duplicates.setdefault(rowIndex, f"{column.name} {value} already exists")
+                elif value in seenValues:
+                    duplicates.setdefault(rowIndex, f"{column.name} {value} is duplicated in the import")
+                seenValues.add(value)
+        return duplicates
+
+    def insertRows(self, session, model, rows: list):
+        """
+        Inserts rows with one executemany per distinct set of fields, so omitted fields keep their column defaults.
+        """
+        rowGroups = {}
+        for row in rows:
+            rowGroups.setdefault(tuple(sorted(row.keys())), []).append(row)
+        for rowGroup in rowGroups.values():
+            session.execute(insert(model.__table__), rowGroup)
+
+    def getInsertedIds(self, session, model, rows: list) -> list:
+        """
+        Returns the primary keys of inserted rows, looked up by a unique column since executemany does not return them on every backend.
+        AuC rows are looked up by imsi, or by iccid if they have no imsi.
+        """
+        primaryKey = model.__mapper__.primary_key[0]
+        uniqueColumns = [AUC.imsi, AUC.iccid] if model is AUC else [SUBSCRIBER.imsi] if model is SUBSCRIBER else [IMS_SUBSCRIBER.msisdn]
+        valuesByColumn = {}
+        for row in rows:
+            for uniqueColumn in uniqueColumns:
+                if row.get(uniqueColumn.name) is not None:
+                    valuesByColumn.setdefault(uniqueColumn, []).append(row[uniqueColumn.name])
+                    break
+        if not valuesByColumn:
+            return []
+        return sorted(session.execute(select(primaryKey).where(or_(*[uniqueColumn.in_(values) for uniqueColumn, values in valuesByColumn.items()]))).scalars())
+
+    def getOpcPool(self, opcPool: dict):
+        """
+        Returns the process pool deriving OPc for one import, started on first use and kept in opcPool['executor'].
+        Workers are spawned rather than forked, as the API server and its logging, metric and tracing threads must not be forked.
+        """
+        if opcPool.get('executor') is None:
+            opcPool['executor'] = concurrent.futures.ProcessPoolExecutor(max_workers=self.opcWorkers, mp_context=multiprocessing.get_context('spawn'))
+        return opcPool['executor']
+
+    def deriveOpc(self, chunk: list, opcPool: dict=None):
+        """
+        Replaces op with the derived opc in AuC records of a chunk, so only OPc is stored and AIR never derives it.
+        Work units of opcWorkUnitSize records are spread over the import's process pool, or derived inline for a single unit or worker.
+        Returns the chunk, the number of OPc derived and a list of (line number, error) for records whose OPc could not be derived.
+        """
+        opIndexes = [chunkIndex for chunkIndex, (lineNumber, record) in enumerate(chunk) if record.get('op') not in (None, '')]
+        if not opIndexes:
+            return chunk, 0, []
+        keyPairs = [(str(chunk[chunkIndex][1].get('ki') or '').strip(), str(chunk[chunkIndex][1]['op']).strip()) for chunkIndex in opIndexes]
+        workUnits = [keyPairs[unitStart:unitStart + self.opcWorkUnitSize] for unitStart in range(0, len(keyPairs), self.opcWorkUnitSize)]
+        if opcPool is not None and self.opcWorkers > 1 and len(workUnits) > 1:
+            derivedUnits = self.getOpcPool(opcPool).map(deriveOpcUnit, workUnits)
+        else:
+            derivedUnits = map(deriveOpcUnit, workUnits)
+        derivedKeys = [derivedKey for derivedUnit in derivedUnits for derivedKey in derivedUnit]
+
+        chunk = list(chunk)
+        derivationErrors = []
+        for chunkIndex, (opc, error) in zip(opIndexes, derivedKeys):
+            lineNumber, record = chunk[chunkIndex]
+            if record.get('opc') not in (None, ''):
+                error = "Give either op or opc, not both"
+            if error:
+                derivationErrors.append((lineNumber, error))
+                chunk[chunkIndex] = None
+                continue
+            record = {key: value for key, value in record.items() if key != 'op'}
+            record['opc'] = opc
+            chunk[chunkIndex] = (lineNumber, record)
+        return [chunkRecord for chunkRecord in chunk if chunkRecord is not None], len(opIndexes) - len(derivationErrors), derivationErrors
+
+    def importChunk(self, objectType: str, chunk: list, propagate: bool=True, operationId: str=None, opcPool: dict=None) -> dict:
+        """
+        Validates and inserts one chunk of (line number, record), in one transaction with one summarised operation log entry.
+        AuC records may give op instead of opc, which is derived before validation.
+        Rows which fail validation, or duplicate a stored unique value, are reported and skipped.
+        """
+        model = self.objectTypes[objectType]
+        primaryKey = model.__mapper__.primary_key[0]
+        chunkResult = {'inserted': 0, 'failed': 0, 'opc_derived': 0, 'errors': [], 'operation_id': None}
+
+        def rejectRow(lineNumber, error):
+            chunkResult['failed'] += 1
+            chunkResult['errors'].append({'line': lineNumber, 'error': error})
+
+        for lineNumber, record in chunk:
+            if isinstance(record, Exception):
+                rejectRow(lineNumber, str(record))
+        chunk = [(lineNumber, record) for lineNumber, record in chunk if not isinstance(record, Exception)]
+
+        if model is AUC:
+            chunk, chunkResult['opc_derived'], derivationErrors = self.deriveOpc(chunk, opcPool)
+            for lineNumber, error in derivationErrors:
+                rejectRow(lineNumber, error)
+
+        # (line number, record as received, validated row)
+        pendingRows = []
+        for lineNumber, record in chunk:
+            try:
+                pendingRows.append((lineNumber, record, self.validateRecord(model, record)))
+            except Exception as e:
+                rejectRow(lineNumber, str(e))
+
+        with self.database.sessionScope() as session:
+            if model is SUBSCRIBER:
+                self.resolveAucIds(session, [row for lineNumber, record, row in pendingRows])
+            validRows = []
+            for lineNumber, record, row in pendingRows:
+                try:
+                    self.checkRequired(model, row)
+                    validRows.append((lineNumber, record, row))
+                except ValueError as e:
+                    rejectRow(lineNumber, str(e))
+
+            for attempt in range(2):
+                if not validRows:
+                    break
+                try:
+                    rows = [row for lineNumber, record, row in validRows]
+                    self.insertRows(session, model, rows)
+                    insertedIds = self.getInsertedIds(session, model, rows)
+                    chunkResult['operation_id'] = self.database.log_change(session, insertedIds[0] if insertedIds else None, 'BULK_INSERT',
+                                                                           [(primaryKey.name, None, ','.join(str(insertedId) for insertedId in insertedIds))],
+                                                                           model.__table__.name, operationId or str(uuid.uuid4()))
+                    session.commit()
+                    chunkResult['inserted'] += len(validRows)
+                    break
+                except IntegrityError as e:
+                    # Reject rows clashing with stored (or earlier) unique values, and try once more.
+                    self.database.safe_rollback(session)
+                    duplicates = self.findExisting(session, model, [row for lineNumber, record, row in validRows]) if attempt == 0 else {}
+                    if not duplicates:
+                        for lineNumber, record, row in validRows:
+                            rejectRow(lineNumber, str(e.orig))
+                        validRows = []
+                        break
+                    for rowIndex, (lineNumber, record, row) in enumerate(validRows):
+                        if rowIndex in duplicates:
+                            rejectRow(lineNumber, duplicates[rowIndex])
+                    validRows = [validRow for rowIndex, validRow in enumerate(validRows) if rowIndex not in duplicates]
+
+        if chunkResult['inserted']:
+            self.database.handleWebhook({'bulk_provision': objectType, 'count': chunkResult['inserted'], 'operation_id': chunkResult['operation_id']}, 'PUT')
+            if propagate:
+                self.replicateChunk(objectType, [record for lineNumber, record, row in validRows])
+        return chunkResult
+
+    def replicateChunk(self, objectType: str, records: list):
+        """
+        Sends one geored message for a chunk, if PROVISIONING is a geored sync action.
+        Primary keys are left for each node to assign, and subscribers reference their AuC by imsi.
+        """
+        if not self.config.get('geored', {}).get('enabled', False) or 'PROVISIONING' not in self.config.get('geored', {}).get('sync_actions', []):
+            return
+        primaryKeyName = self.objectTypes[objectType].__mapper__.primary_key[0].name
+        replicatedRecords = []
+        for record in records:
+            record = {key: value for key, value in record.items() if key != primaryKeyName}
+            if objectType == 'subscriber' and record.get('imsi'):
+                record.pop('auc_id', None)
+            replicatedRecords.append(record)
+        self.database.handleGeored({'bulk_provision': objectType, 'records': replicatedRecords}, 'PATCH')
+
+    def importRecords(self, objectType: str, records, propagate: bool=True, progressCallback=None) -> dict:
+        """
+        Imports an iterable of (line number, record) in chunks of chunkSize, returning a summary of the import.
+        progressCallback, if given, is called with the running summary after each chunk.
+        """
+        if objectType not in self.objectTypes:
+            raise ValueError(f"Unknown object type {objectType}, expected one of {', '.join(self.objectTypes)}")
+        startTime = time.time()
+        importResult = {'object_type': objectType, 'inserted': 0, 'failed': 0, 'opc_derived': 0, 'chunks': 0, 'errors': [], 'operation_ids': []}
+        # OPc pool of this import only, as concurrent imports through the API share this provisioner.
+        opcPool = {}
+
+        def importPendingChunk(chunk):
+            try:
+                chunkResult = self.importChunk(objectType, chunk, propagate=propagate, opcPool=opcPool)
+            except Exception as e:
+                self.logTool.log(service='Database', level='error', message=f"[provisioning.py] [importRecords] Failed to import chunk from line {chunk[0][0]}: {traceback.format_exc()}", redisClient=self.redisMessaging)
+                chunkResult = {'inserted': 0, 'failed': len(chunk), 'opc_derived': 0, 'errors': [{'line': chunk[0][0], 'error': f"Chunk of {len(chunk)} records failed: {e}"}], 'operation_id': None}
+            importResult['inserted'] += chunkResult['inserted']
+            importResult['failed'] += chunkResult['failed']
+            importResult['opc_derived'] += chunkResult['opc_derived']
+            importResult['chunks'] += 1
+            importResult['errors'].extend(chunkResult['errors'][:max(self.maxReportedErrors - len(importResult['errors']), 0)])
+            if chunkResult['operation_id']:
+                importResult['operation_ids'].append(chunkResult['operation_id'])
+            importResult['elapsed_seconds'] = round(time.time() - startTime, 3)
+            if progressCallback:
+                progressCallback(importResult)
+
+        try:
+            chunk = []
+            for lineNumber, record in records:
+                chunk.append((lineNumber, record))
+                if len(chunk) >= self.chunkSize:
+                    importPendingChunk(chunk)
+                    chunk = []
+            if chunk:
+                importPendingChunk(chunk)
+        finally:
+            if opcPool.get('executor') is not None:
+                opcPool['executor'].shutdown(cancel_futures=True)
+
+        importResult['elapsed_seconds'] = round(time.time() - startTime, 3)
+        self.logTool.log(service='Database', level='info', message=f"[provisioning.py] [importRecords] Imported {importResult['inserted']} {objectType} records in {importResult['chunks']} chunks, {importResult['failed']} failed, {importResult['opc_derived']} OPc derived, in {importResult['elapsed_seconds']}s", redisClient=self.redisMessaging)
+        return importResult
+
+    def importStream(self, objectType: str, stream, recordFormat: str='csv', propagate: bool=True, progressCallback=None) -> dict:
+        """
+        Imports records streamed from CSV or JSONL.
+        """
+        return self.importRecords(objectType, self.readRecords(stream, recordFormat), propagate=propagate, progressCallback=progressCallback)
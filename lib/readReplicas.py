@@ -0,0 +1,91 @@
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event, text
+
+class ReadReplicas:
+    """
+    Read replicas, given as SQLAlchemy URLs, for reads which tolerate replication lag.
+    A replica lagging the primary by more than replicaMaxLag seconds, or whose lag can't be read, is skipped. For replicaReadAfterWrite
+    seconds after a commit on the primary, reads stay on the primary so this process reads its own writes.
+    """
+
+    def __init__(self, primaryEngine, config: dict, logTool, redisMessaging, hostname: str, replicaUrls: list=None):
+        self.primaryEngine = primaryEngine
+        self.config = config
+        self.logTool = logTool
+        self.redisMessaging = redisMessaging
+        self.hostname = hostname
+        self.replicaUrls = list(replicaUrls if replicaUrls is not None else self.config.get('database', {}).get('replica_urls', None) or [])
+        self.replicaMaxLag = float(self.config.get('database', {}).get('replica_max_lag', 5))
+        self.replicaLagCheckInterval = float(self.config.get('database', {}).get('replica_lag_check_interval', 5))
+        self.replicaReadAfterWrite = float(self.config.get('database', {}).get('replica_read_after_write', 2))
+        self.replicaEngines = [create_engine(
+            replicaUrl,
+            echo = self.config.get('logging', {}).get('sqlalchemy_sql_echo', False),
+            pool_recycle=self.config.get('logging', {}).get('sqlalchemy_pool_recycle', 5),
+            pool_size=self.config.get('logging', {}).get('sqlalchemy_pool_size', 30),
+            max_overflow=self.config.get('logging', {}).get('sqlalchemy_max_overflow', 0)) for replicaUrl in self.replicaUrls]
+        # Replica index: (monotonic time checked, lag in seconds or None if unavailable)
+        self.replicaLag = {}
+        self.replicaIndex = 0
+        self.lastPrimaryCommit = 0.0
+        if self.replicaEngines:
+            event.listen(self.primaryEngine, 'commit', self.handlePrimaryCommit)
+
+    def getReadEngine(self):
+        """
+        Returns the next read replica, round robin, whose lag is within replicaMaxLag, or the primary engine.
+        """
+        if not self.replicaEngines or time.monotonic() - self.lastPrimaryCommit < self.replicaReadAfterWrite:
+            return self.primaryEngine
+        for attempt in range(len(self.replicaEngines)):
+            replicaIndex = self.replicaIndex % len(self.replicaEngines)
+            self.replicaIndex = replicaIndex + 1
+            replicaLag = self.getReplicaLag(replicaIndex)
+            if replicaLag is not None and replicaLag <= self.replicaMaxLag:
+                return self.replicaEngines[replicaIndex]
+        self.logTool.log(service='Database', level='debug', message="[readReplicas.py] [getReadEngine] No read replica within %ss of the primary, reading from the primary", messageArgs=(self.replicaMaxLag,), redisClient=self.redisMessaging)
+        return self.primaryEngine
+
+    def getReplicaLag(self, replicaIndex: int) -> Optional[float]:
+        """
+        Returns how many seconds a read replica is behind the primary, or None if it can't be reached or isn't replicating.
+        Checked at most once every replicaLagCheckInterval seconds per replica.
+        """
+        checkedAt, replicaLag = self.replicaLag.get(replicaIndex, (None, None))
+        if checkedAt is not None and time.monotonic() - checkedAt < self.replicaLagCheckInterval:
+            return replicaLag
+        replicaEngine = self.replicaEngines[replicaIndex]
+        try:
+            with replicaEngine.connect() as connection:
+                if replicaEngine.dialect.name == 'postgresql':
+                    replicaLag = connection.execute(text("SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                                                         "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END")).scalar()
+                elif replicaEngine.dialect.name == 'mysql':
+                    try:
+                        replicaStatus = connection.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                    except Exception as e:
+                        replicaStatus = connection.execute(text("SHOW SLAVE STATUS")).mappings().first()
+                    if replicaStatus is None:
+                        replicaLag = 0
+                    else:
+                        replicaLag = replicaStatus.get('Seconds_Behind_Source', replicaStatus.get('Seconds_Behind_Master'))
+                else:
+                    replicaLag = 0
+            replicaLag = float(replicaLag) if replicaLag is not None else None
+        except Exception as e:
+            self.logTool.log(service='Database', level='warning', message=f"[readReplicas.py] [getReplicaLag] Failed to read the lag of replica {replicaIndex}, error: {e}", redisClient=self.redisMessaging)
+            replicaLag = None
+        self.replicaLag[replicaIndex] = (time.monotonic(), replicaLag)
+        self.redisMessaging.sendMetric(serviceName='database', metricName='prom_database_replica_lag_seconds',
+                                       metricType='gauge', metricAction='set',
+                                       metricValue=float(replicaLag if replicaLag is not None else -1), metricHelp='Seconds a read replica is behind the primary, or -1 if unavailable',
+                                       metricLabels={"hostname": self.hostname, "replica": str(replicaIndex)},
+                                       metricExpiry=60,
+                                       usePrefix=True,
+                                       prefixHostname=self.hostname,
+                                       prefixServiceName='metric')
+        return replicaLag
+
+    def handlePrimaryCommit(self, connection):
+        self.lastPrimaryCommit = time.monotonic()
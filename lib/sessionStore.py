@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import atexit
+import datetime
+import threading
+import traceback
+import redis
+from datetime import timezone
+
+class GxSessionStore:
+    """
+    Gx / Rx binding state (the SERVING_APN of each subscriber and APN) kept in redis hashes, indexed by UE IP and by IMSI.
+    CCR-I / CCR-T write to redis only, and changed sessions are persisted to SERVING_APN in batches by a background thread,
+    for durability and for the API. Ended sessions are kept as tombstones until persisted, so lookups never fall back to a stale row.
+    Each write of a session bumps its version, so a persisting worker can tell if the session was changed while it was being written.
+    """
+
+    # Fields of SERVING_APN kept in the store.
+    sessionFields = ['serving_apn_id', 'subscriber_id', 'apn', 'pcrf_session_id', 'subscriber_routing', 'ip_version',
+                     'serving_pgw', 'serving_pgw_timestamp', 'serving_pgw_realm', 'serving_pgw_peer']
+    # Number of times storeSession retries when a watched key is changed by another worker.
+    storeSessionAttempts = 10
+
+    def __init__(self, database, logTool, redisMessaging):
+        self.database = database
+        self.logTool = logTool
+        self.redisMessaging = redisMessaging
+        self.redisClient = redisMessaging.redisClient
+        self.hostname = database.hostname
+        self.persistInterval = float(database.config.get('database', {}).get('session_store_persist_interval', 1))
+        self.persistBatchSize = int(database.config.get('database', {}).get('session_store_persist_batch_size', 500))
+        self.tombstoneExpiry = int(database.config.get('database', {}).get('session_store_tombstone_expiry', 300))
+        self.persistThread = None
+        self.persistPid = None
+        self.persistLock = threading.Lock()
+
+    def getKey(self, *keyParts) -> str:
+        return self.redisMessaging.handlePrefix(key=':'.join(str(keyPart) for keyPart in keyParts), usePrefix=True, prefixHostname=self.hostname, prefixServiceName='gx')
+
+    def getSessionKey(self, subscriberId, apnId) -> str:
+        return self.getKey('session', int(subscriberId), int(apnId))
+
+    def encodeSession(self, session: dict) -> dict:
+        encodedSession = {}
+        for field, value in session.items():
+            if isinstance(value, datetime.datetime):
+                value = value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            encodedSession[field] = json.dumps(value)
+        return encodedSession
+
+    def decodeSession(self, encodedSession: dict) -> dict:
+        session = {key.decode('utf-8'): json.loads(value) for key, value in encodedSession.items()}
+        if session.get('serving_pgw_timestamp'):
+            session['serving_pgw_timestamp'] = datetime.datetime.strptime(session['serving_pgw_timestamp'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        return session
+
+    def storeSession(self, imsi: str, subscriberId: int, apnId: int, session: dict=None) -> bool:
+        """
+        Stores the session of a subscriber on an APN, or ends it if session is None, returning False if redis could not be written.
+        Another session holding the same UE IP is ended, as the UE can only have one IP per PDN connection.
+        The keys read are watched, and the write is retried if another worker changes them first.
+        """
+        sessionKey = self.getSessionKey(subscriberId, apnId)
+        try:
+            with self.redisClient.pipeline() as redisPipeline:
+                for attempt in range(self.storeSessionAttempts):
+                    try:
+                        redisPipeline.watch(sessionKey)
+                        self.queueStoreSession(redisPipeline, sessionKey, imsi, subscriberId, apnId, session)
+                        redisPipeline.execute()
+                        break
+                    except redis.WatchError:
+                        redisPipeline.reset()
+                else:
+                    raise redis.WatchError(f"{sessionKey} changed by another worker in each of {self.storeSessionAttempts} attempts")
+        except Exception as e:
+            self.logTool.log(service='Database', level='error', message=f"[sessionStore.py] [storeSession] Failed to store session for {imsi} on APN {apnId}: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return False
+        if self.persistPid != os.getpid():
+            self.startPersistThread()
+        return True
+
+    def queueStoreSession(self, redisPipeline, sessionKey: str, imsi: str, subscriberId: int, apnId: int, session: dict=None):
+        """
+        Reads the keys storeSession depends on through a watching pipeline, watching each one, then queues the writes in a transaction.
+        """
+        storedSession = self.decodeSession(redisPipeline.hgetall(sessionKey))
+        if session is None:
+            redisPipeline.multi()
+            self.addTombstone(redisPipeline, sessionKey, storedSession or {'subscriber_id': int(subscriberId), 'apn': int(apnId), 'imsi': str(imsi)})
+            return
+        session = {field: value for field, value in session.items() if field in self.sessionFields}
+        session.update({'subscriber_id': int(subscriberId), 'apn': int(apnId), 'imsi': str(imsi)})
+        if storedSession.get('serving_apn_id') is not None:
+            session['serving_apn_id'] = storedSession['serving_apn_id']
+        session['version'] = storedSession.get('version', 0) + 1
+        subscriberRouting = session.get('subscriber_routing')
+        releasePreviousIp = False
+        if storedSession.get('subscriber_routing') and storedSession['subscriber_routing'] != subscriberRouting:
+            redisPipeline.watch(self.getKey('ip', storedSession['subscriber_routing']))
+            previousIpOwnerKey = redisPipeline.get(self.getKey('ip', storedSession['subscriber_routing']))
+            releasePreviousIp = previousIpOwnerKey is not None and previousIpOwnerKey.decode('utf-8') == sessionKey
+        ipOwnerSession = None
+        if subscriberRouting:
+            redisPipeline.watch(self.getKey('ip', subscriberRouting))
+            ipOwnerKey = redisPipeline.get(self.getKey('ip', subscriberRouting))
+            if ipOwnerKey is not None and ipOwnerKey.decode('utf-8') != sessionKey:
+                ipOwnerKey = ipOwnerKey.decode('utf-8')
+                redisPipeline.watch(ipOwnerKey)
+                ipOwnerSession = self.decodeSession(redisPipeline.hgetall(ipOwnerKey))
+        redisPipeline.multi()
+        if releasePreviousIp:
+            redisPipeline.delete(self.getKey('ip', storedSession['subscriber_routing']))
+        if subscriberRouting:
+            if ipOwnerSession and not ipOwnerSession.get('deleted'):
+                self.addTombstone(redisPipeline, ipOwnerKey, ipOwnerSession)
+            redisPipeline.set(self.getKey('ip', subscriberRouting), sessionKey)
+        redisPipeline.delete(sessionKey)
+        redisPipeline.hset(sessionKey, mapping=self.encodeSession(session))
+        redisPipeline.sadd(self.getKey('imsi', imsi), sessionKey)
+        redisPipeline.sadd(self.getKey('dirty'), sessionKey)
+
+    def addTombstone(self, redisPipeline, sessionKey: str, storedSession: dict):
+        """
+        Marks a session as ended until it has been deleted from SERVING_APN.
+        """
+        redisPipeline.delete(sessionKey)
+        redisPipeline.hset(sessionKey, mapping=self.encodeSession({'deleted': True, 'subscriber_id': storedSession.get('subscriber_id'), 'apn': storedSession.get('apn'),
+                                                                   'subscriber_routing': storedSession.get('subscriber_routing'), 'version': storedSession.get('version', 0) + 1}))
+        if storedSession.get('imsi'):
+            redisPipeline.srem(self.getKey('imsi', storedSession['imsi']), sessionKey)
+        redisPipeline.sadd(self.getKey('dirty'), sessionKey)
+
+    def getSession(self, subscriberId, apnId):
+        """
+        Returns ('live', session), ('deleted', None) for an ended session not yet deleted from SERVING_APN,
+        or ('missing', None) if the store doesn't know the session (or redis can't be read) and SERVING_APN should be used.
+        """
+        return self.getSessionByKey(self.getSessionKey(subscriberId, apnId))
+
+    def getSessionByKey(self, sessionKey: str):
+        try:
+            session = self.decodeSession(self.redisClient.hgetall(sessionKey))
+        except Exception as e:
+            self.logTool.log(service='Database', level='error', message=f"[sessionStore.py] [getSessionByKey] Failed to read {sessionKey}: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return 'missing', None
+        if not session:
+            return 'missing', None
+        if session.get('deleted'):
+            return 'deleted', None
+        session.pop('imsi', None)
+        session.pop('version', None)
+        return 'live', session
+
+    def getSessionByIp(self, subscriberRouting: str):
+        """
+        Returns the session holding a UE IP, as for getSession.
+        """
+        try:
+            sessionKey = self.redisClient.get(self.getKey('ip', subscriberRouting))
+        except Exception as e:
+            self.logTool.log(service='Database', level='error', message=f"[sessionStore.py] [getSessionByIp] Failed to read the session of {subscriberRouting}: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return 'missing', None
+        if sessionKey is None:
+            return 'missing', None
+        sessionState, session = self.getSessionByKey(sessionKey.decode('utf-8'))
+        if sessionState == 'live' and session.get('subscriber_routing') != subscriberRouting:
+            return 'deleted', None
+        return sessionState, session
+
+    def getSessionsByImsi(self, imsi: str) -> dict:
+        """
+        Returns {apn_id: session} of the live sessions of a subscriber.
+        """
+        sessions = {}
+        try:
+            sessionKeys = self.redisClient.smembers(self.getKey('imsi', imsi))
+        except Exception as e:
+            self.logTool.log(service='Database', level='error', message=f"[sessionStore.py] [getSessionsByImsi] Failed to read the sessions of {imsi}: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return sessions
+        for sessionKey in sessionKeys:
+            sessionState, session = self.getSessionByKey(sessionKey.decode('utf-8'))
+            if sessionState == 'live':
+                sessions[session['apn']] = session
+        return sessions
+
+    def startPersistThread(self):
+        """
+        Starts the persistence thread, or restarts it if the process has been forked since it was started.
+        """
+        with self.persistLock:
+            if self.persistThread is not None and self.persistPid == os.getpid():
+                return
+            self.persistPid = os.getpid()
+            self.persistThread = threading.Thread(target=self.maintainPersistence, name='gxSessionStore', daemon=True)
+            self.persistThread.start()
+            atexit.register(self.persistSessions)
+
+    def maintainPersistence(self):
+        while True:
+            time.sleep(self.persistInterval)
+            try:
+                while self.persistSessions() >= self.persistBatchSize:
+                    pass
+            except Exception as e:
+                self.logTool.log(service='Database', level='error', message=f"[sessionStore.py] [maintainPersistence] Failed to persist sessions: {traceback.format_exc()}", redisClient=self.redisMessaging)
+
+    def persistSessions(self) -> int:
+        """
+        Writes up to persistBatchSize changed sessions to SERVING_APN in one transaction, returning the number written.
+        Sessions are returned to the changed set if the write fails, or if they were changed while being written, as another
+        worker may have persisted the newer version first.
+        """
+        dirtyKey = self.getKey('dirty')
+        sessionKeys = [sessionKey.decode('utf-8') for sessionKey in (self.redisClient.spop(dirtyKey, self.persistBatchSize) or [])]
+        if not sessionKeys:
+            return 0
+        redisPipeline = self.redisClient.pipeline()
+        for sessionKey in sessionKeys:
+            redisPipeline.hgetall(sessionKey)
+        storedSessions = [self.decodeSession(storedSession) for storedSession in redisPipeline.execute()]
+
+        liveSessions = {}
+        endedSessions = {}
+        for sessionKey, storedSession in zip(sessionKeys, storedSessions):
+            if not storedSession:
+                continue
+            if storedSession.get('deleted'):
+                endedSessions[sessionKey] = storedSession
+            else:
+                liveSessions[sessionKey] = storedSession
+        if not liveSessions and not endedSessions:
+            return len(sessionKeys)
+        try:
+            servingApnIds = self.database.persistServingApns(list(liveSessions.values()), [(endedSession['subscriber_id'], endedSession['apn']) for endedSession in endedSessions.values()])
+        except Exception as e:
+            self.redisClient.sadd(dirtyKey, *sessionKeys)
+            self.logTool.log(service='Database', level='error', message=f"[sessionStore.py] [persistSessions] Failed to persist {len(sessionKeys)} sessions, will retry: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return 0
+
+        persistedSessions = dict(liveSessions, **endedSessions)
+        unchangedKeys = set()
+        try:
+            with self.redisClient.pipeline() as redisPipeline:
+                for attempt in range(self.storeSessionAttempts):
+                    try:
+                        redisPipeline.watch(*persistedSessions)
+                        unchangedKeys = {sessionKey for sessionKey, storedSession in persistedSessions.items()
+                                         if json.loads(redisPipeline.hget(sessionKey, 'version') or 'null') == storedSession.get('version')}
+                        redisPipeline.multi()
+                        for sessionKey, storedSession in liveSessions.items():
+                            if sessionKey not in unchangedKeys:
+                                continue
+                            servingApnId = servingApnIds.get((storedSession['subscriber_id'], storedSession['apn']))
+                            if servingApnId is not None:
+                                redisPipeline.hset(sessionKey, 'serving_apn_id', json.dumps(servingApnId))
+                        for sessionKey in endedSessions:
+                            if sessionKey in unchangedKeys:
+                                redisPipeline.expire(sessionKey, self.tombstoneExpiry)
+                        # Changed since they were read, so written again, whichever version was persisted last.
+                        changedKeys = [sessionKey for sessionKey in persistedSessions if sessionKey not in unchangedKeys]
+                        if changedKeys:
+                            redisPipeline.sadd(dirtyKey, *changedKeys)
+                        redisPipeline.execute()
+                        break
+                    except redis.WatchError:
+                        redisPipeline.reset()
+                else:
+                    raise redis.WatchError(f"Sessions changed by another worker in each of {self.storeSessionAttempts} attempts")
+        except Exception as e:
+            self.redisClient.sadd(dirtyKey, *persistedSessions)
+            self.logTool.log(service='Database', level='error', message=f"[sessionStore.py] [persistSessions] Failed to check {len(persistedSessions)} persisted sessions for changes, will write them again: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            return len(sessionKeys)
+        # IPs left pointing at a tombstone expire with it, unless taken by another session meanwhile.
+        for sessionKey, endedSession in endedSessions.items():
+            if sessionKey in unchangedKeys and endedSession.get('subscriber_routing'):
+                ipKey = self.getKey('ip', endedSession['subscriber_routing'])
+                ipOwnerKey = self.redisClient.get(ipKey)
+                if ipOwnerKey is not None and ipOwnerKey.decode('utf-8') == sessionKey:
+                    self.redisClient.expire(ipKey, self.tombstoneExpiry)
+        self.redisMessaging.sendMetric(serviceName='database', metricName='prom_gx_session_store_pending',
+                                       metricType='gauge', metricAction='set',
+                                       metricValue=float(self.redisClient.scard(dirtyKey)), metricHelp='Number of Gx sessions changed in the session store and not yet written to SERVING_APN',
+                                       metricLabels={"hostname": self.hostname},
+                                       metricExpiry=60,
+                                       usePrefix=True,
+                                       prefixHostname=self.hostname,
+                                       prefixServiceName='metric')
+        return len(sessionKeys)
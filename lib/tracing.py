@@ -0,0 +1,227 @@
+import os, time, json
+import socket
+import atexit
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+import requests
+
+# (traceId, spanId) of the message currently being handled, followed through asyncio tasks and threads that copy the context.
+currentTraceContext = contextvars.ContextVar('pyhssTraceContext', default=None)
+
+class SpanExporter:
+    """
+    Buffers finished spans in a bounded in-memory ring, and exports them from a background thread every flushInterval seconds.
+    Spans are exported as OTLP JSON, either appended to a local file (one export request per line) or posted to an OTLP/HTTP endpoint.
+    When the ring is full, the oldest spans are dropped, so exporting never blocks the caller.
+    """
+    def __init__(self, serviceName: str, exporter: str='file', filePath: str='/var/log/pyhss_spans.json', otlpEndpoint: str='http://127.0.0.1:4318/v1/traces', bufferSize: int=10000, flushInterval: float=1.0):
+        self.serviceName = serviceName
+        self.exporter = exporter.lower()
+        self.filePath = filePath
+        self.otlpEndpoint = otlpEndpoint
+        self.bufferSize = bufferSize
+        self.flushInterval = flushInterval
+        self.hostname = socket.gethostname()
+        self.spanBuffer = deque(maxlen=bufferSize)
+        self.bufferLock = threading.Lock()
+        self.exporterThread = None
+        self.exporterPid = None
+        atexit.register(self.flush)
+
+    def start(self):
+        """
+        Starts the exporter thread, or restarts it if the process has been forked since it was started.
+        """
+        with self.bufferLock:
+            if self.exporterThread is not None and self.exporterPid == os.getpid():
+                return
+            self.exporterPid = os.getpid()
+            self.exporterThread = threading.Thread(target=self.exportSpans, name='spanExporter', daemon=True)
+            self.exporterThread.start()
+
+    def enqueue(self, span: dict):
+        """
+        Adds a finished span to the ring, without blocking on the exporter.
+        """
+        if self.exporterPid != os.getpid():
+            self.start()
+        self.spanBuffer.append(span)
+
+    def getAttributes(self, attributes: dict) -> list:
+        """
+        Converts a dict of attributes to OTLP JSON key / value pairs.
+        """
+        otlpAttributes = []
+        for attributeKey, attributeValue in attributes.items():
+            if isinstance(attributeValue, bool):
+                otlpValue = {'boolValue': attributeValue}
+            elif isinstance(attributeValue, int):
+                otlpValue = {'intValue': str(attributeValue)}
+            elif isinstance(attributeValue, float):
+                otlpValue = {'doubleValue': attributeValue}
+            else:
+                otlpValue = {'stringValue': str(attributeValue)}
+            otlpAttributes.append({'key': attributeKey, 'value': otlpValue})
+        return otlpAttributes
+
+    def flush(self) -> int:
+        """
+        Exports all buffered spans in one OTLP JSON export request.
+        Returns the number of spans exported.
+        """
+        with self.bufferLock:
+            if not self.spanBuffer:
+                return 0
+            spanList = list(self.spanBuffer)
+            self.spanBuffer.clear()
+
+        otlpSpans = []
+        for span in spanList:
+            otlpSpan = {
+                'traceId': span['traceId'],
+                'spanId': span['spanId'],
+                'name': span['name'],
+                'kind': span['kind'],
+                'startTimeUnixNano': str(span['startTime']),
+                'endTimeUnixNano': str(span['endTime']),
+                'attributes': self.getAttributes(span['attributes']),
+            }
+            if span['parentSpanId']:
+                otlpSpan['parentSpanId'] = span['parentSpanId']
+            otlpSpans.append(otlpSpan)
+        exportRequest = {'resourceSpans': [{
+            'resource': {'attributes': self.getAttributes({'service.name': f"pyhss-{self.serviceName}", 'host.name': self.hostname})},
+            'scopeSpans': [{'scope': {'name': 'pyhss'}, 'spans': otlpSpans}],
+        }]}
+
+        if self.exporter == 'otlp':
+            requests.post(self.otlpEndpoint, data=json.dumps(exportRequest), headers={'Content-Type': 'application/json'}, timeout=5)
+        else:
+            with open(self.filePath, 'a') as spanFile:
+                spanFile.write(json.dumps(exportRequest) + '\n')
+        return len(otlpSpans)
+
+    def exportSpans(self):
+        """
+        Flushes the ring every flushInterval. Spans which fail to export are discarded.
+        """
+        while True:
+            time.sleep(self.flushInterval)
+            try:
+                self.flush()
+            except Exception as e:
+                pass
+
+
+class Tracer:
+    """
+    Lightweight trace context propagation and span recording, compatible with W3C Trace Context and OTLP JSON.
+    The current trace is held in a context variable, so it follows a message through asyncio tasks and into log messages.
+    Across processes it is carried in InboundData / OutboundData, geored and webhook messages, and as a traceparent header.
+    With recordSpans False, the tracer only propagates trace context, and has no span exporter.
+    """
+    def __init__(self, config: dict, serviceName: str, recordSpans: bool=True):
+        self.serviceName = serviceName
+        self.enabled = config.get('tracing', {}).get('enabled', False)
+        self.sampleRate = float(config.get('tracing', {}).get('sample_rate', 1.0))
+        self.spanExporter = None
+        exporter = str(config.get('tracing', {}).get('exporter', 'none')).lower()
+        if self.enabled and recordSpans and exporter in ['file', 'otlp']:
+            self.spanExporter = SpanExporter(serviceName=serviceName,
+                                             exporter=exporter,
+                                             filePath=config.get('tracing', {}).get('file_path', '/var/log/pyhss_spans.json'),
+                                             otlpEndpoint=config.get('tracing', {}).get('otlp_endpoint', 'http://127.0.0.1:4318/v1/traces'),
+                                             bufferSize=int(config.get('tracing', {}).get('buffer_size', 10000)),
+                                             flushInterval=float(config.get('tracing', {}).get('flush_interval', 1)))
+
+    def generateTraceId(self) -> str:
+        return os.urandom(16).hex()
+
+    def generateSpanId(self) -> str:
+        return os.urandom(8).hex()
+
+    def isSampled(self, traceId: str) -> bool:
+        """
+        Returns whether spans of a trace are recorded. Derived from the trace id, so every service makes the same decision.
+        """
+        if self.sampleRate >= 1:
+            return True
+        return int(traceId[-8:], 16) < self.sampleRate * 0xffffffff
+
+    def getTraceContext(self) -> tuple:
+        """
+        Returns the (traceId, spanId) of the current trace, or None.
+        """
+        return currentTraceContext.get()
+
+    def setTraceContext(self, traceId: str, spanId: str=None):
+        """
+        Makes a trace current, or clears the current trace if traceId is None, returning a token for resetTraceContext.
+        """
+        return currentTraceContext.set((traceId, spanId) if traceId else None)
+
+    def resetTraceContext(self, token):
+        currentTraceContext.reset(token)
+
+    def getTraceparent(self, traceContext: tuple=None) -> str:
+        """
+        Returns a W3C traceparent header value for the given (traceId, spanId), or for the current trace, or None.
+        """
+        if traceContext is None:
+            traceContext = currentTraceContext.get()
+        if traceContext is None:
+            return None
+        return f"00-{traceContext[0]}-{traceContext[1] or self.generateSpanId()}-{'01' if self.isSampled(traceContext[0]) else '00'}"
+
+    def parseTraceparent(self, traceparent: str) -> tuple:
+        """
+        Returns the (traceId, spanId) from a W3C traceparent header value, or None if it is not valid.
+        """
+        try:
+            version, traceId, spanId, traceFlags = traceparent.strip().split('-')
+            if len(traceId) != 32 or len(spanId) != 16:
+                return None
+            int(traceId, 16), int(spanId, 16)
+            return (traceId, spanId)
+        except Exception as e:
+            return None
+
+    def continueTrace(self, traceparent: str) -> tuple:
+        """
+        Makes the trace from a traceparent header value current, or clears the current trace if it is missing or invalid.
+        Returns the (traceId, spanId) of the trace, or None.
+        """
+        traceContext = self.parseTraceparent(traceparent) if traceparent else None
+        currentTraceContext.set(traceContext)
+        return traceContext
+
+    def recordSpan(self, name: str, traceId: str, spanId: str, parentSpanId: str, startTime: int, endTime: int=None, attributes: dict={}, kind: int=1):
+        """
+        Records a finished span, with start and end times in nanoseconds since the epoch.
+        Kind follows OTLP: 1 internal, 2 server, 3 client, 4 producer, 5 consumer.
+        """
+        if self.spanExporter is None or not traceId or not self.isSampled(traceId):
+            return
+        self.spanExporter.enqueue({'name': name, 'traceId': traceId, 'spanId': spanId, 'parentSpanId': parentSpanId,
+                                   'startTime': startTime, 'endTime': endTime or time.time_ns(), 'attributes': attributes, 'kind': kind})
+
+    @contextmanager
+    def span(self, name: str, attributes: dict={}, kind: int=1):
+        """
+        Runs a block as a child span of the current trace, which is current for the duration of the block.
+        Does nothing if there is no current trace.
+        """
+        traceContext = currentTraceContext.get()
+        if traceContext is None:
+            yield None
+            return
+        spanId = self.generateSpanId()
+        startTime = time.time_ns()
+        token = currentTraceContext.set((traceContext[0], spanId))
+        try:
+            yield spanId
+        finally:
+            currentTraceContext.reset(token)
+            self.recordSpan(name=name, traceId=traceContext[0], spanId=spanId, parentSpanId=traceContext[1], startTime=startTime, attributes=attributes, kind=kind)
@@ -1,7 +1,7 @@
 import sys
 import json
-from flask import Flask, request, jsonify, Response
-from flask_restx import Api, Resource, fields, reqparse, abort
+from flask import Flask, request, jsonify, Response, g
+from flask_restx import Api, Resource, fields, reqparse, abort, inputs
 from werkzeug.middleware.proxy_fix import ProxyFix
 from functools import wraps
 import os
@@ -14,6 +14,8 @@ import socket
 from logtool import LogTool
 from diameter import Diameter
 from messaging import RedisMessaging
+from tracing import Tracer
+from provisioning import BulkProvisioner
 import database
 import yaml
 
@@ -41,6 +43,8 @@ redisMessaging = RedisMessaging(host=redisHost, port=redisPort, useUnixSocket=re
 
 logTool = LogTool(config)
 
+tracer = Tracer(config=config, serviceName='api')
+
 diameterClient = Diameter(
                     redisMessaging=redisMessaging, 
                     logTool=logTool,
@@ -53,6 +57,8 @@ diameterClient = Diameter(
 
 databaseClient = database.Database(logTool=logTool, redisMessaging=redisMessaging)
 
+bulkProvisioner = BulkProvisioner(database=databaseClient, logTool=logTool, redisMessaging=redisMessaging)
+
 apiService = Flask(__name__)
 
 APN = database.APN
@@ -102,6 +108,17 @@ paginatorParser = reqparse.RequestParser()
 paginatorParser.add_argument('page', type=int, required=False, default=0, help='Page number for pagination')
 paginatorParser.add_argument('page_size', type=int, required=False, default=config['api'].get('page_size', 100), help='Number of items per page for pagination')
 
+listParser = paginatorParser.copy()
+listParser.add_argument('after', type=int, required=False, default=None, help='Return records after this cursor (keyset pagination), from the X-Next-Cursor header of the previous page. Overrides page.')
+listParser.add_argument('format', type=str, required=False, default='json', choices=('json', 'ndjson'), help='ndjson streams every record as newline delimited JSON, ignoring page, page_size and after')
+
+bulkParser = reqparse.RequestParser()
+bulkParser.add_argument('format', type=str, required=False, default='csv', choices=('csv', 'jsonl'), location='args', help='Format of the uploaded records: csv (with a header row of field names) or jsonl (one JSON object per line)')
+
+servingSubsParser = reqparse.RequestParser()
+servingSubsParser.add_argument('get_local_users_only', type=inputs.boolean, required=False, default=False, help='Only include subscribers reached through a Diameter peer connected to this node')
+servingSubsParser.add_argument('format', type=str, required=False, default='json', choices=('json', 'ndjson'), help='ndjson streams each served subscriber as newline delimited JSON')
+
 APN_model = api.schema_model('APN JSON', 
     databaseClient.Generate_JSON_Model_for_Flask(APN)
 )
@@ -299,7 +316,69 @@ def handle_exception(e):
         logTool.log(service='API', level='error', message=f"[API] Additional Error Information: {traceback.format_exc()}\n{sys.exc_info()[2]}", redisClient=redisMessaging)
         return response_json, 500
 
+
+def listRecords(objType, args, recordFilter=None):
+    """
+    Returns a list endpoint response for objType, by page (args page / page_size), by keyset cursor (args after),
+    or streamed as NDJSON (args format) so full exports are never held in memory.
+    recordFilter, if given, is applied to each record before it is returned.
+    """
+    if args.get('format') == 'ndjson':
+        def generateRecords():
+            for record in databaseClient.streamAll(objType, batch_size=max(args['page_size'] or 0, 1000)):
+                if recordFilter:
+                    record = recordFilter(record)
+                yield json.dumps(record, default=str) + '\n'
+        return Response(generateRecords(), mimetype='application/x-ndjson')
+
+    if args.get('after') is not None:
+        data, nextCursor = databaseClient.getAllKeyset(objType, args['after'], args['page_size'])
+        headers = {'X-Next-Cursor': str(nextCursor)} if nextCursor is not None else {}
+    else:
+        data = databaseClient.getAllPaginated(objType, args['page'], args['page_size'])
+        headers = {}
+    if recordFilter:
+        data = [recordFilter(record) for record in data]
+    return data, 200, headers
+
+def listServedSubscribers(servedType, args):
+    """
+    Returns the subscribers served by an MME, S-CSCF or PGW, keyed by IMSI, or streamed as NDJSON (args format).
+    """
+    if args.get('format') == 'ndjson':
+        def generateServedSubscribers():
+            for imsi, record in databaseClient.streamServedSubscribers(servedType, get_local_users_only=args['get_local_users_only']):
+                yield json.dumps({imsi: record}, default=str) + '\n'
+        return Response(generateServedSubscribers(), mimetype='application/x-ndjson')
+    return dict(databaseClient.streamServedSubscribers(servedType, get_local_users_only=args['get_local_users_only'])), 200
+
+def bulkProvision(objectType):
+    """
+    Imports the records in the request body (or an uploaded file), streamed in chunks, and returns the import summary.
+    """
+    args = bulkParser.parse_args()
+    recordStream = request.files['file'].stream if 'file' in request.files else request.stream
+    return bulkProvisioner.importStream(objectType, recordStream, recordFormat=args['format']), 200
+
+def trace_before_request():
+    # Requests from other PyHSS services (e.g. geored) continue the caller's trace, as a server span.
+    g.traceContext = tracer.continueTrace(request.headers.get('traceparent'))
+    if g.traceContext is not None:
+        g.traceSpanId = tracer.generateSpanId()
+        g.traceStartTime = time.time_ns()
+        tracer.setTraceContext(g.traceContext[0], g.traceSpanId)
+    return None
+
+def trace_after_request(response):
+    if g.get('traceContext') is not None:
+        tracer.recordSpan(name=f"api {request.method} {request.url_rule.rule if request.url_rule else request.path}", traceId=g.traceContext[0], spanId=g.traceSpanId, parentSpanId=g.traceContext[1],
+                          startTime=g.traceStartTime, kind=2, attributes={'http.method': request.method, 'http.target': request.path, 'http.status_code': response.status_code})
+    return response
+
+apiService.before_request(trace_before_request)
 apiService.before_request(auth_before_request)
+apiService.after_request(trace_after_request)
+
 
 @apiService.errorhandler(404)
 def page_not_found(e):
@@ -472,21 +551,26 @@ class PyHSS_AUC(Resource):
             print(E)
             return handle_exception(E)
 
+@ns_auc.route('/bulk')
+class PyHSS_AUC_Bulk(Resource):
+    @ns_auc.doc('Bulk create AUC Objects')
+    @ns_auc.expect(bulkParser)
+    def put(self):
+        '''Create AUC objects in bulk from CSV or JSONL'''
+        try:
+            return bulkProvision('auc')
+        except Exception as E:
+            print(E)
+            return handle_exception(E)
+
 @ns_auc.route('/list')
 class PyHSS_AUC_All(Resource):
-    @ns_auc.expect(paginatorParser)
+    @ns_auc.expect(listParser)
     def get(self):
         '''Get all AuC Data (except keys)'''
         try:
-            args = paginatorParser.parse_args()
-            data = databaseClient.getAllPaginated(AUC, args['page'], args['page_size'])
-            if not insecureAuc:
-                sanitizedData = []
-                for aucRecord in data:
-                    databaseClient.Sanitize_Keys(aucRecord)
-                    sanitizedData.append(aucRecord)
-                return sanitizedData
-            return (data), 200
+            args = listParser.parse_args()
+            return listRecords(AUC, args, recordFilter=None if insecureAuc else databaseClient.Sanitize_Keys)
         except Exception as E:
             print(E)
             return handle_exception(E)
@@ -626,15 +710,26 @@ class PyHSS_SUBSCRIBER_MSISDN(Resource):
             print(E)
             return handle_exception(E)
 
+@ns_subscriber.route('/bulk')
+class PyHSS_SUBSCRIBER_Bulk(Resource):
+    @ns_subscriber.doc('Bulk create SUBSCRIBER Objects')
+    @ns_subscriber.expect(bulkParser)
+    def put(self):
+        '''Create SUBSCRIBER objects in bulk from CSV or JSONL'''
+        try:
+            return bulkProvision('subscriber')
+        except Exception as E:
+            print(E)
+            return handle_exception(E)
+
 @ns_subscriber.route('/list')
 class PyHSS_SUBSCRIBER_All(Resource):
-    @ns_subscriber.expect(paginatorParser)
+    @ns_subscriber.expect(listParser)
     def get(self):
         '''Get all Subscribers'''
         try:
-            args = paginatorParser.parse_args()
-            data = databaseClient.getAllPaginated(SUBSCRIBER, args['page'], args['page_size'])
-            return (data), 200
+            args = listParser.parse_args()
+            return listRecords(SUBSCRIBER, args)
         except Exception as E:
             print(E)
             return handle_exception(E)
@@ -790,15 +885,26 @@ class PyHSS_IMS_SUBSCRIBER_IMSI(Resource):
             print("Flask Exception: " + str(E))
             return handle_exception(E), 400
 
+@ns_ims_subscriber.route('/bulk')
+class PyHSS_IMS_SUBSCRIBER_Bulk(Resource):
+    @ns_ims_subscriber.doc('Bulk create IMS SUBSCRIBER Objects')
+    @ns_ims_subscriber.expect(bulkParser)
+    def put(self):
+        '''Create IMS SUBSCRIBER objects in bulk from CSV or JSONL'''
+        try:
+            return bulkProvision('ims_subscriber')
+        except Exception as E:
+            print(E)
+            return handle_exception(E)
+
 @ns_ims_subscriber.route('/list')
 class PyHSS_IMS_Subscriber_All(Resource):
-    @ns_ims_subscriber.expect(paginatorParser)
+    @ns_ims_subscriber.expect(listParser)
     def get(self):
         '''Get all IMS Subscribers'''
         try:
-            args = paginatorParser.parse_args()
-            data = databaseClient.getAllPaginated(IMS_SUBSCRIBER, args['page'], args['page_size'])
-            return (data), 200
+            args = listParser.parse_args()
+            return listRecords(IMS_SUBSCRIBER, args)
         except Exception as E:
             print(E)
             return handle_exception(E), 400
@@ -1334,6 +1440,23 @@ class PyHSS_OAM_Peers(Resource):
             print(E)
             return handle_exception(E)
 
+@ns_oam.route('/packet_capture')
+class PyHSS_OAM_Packet_Capture(Resource):
+    @auth_required
+    def get(self):
+        '''Write the diameterService packet capture of all peers to a pcap file, if hss.packet_capture_enabled is set'''
+        try:
+            if not config.get('hss', {}).get('packet_capture_enabled', False):
+                return {'result': 'Failed', 'reason': 'Packet capture is not enabled'}, 400
+            fileName = f"pyhss_diameter_{originHostname}_{time.strftime('%Y%m%d%H%M%S')}.pcap"
+            redisMessaging.sendMessage(queue='packet-capture-request', message=json.dumps({"fileName": fileName}), queueExpiry=60, usePrefix=True, prefixHostname=originHostname, prefixServiceName='diameter')
+            filePath = os.path.join(config.get('hss', {}).get('packet_capture_directory', '/tmp'), fileName)
+            return {'result': 'OK', 'filePath': filePath}, 200
+        except Exception as E:
+            logTool.log(service='API', level='error', message=f"[API] An error occurred: {traceback.format_exc()}", redisClient=redisMessaging)
+            print(E)
+            return handle_exception(E)
+
 @ns_oam.route('/deregister/<string:imsi>')
 class PyHSS_OAM_Deregister(Resource):
     def get(self, imsi):
@@ -1513,36 +1636,36 @@ class PyHSS_OAM_Rollback_Last_Table(Resource):
 
 @ns_oam.route('/serving_subs')
 class PyHSS_OAM_Serving_Subs(Resource):
+    @ns_oam.expect(servingSubsParser)
     def get(self):
         '''Get all Subscribers served by HSS'''
         try:
-            data = databaseClient.Get_Served_Subscribers()
-            print("Got back served Subs: " + str(data))
-            return data, 200
+            args = servingSubsParser.parse_args()
+            return listServedSubscribers('mme', args)
         except Exception as E:
             print(E)
             return handle_exception(E)
 
 @ns_oam.route('/serving_subs_pcrf')
 class PyHSS_OAM_Serving_Subs_PCRF(Resource):
+    @ns_oam.expect(servingSubsParser)
     def get(self):
         '''Get all Subscribers served by PCRF'''
         try:
-            data = databaseClient.Get_Served_PCRF_Subscribers()
-            print("Got back served Subs: " + str(data))
-            return data, 200
+            args = servingSubsParser.parse_args()
+            return listServedSubscribers('pcrf', args)
         except Exception as E:
             print(E)
             return handle_exception(E)
 
 @ns_oam.route('/serving_subs_ims')
 class PyHSS_OAM_Serving_Subs_IMS(Resource):
+    @ns_oam.expect(servingSubsParser)
     def get(self):
         '''Get all Subscribers served by IMS'''
         try:
-            data = databaseClient.Get_Served_IMS_Subscribers()
-            print("Got back served Subs: " + str(data))
-            return data, 200
+            args = servingSubsParser.parse_args()
+            return listServedSubscribers('ims', args)
         except Exception as E:
             print(E)
             return handle_exception(E)
@@ -2230,6 +2353,20 @@ class PyHSS_Geored(Resource):
                                     usePrefix=True, 
                                     prefixHostname=originHostname, 
                                     prefixServiceName='metric')
+            if 'bulk_provision' in json_data:
+                print("Bulk provisioning " + str(json_data['bulk_provision']))
+                response_data.append(bulkProvisioner.importRecords(json_data['bulk_provision'], enumerate(json_data.get('records', []), start=1), propagate=False))
+                redisMessaging.sendMetric(serviceName='api', metricName='prom_flask_http_geored_endpoints',
+                                    metricType='counter', metricAction='inc', 
+                                    metricValue=1.0, metricHelp='Number of Geored Pushes Received',
+                                    metricLabels={
+                                        "endpoint": "PROVISIONING",
+                                        "geored_host": request.remote_addr,
+                                    },
+                                    metricExpiry=60,
+                                    usePrefix=True, 
+                                    prefixHostname=originHostname, 
+                                    prefixServiceName='metric')
             if 'auc_id' in json_data:
                 print("Updating AuC")
                 response_data.append(databaseClient.Update_AuC(json_data['auc_id'], json_data['sqn'], propagate=False))
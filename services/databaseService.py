@@ -6,6 +6,8 @@ import datetime
 import traceback
 sys.path.append(os.path.realpath('../lib'))
 from messagingAsync import RedisMessagingAsync
+from messaging import RedisMessaging
+from readReplicas import ReadReplicas
 from banners import Banners
 from logtool import LogTool
 from sqlalchemy import create_engine, inspect
@@ -53,7 +55,10 @@ class DatabaseService:
         self.sqlAlchemyEngine = create_engine(
             f"{self.databaseType}://{self.databaseUsername}:{self.databasePassword}@{self.databaseHost}/{self.database}"
         )
-        self.sqlAlchemySession = sessionmaker(bind=self.sqlAlchemyEngine)
+        self.sqlAlchemySession = sessionmaker()
+        # The cache tolerates replication lag, so each read may be served by a read replica, chosen as for the HSS's own lag tolerant reads.
+        self.redisMessaging = RedisMessaging(host=self.redisHost, port=self.redisPort, useUnixSocket=self.redisUseUnixSocket, unixSocketPath=self.redisUnixSocketPath)
+        self.readReplicas = ReadReplicas(self.sqlAlchemyEngine, self.config, self.logTool, self.redisMessaging, self.hostname)
 
     def sanitizeJson(self, obj):
         """
@@ -80,9 +85,10 @@ class DatabaseService:
             try:
                 self.logTool.log(service='Database', level='debug', message=f"[Database] [readDatabase] Starting Read from database.", redisClient=self.redisLogMessaging)
                 databaseMetadata = MetaData()
-                databaseConnection = self.sqlAlchemyEngine.connect()
-                databaseMetadata.reflect(bind=databaseConnection) 
-                self.readSession = self.sqlAlchemySession()
+                readEngine = self.readReplicas.getReadEngine()
+                with readEngine.connect() as databaseConnection:
+                    databaseMetadata.reflect(bind=databaseConnection)
+                self.readSession = self.sqlAlchemySession(bind=readEngine)
 
                 for tableName in databaseMetadata.tables:
                     tableObject = Table(tableName, databaseMetadata, autoloaded=True)
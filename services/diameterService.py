@@ -1,5 +1,5 @@
 import asyncio
-import sys, os, json
+import sys, os, json, signal
 import time, yaml, uuid
 from datetime import datetime
 from tzlocal import get_localzone
@@ -9,6 +9,8 @@ from messagingAsync import RedisMessagingAsync
 from diameterAsync import DiameterAsync
 from banners import Banners
 from logtool import LogTool
+from packetCapture import PacketCapture
+from tracing import Tracer
 from baseModels import Peer, InboundData, OutboundData
 import pydantic_core
 import traceback
@@ -25,8 +27,12 @@ class DiameterService:
             with open("../config.yaml", "r") as self.configFile:
                 self.config = yaml.safe_load(self.configFile)
         except:
-            print(f"[Diameter] [__init__] Fatal Error - config.yaml not found, exiting.")
-            quit()
+            try:
+                with open("config.yaml", "r") as self.configFile:
+                    self.config = yaml.safe_load(self.configFile)
+            except:
+                print(f"[Diameter] [__init__] Fatal Error - config.yaml not found, exiting.")
+                quit()
 
         self.redisUseUnixSocket = self.config.get('redis', {}).get('useUnixSocket', False)
         self.redisUnixSocketPath = self.config.get('redis', {}).get('unixSocketPath', '/var/run/redis/redis-server.sock')
@@ -55,6 +61,28 @@ class DiameterService:
         self.hostname = socket.gethostname()
         self.useExternalSocketService = self.config.get('hss', {}).get('use_external_socket_service', False)
         self.diameterPeerKey = self.config.get('hss', {}).get('diameter_peer_key', 'diameterPeers')
+        self.embeddedMode = self.config.get('hss', {}).get('embedded_mode', False)
+        self.outboundQueues = {}
+        self.orderingLocks = {}
+        # S6a and Cx requests are answered in order per subscriber, as in hssService.
+        self.subscriberOrderedApplications = [16777251, 16777216]
+        # CER, DWR and DPR are answered on the event loop, everything else by the Diameter class on a thread pool.
+        self.embeddedNativeCommandCodes = [257, 280, 282]
+        # The event loop only keeps weak references to tasks, so in-flight embedded requests are held here until done.
+        self.embeddedRequestTasks = set()
+        self.packetCaptureEnabled = self.config.get('hss', {}).get('packet_capture_enabled', False)
+        self.packetCaptureDirectory = self.config.get('hss', {}).get('packet_capture_directory', '/tmp')
+        self.stageLatencyEnabled = self.config.get('benchmarking', {}).get('stage_latency_enabled', False)
+        # Stages a message passes through after being received, in order. Each stage's latency is measured from the previous stage present.
+        self.latencyStages = ['enqueue', 'dequeue', 'worker_start', 'decode', 'handler_start', 'handler_end', 'encode', 'outbound_enqueue', 'write']
+        self.latencyBuckets = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+        self.tracer = Tracer(config=self.config, serviceName='diameter')
+        self.tracingEnabled = self.tracer.enabled
+        self.packetCapture = None
+        if self.packetCaptureEnabled:
+            self.packetCapture = PacketCapture(maxPackets=int(self.config.get('hss', {}).get('packet_capture_size', 1000)))
+        # Packet capture dumps started by SIGUSR1, held until done as the event loop only keeps weak references to tasks.
+        self.packetCaptureDumpTasks = set()
     
     async def validateDiameterInbound(self, clientAddress: str, clientPort: str, inboundData) -> bool:
         """
@@ -98,7 +126,10 @@ class DiameterService:
                                                 InitialReceiveTimestamp=time.time_ns(),
                                                 OutboundHex=outboundDwrEncoded)
                     await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [handleOutboundDwr] Sending Outbound DWR to: {outboundQueue}"))
-                    await(self.redisDwrMessaging.sendMessage(queue=outboundQueue, message=outboundData.model_dump_json(), queueExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter'))
+                    if self.embeddedMode:
+                        await(self.queueOutboundData(outboundData))
+                    else:
+                        await(self.redisDwrMessaging.sendMessage(queue=outboundQueue, message=outboundData.model_dump_json(), queueExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter'))
                 await(asyncio.sleep(self.outboundDwrInterval))
                 continue
             except Exception as e:
@@ -254,11 +285,14 @@ class DiameterService:
                     return False
 
                 if len(inboundData) > 0:
+                    if self.packetCapture is not None:
+                        self.packetCapture.capture(clientConnection, inboundData, True)
                     inboundData = InboundData(SenderIp=clientAddress,
                                               SenderPort=clientPort,
                                               InitialReceiveTimestamp=time.time_ns(),
                                               InboundHex=inboundData.hex())
-                    
+                    # A read may hold several diameter messages, so each one is given its own trace once it is split,
+                    # by handleEmbeddedRequest or by hssService.
                     self.sharedQueue.put_nowait(inboundData)
 
             except Exception as e:
@@ -286,21 +320,149 @@ class DiameterService:
                             else:
                                 await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [inboundDataWorker] [{coroutineUuid}] Validated peer: {inboundData.SenderIp} on port {inboundData.SenderPort}"))
 
-                        await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [inboundDataWorker] [{coroutineUuid}] Queueing to redis: {inboundData}"))
-                        messageList.append(inboundData.model_dump_json())
                         if self.benchmarking:
                             self.diameterRequests += 1
+
+                        if self.embeddedMode:
+                            # Requests are answered in-process. Answers to our own requests still go to redis, where the
+                            # diameter library waits for them (see Diameter.awaitDiameterRequestAndResponse).
+                            inboundAnswers = []
+                            for diameterMessage in await(self.diameterLibrary.splitDiameterMessage(inboundData.InboundHex)):
+                                if int(diameterMessage[8:10], 16) & 0x80:
+                                    embeddedRequestTask = asyncio.create_task(self.handleEmbeddedRequest(inboundData=inboundData, diameterMessage=diameterMessage))
+                                    self.embeddedRequestTasks.add(embeddedRequestTask)
+                                    embeddedRequestTask.add_done_callback(self.embeddedRequestTasks.discard)
+                                else:
+                                    inboundAnswers.append(diameterMessage)
+                            if not inboundAnswers:
+                                continue
+                            inboundData = InboundData(SenderIp=inboundData.SenderIp,
+                                                      SenderPort=inboundData.SenderPort,
+                                                      InitialReceiveTimestamp=inboundData.InitialReceiveTimestamp,
+                                                      InboundHex=''.join(inboundAnswers))
+
+                        await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [inboundDataWorker] [{coroutineUuid}] Queueing to redis: {inboundData}"))
+                        messageList.append(inboundData)
                     except asyncio.TimeoutError:
                         break
 
                 if messageList:
-                    await self.redisReaderMessaging.sendBulkMessage(queue=inboundQueueName, messageList=messageList, queueExpiry=self.diameterRequestTimeout, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+                    if self.stageLatencyEnabled:
+                        enqueueTimestamp = time.time_ns()
+                        for inboundData in messageList:
+                            inboundData.StageTimestamps = {'enqueue': enqueueTimestamp}
+                    await self.redisReaderMessaging.sendBulkMessage(queue=inboundQueueName, messageList=[inboundData.model_dump_json() for inboundData in messageList], queueExpiry=self.diameterRequestTimeout, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
                     messageList = []
 
             except Exception as e:
                 await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [inboundDataWorker] [{coroutineUuid}] Exception for inboundDataWorker, continuing.\n{e}"))
                 pass
 
+    async def getOrderingKey(self, inboundData: InboundData, diameterMessage: str) -> tuple:
+        """
+        Returns the key that embedded requests must be answered in order by, as HssService.getOrderingKey does.
+        S6a and Cx requests are keyed by subscriber (the IMSI part of the User-Name), as requests for the same subscriber
+        from different peers or sessions read and increment the same SQN. Others are keyed by the sending peer and, if present, the Session-Id.
+        """
+        try:
+            packetVars, avps = await(self.diameterLibrary.decodeDiameterPacket(diameterMessage))
+            if packetVars['ApplicationId'] in self.subscriberOrderedApplications:
+                userName = await(self.diameterLibrary.getAvpData(avps, 1))
+                if len(userName) > 0:
+                    return ('subscriber', bytes.fromhex(userName[0]).decode('utf-8').split('@')[0])
+            sessionId = await(self.diameterLibrary.getAvpData(avps, 263))
+            if len(sessionId) > 0:
+                return (inboundData.SenderIp, inboundData.SenderPort, sessionId[0])
+        except Exception as e:
+            pass
+        return (inboundData.SenderIp, inboundData.SenderPort, None)
+
+    async def handleEmbeddedRequest(self, inboundData: InboundData, diameterMessage: str) -> bool:
+        """
+        Answers a single diameter request in-process (embedded mode), and queues the answer for the connected client.
+        Requests sharing an ordering key (see getOrderingKey) are answered one at a time, in the order they were received.
+        With tracing enabled, each request gets its own trace, recorded as a span once its answer is written.
+        """
+        try:
+            traceId, spanId = (self.tracer.generateTraceId(), self.tracer.generateSpanId()) if self.tracingEnabled else (None, None)
+            if traceId is not None:
+                # Each request is handled in its own task, so the trace stays current for this request only.
+                self.tracer.setTraceContext(traceId, spanId)
+            orderingKey = await(self.getOrderingKey(inboundData=inboundData, diameterMessage=diameterMessage))
+
+            # Each entry holds a lock and the number of requests using it, so it can be dropped once the key is idle.
+            orderingLock = self.orderingLocks.get(orderingKey)
+            if orderingLock is None:
+                orderingLock = [asyncio.Lock(), 0]
+                self.orderingLocks[orderingKey] = orderingLock
+            orderingLock[1] += 1
+            stageTimestamps = {} if self.stageLatencyEnabled else None
+            try:
+                async with orderingLock[0]:
+                    if stageTimestamps is not None:
+                        stageTimestamps['worker_start'] = time.time_ns()
+                    if int(diameterMessage[10:16], 16) in self.embeddedNativeCommandCodes:
+                        if stageTimestamps is not None:
+                            stageTimestamps['handler_start'] = time.time_ns()
+                        diameterOutbound = await(self.diameterLibrary.generateDiameterResponse(bytes.fromhex(diameterMessage)))
+                        if stageTimestamps is not None:
+                            stageTimestamps['handler_end'] = time.time_ns()
+                    else:
+                        diameterOutbound = await(self.diameterLibrary.generateSynchronousResponse(bytes.fromhex(diameterMessage), stageTimestamps=stageTimestamps))
+                    if stageTimestamps is not None:
+                        stageTimestamps['encode'] = time.time_ns()
+            finally:
+                orderingLock[1] -= 1
+                if orderingLock[1] == 0:
+                    self.orderingLocks.pop(orderingKey, None)
+
+            if not diameterOutbound:
+                return False
+
+            outboundData = OutboundData(DestinationIp=inboundData.SenderIp,
+                                        DestinationPort=inboundData.SenderPort,
+                                        InitialReceiveTimestamp=inboundData.InitialReceiveTimestamp,
+                                        OutboundHex=diameterOutbound,
+                                        StageTimestamps=stageTimestamps,
+                                        TraceId=traceId,
+                                        SpanId=spanId)
+            await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [handleEmbeddedRequest] Generated Diameter Outbound: {diameterOutbound}"))
+            if outboundData.StageTimestamps is not None:
+                outboundData.StageTimestamps['outbound_enqueue'] = time.time_ns()
+            return await(self.queueOutboundData(outboundData))
+        except Exception as e:
+            await(self.logTool.logAsync(service='Diameter', level='warning', message=f"[Diameter] [handleEmbeddedRequest] Failed to generate diameter outbound: {traceback.format_exc()}"))
+            return False
+
+    async def queueOutboundData(self, outboundData: OutboundData) -> bool:
+        """
+        Queues outbound data for a connected client in memory (embedded mode).
+        """
+        outboundQueue = self.outboundQueues.get(f"{outboundData.DestinationIp}-{outboundData.DestinationPort}", None)
+        if outboundQueue is None:
+            await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [queueOutboundData] No connection for {outboundData.DestinationIp} on port {outboundData.DestinationPort}, discarding outbound data."))
+            return False
+        try:
+            outboundQueue.put_nowait(outboundData)
+            return True
+        except asyncio.QueueFull:
+            await(self.logTool.logAsync(service='Diameter', level='warning', message=f"[Diameter] [queueOutboundData] Outbound queue full for {outboundData.DestinationIp} on port {outboundData.DestinationPort}, discarding outbound data."))
+            return False
+
+    async def forwardRedisOutboundData(self, clientAddress: str, clientPort: str, coroutineUuid: str) -> bool:
+        """
+        Moves outbound data queued in redis by other services (e.g. requests sent through the API) to the in-memory outbound queue (embedded mode).
+        """
+        while True:
+            try:
+                pendingOutboundMessage = (await(self.redisWriterMessaging.awaitMessage(key=f"diameter-outbound-{clientAddress}-{clientPort}", usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')))[1]
+                await(self.queueOutboundData(OutboundData.model_validate(pydantic_core.from_json(pendingOutboundMessage))))
+            except asyncio.CancelledError:
+                return False
+            except Exception as e:
+                await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [forwardRedisOutboundData] [{coroutineUuid}] Stopped forwarding for {clientAddress} on port {clientPort}: {traceback.format_exc()}"))
+                return False
+
     async def writeOutboundData(self, writer, clientAddress: str, clientPort: str, socketTimeout: int, coroutineUuid: str) -> bool:
         """
         Waits for a message to be received from Redis, then sends to the connected client.
@@ -309,19 +471,72 @@ class DiameterService:
         while not writer.transport.is_closing():
             try:
                 await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [writeOutboundData] [{coroutineUuid}] Waiting for messages for host {clientAddress} on port {clientPort}"))
-                pendingOutboundMessage = (await(self.redisWriterMessaging.awaitMessage(key=f"diameter-outbound-{clientAddress}-{clientPort}", usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')))[1]
-                outboundData = OutboundData.model_validate(pydantic_core.from_json(pendingOutboundMessage))
+                if self.embeddedMode:
+                    outboundData = await(self.outboundQueues[f"{clientAddress}-{clientPort}"].get())
+                else:
+                    pendingOutboundMessage = (await(self.redisWriterMessaging.awaitMessage(key=f"diameter-outbound-{clientAddress}-{clientPort}", usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')))[1]
+                    outboundData = OutboundData.model_validate(pydantic_core.from_json(pendingOutboundMessage))
                 diameterOutboundBinary = bytes.fromhex(outboundData.OutboundHex)
                 await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [writeOutboundData] [{coroutineUuid}] Sending: {diameterOutboundBinary.hex()} to to {clientAddress} on {clientPort}."))
 
                 writer.write(diameterOutboundBinary)
+                if self.packetCapture is not None:
+                    self.packetCapture.capture(f"{clientAddress}-{clientPort}", diameterOutboundBinary, False)
                 await(writer.drain())
                 if self.benchmarking:
                     self.diameterResponses += 1
+                if self.stageLatencyEnabled and outboundData.StageTimestamps:
+                    await(self.observeStageLatency(outboundData=outboundData, diameterOutboundBinary=diameterOutboundBinary))
+                if outboundData.TraceId is not None:
+                    self.tracer.recordSpan(name='diameter.request', traceId=outboundData.TraceId, spanId=outboundData.SpanId, parentSpanId=None,
+                                           startTime=outboundData.InitialReceiveTimestamp, kind=2,
+                                           attributes={'net.peer.ip': clientAddress, 'net.peer.port': clientPort,
+                                                       'diameter.application_id': int.from_bytes(diameterOutboundBinary[8:12], 'big'),
+                                                       'diameter.command_code': int.from_bytes(diameterOutboundBinary[5:8], 'big')})
             except Exception as e:
                 await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [writeOutboundData] [{coroutineUuid}] Connection closed for {clientAddress} on port {clientPort}, closing writer.{traceback.format_exc()}"))
                 return False
 
+    async def observeStageLatency(self, outboundData: OutboundData, diameterOutboundBinary: bytes):
+        """
+        Observes the time an answer spent in each stage since its request was received, and in total,
+        labelled by application, command and result code.
+        """
+        try:
+            stageTimestamps = outboundData.StageTimestamps
+            stageTimestamps['write'] = time.time_ns()
+            latencyLabels = {'diameter_application_id': int.from_bytes(diameterOutboundBinary[8:12], 'big'),
+                             'diameter_cmd_code': int.from_bytes(diameterOutboundBinary[5:8], 'big'),
+                             'diameter_result_code': await(self.diameterLibrary.getResultCode(diameterOutboundBinary))}
+            previousTimestamp = outboundData.InitialReceiveTimestamp
+            for latencyStage in self.latencyStages:
+                stageTimestamp = stageTimestamps.get(latencyStage)
+                if stageTimestamp is None:
+                    continue
+                await(self.redisMetricMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_stage_latency_seconds',
+                                                metricType='histogram', metricAction='observe',
+                                                metricValue=max(stageTimestamp - previousTimestamp, 0) / 1e9,
+                                                metricLabels={**latencyLabels, 'stage': latencyStage},
+                                                metricBuckets=self.latencyBuckets,
+                                                metricHelp='Time spent by diameter messages in each processing stage, since the previous stage',
+                                                metricExpiry=60,
+                                                usePrefix=True,
+                                                prefixHostname=self.hostname,
+                                                prefixServiceName='metric'))
+                previousTimestamp = stageTimestamp
+            await(self.redisMetricMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_latency_seconds',
+                                            metricType='histogram', metricAction='observe',
+                                            metricValue=max(stageTimestamps['write'] - outboundData.InitialReceiveTimestamp, 0) / 1e9,
+                                            metricLabels=latencyLabels,
+                                            metricBuckets=self.latencyBuckets,
+                                            metricHelp='Time from receiving a diameter request to writing its answer',
+                                            metricExpiry=60,
+                                            usePrefix=True,
+                                            prefixHostname=self.hostname,
+                                            prefixServiceName='metric'))
+        except Exception as e:
+            await(self.logTool.logAsync(service='Diameter', level='debug', message=f"[Diameter] [observeStageLatency] Failed to observe stage latency: {traceback.format_exc()}"))
+
     async def handleConnection(self, reader, writer):
         """
         For each new connection on port 3868, create an asynchronous reader and writer, and handle adding and updating self.activePeers.
@@ -362,10 +577,20 @@ class DiameterService:
 
             await(self.logActivePeers())
 
+            if self.packetCapture is not None:
+                (localAddress, localPort) = writer.get_extra_info('sockname')[:2]
+                self.packetCapture.registerPeer(peerKey=f"{clientAddress}-{clientPort}", localIp=localAddress, localPort=localPort, peerIp=clientAddress, peerPort=clientPort, transport=str(self.config.get('hss', {}).get('transport', 'TCP')))
+
+            if self.embeddedMode:
+                self.outboundQueues[f"{clientAddress}-{clientPort}"] = asyncio.Queue(maxsize=1024)
+
             readTask = asyncio.create_task(self.readInboundData(reader=reader, clientAddress=clientAddress, clientPort=clientPort, socketTimeout=self.socketTimeout, coroutineUuid=coroutineUuid))
             writeTask = asyncio.create_task(self.writeOutboundData(writer=writer, clientAddress=clientAddress, clientPort=clientPort, socketTimeout=self.socketTimeout, coroutineUuid=coroutineUuid))
+            connectionTasks = [readTask, writeTask]
+            if self.embeddedMode:
+                connectionTasks.append(asyncio.create_task(self.forwardRedisOutboundData(clientAddress=clientAddress, clientPort=clientPort, coroutineUuid=coroutineUuid)))
 
-            completeTasks, pendingTasks =  await(asyncio.wait([readTask, writeTask], return_when=asyncio.FIRST_COMPLETED))
+            completeTasks, pendingTasks =  await(asyncio.wait(connectionTasks, return_when=asyncio.FIRST_COMPLETED))
 
             for pendingTask in pendingTasks:
                 try:
@@ -374,6 +599,7 @@ class DiameterService:
                 except asyncio.CancelledError:
                     pass
       
+            self.outboundQueues.pop(f"{clientAddress}-{clientPort}", None)
             writer.close()
             await(writer.wait_closed())
             self.activePeers[f"{clientAddress}-{clientPort}"].update(LastDisconnectTimestamp=datetime.now(get_localzone()).isoformat('T'),
@@ -387,6 +613,43 @@ class DiameterService:
             await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [handleConnection] [{coroutineUuid}] Unhandled exception in diameterService.handleConnection: {e}"))
             return
 
+    async def dumpPacketCapture(self, fileName: str=None, peerKeys: list=None) -> str:
+        """
+        Writes the captured messages of all peers (or the given peer keys, as {ip}-{port}) to a pcap file in packetCaptureDirectory.
+        The file is written on a worker thread, from a snapshot taken on the event loop.
+        """
+        try:
+            if not fileName:
+                fileName = f"pyhss_diameter_{self.hostname}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pcap"
+            filePath = os.path.join(self.packetCaptureDirectory, os.path.basename(fileName))
+            peerCaptures = self.packetCapture.snapshot(peerKeys=peerKeys)
+            packetCount = await(asyncio.get_running_loop().run_in_executor(None, self.packetCapture.writePcap, filePath, peerCaptures))
+            await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [dumpPacketCapture] Wrote {packetCount} captured packets from {len(peerCaptures)} peers to {filePath}"))
+            return filePath
+        except Exception as e:
+            await(self.logTool.logAsync(service='Diameter', level='error', message=f"[Diameter] [dumpPacketCapture] Error writing packet capture: {traceback.format_exc()}"))
+            return ''
+
+    def startPacketCaptureDump(self):
+        """
+        Starts a packet capture dump in the background, keeping its task until it is done. Called from the SIGUSR1 handler.
+        """
+        packetCaptureDumpTask = asyncio.create_task(self.dumpPacketCapture())
+        self.packetCaptureDumpTasks.add(packetCaptureDumpTask)
+        packetCaptureDumpTask.add_done_callback(self.packetCaptureDumpTasks.discard)
+
+    async def handlePacketCaptureRequests(self):
+        """
+        Waits for packet capture requests queued by the API, and writes a pcap file for each.
+        """
+        while True:
+            try:
+                packetCaptureRequest = json.loads((await(self.redisReaderMessaging.awaitMessage(key='packet-capture-request', usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')))[1])
+                await(self.dumpPacketCapture(fileName=packetCaptureRequest.get('fileName'), peerKeys=packetCaptureRequest.get('peers')))
+            except Exception as e:
+                await(self.logTool.logAsync(service='Diameter', level='error', message=f"[Diameter] [handlePacketCaptureRequests] Error handling packet capture request: {traceback.format_exc()}"))
+                await(asyncio.sleep(1))
+
     async def startServer(self, host: str=None, port: int=None, type: str=None):
         """
         Start a server with the given parameters and handle new clients with self.handleConnection.
@@ -421,6 +684,11 @@ class DiameterService:
             if self.benchmarking:
                 logProcessedMessagesTask = asyncio.create_task(self.logProcessedMessages())
 
+            if self.packetCapture is not None:
+                handlePacketCaptureRequestsTask = asyncio.create_task(self.handlePacketCaptureRequests())
+                asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.startPacketCaptureDump)
+                await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [startServer] Packet capture enabled, send SIGUSR1 or use /oam/packet_capture to write a pcap to {self.packetCaptureDirectory}"))
+
             if type.upper() == 'TCP':
                 server = await(asyncio.start_server(self.handleConnection, host, port))
             elif type.upper() == 'SCTP':
@@ -448,6 +716,8 @@ class DiameterService:
                 server = await(asyncio.start_server(self.handleConnection, sock=self.sctpSocket))
             else:
                 return False
+            if self.embeddedMode:
+                await(self.logTool.logAsync(service='Diameter', level='info', message=f"[Diameter] [startServer] Embedded mode enabled, diameter requests are answered in-process."))
             servingAddresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
             await(self.logTool.logAsync(service='Diameter', level='info', message=f"{self.banners.diameterService()}\n[Diameter] Serving on {servingAddresses}"))
             async with server:
@@ -7,6 +7,7 @@ sys.path.append(os.path.realpath('../lib'))
 from messagingAsync import RedisMessagingAsync
 from banners import Banners
 from logtool import LogTool
+from tracing import Tracer
 
 class GeoredService:
     """
@@ -37,6 +38,7 @@ class GeoredService:
         self.ocsNotificationsEnabled = self.config.get('ocs', {}).get('enabled', False)
         self.benchmarking = self.config.get('hss').get('enable_benchmarking', False)
         self.hostname = socket.gethostname()
+        self.tracer = Tracer(config=self.config, serviceName='geored')
 
         if not self.config.get('geored', {}).get('enabled'):
             self.logger.error("[Geored] Fatal Error - geored not enabled under geored.enabled, exiting.")
@@ -46,9 +48,10 @@ class GeoredService:
                 self.logger.error("[Geored] Fatal Error - no peers defined under geored.sync_endpoints, exiting.")
                 quit()
 
-    async def sendGeored(self, asyncSession, url: str, operation: str, body: str, transactionId: str=uuid.uuid4(), retryCount: int=3) -> bool:
+    async def sendGeored(self, asyncSession, url: str, operation: str, body: str, transactionId: str=uuid.uuid4(), retryCount: int=3, traceContext: tuple=None) -> bool:
             """
             Sends a Geored HTTP request to a given endpoint.
+            If traceContext is given, the request is sent with a traceparent header and recorded as a client span.
             """
             if self.benchmarking:
                 startTime = time.perf_counter()
@@ -62,6 +65,10 @@ class GeoredService:
                 return False
             
             headers = {"Content-Type": "application/json", "Transaction-Id": str(transactionId), "User-Agent": f"PyHSS/1.0.1 (Geored)"}
+            if traceContext is not None:
+                spanId = self.tracer.generateSpanId()
+                spanStartTime = time.time_ns()
+                headers['traceparent'] = self.tracer.getTraceparent(traceContext=(traceContext[0], spanId))
 
             for attempt in range(retryCount):
                 try:
@@ -163,6 +170,9 @@ class GeoredService:
                     usePrefix=True, 
                     prefixHostname=self.hostname, 
                     prefixServiceName='metric'))
+            if traceContext is not None:
+                self.tracer.recordSpan(name=f'geored.{operation.lower()}', traceId=traceContext[0], spanId=spanId, parentSpanId=traceContext[1], startTime=spanStartTime, kind=3,
+                                       attributes={'http.url': url, 'http.method': operation, 'http.status_code': responseStatusCode or 0})
             if self.benchmarking:
                 await(self.logTool.logAsync(service='Geored', level='info', message=f"[Geored] [sendGeored] Time taken to send individual geored request to {url}: {round(((time.perf_counter() - startTime)*1000), 3)} ms"))
 
@@ -186,6 +196,14 @@ class GeoredService:
             if 'User-Agent' not in headers:
                 headers['User-Agent'] = f"PyHSS/1.0.1 (Webhook)"
 
+            # The webhook is sent as a child span of the trace it was queued in, if any.
+            traceContext = self.tracer.parseTraceparent(headers.get('traceparent', ''))
+            if traceContext is not None:
+                headers = dict(headers)
+                spanId = self.tracer.generateSpanId()
+                spanStartTime = time.time_ns()
+                headers['traceparent'] = self.tracer.getTraceparent(traceContext=(traceContext[0], spanId))
+
             for attempt in range(retryCount):
                 try:
                     responseStatusCode = None
@@ -286,6 +304,9 @@ class GeoredService:
                     usePrefix=True, 
                     prefixHostname=self.hostname, 
                     prefixServiceName='metric'))
+            if traceContext is not None:
+                self.tracer.recordSpan(name=f'webhook.{operation.lower()}', traceId=traceContext[0], spanId=spanId, parentSpanId=traceContext[1], startTime=spanStartTime, kind=3,
+                                       attributes={'http.url': url, 'http.method': operation, 'http.status_code': responseStatusCode or 0})
             if self.benchmarking:
                 await(self.logTool.logAsync(service='Geored', level='info', message=f"[Geored] [sendWebhook] Time taken to send individual webhook request to {url}: {round(((time.perf_counter() - startTime)*1000), 3)} ms"))
 
@@ -306,11 +327,12 @@ class GeoredService:
                 georedBody = georedMessage['body']
                 georedUrls = georedMessage['urls']
                 georedTasks = []
+                traceContext = self.tracer.continueTrace(georedMessage.get('traceparent'))
 
                 socketSession = aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False))
                 async with socketSession as session:
                     for georedEndpoint in georedUrls:
-                        georedTasks.append(self.sendGeored(asyncSession=session, url=georedEndpoint, operation=georedOperation, body=georedBody))
+                        georedTasks.append(self.sendGeored(asyncSession=session, url=georedEndpoint, operation=georedOperation, body=georedBody, traceContext=traceContext))
                     await asyncio.gather(*georedTasks)
                 if self.benchmarking:
                     await(self.logTool.logAsync(service='Geored', level='info', message=f"[Geored] [handleAsymmetricGeoredQueue] Time taken to send asymmetric geored message to specified peers: {round(((time.perf_counter() - startTime)*1000), 3)} ms"))
@@ -336,11 +358,12 @@ class GeoredService:
                 georedOperation = georedMessage['operation']
                 georedBody = georedMessage['body']
                 georedTasks = []
+                traceContext = self.tracer.continueTrace(georedMessage.get('traceparent'))
 
                 socketSession = aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False))
                 async with socketSession as session:
                     for remotePeer in self.georedPeers:
-                        georedTasks.append(self.sendGeored(asyncSession=session, url=remotePeer+'/geored/', operation=georedOperation, body=georedBody))
+                        georedTasks.append(self.sendGeored(asyncSession=session, url=remotePeer+'/geored/', operation=georedOperation, body=georedBody, traceContext=traceContext))
                     await asyncio.gather(*georedTasks)
                 if self.benchmarking:
                     await(self.logTool.logAsync(service='Geored', level='info', message=f"[Geored] [handleGeoredQueue] Time taken to send geored message to all geored peers: {round(((time.perf_counter() - startTime)*1000), 3)} ms"))
@@ -375,6 +398,7 @@ class GeoredService:
                 webhookOperation = webhookMessage['operation']
                 webhookBody = webhookMessage['body']
                 webhookTasks = []
+                traceContext = self.tracer.continueTrace(webhookHeaders.get('traceparent'))
                 
                 socketSession = aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False))
                 async with socketSession as session:
@@ -1,10 +1,12 @@
-import os, sys, json, yaml, time, traceback, socket
+import os, sys, json, yaml, time, traceback, socket, binascii
+from concurrent.futures import ThreadPoolExecutor, wait
 sys.path.append(os.path.realpath('../lib'))
 from messaging import RedisMessaging
 from diameter import Diameter
 from banners import Banners
 from logtool import LogTool
 from baseModels import Peer, InboundData, OutboundData
+from tracing import Tracer
 import pydantic_core
 
 
@@ -35,6 +37,16 @@ class HssService:
         self.benchmarking = self.config.get('hss').get('enable_benchmarking', False)
         self.hostname = socket.gethostname()
         self.diameterPeerKey = self.config.get('hss', {}).get('diameter_peer_key', 'diameterPeers')
+        self.batchPrefetchEnabled = self.config.get('hss', {}).get('batch_prefetch_enabled', True)
+        self.tracer = Tracer(config=self.config, serviceName='hss')
+        self.stageLatencyEnabled = self.config.get('benchmarking', {}).get('stage_latency_enabled', False)
+        self.processingWorkers = int(self.config.get('hss', {}).get('processing_workers', 1))
+        if self.processingWorkers > 1:
+            self.processingExecutor = ThreadPoolExecutor(max_workers=self.processingWorkers, thread_name_prefix='hssWorker')
+        else:
+            self.processingExecutor = None
+        # S6a and Cx, whose requests are ordered per subscriber rather than per session.
+        self.subscriberOrderedApplications = [16777251, 16777216]
 
     def handleQueue(self):
         """
@@ -49,106 +61,226 @@ class HssService:
 
                 if inboundMessageList == None:
                     continue
+                dequeueTimestamp = time.time_ns()
+
+                # Decode the whole batch first, so that database rows for the batch can be fetched in bulk.
+                inboundBatch = []
                 for inboundMessage in inboundMessageList[1]:
                     self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] Message: {inboundMessage}", redisClient=self.redisMessaging)
-                    inboundMessage = inboundMessage.decode('ascii')
-                    inboundData = InboundData.model_validate(pydantic_core.from_json(inboundMessage))
-                    inboundBinary = bytes.fromhex(inboundData.InboundHex)
+                    try:
+                        inboundMessage = inboundMessage.decode('ascii')
+                        inboundData = InboundData.model_validate(pydantic_core.from_json(inboundMessage))
+                        inboundBinary = bytes.fromhex(inboundData.InboundHex)
+
+                        if inboundBinary == None:
+                            continue
 
-                    if inboundBinary == None:
+                        buffered_diameter_messages = self.diameterLibrary.split_diameter_message(inboundBinary)
+                        if self.stageLatencyEnabled and inboundData.StageTimestamps is not None:
+                            inboundData.StageTimestamps['dequeue'] = dequeueTimestamp
+                        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] Buffered diameter messages: {buffered_diameter_messages}", redisClient=self.redisMessaging)
+                        inboundBatch.append((inboundData, buffered_diameter_messages))
+                    except Exception as e:
+                        self.logTool.log(service='HSS', level='warning', message=f"[HSS] [handleQueue] Failed to decode inbound message: {traceback.format_exc()}", redisClient=self.redisMessaging)
                         continue
 
-                    buffered_diameter_messages = self.diameterLibrary.split_diameter_message(inboundBinary)
-                    self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] Buffered diameter messages: {buffered_diameter_messages}", redisClient=self.redisMessaging)
-                    messageNumber = 1
-
-                    for buffered_diameter_message in buffered_diameter_messages:
-                        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] Processing message ({messageNumber} of {len(buffered_diameter_messages)}): {buffered_diameter_message}", redisClient=self.redisMessaging)
-
-                        try:
-                            diameterPeers = self.redisMessaging.getAllHashData(self.diameterPeerKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                            if diameterPeers:
-                                for diameterPeerKey, diameterPeerValue in diameterPeers.items():
-                                    diameterPeer = Peer.model_validate(pydantic_core.from_json(json.dumps(diameterPeerValue)))
-                                    # If this is a message from a stored peer, increment prom_diam_request_count_host by 1.
-                                    if diameterPeer.IpAddress == inboundData.SenderIp and diameterPeer.Port == inboundData.SenderPort:
-                                        self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_request_count_host',
-                                                    metricType='gauge', metricAction='inc',
-                                                    metricLabels={
-                                                    "host": diameterPeer.Hostname},
-                                                    metricValue=float(1), metricHelp='Number of Diameter Requests Recieved per Host',
-                                                    metricExpiry=60,
-                                                    usePrefix=True, 
-                                                    prefixHostname=self.hostname, 
-                                                    prefixServiceName='metric')
-
-                        except Exception as e:
-                            self.logTool.log(service='HSS', level='error', message=f"[HSS] [handleQueue] Error updating prom_diam_request_count_host: {traceback.format_exc()}", redisClient=self.redisMessaging)
-                            pass
-
-                        try:
-                            messageBinary = bytes.fromhex(buffered_diameter_message)
-                            diameterOutbound = self.diameterLibrary.generateDiameterResponse(binaryData=messageBinary)
-
-                            if diameterOutbound == None:
-                                continue
-                            if not len(diameterOutbound) > 0:
-                                continue
-
-                            diameterMessageTypeDict = self.diameterLibrary.getDiameterMessageType(binaryData=messageBinary)
-                            
-                            if diameterMessageTypeDict == None:
-                                continue
-                            if not len(diameterMessageTypeDict) > 0:
-                                continue
-
-                            diameterMessageTypeInbound = diameterMessageTypeDict.get('inbound', '')
-                            diameterMessageTypeOutbound = diameterMessageTypeDict.get('outbound', '')
-                        except Exception as e:
-                            self.logTool.log(service='HSS', level='warning', message=f"[HSS] [handleQueue] Failed to generate diameter outbound: {e}", redisClient=self.redisMessaging)
-                            continue
-                        
-                        outboundQueue = f"diameter-outbound-{inboundData.SenderIp}-{inboundData.SenderPort}"
-                        outboundMessage = OutboundData(DestinationIp=inboundData.SenderIp,
-                                                    DestinationPort=inboundData.SenderPort,
-                                                    InitialReceiveTimestamp=inboundData.InitialReceiveTimestamp,
-                                                    OutboundHex=diameterOutbound)
-
-                        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] [{diameterMessageTypeOutbound}] Generated Diameter Outbound: {diameterOutbound}", redisClient=self.redisMessaging)
-                        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] [{diameterMessageTypeOutbound}] Outbound Diameter Queue: {outboundQueue}", redisClient=self.redisMessaging)
-                        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] [{diameterMessageTypeOutbound}] Outbound Diameter: {outboundMessage}", redisClient=self.redisMessaging)
-
-                        self.redisMessaging.sendMessage(queue=outboundQueue, message=outboundMessage.model_dump_json(), queueExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                        messageNumber += 1
-                        if self.benchmarking:
-                            self.logTool.log(service='HSS', level='info', message=f"[HSS] [handleQueue] [{diameterMessageTypeInbound}] Time taken to process request: {round(((time.perf_counter() - startTime)*1000), 3)} ms", redisClient=self.redisMessaging)
-
-                        try:
-                            self.diameterLibrary.clear_expired_emergency_subscribers()
-                            diameterPeers = self.redisMessaging.getAllHashData(self.diameterPeerKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
-                            if diameterPeers:
-                                for diameterPeerKey, diameterPeerValue in diameterPeers.items():
-                                    diameterPeer = Peer.model_validate(pydantic_core.from_json(json.dumps(diameterPeerValue)))
-                                    if diameterPeer.IpAddress == inboundData.SenderIp and diameterPeer.Port == inboundData.SenderPort:
-                                        self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_response_count_host',
-                                                    metricType='gauge', metricAction='inc',
-                                                    metricLabels={
-                                                    "host": diameterPeer.Hostname},
-                                                    metricValue=float(1), metricHelp='Number of Diameter Responses Sent per Host',
-                                                    metricExpiry=60,
-                                                    usePrefix=True, 
-                                                    prefixHostname=self.hostname, 
-                                                    prefixServiceName='metric')
-
-                        except Exception as e:
-                            self.logTool.log(service='HSS', level='error', message=f"[HSS] [handleQueue] Error updating prom_diam_response_count_host: {traceback.format_exc()}", redisClient=self.redisMessaging)
-                            pass
+                if self.batchPrefetchEnabled:
+                    self.diameterLibrary.prefetchBatch([bufferedMessage for inboundData, bufferedMessages in inboundBatch for bufferedMessage in bufferedMessages])
 
+                try:
+                    if self.processingExecutor is not None:
+                        self.handleBatchConcurrently(inboundBatch=inboundBatch)
+                        if self.benchmarking:
+                            self.logTool.log(service='HSS', level='info', message=f"[HSS] [handleQueue] Time taken to process batch of {len(inboundBatch)} messages: {round(((time.perf_counter() - startTime)*1000), 3)} ms", redisClient=self.redisMessaging)
+                    else:
+                        for inboundData, buffered_diameter_messages in inboundBatch:
+                            messageNumber = 1
+                            for buffered_diameter_message in buffered_diameter_messages:
+                                self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleQueue] Processing message ({messageNumber} of {len(buffered_diameter_messages)}): {buffered_diameter_message}", redisClient=self.redisMessaging)
+                                if self.handleDiameterMessage(inboundData=inboundData, diameterMessage=buffered_diameter_message):
+                                    messageNumber += 1
+                                if self.benchmarking:
+                                    self.logTool.log(service='HSS', level='info', message=f"[HSS] [handleQueue] Time taken to process request: {round(((time.perf_counter() - startTime)*1000), 3)} ms", redisClient=self.redisMessaging)
+                finally:
+                    if self.batchPrefetchEnabled:
+                        self.diameterLibrary.clearPrefetchedBatch()
 
             except Exception as e:
                 self.logTool.log(service='HSS', level='error', message=f"[HSS] [handleQueue] Exception: {traceback.format_exc()}", redisClient=self.redisMessaging)
                 continue
+
+    def getOrderingKey(self, inboundData: InboundData, diameterMessage: str) -> tuple:
+        """
+        Returns the key that messages must be processed in order by.
+        S6a and Cx requests are keyed by subscriber (the IMSI part of the User-Name), as requests for the same subscriber
+        from different peers or sessions read and increment the same SQN. Others are keyed by the sending peer and, if present, the Session-Id.
+        """
+        try:
+            packetVars, avps = self.diameterLibrary.decode_diameter_packet(diameterMessage)
+            if packetVars['ApplicationId'] in self.subscriberOrderedApplications:
+                userName = self.diameterLibrary.get_avp_data(avps, 1)
+                if len(userName) > 0:
+                    return ('subscriber', binascii.unhexlify(userName[0]).decode('utf-8').split('@')[0])
+            sessionId = self.diameterLibrary.get_avp_data(avps, 263)
+            if len(sessionId) > 0:
+                return (inboundData.SenderIp, inboundData.SenderPort, sessionId[0])
+        except Exception as e:
+            pass
+        return (inboundData.SenderIp, inboundData.SenderPort, None)
+
+    def handleBatchConcurrently(self, inboundBatch: list):
+        """
+        Processes a batch of inbound messages on the worker pool.
+        Messages sharing an ordering key are handled sequentially by a single worker, so their answers are queued in order.
+        Returns once the whole batch has been processed.
+        """
+        orderedGroups = {}
+        for inboundData, buffered_diameter_messages in inboundBatch:
+            for buffered_diameter_message in buffered_diameter_messages:
+                orderingKey = self.getOrderingKey(inboundData=inboundData, diameterMessage=buffered_diameter_message)
+                orderedGroups.setdefault(orderingKey, []).append((inboundData, buffered_diameter_message))
+
+        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [handleBatchConcurrently] Processing {sum(len(group) for group in orderedGroups.values())} messages in {len(orderedGroups)} ordered groups", redisClient=self.redisMessaging)
+        futures = [self.processingExecutor.submit(self.handleOrderedMessages, orderedMessages) for orderedMessages in orderedGroups.values()]
+        wait(futures)
+        for future in futures:
+            if future.exception() is not None:
+                self.logTool.log(service='HSS', level='error', message=f"[HSS] [handleBatchConcurrently] Worker exception: {future.exception()}", redisClient=self.redisMessaging)
+
+    def handleOrderedMessages(self, orderedMessages: list):
+        """
+        Processes a list of (inboundData, diameterMessage) tuples in order, tracking the number of in-flight messages.
+        """
+        for inboundData, diameterMessage in orderedMessages:
+            self.redisMessaging.sendMetric(serviceName='hss', metricName='prom_hss_inflight_requests',
+                                    metricType='gauge', metricAction='inc',
+                                    metricValue=1.0, metricHelp='Number of Diameter Requests currently being processed by hssService workers',
+                                    metricExpiry=60,
+                                    usePrefix=True,
+                                    prefixHostname=self.hostname,
+                                    prefixServiceName='metric')
+            try:
+                self.handleDiameterMessage(inboundData=inboundData, diameterMessage=diameterMessage)
+            except Exception as e:
+                self.logTool.log(service='HSS', level='error', message=f"[HSS] [handleOrderedMessages] Exception: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            finally:
+                self.redisMessaging.sendMetric(serviceName='hss', metricName='prom_hss_inflight_requests',
+                                        metricType='gauge', metricAction='dec',
+                                        metricValue=1.0, metricHelp='Number of Diameter Requests currently being processed by hssService workers',
+                                        metricExpiry=60,
+                                        usePrefix=True,
+                                        prefixHostname=self.hostname,
+                                        prefixServiceName='metric')
+
+    def handleDiameterMessage(self, inboundData: InboundData, diameterMessage: str) -> bool:
+        """
+        Processes a single diameter message from a given peer and queues the response, if any.
+        With tracing enabled, the message is given its own trace, as one inbound read may hold several messages. The trace is current
+        while the message is processed, and recorded as a span.
+        Returns True if a response was queued.
+        """
+        if not self.tracer.enabled:
+            return self.processDiameterMessage(inboundData=inboundData, diameterMessage=diameterMessage)
+        inboundData = inboundData.model_copy(update={'TraceId': self.tracer.generateTraceId(), 'SpanId': self.tracer.generateSpanId()})
+        traceToken = self.tracer.setTraceContext(inboundData.TraceId, inboundData.SpanId)
+        try:
+            with self.tracer.span('hss.handleDiameterMessage', attributes={'diameter.command_code': int(diameterMessage[10:16], 16), 'diameter.application_id': int(diameterMessage[16:24], 16)}):
+                return self.processDiameterMessage(inboundData=inboundData, diameterMessage=diameterMessage)
+        finally:
+            self.tracer.resetTraceContext(traceToken)
+
+    def processDiameterMessage(self, inboundData: InboundData, diameterMessage: str) -> bool:
+        """
+        Generates the response to a single diameter message and queues it, updating per host metrics.
+        Returns True if a response was queued.
+        """
+        # Several messages can share one inbound read, so each answer gets its own copy of the stage timestamps.
+        # 'worker_start' is when this message's turn came, after the batch was prefetched and any earlier messages in its order were answered.
+        stageTimestamps = dict(inboundData.StageTimestamps, worker_start=time.time_ns()) if self.stageLatencyEnabled and inboundData.StageTimestamps is not None else None
+        try:
+            diameterPeers = self.redisMessaging.getAllHashData(self.diameterPeerKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+            if diameterPeers:
+                for diameterPeerKey, diameterPeerValue in diameterPeers.items():
+                    diameterPeer = Peer.model_validate(pydantic_core.from_json(json.dumps(diameterPeerValue)))
+                    # If this is a message from a stored peer, increment prom_diam_request_count_host by 1.
+                    if diameterPeer.IpAddress == inboundData.SenderIp and diameterPeer.Port == inboundData.SenderPort:
+                        self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_request_count_host',
+                                    metricType='gauge', metricAction='inc',
+                                    metricLabels={
+                                    "host": diameterPeer.Hostname},
+                                    metricValue=float(1), metricHelp='Number of Diameter Requests Recieved per Host',
+                                    metricExpiry=60,
+                                    usePrefix=True, 
+                                    prefixHostname=self.hostname, 
+                                    prefixServiceName='metric')
+
+        except Exception as e:
+            self.logTool.log(service='HSS', level='error', message=f"[HSS] [processDiameterMessage] Error updating prom_diam_request_count_host: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            pass
+
+        try:
+            messageBinary = bytes.fromhex(diameterMessage)
+            diameterOutbound = self.diameterLibrary.generateDiameterResponse(binaryData=messageBinary, stageTimestamps=stageTimestamps)
+            if stageTimestamps is not None:
+                stageTimestamps['encode'] = time.time_ns()
+
+            if diameterOutbound == None:
+                return False
+            if not len(diameterOutbound) > 0:
+                return False
+
+            diameterMessageTypeDict = self.diameterLibrary.getDiameterMessageType(binaryData=messageBinary)
             
+            if diameterMessageTypeDict == None:
+                return False
+            if not len(diameterMessageTypeDict) > 0:
+                return False
+
+            diameterMessageTypeInbound = diameterMessageTypeDict.get('inbound', '')
+            diameterMessageTypeOutbound = diameterMessageTypeDict.get('outbound', '')
+        except Exception as e:
+            self.logTool.log(service='HSS', level='warning', message=f"[HSS] [processDiameterMessage] Failed to generate diameter outbound: {e}", redisClient=self.redisMessaging)
+            return False
+        
+        outboundQueue = f"diameter-outbound-{inboundData.SenderIp}-{inboundData.SenderPort}"
+        outboundMessage = OutboundData(DestinationIp=inboundData.SenderIp,
+                                    DestinationPort=inboundData.SenderPort,
+                                    InitialReceiveTimestamp=inboundData.InitialReceiveTimestamp,
+                                    OutboundHex=diameterOutbound,
+                                    StageTimestamps=stageTimestamps,
+                                    TraceId=inboundData.TraceId,
+                                    SpanId=inboundData.SpanId)
+
+        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [processDiameterMessage] [{diameterMessageTypeOutbound}] Generated Diameter Outbound: {diameterOutbound}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [processDiameterMessage] [{diameterMessageTypeOutbound}] Outbound Diameter Queue: {outboundQueue}", redisClient=self.redisMessaging)
+        self.logTool.log(service='HSS', level='debug', message=f"[HSS] [processDiameterMessage] [{diameterMessageTypeOutbound}] Outbound Diameter: {outboundMessage}", redisClient=self.redisMessaging)
+
+        if outboundMessage.StageTimestamps is not None:
+            outboundMessage.StageTimestamps['outbound_enqueue'] = time.time_ns()
+        self.redisMessaging.sendMessage(queue=outboundQueue, message=outboundMessage.model_dump_json(), queueExpiry=60, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+
+        try:
+            self.diameterLibrary.clear_expired_emergency_subscribers()
+            diameterPeers = self.redisMessaging.getAllHashData(self.diameterPeerKey, usePrefix=True, prefixHostname=self.hostname, prefixServiceName='diameter')
+            if diameterPeers:
+                for diameterPeerKey, diameterPeerValue in diameterPeers.items():
+                    diameterPeer = Peer.model_validate(pydantic_core.from_json(json.dumps(diameterPeerValue)))
+                    if diameterPeer.IpAddress == inboundData.SenderIp and diameterPeer.Port == inboundData.SenderPort:
+                        self.redisMessaging.sendMetric(serviceName='diameter', metricName='prom_diam_response_count_host',
+                                    metricType='gauge', metricAction='inc',
+                                    metricLabels={
+                                    "host": diameterPeer.Hostname},
+                                    metricValue=float(1), metricHelp='Number of Diameter Responses Sent per Host',
+                                    metricExpiry=60,
+                                    usePrefix=True, 
+                                    prefixHostname=self.hostname, 
+                                    prefixServiceName='metric')
+
+        except Exception as e:
+            self.logTool.log(service='HSS', level='error', message=f"[HSS] [processDiameterMessage] Error updating prom_diam_response_count_host: {traceback.format_exc()}", redisClient=self.redisMessaging)
+            pass
+
+        return True
 
 
 if __name__ == '__main__':
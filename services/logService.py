@@ -11,7 +11,7 @@ class LogService:
     """
     PyHSS Log Service
     A class for handling queued log entries in the Redis DB.
-    This class is synchronous and not high-performance.
+    This class is synchronous, and drains log messages in bulk.
     """
 
     def __init__(self):
@@ -38,37 +38,93 @@ class LogService:
         'NOTSET': {'verbosity': 6, 'logging':  logging.NOTSET},
         }
         self.hostname = socket.gethostname()
+        self.drainBatchSize = int(self.config.get('logging', {}).get('drain_batch_size', 1000))
+        self.fileFlushInterval = float(self.config.get('logging', {}).get('file_flush_interval', 1))
+        self.logQueue = self.redisMessaging.handlePrefix(key='log', usePrefix=True, prefixHostname=self.hostname, prefixServiceName='log')
+        self.activeLogFiles = {}
+        self.droppedCount = 0
+        self.timestampCache = (None, '')
 
         print(f"{self.banners.logService()}")
 
-    def handleLogs(self):
+    def formatTimestamp(self, logTimestamp: float) -> str:
         """
-        Continually polls the Redis DB for queued log files. Parses and writes log files to disk, using LogTool.
+        Formats a log timestamp, reusing the last result for messages logged within the same second.
         """
-        activeLoggers = {}
-        while True:
-            try:
-                logMessage = json.loads(self.redisMessaging.awaitMessage(key='log', usePrefix=True, prefixHostname=self.hostname, prefixServiceName='log')[1])
+        timestampSecond = int(logTimestamp)
+        if self.timestampCache[0] != timestampSecond:
+            self.timestampCache = (timestampSecond, datetime.fromtimestamp(timestampSecond).strftime("%m/%d/%Y %H:%M:%S %Z").strip())
+        return self.timestampCache[1]
 
-                print(f"[Log] Message: {logMessage}")
+    def writeLogMessage(self, rawLogMessage) -> bool:
+        """
+        Parses a single queued log message and writes it to the buffered log file of its service.
+        """
+        logMessage = json.loads(rawLogMessage)
+        logService = str(logMessage.get('service')).lower()
+        logFileName = f"{logService}_logging_file"
+        if logFileName not in self.logFilePaths:
+            return False
 
-                logFileMessage = logMessage['message']
-                logService = logMessage.get('service').lower()
-                logLevel = logMessage.get('level').lower()
-                logTimestamp = logMessage.get('timestamp')
+        if logService not in self.activeLogFiles:
+            self.activeLogFiles[logService] = self.logTool.setupBufferedLogFile(logFilePath=self.logFilePaths.get(logFileName, '/var/log/pyhss.log'))
 
-                if f"{logService}_logging_file" not in self.logFilePaths:
-                    continue
+        logLevel = str(logMessage.get('level')).upper()
+        logTimestamp = float(logMessage.get('timestamp', time.time()))
+        if self.logTool.logToStdout:
+            print(f"[Log] Message: {logMessage}")
+        self.activeLogFiles[logService].write(f"{self.formatTimestamp(logTimestamp)}  {logLevel}  {logMessage['message']}\n")
+        return True
 
-                logFileName = f"{logService}_logging_file"
-                logFilePath = self.logFilePaths.get(logFileName, '/var/log/pyhss.log')
+    def flushLogFiles(self):
+        """
+        Flushes all buffered log files to disk, and exports the log backlog and drop count.
+        """
+        for logService, logFile in self.activeLogFiles.items():
+            try:
+                logFile.flush()
+            except Exception as e:
+                print(f"[Log] Error flushing log file for {logService}: {e}")
 
-                if logService not in activeLoggers:
-                    activeLoggers[logService] = self.logTool.setupFileLogger(loggerName=logService, logFilePath=logFilePath)
+        self.redisMessaging.sendMetric(serviceName='log', metricName='prom_log_backlog',
+                                        metricType='gauge', metricAction='set',
+                                        metricValue=float(self.redisMessaging.getQueueLength(queue=self.logQueue)), metricHelp='Number of log messages waiting to be written by logService',
+                                        metricLabels={"hostname": self.hostname},
+                                        metricExpiry=60,
+                                        usePrefix=True,
+                                        prefixHostname=self.hostname,
+                                        prefixServiceName='metric')
+        if self.droppedCount:
+            self.redisMessaging.sendMetric(serviceName='log', metricName='prom_log_service_dropped_count',
+                                            metricType='counter', metricAction='inc',
+                                            metricValue=float(self.droppedCount), metricHelp='Number of log messages logService failed to write',
+                                            metricLabels={"hostname": self.hostname},
+                                            metricExpiry=60,
+                                            usePrefix=True,
+                                            prefixHostname=self.hostname,
+                                            prefixServiceName='metric')
+            self.droppedCount = 0
 
-                fileLogger = activeLoggers[logService]
-                fileLogger.log(self.logLevels.get(logLevel.upper(), {}).get('logging', logging.INFO), logFileMessage, extra={'timestamp': float(logTimestamp)})
+    def handleLogs(self):
+        """
+        Drains queued log messages from the Redis DB in bulk, and writes them to buffered log files.
+        Log files are flushed to disk every fileFlushInterval seconds.
+        """
+        lastFlush = time.time()
+        while True:
+            try:
+                logMessages = self.redisMessaging.awaitBulkMessage(key=self.logQueue, count=self.drainBatchSize, timeout=self.fileFlushInterval, direction='LEFT')
+                if logMessages:
+                    for rawLogMessage in logMessages[1]:
+                        try:
+                            self.writeLogMessage(rawLogMessage)
+                        except Exception as e:
+                            self.droppedCount += 1
+                            print(f"[Log] Error writing log message: {e}")
 
+                if time.time() - lastFlush >= self.fileFlushInterval:
+                    self.flushLogFiles()
+                    lastFlush = time.time()
 
             except Exception as e:
                 self.logTool.log(service='Log', level='error', message=f"[Log] Error: {e}", redisClient=self.redisMessaging)
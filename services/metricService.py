@@ -6,13 +6,130 @@ from prometheus_client import make_wsgi_app, start_http_server, Counter, Gauge,
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 from flask import Flask
 from influxdb import InfluxDBClient
+from influxdb.exceptions import InfluxDBClientError
 import threading
 import traceback
+from collections import deque
 sys.path.append(os.path.realpath('../lib'))
 from messaging import RedisMessaging
 from banners import Banners
 from logtool import LogTool
 
+class InfluxWriter:
+    """
+    Buffers InfluxDB points in memory, and writes them in batches over one persistent InfluxDBClient from a background thread.
+    Batches are written every flushInterval seconds, or sooner once batchSize points are buffered.
+    Batches failing on connection or server errors stay buffered and are retried with a backoff. Batches InfluxDB rejects as invalid are split
+    to write the valid points and drop the invalid ones, rather than retried. When the buffer is full, the oldest points are dropped, so InfluxDB never blocks the caller.
+    """
+    def __init__(self, influxClient, batchSize: int=5000, flushInterval: float=1.0, bufferSize: int=100000, maxRetryInterval: float=30.0, writtenCounter=None, droppedCounter=None, failedCounter=None, logTool=None, redisMessaging=None):
+        self.influxClient = influxClient
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+        self.bufferSize = bufferSize
+        self.maxRetryInterval = maxRetryInterval
+        self.writtenCounter = writtenCounter
+        self.droppedCounter = droppedCounter
+        self.failedCounter = failedCounter
+        self.logTool = logTool
+        self.redisMessaging = redisMessaging
+        self.pointBuffer = deque()
+        self.bufferLock = threading.Lock()
+        self.flushEvent = threading.Event()
+        self.retryInterval = 0
+        self.writerThread = None
+
+    def start(self):
+        """
+        Starts the writer thread.
+        """
+        if self.writerThread is None:
+            self.writerThread = threading.Thread(target=self.writePoints, name='influxWriter', daemon=True)
+            self.writerThread.start()
+
+    def enqueue(self, influxPoints: list) -> int:
+        """
+        Adds points to the buffer, without blocking on InfluxDB.
+        Returns the number of buffered points that were dropped to make room.
+        """
+        droppedCount = 0
+        with self.bufferLock:
+            self.pointBuffer.extend(influxPoints)
+            while len(self.pointBuffer) > self.bufferSize:
+                self.pointBuffer.popleft()
+                droppedCount += 1
+            bufferedPoints = len(self.pointBuffer)
+        if droppedCount and self.droppedCounter is not None:
+            self.droppedCounter.inc(droppedCount)
+        if bufferedPoints >= self.batchSize and not self.retryInterval:
+            self.flushEvent.set()
+        return droppedCount
+
+    def flush(self) -> int:
+        """
+        Writes buffered points to InfluxDB, one batch per request.
+        A batch rejected as invalid (400, or 413 if too large) is split in halves until the invalid points are isolated and dropped.
+        A batch rejected with any other client error, such as 401 or 404, is dropped, as retrying it can't succeed.
+        On connection or server errors, the unwritten points are returned to the front of the buffer to be retried.
+        Returns the number of points written.
+        """
+        writtenCount = 0
+        while True:
+            with self.bufferLock:
+                influxBatch = [self.pointBuffer.popleft() for _ in range(min(self.batchSize, len(self.pointBuffer)))]
+            if not influxBatch:
+                return writtenCount
+            # Parts of the batch still to write, the next to write last.
+            pendingBatches = [influxBatch]
+            while pendingBatches:
+                influxBatch = pendingBatches.pop()
+                try:
+                    self.influxClient.write_points(influxBatch)
+                except InfluxDBClientError as e:
+                    if e.code in (400, 413) and len(influxBatch) > 1:
+                        pendingBatches.extend([influxBatch[len(influxBatch) // 2:], influxBatch[:len(influxBatch) // 2]])
+                        continue
+                    if self.droppedCounter is not None:
+                        self.droppedCounter.inc(len(influxBatch))
+                    if self.failedCounter is not None:
+                        self.failedCounter.inc()
+                    if self.logTool is not None:
+                        self.logTool.log(service='Metric', level='warn', message="[Metric] [InfluxWriter] InfluxDB rejected %s points, dropping them: %s", messageArgs=(len(influxBatch), e), redisClient=self.redisMessaging)
+                    continue
+                except Exception as e:
+                    unwrittenPoints = influxBatch + [point for pendingBatch in reversed(pendingBatches) for point in pendingBatch]
+                    with self.bufferLock:
+                        self.pointBuffer.extendleft(reversed(unwrittenPoints))
+                        droppedCount = 0
+                        while len(self.pointBuffer) > self.bufferSize:
+                            self.pointBuffer.popleft()
+                            droppedCount += 1
+                    if droppedCount and self.droppedCounter is not None:
+                        self.droppedCounter.inc(droppedCount)
+                    if self.failedCounter is not None:
+                        self.failedCounter.inc()
+                    raise
+                writtenCount += len(influxBatch)
+                if self.writtenCounter is not None:
+                    self.writtenCounter.inc(len(influxBatch))
+
+    def writePoints(self):
+        """
+        Flushes the buffer every flushInterval, or sooner when batchSize points are buffered.
+        After a failed write, waits with an exponential backoff (up to maxRetryInterval) before retrying.
+        """
+        while True:
+            self.flushEvent.wait(self.retryInterval or self.flushInterval)
+            self.flushEvent.clear()
+            try:
+                self.flush()
+                self.retryInterval = 0
+            except Exception as e:
+                self.retryInterval = min(max(self.retryInterval * 2, self.flushInterval), self.maxRetryInterval)
+                if self.logTool is not None:
+                    self.logTool.log(service='Metric', level='warn', message="[Metric] [InfluxWriter] Unable to write to InfluxDB, retrying in %ss (%s points buffered): %s", messageArgs=(self.retryInterval, len(self.pointBuffer), e), redisClient=self.redisMessaging)
+
+
 class MetricService:
 
     def __init__(self, redisHost: str='127.0.0.1', redisPort: int=6379):
@@ -35,92 +152,148 @@ class MetricService:
         self.influxPassword = self.config.get('influxdb', {}).get('password', None)
         self.influxHost = self.config.get('influxdb', {}).get('host', None)
         self.influxPort = self.config.get('influxdb', {}).get('port', None)
+        self.influxTimeout = float(self.config.get('influxdb', {}).get('timeout', 5))
+        self.influxBatchSize = int(self.config.get('influxdb', {}).get('batch_size', 5000))
+        self.influxFlushInterval = float(self.config.get('influxdb', {}).get('flush_interval', 1))
+        self.influxBufferSize = int(self.config.get('influxdb', {}).get('buffer_size', 100000))
+        self.influxMaxRetryInterval = float(self.config.get('influxdb', {}).get('max_retry_interval', 30))
+        self.drainBatchSize = int(self.config.get('prometheus', {}).get('drain_batch_size', 1000))
+        self.actions = {'inc': 'inc', 'dec': 'dec', 'set':'set', 'observe': 'observe'}
+        self.prometheusTypes = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram, 'summary': Summary}
+        # Collectors keyed by (name, type), and labelled children keyed by (name, type, labels), so known metrics never go through registration.
+        self.collectors = {}
+        self.labelChildren = {}
+        self.influxWriter = None
+        if all([self.influxEnabled, self.influxDatabase, self.influxUser, self.influxPassword, self.influxHost, self.influxPort]):
+            influxClient = InfluxDBClient(self.influxHost, self.influxPort, self.influxUser, self.influxPassword, self.influxDatabase, timeout=self.influxTimeout, retries=1)
+            self.influxWriter = InfluxWriter(influxClient=influxClient,
+                                             batchSize=self.influxBatchSize,
+                                             flushInterval=self.influxFlushInterval,
+                                             bufferSize=self.influxBufferSize,
+                                             maxRetryInterval=self.influxMaxRetryInterval,
+                                             writtenCounter=self.getCollector('prom_influx_written_points', 'counter', 'Number of points written to InfluxDB', {}),
+                                             droppedCounter=self.getCollector('prom_influx_dropped_points', 'counter', 'Number of InfluxDB points dropped due to a full buffer or rejected by InfluxDB', {}),
+                                             failedCounter=self.getCollector('prom_influx_failed_writes', 'counter', 'Number of failed InfluxDB batch writes', {}),
+                                             logTool=self.logTool,
+                                             redisMessaging=self.redisMessaging)
+            self.influxWriter.start()
 
     def processInfluxdb(self, influxData: dict) -> bool:
         """
-        Sends defined InfluxDB Metrics to InfluxDB, if configured.
+        Buffers defined InfluxDB Metrics for the InfluxDB writer, if configured.
         """
 
-        if not self.influxEnabled:
-            return True
-        if not self.influxDatabase:
-            return True
-        if not self.influxUser:
-            return True
-        if not self.influxPassword:
-            return True
-        if not self.influxHost:
+        if self.influxWriter is None:
             return True
-        if not self.influxPort:
-            return True
-    
-        influxClient = InfluxDBClient(self.influxHost, self.influxPort, self.influxUser, self.influxPassword, self.influxDatabase)
 
         if not isinstance(influxData, list):
             influxData = [influxData]
 
-        influxClient.write_points(influxData)
-        
+        self.influxWriter.enqueue(influxData)
+
         return True
 
     
-    def handleMetrics(self):
+    def getCollector(self, counterName: str, counterType: str, counterHelp: str, counterLabels: dict, counterBuckets: list=None):
         """
-        Collects queued metrics from redis, and exposes them using prometheus_client.
+        Returns the prometheus collector for a metric name and type, or its labelled child, creating and caching it on first use.
+        Histogram buckets only apply when the collector is first created.
         """
-        try:
-            actions = {'inc': 'inc', 'dec': 'dec', 'set':'set'}
-            prometheusTypes = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram, 'summary': Summary}
+        collectorKey = (counterName, counterType)
+        if counterLabels:
+            labelKey = (counterName, counterType, tuple(counterLabels.items()))
+            labelChild = self.labelChildren.get(labelKey)
+            if labelChild is not None:
+                return labelChild
 
-            metric = self.redisMessaging.awaitMessage(key='metric', usePrefix=True, prefixHostname=self.hostname, prefixServiceName='metric')[1]
+        counterRecord = self.collectors.get(collectorKey)
+        if counterRecord is None:
+            try:
+                if counterType == 'histogram' and counterBuckets:
+                    counterRecord = Histogram(counterName, counterHelp, labelnames=counterLabels.keys(), buckets=[float(bucket) for bucket in counterBuckets], registry=self.registry)
+                else:
+                    counterRecord = self.prometheusTypes[counterType](counterName, counterHelp, labelnames=counterLabels.keys(), registry=self.registry)
+            except ValueError as e:
+                counterRecord = self.registry._names_to_collectors.get(counterName)
+                if counterRecord is None:
+                    raise
+            self.collectors[collectorKey] = counterRecord
 
-            self.logTool.log(service='Metric', level='debug', message=f"[Metric] [handleMetrics] Received Metric: {metric}", redisClient=self.redisMessaging)
-            prometheusJsonList = json.loads(metric)
+        if counterLabels:
+            labelChild = counterRecord.labels(*counterLabels.values())
+            self.labelChildren[labelKey] = labelChild
+            return labelChild
+        return counterRecord
 
-            for prometheusJson in prometheusJsonList:
-                self.logTool.log(service='Metric', level='debug', message=f"[Metric] [handleMetrics] {prometheusJson}", redisClient=self.redisMessaging)
-                if not all(key in prometheusJson for key in ('NAME', 'TYPE', 'ACTION', 'VALUE')):
-                    raise ValueError('All fields are not available for parsing')
-                counterName = prometheusJson['NAME']
-                counterType = prometheusTypes.get(prometheusJson['TYPE'].lower())
-                counterAction = prometheusJson['ACTION'].lower()
-                counterValue = float(prometheusJson['VALUE'])
-                counterHelp = prometheusJson.get('HELP', '')
-                counterLabels = prometheusJson.get('LABELS', {})
+    def processMetric(self, prometheusJson: dict) -> bool:
+        """
+        Applies a single metric to its prometheus collector, and forwards any InfluxDB points.
+        """
+        if not all(key in prometheusJson for key in ('NAME', 'TYPE', 'ACTION', 'VALUE')):
+            raise ValueError('All fields are not available for parsing')
+        counterName = prometheusJson['NAME']
+        counterType = prometheusJson['TYPE'].lower()
+        counterAction = prometheusJson['ACTION'].lower()
+        counterLabels = prometheusJson.get('LABELS', {})
 
-                try:
-                    metricInflux = prometheusJson.get('INFLUX', {})
-                    if metricInflux:
-                        self.processInfluxdb(influxData=metricInflux)
-                except Exception as e:
-                    self.logTool.log(service='Metric', level='warn', message=f"[Metric] [handleMetrics] Error processing metric InfluxDb content: {traceback.format_exc()}", redisClient=self.redisMessaging)
-
-                if isinstance(counterLabels, list):
-                            counterLabels = dict()
-
-                if counterType is not None:
-                    try:
-                        counterRecord = counterType(counterName, counterHelp, labelnames=counterLabels.keys(), registry=self.registry)
-                        if counterLabels:
-                            counterRecord = counterRecord.labels(*counterLabels.values())
-                    except ValueError as e:
-                        counterRecord = self.registry._names_to_collectors.get(counterName)
-                        if counterLabels and counterRecord:
-                            counterRecord = counterRecord.labels(*counterLabels.values())
-                    action = actions.get(counterAction)
-                    if action is not None:
-                        prometheusMethod = getattr(counterRecord, action)
-                        prometheusMethod(counterValue)
-                    else:
-                        self.logTool.log(service='Metric', level='warn', message=f"[Metric] [handleMetrics] Invalid action '{counterAction}' in message: {metric}, skipping.", redisClient=self.redisMessaging)
-                        continue
-                else:
-                    self.logTool.log(service='Metric', level='warn', message=f"[Metric] [handleMetrics] Invalid type '{counterType}' in message: {metric}, skipping.", redisClient=self.redisMessaging)
-                    continue
+        metricInflux = prometheusJson.get('INFLUX')
+        if metricInflux:
+            try:
+                self.processInfluxdb(influxData=metricInflux)
+            except Exception as e:
+                self.logTool.log(service='Metric', level='warn', message=f"[Metric] [processMetric] Error processing metric InfluxDb content: {traceback.format_exc()}", redisClient=self.redisMessaging)
+
+        if isinstance(counterLabels, list):
+            counterLabels = dict()
+
+        if counterType not in self.prometheusTypes:
+            self.logTool.log(service='Metric', level='warn', message="[Metric] [processMetric] Invalid type '%s' in metric: %s, skipping.", messageArgs=(counterType, prometheusJson), redisClient=self.redisMessaging)
+            return False
+
+        action = self.actions.get(counterAction)
+        if action is None:
+            self.logTool.log(service='Metric', level='warn', message="[Metric] [processMetric] Invalid action '%s' in metric: %s, skipping.", messageArgs=(counterAction, prometheusJson), redisClient=self.redisMessaging)
+            return False
+
+        counterRecord = self.getCollector(counterName=counterName, counterType=counterType, counterHelp=prometheusJson.get('HELP', ''), counterLabels=counterLabels, counterBuckets=prometheusJson.get('BUCKETS'))
+        prometheusMethod = getattr(counterRecord, action)
+        # Aggregated observations carry every observed value in VALUES.
+        if 'VALUES' in prometheusJson:
+            for observedValue in prometheusJson['VALUES']:
+                prometheusMethod(float(observedValue))
+        else:
+            prometheusMethod(float(prometheusJson['VALUE']))
+        return True
 
-        except Exception as e:
-            self.logTool.log(service='Metric', level='error', message=f"[Metric] [handleMetrics] Unable to parse message: {metric}, due to {e}. Skipping.", redisClient=self.redisMessaging)
+    def processMetricMessage(self, metric) -> int:
+        """
+        Parses a queued metric message, which holds a list of metrics, and processes each metric.
+        A metric which fails to process does not prevent the rest of the list from being processed.
+        Returns the number of metrics processed.
+        """
+        self.logTool.log(service='Metric', level='debug', message="[Metric] [processMetricMessage] Received Metric: %s", messageArgs=(metric,), redisClient=self.redisMessaging)
+        processedCount = 0
+        for prometheusJson in json.loads(metric):
+            try:
+                if self.processMetric(prometheusJson):
+                    processedCount += 1
+            except Exception as e:
+                self.logTool.log(service='Metric', level='error', message="[Metric] [processMetricMessage] Unable to process metric: %s, due to %s. Skipping.", messageArgs=(prometheusJson, e), redisClient=self.redisMessaging)
+        return processedCount
+
+    def handleMetrics(self):
+        """
+        Collects queued metrics from redis in bulk, and exposes them using prometheus_client.
+        """
+        metricMessages = self.redisMessaging.awaitBulkMessage(key='metric', count=self.drainBatchSize, direction='LEFT', usePrefix=True, prefixHostname=self.hostname, prefixServiceName='metric')
+        if not metricMessages:
+            time.sleep(0.1)
             return
+        for metric in metricMessages[1]:
+            try:
+                self.processMetricMessage(metric)
+            except Exception as e:
+                self.logTool.log(service='Metric', level='error', message="[Metric] [handleMetrics] Unable to parse message: %s, due to %s. Skipping.", messageArgs=(metric, e), redisClient=self.redisMessaging)
 
 
     def getMetrics(self):
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+import diameter
+from logtool import LogTool
+from messaging import RedisMessaging
+import test_DiameterAsync
+import test_LocationBuffer
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class AnswerCache_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        redisMessaging = RedisMessaging()
+        redisMessaging.redisClient = fakeredis.FakeRedis()
+        with mock.patch.object(diameter, 'Database', test_DiameterAsync.StubDatabase):
+            cls.diameter = diameter.Diameter(logTool=LogTool(config=test_LocationBuffer.loadConfig()), originHost='hss01', originRealm='epc.mnc001.mcc001.3gppnetwork.org', productName='PyHSS', mcc='505', mnc='93', redisMessaging=redisMessaging)
+        cls.diameter.answerCacheEnabled = True
+
+    def setUp(self):
+        self.diameter.redisMessaging.redisClient.flushall()
+        self.diameter.database.issuedSqns.clear()
+
+    def withIdentifiers(self, request: bytes, hopByHop: int, endToEnd: int) -> bytes:
+        return request[:12] + hopByHop.to_bytes(4, 'big') + endToEnd.to_bytes(4, 'big') + request[20:]
+
+    def cachedKeys(self) -> list:
+        return self.diameter.redisMessaging.redisClient.keys('*diameterAnswerCache*')
+
+    def test_A_Retransmission_Answered_From_Cache(self):
+        answer = self.diameter.generateDiameterResponse(self.withIdentifiers(test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR, 1, 100))
+        retransmissionAnswer = self.diameter.generateDiameterResponse(self.withIdentifiers(test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR, 2, 100))
+        self.assertEqual(len(self.diameter.database.issuedSqns), 1, "Retransmission processed again")
+        self.assertEqual(retransmissionAnswer[24:32], '00000002', "Cached answer does not carry the Hop-by-Hop Identifier of the retransmission")
+        self.assertEqual(retransmissionAnswer[:24] + retransmissionAnswer[32:], answer[:24] + answer[32:], "Cached answer differs from the original")
+
+    def test_B_Key_Scoped_To_Session(self):
+        self.diameter.generateDiameterResponse(self.withIdentifiers(test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR, 1, 200))
+        self.diameter.generateDiameterResponse(self.withIdentifiers(test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR.replace(b'3076d64228', b'3076d64229'), 1, 200))
+        self.assertEqual(len(self.diameter.database.issuedSqns), 2, "Request of another session answered from the cache")
+        self.assertEqual(len(self.cachedKeys()), 2)
+
+    def test_C_Only_Success_Cached(self):
+        unknownSubscriberAir = self.withIdentifiers(test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR.replace(b'505931111111116', b'505931111111117'), 1, 300)
+        answer = self.diameter.generateDiameterResponse(unknownSubscriberAir)
+        self.assertEqual(self.diameter.getResultCode(bytes.fromhex(answer)) // 1000, 5, "Unknown subscriber answered with success")
+        self.assertEqual(self.cachedKeys(), [], "Failed answer cached, or its claim not released")
+
+    def test_D_Duplicate_Dropped_While_Answered(self):
+        request = self.withIdentifiers(test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR, 1, 400)
+        packetVars, avps = self.diameter.decode_diameter_packet(request)
+        answerCacheKey = self.diameter.getAnswerCacheKey(originHost='hss01', sessionId=self.diameter.get_avp_data(avps, 263)[0], packetVars=packetVars)
+        # Claimed by another worker answering the first copy.
+        self.assertTrue(self.diameter.claimAnswer(answerCacheKey=answerCacheKey, packetVars=packetVars)[0])
+        self.assertEqual(self.diameter.generateDiameterResponse(request), '', "Duplicate answered while the first copy was being answered")
+        self.assertEqual(self.diameter.database.issuedSqns, [], "Duplicate processed while the first copy was being answered")
+        self.assertEqual(self.diameter.redisMessaging.getValue(key=answerCacheKey, usePrefix=True, prefixHostname=self.diameter.hostname, prefixServiceName='diameter'), b'pending', "Claim of the first copy released by a duplicate")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import database
+from database import SUBSCRIBER, AUC, APN, OPERATION_LOG_BASE
+import test_LocationBuffer
+from readReplicas import ReadReplicas
+
+class Database_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempDir = tempfile.mkdtemp()
+        config = test_LocationBuffer.loadConfig()
+        config['geored']['enabled'] = False
+        config['webhooks'] = {'enabled': False}
+        cls.database = test_LocationBuffer.sqliteDatabase(os.path.join(cls.tempDir, 'hss.db'), config)
+        with cls.database.sessionScope() as session:
+            session.add(AUC(auc_id=1, ki='3c6e0b8a9c15224a8228b9a98ca1531d', opc='2a8b4e6e3da3f3e6c2c7e2c8a2b1c3d4', amf='8000', sqn=1))
+            session.add(APN(apn_id=1, apn='internet', apn_ambr_dl=999999, apn_ambr_ul=999999))
+            session.add(SUBSCRIBER(subscriber_id=1, imsi='505931111111116', auc_id=1, default_apn=1, apn_list='1'))
+            session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tempDir, ignore_errors=True)
+
+    def getSqn(self) -> int:
+        with self.database.sessionScope() as session:
+            return session.query(AUC).filter_by(auc_id=1).one().sqn
+
+    def test_A_Vectors_Not_Served_From_Prefetch(self):
+        self.assertEqual(self.database.prefetchSubscribers(['505931111111116']), 1)
+        # The SQN is advanced by another process after the batch was prefetched.
+        with self.database.sessionScope() as session:
+            session.query(AUC).filter_by(auc_id=1).one().sqn = 5000
+            session.commit()
+        with mock.patch.object(database.S6a_crypt, 'generate_eutran_vector', wraps=database.S6a_crypt.generate_eutran_vector) as generateEutranVector:
+            self.database.Get_Vectors_AuC(1, "air", plmn='05f539')
+        self.database.clearPrefetchCache()
+        self.assertEqual(generateEutranVector.call_args.args[3], 5000, "Vector generated with a prefetched SQN")
+        self.assertEqual(self.getSqn(), 5100, "Stale SQN written back")
+
+    def test_B_Lagging_Replica_Skipped(self):
+        replicaConfig = {'database': {'replica_max_lag': 5, 'replica_read_after_write': 0}}
+        readReplicas = ReadReplicas(self.database.engine, replicaConfig, mock.MagicMock(), mock.MagicMock(), 'hss01', replicaUrls=[f"sqlite:///{os.path.join(self.tempDir, 'replica0.db')}", f"sqlite:///{os.path.join(self.tempDir, 'replica1.db')}"])
+        with mock.patch.object(readReplicas, 'getReplicaLag', side_effect=lambda replicaIndex: [60.0, 1.0][replicaIndex]):
+            self.assertEqual([readReplicas.getReadEngine() for attempt in range(2)], [readReplicas.replicaEngines[1]] * 2, "Lagging replica read from")
+        with mock.patch.object(readReplicas, 'getReplicaLag', return_value=None):
+            self.assertIs(readReplicas.getReadEngine(), self.database.engine, "Unreachable replica read from")
+
+class OperationLog_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempDir = tempfile.mkdtemp()
+        config = test_LocationBuffer.loadConfig()
+        config['geored']['enabled'] = False
+        config['webhooks'] = {'enabled': False}
+        # Queued entries are only written by flushOperationLog, not the background thread.
+        config['database']['operation_log_flush_interval'] = 3600
+        config['database']['operation_log_trim_interval'] = 3600
+        cls.database = test_LocationBuffer.sqliteDatabase(os.path.join(cls.tempDir, 'hss.db'), config)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tempDir, ignore_errors=True)
+
+    def setUp(self):
+        self.database.operationLogQueue.clear()
+        with self.database.sessionScope() as session:
+            session.query(OPERATION_LOG_BASE).delete()
+            session.query(APN).delete()
+            session.commit()
+
+    def getApn(self, apn_id: int):
+        with self.database.sessionScope() as session:
+            apn = session.query(APN).filter_by(apn_id=apn_id).one_or_none()
+            return None if apn is None else (apn.apn, apn.apn_ambr_dl)
+
+    def operationLogCount(self) -> int:
+        with self.database.sessionScope() as session:
+            return session.query(OPERATION_LOG_BASE).count()
+
+    def assertChangeLogged(self, writeBehind: bool):
+        if writeBehind:
+            self.assertEqual(self.operationLogCount(), 0, "Operation log written before it was flushed")
+            self.assertEqual(len(self.database.operationLogQueue), 1, "Operation log entry not queued")
+        else:
+            self.assertEqual(self.operationLogCount(), 1, "Operation log entry not written")
+
+    def test_A_Rollback_Update(self):
+        for writeBehind in (False, True):
+            with self.subTest(writeBehind=writeBehind), mock.patch.object(self.database, 'operationLogWriteBehind', writeBehind):
+                self.setUp()
+                apnId = self.database.CreateObj(APN, {'apn': 'internet', 'apn_ambr_dl': 1000, 'apn_ambr_ul': 1000}, disable_logging=True)['apn_id']
+                self.database.UpdateObj(APN, {'apn_ambr_dl': 2000}, apnId)
+                self.assertChangeLogged(writeBehind)
+                self.database.rollback_last_change()
+                self.assertEqual(self.getApn(apnId), ('internet', 1000), "Update not rolled back")
+
+    def test_B_Rollback_Insert(self):
+        for writeBehind in (False, True):
+            with self.subTest(writeBehind=writeBehind), mock.patch.object(self.database, 'operationLogWriteBehind', writeBehind):
+                self.setUp()
+                apnId = self.database.CreateObj(APN, {'apn': 'internet', 'apn_ambr_dl': 1000, 'apn_ambr_ul': 1000})['apn_id']
+                self.assertChangeLogged(writeBehind)
+                self.database.rollback_last_change()
+                self.assertIsNone(self.getApn(apnId), "Insert not rolled back")
+
+    def test_C_Rollback_Delete(self):
+        for writeBehind in (False, True):
+            with self.subTest(writeBehind=writeBehind), mock.patch.object(self.database, 'operationLogWriteBehind', writeBehind):
+                self.setUp()
+                apnId = self.database.CreateObj(APN, {'apn': 'internet', 'apn_ambr_dl': 1000, 'apn_ambr_ul': 1000}, disable_logging=True)['apn_id']
+                self.database.DeleteObj(APN, apnId)
+                self.assertChangeLogged(writeBehind)
+                self.database.rollback_last_change()
+                self.assertEqual(self.getApn(apnId), ('internet', 1000), "Delete not rolled back")
+
+    def test_D_Trim_Keeps_Newest(self):
+        apnId = self.database.CreateObj(APN, {'apn': 'internet', 'apn_ambr_dl': 1000, 'apn_ambr_ul': 1000}, disable_logging=True)['apn_id']
+        for apnAmbrDl in range(2001, 2006):
+            self.database.UpdateObj(APN, {'apn_ambr_dl': apnAmbrDl}, apnId)
+        with mock.patch.object(self.database, 'operationLogMaxRecords', 3):
+            self.assertEqual(self.database.trimOperationLog(), 2)
+        with self.database.sessionScope() as session:
+            keptChanges = [operationLog.changes for operationLog in session.query(OPERATION_LOG_BASE).order_by(OPERATION_LOG_BASE.id)]
+        self.assertEqual([f"{apnAmbrDl - 1} ----> [int] {apnAmbrDl}" in changes for changes, apnAmbrDl in zip(keptChanges, range(2003, 2006))], [True] * 3, "Trimming did not keep the newest entries")
+        # The newest change is still rolled back after trimming.
+        self.database.rollback_last_change()
+        self.assertEqual(self.getApn(apnId), ('internet', 2004))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+import yaml
+import S6a_crypt
+import diameter
+from diameterAsync import DiameterAsync
+from database import SUBSCRIBER, APN
+from logtool import LogTool
+
+class StubDatabase:
+    """
+    Serves the test subscriber 505931111111116 with one APN to the synchronous S6a handlers, and records serving MME updates
+    and the SQN of each vector generated.
+    """
+    def __init__(self, *args, **kwargs):
+        self.servingMmeUpdates = []
+        self.sqn = 1
+        self.issuedSqns = []
+
+    def Get_Subscriber(self, imsi, **kwargs):
+        if str(imsi) != '505931111111116':
+            raise ValueError(f"Subscriber {imsi} not found")
+        subscriber = {column.name: None for column in SUBSCRIBER.__table__.columns}
+        subscriber.update({'subscriber_id': 1, 'imsi': '505931111111116', 'msisdn': '61400000000', 'enabled': True, 'auc_id': 1, 'default_apn': 1, 'apn_list': '1',
+                           'nam': 0, 'ue_ambr_dl': 999999, 'ue_ambr_ul': 999999, 'subscribed_rau_tau_timer': 300, 'roaming_enabled': True})
+        return subscriber
+
+    def Get_Vectors_AuC(self, auc_id, action, **kwargs):
+        # Reads and increments the SQN without a lock, like the AuC row, so concurrent requests for a subscriber reuse it.
+        sqn = self.sqn
+        time.sleep(0.05)
+        self.sqn = sqn + 1
+        self.issuedSqns.append(sqn)
+        rand, xres, autn, kasme = S6a_crypt.generate_eutran_vector('465B5CE8B199B49FAA5F0A2EE238A6BC', 'CD63CB71954A9F4E48A5994E37A02BAF', '8000', sqn, kwargs['plmn'])
+        return {'rand': rand, 'xres': xres, 'autn': autn, 'kasme': kasme}
+
+    def Get_APN(self, apn_id):
+        apn = {column.name: None for column in APN.__table__.columns}
+        apn.update({'apn_id': 1, 'apn': 'internet', 'ip_version': 0, 'apn_ambr_dl': 999999, 'apn_ambr_ul': 999999, 'qci': 9, 'arp_priority': 4,
+                    'arp_preemption_capability': True, 'arp_preemption_vulnerability': False})
+        return apn
+
+    def Get_SUBSCRIBER_ROUTING(self, subscriber_id, apn_id):
+        raise ValueError("No static IP")
+
+    def Update_Serving_MME(self, **kwargs):
+        self.servingMmeUpdates.append(kwargs)
+
+class DiameterAsync_Tests(unittest.TestCase):
+    # Same byte fixtures as test_Diameter.py
+    Diameter_CER = b"\x01\x00\x01P\x80\x00\x01\x01\x00\x00\x00\x00\x8e\xb7\xd5j\xb0{\xcd\xd6\x00\x00\x01\x08@\x00\x00\rhss01\x00\x00\x00\x00\x00\x01(@\x00\x00)epc.mnc001.mcc001.3gppnetwork.org\x00\x00\x00\x00\x00\x01\x01@\x00\x00\x0e\x00\x01\x7f\x00\x01\x01\x00\x00\x00\x00\x01\n@\x00\x00\x0c\x00\x00\x00\x00\x00\x00\x01\r\x00\x00\x00\x14PyHSS-client\x00\x00\x01\x04@\x00\x00 \x00\x00\x01\x02@\x00\x00\x0c\x01\x00\x00#\x00\x00\x01\n@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\x04@\x00\x00 \x00\x00\x01\x02@\x00\x00\x0c\x01\x00\x00\x16\x00\x00\x01\n@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\x04@\x00\x00 \x00\x00\x01\x02@\x00\x00\x0c\x01\x00\x00'\x00\x00\x01\n@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\x04@\x00\x00 \x00\x00\x01\x02@\x00\x00\x0c\x01\x00\x00\x01\x00\x00\x01\n@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\x04@\x00\x00 \x00\x00\x01\x02@\x00\x00\x0c\x01\x00\x00\x00\x00\x00\x01\n@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\x02@\x00\x00\x0c\xff\xff\xff\xff\x00\x00\x01\t@\x00\x00\x0c\x00\x00\x15\x9f\x00\x00\x01\t@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\t@\x00\x00\x0c\x00\x002\xdb"
+    Diameter_DWR = b'\x01\x00\x00P\x80\x00\x01\x18\x00\x00\x00\x00x\xb7\x96\x8du\xb2+\xf3\x00\x00\x01\x08@\x00\x00\rhss01\x00\x00\x00\x00\x00\x01(@\x00\x00)epc.mnc001.mcc001.3gppnetwork.org\x00\x00\x00'
+    Diameter_DPR = b'\x01\x00\x00\\\x80\x00\x01\x1a\x00\x00\x00\x007%\x1fT\x13j\xdf\x14\x00\x00\x01\x08@\x00\x00\rhss01\x00\x00\x00\x00\x00\x01(@\x00\x00)epc.mnc001.mcc001.3gppnetwork.org\x00\x00\x00\x00\x00\x01\x11@\x00\x00\x0c\x00\x00\x00\x00'
+    Diameter_ULR = b"\x01\x00\x01\x18\xc0\x00\x01<\x01\x00\x00#\xa2\xd9\xb6\\\xe9!\xf7\xfa\x00\x00\x01\x07@\x00\x00'6873733031;c78c1d986e;1;app_s6a\x00\x00\x00\x01\x15@\x00\x00\x0c\x00\x00\x00\x01\x00\x00\x01\x08@\x00\x00\rhss01\x00\x00\x00\x00\x00\x01(@\x00\x00)epc.mnc001.mcc001.3gppnetwork.org\x00\x00\x00\x00\x00\x01\x1b@\x00\x00\x1cnickvsnetworking.com\x00\x00\x00\x01@\x00\x00\x17505931111111116\x00\x00\x00\x04\x08\x80\x00\x00\x10\x00\x00(\xaf\x00\x00\x03\xec\x00\x00\x05}\xc0\x00\x00\x10\x00\x00(\xaf\x00\x00\x00\x02\x00\x00\x05\x7f\xc0\x00\x00\x0f\x00\x00(\xaf\x05\xf59\x00\x00\x00\x06O\x80\x00\x00\x10\x00\x00(\xaf\x00\x00\x00\x00\x00\x00\x01\x04@\x00\x00 \x00\x00\x01\n@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\x02@\x00\x00\x0c\x01\x00\x00#"
+    Diameter_AIR = b"\x01\x00\x01\x14\xc0\x00\x01>\x01\x00\x00#0\xd0hym\x19i\xc8\x00\x00\x01\x07@\x00\x00'6873733031;3076d64228;1;app_s6a\x00\x00\x00\x01\x15@\x00\x00\x0c\x00\x00\x00\x01\x00\x00\x01\x08@\x00\x00\rhss01\x00\x00\x00\x00\x00\x01(@\x00\x00)epc.mnc001.mcc001.3gppnetwork.org\x00\x00\x00\x00\x00\x01\x1b@\x00\x00\x1cnickvsnetworking.com\x00\x00\x00\x01@\x00\x00\x17505931111111116\x00\x00\x00\x05\x80\xc0\x00\x00,\x00\x00(\xaf\x00\x00\x05\x82\xc0\x00\x00\x10\x00\x00(\xaf\x00\x00\x00\x01\x00\x00\x05\x84\xc0\x00\x00\x10\x00\x00(\xaf\x00\x00\x00\x01\x00\x00\x05\x7f\xc0\x00\x00\x0f\x00\x00(\xaf\x05\xf59\x00\x00\x00\x01\x04@\x00\x00 \x00\x00\x01\n@\x00\x00\x0c\x00\x00(\xaf\x00\x00\x01\x02@\x00\x00\x0c\x01\x00\x00#"
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            with open("../config.yaml", 'r') as stream:
+                config = yaml.safe_load(stream)
+        except:
+            with open("config.yaml", 'r') as stream:
+                config = yaml.safe_load(stream)
+        logTool = LogTool(config=config)
+        cls.diameterAsync = DiameterAsync(logTool=logTool, originHost='hss01', originRealm='epc.mnc001.mcc001.3gppnetwork.org', productName='PyHSS', mcc='001', mnc='01')
+        # Database backed answers are run by the synchronous Diameter class, here over a stub database, in the fixtures' home PLMN.
+        with mock.patch.object(diameter, 'Database', StubDatabase):
+            cls.diameterAsync.diameterApplication = diameter.Diameter(logTool=logTool, originHost='hss01', originRealm='epc.mnc001.mcc001.3gppnetwork.org', productName='PyHSS', mcc='505', mnc='93')
+
+    def answer(self, request):
+        packetVars, avps = asyncio.run(self.diameterAsync.decodeDiameterPacket(request))
+        response = asyncio.run(self.diameterAsync.generateDiameterResponse(request))
+        answerVars, answerAvps = asyncio.run(self.diameterAsync.decodeDiameterPacket(response))
+        return packetVars, answerVars, answerAvps
+
+    def assertAnswers(self, request, commandCode):
+        packetVars, answerVars, answerAvps = self.answer(request)
+        self.assertEqual(answerVars['command_code'], commandCode, "Command Code Mismatch")
+        self.assertFalse(int(answerVars['flags'], 16) & 0x80, "Answer has the Request flag set")
+        self.assertEqual(answerVars['hop-by-hop-identifier'], packetVars['hop-by-hop-identifier'], "Hop-by-Hop Identifier Mismatch")
+        self.assertEqual(answerVars['end-to-end-identifier'], packetVars['end-to-end-identifier'], "End-to-End Identifier Mismatch")
+        resultCode = asyncio.run(self.diameterAsync.getAvpData(answerAvps, 268))
+        self.assertEqual(int(resultCode[0], 16), 2001, "Result Code is not DIAMETER_SUCCESS")
+        return answerAvps
+
+    def test_A_Recv_AIR_CmdCode(self):
+        packetVars, avps = asyncio.run(self.diameterAsync.decodeDiameterPacket(self.Diameter_AIR))
+        self.assertEqual(packetVars['command_code'], 318, "Command Code Mismatch")
+        self.assertEqual(packetVars['ApplicationId'], 16777251, "Application ID Mismatch")
+        self.assertEqual(packetVars['flags'], "c0", "Flags Mismatch")
+
+    def test_B_Answer_CER(self):
+        answerAvps = self.assertAnswers(self.Diameter_CER, 257)
+        self.assertEqual(asyncio.run(self.diameterAsync.getAvpData(answerAvps, 264))[0], self.diameterAsync.OriginHost, "Origin Host Mismatch")
+
+    def test_B_Answer_DWR(self):
+        self.assertAnswers(self.Diameter_DWR, 280)
+
+    def test_B_Answer_DPR(self):
+        self.assertAnswers(self.Diameter_DPR, 282)
+
+    def test_D_Answer_AIR(self):
+        answerAvps = self.assertAnswers(self.Diameter_AIR, 318)
+        self.assertEqual(len(asyncio.run(self.diameterAsync.getAvpData(answerAvps, 1413))), 1, "AIA has no Authentication-Info")
+
+    def test_D_Answer_ULR(self):
+        servingMmeUpdates = self.diameterAsync.diameterApplication.database.servingMmeUpdates
+        servingMmeUpdates.clear()
+        answerAvps = self.assertAnswers(self.Diameter_ULR, 316)
+        self.assertEqual(len(asyncio.run(self.diameterAsync.getAvpData(answerAvps, 1400))), 1, "ULA has no Subscription-Data")
+        self.assertEqual(servingMmeUpdates[0]['imsi'], '505931111111116', "Serving MME not updated")
+
+    def test_C_Result_Code(self):
+        response = bytes.fromhex(asyncio.run(self.diameterAsync.generateDiameterResponse(self.Diameter_DWR)))
+        self.assertEqual(asyncio.run(self.diameterAsync.getResultCode(response)), 2001, "Result Code Mismatch")
+        self.assertEqual(asyncio.run(self.diameterAsync.getResultCode(self.Diameter_AIR)), 0, "Request should have no Result Code")
+
+    def test_E_Diameter_Application_Created_Once(self):
+        createdApplications = []
+
+        def createApplication(**kwargs):
+            time.sleep(0.05)
+            createdApplications.append(mock.Mock())
+            return createdApplications[-1]
+
+        diameterAsync = DiameterAsync(logTool=self.diameterAsync.logTool, originHost='hss01', originRealm='epc.mnc001.mcc001.3gppnetwork.org', productName='PyHSS', mcc='001', mnc='01')
+
+        async def getConcurrently():
+            return await(asyncio.gather(*[diameterAsync.getDiameterApplication() for request in range(5)]))
+
+        with mock.patch.object(diameter, 'Diameter', side_effect=createApplication):
+            diameterApplications = asyncio.run(getConcurrently())
+        self.assertEqual(len(createdApplications), 1, "Concurrent first requests each created a Diameter class")
+        self.assertEqual({id(diameterApplication) for diameterApplication in diameterApplications}, {id(createdApplications[0])})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'services'))
+import diameter
+from baseModels import InboundData
+from diameterService import DiameterService
+import test_DiameterAsync
+
+class DiameterService_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.diameterService = DiameterService()
+        with mock.patch.object(diameter, 'Database', test_DiameterAsync.StubDatabase):
+            cls.diameterService.diameterLibrary.diameterApplication = diameter.Diameter(logTool=cls.diameterService.logTool, originHost='hss01', originRealm='epc.mnc001.mcc001.3gppnetwork.org', productName='PyHSS', mcc='505', mnc='93')
+
+    def test_A_Embedded_AIR_Ordered_By_Subscriber(self):
+        # The same subscriber's AIR, from two MMEs with different Session-Ids.
+        requests = [('10.0.0.1', test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR), ('10.0.0.2', test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR.replace(b'3076d64228', b'3076d64229'))]
+        database = self.diameterService.diameterLibrary.diameterApplication.database
+
+        async def answerConcurrently():
+            for senderIp, request in requests:
+                self.diameterService.outboundQueues[f"{senderIp}-3868"] = asyncio.Queue()
+            return await(asyncio.gather(*[self.diameterService.handleEmbeddedRequest(inboundData=InboundData(SenderIp=senderIp, SenderPort='3868', InitialReceiveTimestamp=time.time_ns(), InboundHex=request.hex()),
+                                                                                      diameterMessage=request.hex()) for senderIp, request in requests]))
+
+        self.assertEqual(asyncio.run(answerConcurrently()), [True, True], "AIR not answered")
+        self.assertEqual(sorted(database.issuedSqns), [1, 2], "Concurrent AIRs for one subscriber were given the same SQN")
+
+    def test_B_Embedded_Request_Traced_Per_Message(self):
+        # Two requests received in one read.
+        requests = [test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR, test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR.replace(b'3076d64228', b'3076d64229')]
+        inboundData = InboundData(SenderIp='10.0.0.3', SenderPort='3868', InitialReceiveTimestamp=time.time_ns(), InboundHex=b''.join(requests).hex())
+
+        async def answerRead():
+            outboundQueue = asyncio.Queue()
+            self.diameterService.outboundQueues["10.0.0.3-3868"] = outboundQueue
+            for request in requests:
+                await(self.diameterService.handleEmbeddedRequest(inboundData=inboundData, diameterMessage=request.hex()))
+            return [outboundQueue.get_nowait() for request in requests]
+
+        with mock.patch.object(self.diameterService, 'tracingEnabled', True):
+            outboundData = asyncio.run(answerRead())
+        self.assertNotIn(None, [answer.TraceId for answer in outboundData], "Embedded request not traced")
+        self.assertEqual(len({answer.TraceId for answer in outboundData}), 2, "Requests received in one read share a trace")
+        self.assertEqual(len({answer.SpanId for answer in outboundData}), 2, "Requests received in one read share a span")
+
+    def test_C_Packet_Capture_Dump_Task_Held(self):
+        async def dumpFromSignal():
+            with mock.patch.object(self.diameterService, 'dumpPacketCapture', side_effect=lambda: asyncio.sleep(0.01)):
+                self.diameterService.startPacketCaptureDump()
+                heldTasks = set(self.diameterService.packetCaptureDumpTasks)
+                await(asyncio.gather(*heldTasks))
+                await(asyncio.sleep(0))
+            return heldTasks
+
+        self.assertEqual(len(asyncio.run(dumpFromSignal())), 1, "Packet capture dump task not held while running")
+        self.assertEqual(self.diameterService.packetCaptureDumpTasks, set(), "Packet capture dump task held after it was done")
+
+    def test_D_Stage_Timestamps_In_Order(self):
+        stageTimestamps = {'worker_start': time.time_ns()}
+        answer = self.diameterService.diameterLibrary.diameterApplication.generateDiameterResponse(test_DiameterAsync.DiameterAsync_Tests.Diameter_AIR, stageTimestamps=stageTimestamps)
+        self.assertNotEqual(answer, '', "AIR not answered")
+        self.assertEqual(list(stageTimestamps), ['worker_start', 'decode', 'handler_start', 'handler_end'], "Stages not stamped in order")
+        self.assertEqual(sorted(stageTimestamps.values()), list(stageTimestamps.values()), "Stage timestamps out of order")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import os
+import json
+import datetime
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import yaml
+import database
+from database import Database, SUBSCRIBER, AUC, APN, SERVING_APN
+from locationBuffer import LocationUpdateBuffer
+from logtool import LogTool
+
+def loadConfig() -> dict:
+    try:
+        with open("../config.yaml", 'r') as stream:
+            return yaml.safe_load(stream)
+    except:
+        with open("config.yaml", 'r') as stream:
+            return yaml.safe_load(stream)
+
+def sqliteDatabase(path: str, config: dict, redisMessaging=None) -> Database:
+    """
+    Builds a Database on a sqlite file at path, with config in place of config.yaml and redis mocked unless redisMessaging is given.
+    """
+    config['database'].update({'db_type': 'sqlite', 'database': path})
+    with mock.patch.object(database.yaml, 'safe_load', return_value=config):
+        return Database(LogTool(config=config), redisMessaging=redisMessaging or mock.MagicMock())
+
+class StubDatabase:
+    """
+    Records the deferred updates written by each flush, optionally failing batches of more than one.
+    """
+    def __init__(self, config, failBatches=False):
+        self.config = config
+        self.failBatches = failBatches
+        self.written = []
+
+    def writeDeferredLocationUpdates(self, deferredUpdates: list) -> int:
+        if self.failBatches and len(deferredUpdates) > 1:
+            raise RuntimeError("Batch failed")
+        self.written.append(list(deferredUpdates))
+        return len(deferredUpdates)
+
+class LocationUpdateBuffer_Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.config = loadConfig()
+        self.config['database'].update({'location_write_behind_journal': os.path.join(self.tempDir, 'journal'), 'location_write_behind_interval': 3600})
+        self.database = StubDatabase(self.config)
+        self.buffer = LocationUpdateBuffer(self.database, LogTool(config=self.config), mock.MagicMock())
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, ignore_errors=True)
+
+    def deferMme(self, servingMme: str, timestamp: str, deferrable: bool=True) -> bool:
+        return self.buffer.defer('Update_Serving_MME', ('505931111111116',), servingNode=(servingMme, 'epc.mnc093.mcc505.3gppnetwork.org', f"{servingMme};hss01"), deferrable=deferrable,
+                                 arguments={'imsi': '505931111111116', 'serving_mme': servingMme, 'serving_mme_timestamp': timestamp})
+
+    def test_A_Refreshes_Coalesced(self):
+        self.assertFalse(self.deferMme('mme01', '2026-01-01T00:00:00Z'), "First update of a serving node deferred")
+        self.assertTrue(self.deferMme('mme01', '2026-01-01T00:00:01Z'), "Refresh not deferred")
+        self.assertTrue(self.deferMme('mme01', '2026-01-01T00:00:02Z'), "Refresh not deferred")
+        self.assertTrue(self.buffer.defer('update_subscriber_location', ('505931111111116',), merge=True, arguments={'imsi': '505931111111116', 'last_seen_tac': '0001', 'last_seen_eci': None}))
+        self.assertTrue(self.buffer.defer('update_subscriber_location', ('505931111111116',), merge=True, arguments={'imsi': '505931111111116', 'last_seen_tac': None, 'last_seen_eci': '0a0b0c'}))
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(len(self.database.written), 1, "Flush not written in one batch")
+        writtenUpdates = dict(self.database.written[0])
+        self.assertEqual(writtenUpdates['Update_Serving_MME']['serving_mme_timestamp'], '2026-01-01T00:00:02Z', "Refreshes not coalesced to the latest")
+        self.assertEqual((writtenUpdates['update_subscriber_location']['last_seen_tac'], writtenUpdates['update_subscriber_location']['last_seen_eci']), ('0001', '0a0b0c'), "Location updates not merged")
+
+    def test_B_Change_Supersedes_Refresh(self):
+        self.deferMme('mme01', '2026-01-01T00:00:00Z')
+        self.assertTrue(self.deferMme('mme01', '2026-01-01T00:00:01Z'))
+        self.assertFalse(self.deferMme('mme02', '2026-01-01T00:00:02Z'), "Serving node change deferred")
+        self.assertEqual(self.buffer.flush(), 0, "Refresh superseded by a change was written")
+
+        self.assertTrue(self.deferMme('mme02', '2026-01-01T00:00:03Z'))
+        self.assertFalse(self.deferMme('mme02', '2026-01-01T00:00:04Z', deferrable=False), "Call which is not deferrable was deferred")
+        self.assertEqual(self.buffer.flush(), 0, "Refresh superseded by a call which is not deferrable was written")
+
+        # A refresh pending for a serving node which has since been changed is not handed to the database.
+        self.buffer.writePending({('Update_Serving_MME', ('505931111111116',)): ({'imsi': '505931111111116', 'serving_mme': 'mme01'}, ('mme01', None, None))})
+        self.assertEqual(self.database.written, [])
+
+    def test_C_Journal_Recovered(self):
+        orphanJournal = os.path.join(self.tempDir, 'journal.999999999')
+        with open(orphanJournal, 'w') as journal:
+            journal.write(json.dumps({'method': 'update_subscriber_location', 'key': ['505931111111116'], 'arguments': {'imsi': '505931111111116', 'last_seen_tac': '0002'}, 'servingNode': None, 'merge': True}) + '\n')
+        self.buffer.start()
+        self.assertFalse(os.path.exists(orphanJournal), "Orphaned journal not taken over")
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.database.written, [[('update_subscriber_location', {'imsi': '505931111111116', 'last_seen_tac': '0002'})]])
+        self.assertEqual(os.listdir(self.tempDir), [f"journal.{os.getpid()}"], "Journal left behind after flush")
+
+    def test_D_Failed_Batch_Written_One_By_One(self):
+        self.database.failBatches = True
+        self.deferMme('mme01', '2026-01-01T00:00:00Z')
+        self.deferMme('mme01', '2026-01-01T00:00:01Z')
+        self.buffer.defer('update_subscriber_location', ('505931111111116',), merge=True, arguments={'imsi': '505931111111116', 'last_seen_tac': '0001'})
+        self.buffer.flush()
+        self.assertEqual(len(self.database.written), 2, "Updates of a failed batch not written one by one")
+
+class DeferredLocationUpdates_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempDir = tempfile.mkdtemp()
+        config = loadConfig()
+        config['hss']['CancelLocationRequest_Enabled'] = True
+        config['geored'].update({'enabled': True, 'endpoints': ['127.0.0.1:8080'], 'sync_actions': ['HSS', 'PCRF']})
+        config['webhooks'] = {'enabled': False}
+        cls.database = sqliteDatabase(os.path.join(cls.tempDir, 'hss.db'), config)
+        with cls.database.sessionScope() as session:
+            session.add(AUC(auc_id=1, ki='3c6e0b8a9c15224a8228b9a98ca1531d', opc='2a8b4e6e3da3f3e6c2c7e2c8a2b1c3d4', amf='8000', sqn=1))
+            session.add(APN(apn_id=1, apn='internet', apn_ambr_dl=999999, apn_ambr_ul=999999))
+            session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tempDir, ignore_errors=True)
+
+    def setUp(self):
+        self.database.redisMessaging.reset_mock()
+
+    def addSubscriber(self, imsi: str, servingMme: str, servingMmeTimestamp: datetime.datetime) -> int:
+        with self.database.sessionScope() as session:
+            subscriber = SUBSCRIBER(imsi=imsi, auc_id=1, default_apn=1, apn_list='1', serving_mme=servingMme, serving_mme_realm='epc.mnc093.mcc505.3gppnetwork.org',
+                                    serving_mme_peer=f"{servingMme};hss01", serving_mme_timestamp=servingMmeTimestamp,
+                                    last_seen_tac='0001', last_location_update_timestamp=servingMmeTimestamp)
+            session.add(subscriber)
+            session.commit()
+            return subscriber.subscriber_id
+
+    def getSubscriber(self, imsi: str) -> SUBSCRIBER:
+        with self.database.sessionScope() as session:
+            subscriber = session.query(SUBSCRIBER).filter_by(imsi=imsi).one()
+            session.expunge(subscriber)
+            return subscriber
+
+    def mmeRefresh(self, imsi: str, servingMme: str, timestamp: str) -> tuple:
+        return ('Update_Serving_MME', {'imsi': imsi, 'serving_mme': servingMme, 'serving_mme_realm': 'epc.mnc093.mcc505.3gppnetwork.org',
+                                       'serving_mme_peer': f"{servingMme};hss01", 'serving_mme_timestamp': timestamp, 'propagate': True})
+
+    def queuedMessages(self, method: str, queue: str) -> list:
+        return [call for call in getattr(self.database.redisMessaging, method).call_args_list if call.kwargs.get('queue') == queue]
+
+    def test_A_Refresh_Written(self):
+        self.addSubscriber('505930000000001', 'mme01', datetime.datetime(2026, 1, 1, 0, 0, 0))
+        self.assertEqual(self.database.writeDeferredLocationUpdates([self.mmeRefresh('505930000000001', 'mme01', '2026-01-01T00:01:00Z'),
+                                                                     ('update_subscriber_location', {'imsi': '505930000000001', 'last_seen_tac': '0002', 'last_location_update_timestamp': '2026-01-01T00:01:00+00:00'})]), 2)
+        subscriber = self.getSubscriber('505930000000001')
+        self.assertEqual(subscriber.serving_mme_timestamp, datetime.datetime(2026, 1, 1, 0, 1, 0))
+        self.assertEqual(subscriber.last_seen_tac, '0002')
+        georedMessages = self.queuedMessages('sendBulkMessage', 'geored')
+        self.assertEqual(len(georedMessages), 1, "Geored messages not queued in one batch")
+        self.assertEqual(len(georedMessages[0].kwargs['messageList']), 2)
+
+    def test_B_Newer_Write_Kept(self):
+        self.addSubscriber('505930000000002', 'mme02', datetime.datetime(2026, 1, 1, 0, 2, 0))
+        self.assertEqual(self.database.writeDeferredLocationUpdates([self.mmeRefresh('505930000000002', 'mme01', '2026-01-01T00:01:00Z'),
+                                                                     ('update_subscriber_location', {'imsi': '505930000000002', 'last_seen_tac': '0002', 'last_location_update_timestamp': '2026-01-01T00:01:00+00:00'})]), 0)
+        subscriber = self.getSubscriber('505930000000002')
+        self.assertEqual((subscriber.serving_mme, subscriber.last_seen_tac), ('mme02', '0001'), "Deferred update overwrote a newer write")
+
+    def test_C_Older_Change_Written_Through(self):
+        # Another serving node, from an older write, was applied after the refresh was deferred (for example through geored).
+        self.addSubscriber('505930000000003', 'mme02', datetime.datetime(2026, 1, 1, 0, 0, 0))
+        self.assertEqual(self.database.writeDeferredLocationUpdates([self.mmeRefresh('505930000000003', 'mme01', '2026-01-01T00:01:00Z')]), 1)
+        subscriber = self.getSubscriber('505930000000003')
+        self.assertEqual((subscriber.serving_mme, subscriber.serving_mme_timestamp), ('mme01', datetime.datetime(2026, 1, 1, 0, 1, 0)), "Refresh dropped on a serving node mismatch")
+        clrMessages = self.queuedMessages('sendMessage', 'asymmetric-geored')
+        self.assertEqual(len(clrMessages), 1, "CLR not sent to the MME on record")
+        self.assertEqual(json.loads(clrMessages[0].kwargs['message'])['body']['DestinationHost'], 'mme02')
+
+    def test_D_Ended_Session_Not_Refreshed(self):
+        subscriberId = self.addSubscriber('505930000000004', 'mme01', datetime.datetime(2026, 1, 1, 0, 0, 0))
+        with self.database.sessionScope() as session:
+            session.add(SERVING_APN(subscriber_id=subscriberId, apn=1, pcrf_session_id='pgw01;1;1', serving_pgw='pgw01', subscriber_routing='10.45.0.2',
+                                    serving_pgw_timestamp=datetime.datetime(2026, 1, 1, 0, 0, 0)))
+            session.commit()
+        pgwRefresh = {'imsi': '505930000000004', 'apn': 'Internet', 'pcrf_session_id': 'pgw01;1;1', 'serving_pgw': 'pgw01', 'subscriber_routing': '10.45.0.2',
+                      'serving_pgw_realm': 'epc.mnc093.mcc505.3gppnetwork.org', 'serving_pgw_peer': 'pgw01;hss01', 'serving_pgw_timestamp': '2026-01-01T00:01:00Z', 'propagate': True}
+        self.assertEqual(self.database.writeDeferredLocationUpdates([('Update_Serving_APN', pgwRefresh)]), 1)
+        with self.database.sessionScope() as session:
+            self.assertEqual(session.query(SERVING_APN).filter_by(subscriber_id=subscriberId).one().serving_pgw_timestamp, datetime.datetime(2026, 1, 1, 0, 1, 0))
+            session.query(SERVING_APN).filter_by(subscriber_id=subscriberId).delete()
+            session.commit()
+        self.assertEqual(self.database.writeDeferredLocationUpdates([('Update_Serving_APN', dict(pgwRefresh, serving_pgw_timestamp='2026-01-01T00:02:00Z'))]), 0)
+        with self.database.sessionScope() as session:
+            self.assertEqual(session.query(SERVING_APN).filter_by(subscriber_id=subscriberId).count(), 0, "Ended session recreated by a deferred refresh")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from database import SUBSCRIBER, AUC, APN, SERVING_APN
+from messaging import RedisMessaging
+from sessionStore import GxSessionStore
+import test_LocationBuffer
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class GxSessionStore_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempDir = tempfile.mkdtemp()
+        config = test_LocationBuffer.loadConfig()
+        config['database'].update({'session_store_enabled': True, 'session_store_persist_interval': 3600})
+        config['geored']['enabled'] = False
+        config['webhooks'] = {'enabled': False}
+        redisMessaging = RedisMessaging()
+        redisMessaging.redisClient = fakeredis.FakeRedis()
+        cls.database = test_LocationBuffer.sqliteDatabase(os.path.join(cls.tempDir, 'hss.db'), config, redisMessaging=redisMessaging)
+        with cls.database.sessionScope() as session:
+            session.add(AUC(auc_id=1, ki='3c6e0b8a9c15224a8228b9a98ca1531d', opc='2a8b4e6e3da3f3e6c2c7e2c8a2b1c3d4', amf='8000', sqn=1))
+            session.add(APN(apn_id=1, apn='internet', apn_ambr_dl=999999, apn_ambr_ul=999999))
+            session.add(SUBSCRIBER(subscriber_id=1, imsi='505931111111116', auc_id=1, default_apn=1, apn_list='1'))
+            session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tempDir, ignore_errors=True)
+
+    def servingApnCount(self) -> int:
+        with self.database.sessionScope() as session:
+            return session.query(SERVING_APN).filter_by(subscriber_id=1).count()
+
+    def test_A_Session_Ended_While_Persisting(self):
+        # CCR-I, then CCR-T within one persist interval, while another worker persists the ended session
+        # between this worker reading the started session and committing it.
+        otherWorkerStore = GxSessionStore(self.database, self.database.logTool, self.database.redisMessaging)
+        persistServingApns = self.database.persistServingApns
+
+        def endSessionWhilePersisting(servingApns, endedServingApns):
+            if servingApns:
+                self.database.Update_Serving_APN(imsi='505931111111116', apn='internet', pcrf_session_id='pgw01;1;1', serving_pgw=None, subscriber_routing='10.45.0.2')
+                otherWorkerStore.persistSessions()
+            return persistServingApns(servingApns, endedServingApns)
+
+        self.database.Update_Serving_APN(imsi='505931111111116', apn='internet', pcrf_session_id='pgw01;1;1', serving_pgw='pgw01', subscriber_routing='10.45.0.2')
+        with mock.patch.object(self.database, 'persistServingApns', side_effect=endSessionWhilePersisting):
+            self.database.sessionStore.persistSessions()
+        self.assertEqual(self.servingApnCount(), 1, "Race not reproduced")
+
+        self.database.sessionStore.persistSessions()
+        self.assertEqual(self.servingApnCount(), 0, "Session ended while persisting left in SERVING_APN")
+        self.assertEqual(self.database.sessionStore.getSession(1, 1), ('deleted', None))
+        self.assertEqual(self.database.sessionStore.persistSessions(), 0, "Sessions left to persist")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# This utility imports AuC, subscriber or IMS subscriber records in bulk from a CSV (with a header row of field names) or JSONL file,
+# directly into the database configured in config.yaml, in chunks of database.bulk_chunk_size.
+# Run from the tools directory: python3 bulkProvision.py <auc|subscriber|ims_subscriber> <file> [--format csv|jsonl] [--no-geored]
+# Subscribers may give the imsi of their AuC instead of an auc_id, and AuC records may give op instead of opc, which is derived in parallel and stored as opc.
+import os
+import sys
+import json
+import argparse
+sys.path.append(os.path.realpath('../lib'))
+import yaml
+from logtool import LogTool
+from database import Database
+from provisioning import BulkProvisioner
+
+def printProgress(importResult):
+    print(f"\rImported {importResult['inserted']}, failed {importResult['failed']}, OPc derived {importResult['opc_derived']}, in {importResult['chunks']} chunks ({importResult['elapsed_seconds']}s)", end='', file=sys.stderr, flush=True)
+
+# Guarded, as OPc workers are spawned and import this module.
+if __name__ == '__main__':
+    argumentParser = argparse.ArgumentParser(description='Bulk provision PyHSS from a CSV or JSONL file')
+    argumentParser.add_argument('objectType', choices=list(BulkProvisioner.objectTypes))
+    argumentParser.add_argument('file', help='CSV or JSONL file to import, or - for stdin')
+    argumentParser.add_argument('--format', choices=['csv', 'jsonl'], default=None, help='Defaults to jsonl for .jsonl / .ndjson files, otherwise csv')
+    argumentParser.add_argument('--no-geored', action='store_true', help='Do not replicate the imported records to geored peers')
+    argumentParser.add_argument('--opc-workers', type=int, default=None, help='Processes deriving OPc from OP, defaults to database.bulk_opc_workers')
+    arguments = argumentParser.parse_args()
+
+    with open("../config.yaml", 'r') as stream:
+        config = yaml.safe_load(stream)
+
+    recordFormat = arguments.format or ('jsonl' if arguments.file.endswith(('.jsonl', '.ndjson')) else 'csv')
+    logTool = LogTool(config)
+    databaseClient = Database(logTool=logTool)
+    bulkProvisioner = BulkProvisioner(database=databaseClient, logTool=logTool)
+    if arguments.opc_workers:
+        bulkProvisioner.opcWorkers = arguments.opc_workers
+
+    recordFile = sys.stdin if arguments.file == '-' else open(arguments.file, 'r', newline='', encoding='utf-8-sig')
+    with recordFile:
+        importResult = bulkProvisioner.importStream(arguments.objectType, recordFile, recordFormat=recordFormat, propagate=not arguments.no_geored, progressCallback=printProgress)
+    print(file=sys.stderr)
+    print(json.dumps(importResult, indent=2))
+    databaseClient.flushOperationLog()
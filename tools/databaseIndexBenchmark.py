@@ -0,0 +1,115 @@
+# This utility seeds a database with a synthetic subscriber base, and shows the query plan and average time of each hot path lookup,
+# without and with the indexes added in tools/databaseUpgrade/alembic/versions/5c0e9d2b7a41_added_indexes_for_hot_lookups.py.
+# Run from the tools directory: python3 databaseIndexBenchmark.py [subscriberCount] [databaseUrl]
+# The database url defaults to an in-memory SQLite database. Any existing PyHSS tables in the given database are dropped.
+import os
+import sys
+import time
+import random
+import datetime
+sys.path.append(os.path.realpath('../lib'))
+from sqlalchemy import create_engine, select, insert, text
+from database import Base, APN, AUC, SUBSCRIBER, SERVING_APN, IMS_SUBSCRIBER, TFT, EIR, OPERATION_LOG_BASE
+
+subscriberCount = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+databaseUrl = sys.argv[2] if len(sys.argv) > 2 else 'sqlite://'
+queryRepetitions = 200
+chunkSize = 5000
+
+# Columns indexed by the migration, as (model, column name).
+hotLookupIndexes = [
+    (SERVING_APN, 'subscriber_routing'),
+    (SERVING_APN, 'pcrf_session_id'),
+    (SERVING_APN, 'subscriber_id'),
+    (IMS_SUBSCRIBER, 'pcscf_active_session'),
+    (IMS_SUBSCRIBER, 'pcscf'),
+    (SUBSCRIBER, 'serving_mme'),
+    (TFT, 'tft_group_id'),
+    (EIR, 'imei'),
+    (OPERATION_LOG_BASE, 'operation_id'),
+    (OPERATION_LOG_BASE, 'timestamp'),
+]
+
+# Hot path lookups, as (name, function returning a statement for a random subscriber index).
+hotLookups = [
+    ('Get_Serving_APN_By_IP', lambda i: select(SERVING_APN).where(SERVING_APN.subscriber_routing == f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}")),
+    ('Serving APN by PCRF session id', lambda i: select(SERVING_APN).where(SERVING_APN.pcrf_session_id == f"pgw01;{i};1")),
+    ('Get_Serving_APN', lambda i: select(SERVING_APN).where(SERVING_APN.subscriber_id == i + 1, SERVING_APN.apn == 1)),
+    ('Get_IMS_Subscriber_By_Session_Id', lambda i: select(IMS_SUBSCRIBER).where(IMS_SUBSCRIBER.pcscf_active_session == f"pcscf-session-{i}")),
+    ('Get_Subscribers_By_Pcscf', lambda i: select(IMS_SUBSCRIBER).where(IMS_SUBSCRIBER.pcscf == f"pcscf{i % 500:03}.ims.mnc001.mcc001.3gppnetwork.org")),
+    ('Served subscribers by MME', lambda i: select(SUBSCRIBER).where(SUBSCRIBER.serving_mme == f"mme{i % 1000:03}.epc.mnc001.mcc001.3gppnetwork.org")),
+    ('TFTs of a charging rule', lambda i: select(TFT).where(TFT.tft_group_id == i % 1000)),
+    ('EIR exact match', lambda i: select(EIR).where(EIR.imei == f"35{i:013}", EIR.regex_mode == 0)),
+    ('Rollback by operation id', lambda i: select(OPERATION_LOG_BASE).where(OPERATION_LOG_BASE.operation_id == f"{i:036}").order_by(OPERATION_LOG_BASE.timestamp.desc()).limit(1)),
+    ('Last operation', lambda i: select(OPERATION_LOG_BASE).order_by(OPERATION_LOG_BASE.timestamp.desc()).limit(1)),
+]
+
+def insertChunked(connection, model, rowFunction, rowCount):
+    for chunkStart in range(0, rowCount, chunkSize):
+        connection.execute(insert(model.__table__), [rowFunction(i) for i in range(chunkStart, min(chunkStart + chunkSize, rowCount))])
+
+def seedDatabase(engine):
+    startTime = time.time()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    now = datetime.datetime.now()
+    with engine.begin() as connection:
+        connection.execute(insert(APN.__table__), [{'apn_id': 1, 'apn': 'internet', 'apn_ambr_dl': 0, 'apn_ambr_ul': 0}])
+        insertChunked(connection, AUC, lambda i: {'auc_id': i + 1, 'ki': '0' * 32, 'opc': '0' * 32, 'amf': '8000', 'sqn': 1, 'imsi': f"00101{i:010}"}, subscriberCount)
+        insertChunked(connection, SUBSCRIBER, lambda i: {'subscriber_id': i + 1, 'imsi': f"00101{i:010}", 'msisdn': f"61{i:09}", 'auc_id': i + 1, 'default_apn': 1, 'apn_list': '1',
+                                                          'serving_mme': f"mme{i % 1000:03}.epc.mnc001.mcc001.3gppnetwork.org" if i % 2 else None}, subscriberCount)
+        insertChunked(connection, SERVING_APN, lambda i: {'subscriber_id': i + 1, 'apn': 1, 'pcrf_session_id': f"pgw01;{i};1", 'serving_pgw': 'pgw01',
+                                                           'subscriber_routing': f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}, subscriberCount)
+        insertChunked(connection, IMS_SUBSCRIBER, lambda i: {'imsi': f"00101{i:010}", 'msisdn': f"61{i:09}", 'pcscf': f"pcscf{i % 500:03}.ims.mnc001.mcc001.3gppnetwork.org",
+                                                              'pcscf_active_session': f"pcscf-session-{i}" if i % 10 == 0 else None}, subscriberCount)
+        insertChunked(connection, TFT, lambda i: {'tft_group_id': i % 1000, 'tft_string': 'permit out ip from any to any', 'direction': 3}, subscriberCount // 10)
+        insertChunked(connection, EIR, lambda i: {'imei': f"35{i:013}", 'imsi': '', 'regex_mode': 0, 'match_response_code': 0}, subscriberCount // 10)
+        insertChunked(connection, OPERATION_LOG_BASE, lambda i: {'item_id': i + 1, 'operation_id': f"{i // 2:036}", 'operation': 'UPDATE', 'changes': '{}',
+                                                                  'timestamp': now - datetime.timedelta(seconds=subscriberCount * 2 - i), 'table_name': 'subscriber'}, subscriberCount * 2)
+    print(f"Seeded {subscriberCount} subscribers in {time.time() - startTime:.1f}s\n")
+
+def setIndexes(engine, enabled: bool):
+    with engine.begin() as connection:
+        for model, columnName in hotLookupIndexes:
+            for index in model.__table__.indexes:
+                if [column.name for column in index.columns] == [columnName]:
+                    if enabled:
+                        index.create(connection, checkfirst=True)
+                    else:
+                        index.drop(connection, checkfirst=True)
+        if engine.dialect.name == 'sqlite':
+            connection.execute(text('ANALYZE'))
+
+def getQueryPlan(connection, statement) -> str:
+    compiledStatement = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    explainPrefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    planRows = connection.execute(text(explainPrefix + compiledStatement)).fetchall()
+    if connection.dialect.name == 'sqlite':
+        return '; '.join(str(planRow[-1]) for planRow in planRows)
+    return '; '.join(' '.join(str(value) for value in planRow if value is not None) for planRow in planRows)
+
+def benchmarkLookups(engine) -> dict:
+    lookupTimes = {}
+    with engine.connect() as connection:
+        for lookupName, lookupStatement in hotLookups:
+            print(f"  {lookupName}: {getQueryPlan(connection, lookupStatement(1))}")
+            startTime = time.perf_counter()
+            for repetition in range(queryRepetitions):
+                connection.execute(lookupStatement(random.randrange(subscriberCount))).fetchall()
+            lookupTimes[lookupName] = (time.perf_counter() - startTime) / queryRepetitions * 1000
+    return lookupTimes
+
+engine = create_engine(databaseUrl)
+seedDatabase(engine)
+
+print("Query plans without indexes:")
+setIndexes(engine, False)
+timesWithout = benchmarkLookups(engine)
+
+print("\nQuery plans with indexes:")
+setIndexes(engine, True)
+timesWith = benchmarkLookups(engine)
+
+print(f"\n{'Lookup':<36}{'Without (ms)':>14}{'With (ms)':>12}{'Speedup':>10}")
+for lookupName, lookupStatement in hotLookups:
+    print(f"{lookupName:<36}{timesWithout[lookupName]:>14.3f}{timesWith[lookupName]:>12.3f}{timesWithout[lookupName] / max(timesWith[lookupName], 1e-6):>9.0f}x")
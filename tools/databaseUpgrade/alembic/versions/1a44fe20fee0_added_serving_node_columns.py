@@ -0,0 +1,44 @@
+"""Added serving node columns
+
+Revision ID: 1a44fe20fee0
+Revises: 851e500507f5
+Create Date: 2026-10-19 09:40:12.518236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a44fe20fee0'
+down_revision = '851e500507f5'
+branch_labels = None
+depends_on = None
+
+# table: (primary key, peer column, serving node column)
+servingNodeColumns = {
+    'subscriber': ('subscriber_id', 'serving_mme_peer', 'serving_hss'),
+    'ims_subscriber': ('ims_subscriber_id', 'scscf_peer', 'scscf_hss'),
+    'serving_apn': ('serving_apn_id', 'serving_pgw_peer', 'serving_pcrf'),
+}
+
+
+def upgrade() -> None:
+    for tableName, (primaryKey, peerColumn, nodeColumn) in servingNodeColumns.items():
+        op.add_column(tableName, sa.Column(nodeColumn, sa.String(length=512), nullable=True))
+        op.create_index(op.f(f'ix_{tableName}_{nodeColumn}'), tableName, [nodeColumn], unique=False)
+
+    # Backfill from the existing '<diameter peer>;<node>' values. New writes are kept in sync by database.py.
+    connection = op.get_bind()
+    for tableName, (primaryKey, peerColumn, nodeColumn) in servingNodeColumns.items():
+        table = sa.table(tableName, sa.column(primaryKey), sa.column(peerColumn), sa.column(nodeColumn))
+        rows = connection.execute(sa.select(table.c[primaryKey], table.c[peerColumn]).where(table.c[peerColumn].like('%;%'))).fetchall()
+        for rowId, peer in rows:
+            node = peer.split(';')[1] or None
+            connection.execute(table.update().where(table.c[primaryKey] == rowId).values({nodeColumn: node}))
+
+
+def downgrade() -> None:
+    for tableName, (primaryKey, peerColumn, nodeColumn) in servingNodeColumns.items():
+        op.drop_index(op.f(f'ix_{tableName}_{nodeColumn}'), table_name=tableName)
+        op.drop_column(tableName, nodeColumn)
@@ -0,0 +1,41 @@
+"""Added indexes for hot lookups
+
+Revision ID: 5c0e9d2b7a41
+Revises: 1a44fe20fee0
+Create Date: 2026-10-19 10:02:47.104371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c0e9d2b7a41'
+down_revision = '1a44fe20fee0'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs filtered on by diameter handlers and the operation log.
+# Compare query plans before and after with tools/databaseIndexBenchmark.py.
+hotLookupIndexes = [
+    ('serving_apn', 'subscriber_routing'),      # Rx: Get_Serving_APN_By_IP / Get_UE_by_IP
+    ('serving_apn', 'pcrf_session_id'),         # Gx: lookups by PCRF session id
+    ('serving_apn', 'subscriber_id'),           # Get_Serving_APN, served PCRF subscribers
+    ('ims_subscriber', 'pcscf_active_session'), # Rx: Get_IMS_Subscriber_By_Session_Id
+    ('ims_subscriber', 'pcscf'),                # Get_Subscribers_By_Pcscf
+    ('subscriber', 'serving_mme'),              # Served subscribers
+    ('tft', 'tft_group_id'),                    # TFTs of a charging rule
+    ('eir', 'imei'),                            # Exact match EIR lookups
+    ('operation_log', 'operation_id'),          # Rollback by operation id
+    ('operation_log', 'timestamp'),             # Last change / trimming the operation log
+]
+
+
+def upgrade() -> None:
+    for tableName, columnName in hotLookupIndexes:
+        op.create_index(op.f(f'ix_{tableName}_{columnName}'), tableName, [columnName], unique=False)
+
+
+def downgrade() -> None:
+    for tableName, columnName in reversed(hotLookupIndexes):
+        op.drop_index(op.f(f'ix_{tableName}_{columnName}'), table_name=tableName)
@@ -0,0 +1,46 @@
+# This utility benchmarks how many metric events per second metricService can process on one core, without redis.
+# Run from the tools directory: python3 metricServiceBenchmark.py [eventCount] [eventsPerMessage]
+import os
+import sys
+import json
+import time
+import random
+sys.path.append(os.path.realpath('../lib'))
+sys.path.append(os.path.realpath('../services'))
+from metricService import MetricService
+
+eventCount = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+eventsPerMessage = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+# A mix resembling hssService and diameterService traffic: labelled counters, gauges and histogram observations.
+metricTemplates = [
+    {'NAME': 'prom_diam_request_count_application_id', 'TYPE': 'counter', 'ACTION': 'inc', 'HELP': 'Number of Diameter Requests by Application Id', 'LABELS': {'diameter_application_id': 16777251, 'diameter_cmd_code': 318}},
+    {'NAME': 'prom_diam_request_count_application_id', 'TYPE': 'counter', 'ACTION': 'inc', 'HELP': 'Number of Diameter Requests by Application Id', 'LABELS': {'diameter_application_id': 16777251, 'diameter_cmd_code': 316}},
+    {'NAME': 'prom_diam_response_count_application_id_successful', 'TYPE': 'counter', 'ACTION': 'inc', 'HELP': 'Number of Successful Diameter Responses', 'LABELS': {'diameter_application_id': 16777251, 'diameter_cmd_code': 318}},
+    {'NAME': 'prom_diam_request_count_host', 'TYPE': 'counter', 'ACTION': 'inc', 'HELP': 'Number of Diameter Requests by Host', 'LABELS': {'host': 'mme01.epc.mnc001.mcc001.3gppnetwork.org'}},
+    {'NAME': 'prom_hss_inflight_requests', 'TYPE': 'gauge', 'ACTION': 'inc', 'HELP': 'Number of requests being processed by hssService', 'LABELS': {}},
+    {'NAME': 'prom_diam_connected_peers', 'TYPE': 'gauge', 'ACTION': 'set', 'HELP': 'Connected Diameter Peers', 'LABELS': {}},
+    {'NAME': 'prom_diam_auth_event_count', 'TYPE': 'counter', 'ACTION': 'inc', 'HELP': 'Diameter Authentication related Counters', 'LABELS': {'diameter_application_id': 16777251, 'diameter_cmd_code': 318, 'event': 'Unknown User', 'imsi_prefix': '001010'}},
+    {'NAME': 'prom_benchmark_latency_seconds', 'TYPE': 'histogram', 'ACTION': 'observe', 'HELP': 'Benchmark latency', 'LABELS': {'stage': 'handler'}},
+]
+
+metricMessages = []
+for messageIndex in range(eventCount // eventsPerMessage):
+    metricList = []
+    for eventIndex in range(eventsPerMessage):
+        metricEvent = dict(random.choice(metricTemplates))
+        metricEvent.update({'serviceName': 'diameter', 'timestamp': time.time_ns(), 'VALUE': round(random.random(), 3), 'INFLUX': []})
+        metricList.append(metricEvent)
+    metricMessages.append(json.dumps(metricList).encode())
+
+metricService = MetricService()
+metricService.logTool.logToStdout = False
+
+startTime = time.process_time()
+processedCount = 0
+for metricMessage in metricMessages:
+    processedCount += metricService.processMetricMessage(metricMessage)
+elapsedTime = time.process_time() - startTime
+
+print(f"Processed {processedCount} metric events in {len(metricMessages)} messages, using {elapsedTime:.2f}s of CPU time.")
+print(f"{processedCount / elapsedTime:.0f} metric events per second.")